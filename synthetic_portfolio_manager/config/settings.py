@@ -1,4 +1,4 @@
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Union
 from dataclasses import dataclass, field
 from enum import Enum
 import os
@@ -23,6 +23,7 @@ class LogLevel(Enum):
 class MarketConfig:
     base_url: str
     rate_limit: int
+    stream_url: Optional[str] = None
 
 @dataclass
 class APIConfig:
@@ -30,6 +31,7 @@ class APIConfig:
     api_secret: Optional[str] = None
     base_url: str = ''
     rate_limit: int = 1200
+    stream_url: Optional[str] = None
     futures: Optional[MarketConfig] = None
 
 @dataclass
@@ -43,7 +45,30 @@ class LoggingConfig:
 class CacheConfig:
     directory: str = 'data/cache'
     max_age_hours: int = 24
-    compress: bool = False
+    compress: Union[bool, str] = False
+    storage: str = 'files'
+    segment_max_mb: int = 64
+    columnar_directory: Optional[str] = None
+    write_behind: bool = False
+    write_queue_size: int = 1000
+    fsync_interval: float = 1.0
+    retention: bool = False
+    max_disk_mb: Optional[int] = None
+    retention_interval: float = 300.0
+    read_cache_mb: int = 0
+    dedup: bool = False
+    dedup_keyframe_seconds: float = 3600
+    orderbook_deltas: bool = False
+    orderbook_keyframe_interval: int = 100
+
+@dataclass
+class HTTPConfig:
+    pool_size: int = 10
+    pool_sizes: Dict[str, int] = field(default_factory=dict)
+    connect_timeout: float = 3.05
+    read_timeout: float = 10.0
+    keepalive_seconds: float = 30.0
+    http2: bool = False
 
 @dataclass
 class DataCollectionIntervals:
@@ -58,6 +83,15 @@ class DataConfig:
     symbols: List[str] = field(default_factory=lambda: ['BTCUSDT', 'ETHUSDT', 'SOLUSDT'])
     types: List[DataType] = field(default_factory=lambda: [DataType.MARKET, DataType.ORDERBOOK, DataType.TRADE])
     intervals: DataCollectionIntervals = field(default_factory=DataCollectionIntervals)
+    async_fetch: bool = False
+    max_concurrency: int = 10
+    batch_market_data: bool = True
+    memoize_requests: bool = False
+    raw_passthrough: bool = False
+    streaming: bool = False
+    stream_flush_interval: float = 1.0
+    local_order_book: bool = False
+    trade_sync: bool = False
 
 @dataclass
 class Config:
@@ -66,6 +100,7 @@ class Config:
     logging: LoggingConfig = field(default_factory=LoggingConfig)
     cache: CacheConfig = field(default_factory=CacheConfig)
     data: DataConfig = field(default_factory=DataConfig)
+    http: HTTPConfig = field(default_factory=HTTPConfig)
     
     @classmethod
     def from_yaml(cls, path: str) -> 'Config':
@@ -91,6 +126,9 @@ class Config:
         # Process cache configuration
         cache_config = CacheConfig(**data.get('cache', {}))
         
+        # Process HTTP transport configuration
+        http_config = HTTPConfig(**data.get('http', {}))
+        
         # Process data collection configuration
         data_config = data.get('data', {})
         if 'default_market' in data_config:
@@ -105,7 +143,8 @@ class Config:
             coinglass=coinglass_config,
             logging=logging_config,
             cache=cache_config,
-            data=DataConfig(**data_config)
+            data=DataConfig(**data_config),
+            http=http_config
         )
 
     @classmethod
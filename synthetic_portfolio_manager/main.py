@@ -1,12 +1,23 @@
 import argparse
+import asyncio
 import logging
 import time
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 from config.settings import Config, MarketType, DataType
 from utilities.logging_config import setup_logging, get_logger
 from scripts.binance.fetcher import BinanceFetcher
+from scripts.binance.async_fetcher import AsyncBinanceFetcher
 from scripts.binance.processor import BinanceProcessor
 from scripts.binance.cache import BinanceCache
+from scripts.binance.stream import BinanceStreamCollector
+from scripts.binance.trade_sync import TradeSync
+from scripts.binance.klines_backfill import KlinesBackfill
+from scripts.base.columnar_store import ColumnarStore
+from scripts.base.json_bytes import is_raw, loads
+from scripts.base.retention import RetentionEngine, default_policies
+from scripts.base.transport import configure_transport
 
 def parse_args():
     parser = argparse.ArgumentParser(description='Synthetic Portfolio Manager')
@@ -27,11 +38,144 @@ def parse_args():
         choices=['spot', 'futures'],
         help='Market type to fetch data from (overrides config)'
     )
+    parser.add_argument(
+        '--backfill-start',
+        type=str,
+        help='Backfill klines from this UTC date/time (ISO format) instead of collecting'
+    )
+    parser.add_argument(
+        '--backfill-end',
+        type=str,
+        help='End of the klines backfill, exclusive (default: now)'
+    )
+    parser.add_argument(
+        '--backfill-interval',
+        type=str,
+        default='1m',
+        help='Kline interval to backfill (default: 1m)'
+    )
     return parser.parse_args()
 
+def parse_utc_ms(value: str) -> int:
+    """Milliseconds since epoch for an ISO date/time, read as UTC when naive"""
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+def cache_symbol_data(processor: BinanceProcessor, cache: BinanceCache, symbol: str,
+                      market_type: MarketType, fetched: Dict[DataType, Any],
+                      liquidations: Optional[List[Dict]] = None,
+                      columnar: Optional[ColumnarStore] = None) -> None:
+    """Process and cache data fetched for one symbol
+    
+    Orderbooks and trades fetched as raw bytes are cached as they are and
+    parsed only for processing.
+    
+    Args:
+        processor: Initialized BinanceProcessor instance
+        cache: Initialized BinanceCache instance
+        symbol: Trading symbol (e.g., 'BTCUSDT')
+        market_type: Market type (spot or futures)
+        fetched: Raw responses by data type (None for failed fetches)
+        liquidations: Optional raw liquidation events (futures only)
+        columnar: Optional Parquet sink for processed data
+    """
+    logger = get_logger('data_pipeline')
+    
+    # One transaction per symbol (sqlite), never held across network I/O
+    with cache.batch():
+        # Processed up front so its spread can fill in a missing market bidAskSpread
+        orderbook_data = fetched.get(DataType.ORDERBOOK)
+        processed_orderbook = None
+        if orderbook_data:
+            processed_orderbook = processor.process_orderbook_data(
+                loads(orderbook_data) if is_raw(orderbook_data) else orderbook_data,
+                symbol, market_type.value
+            )
+    
+        market_data = fetched.get(DataType.MARKET)
+        if market_data:
+            # Cache raw data
+            cache.save_to_cache(
+                market_data,
+                f"{symbol.lower()}_market",
+                DataType.MARKET.value,
+                is_processed=False
+            )
+            logger.debug(f"Cached raw market data for {symbol}")
+        
+            # Process and cache processed data
+            processed_data = processor.process_market_data(
+                market_data, symbol, market_type.value
+            )
+            if processed_orderbook and processed_data.get('bidAskSpread') is None:
+                processed_data['bidAskSpread'] = processed_orderbook['metrics']['spread']
+            cache.save_to_cache(
+                processed_data,
+                f"{symbol.lower()}_market",
+                DataType.MARKET.value,
+                is_processed=True
+            )
+            if columnar:
+                columnar.append_market(processed_data)
+            logger.debug(f"Cached processed market data for {symbol}")
+    
+        if orderbook_data:
+            cache.save_to_cache(
+                orderbook_data,
+                f"{symbol.lower()}_orderbook",
+                DataType.ORDERBOOK.value,
+                is_processed=False
+            )
+            cache.save_to_cache(
+                processed_orderbook,
+                f"{symbol.lower()}_orderbook",
+                DataType.ORDERBOOK.value,
+                is_processed=True
+            )
+            if columnar:
+                columnar.append_orderbook(processed_orderbook)
+            logger.debug(f"Cached orderbook data for {symbol}")
+    
+        trades_data = fetched.get(DataType.TRADE)
+        if trades_data:
+            cache.save_to_cache(
+                trades_data,
+                f"{symbol.lower()}_trades",
+                DataType.TRADE.value,
+                is_processed=False
+            )
+        
+            if is_raw(trades_data):
+                trades_data = loads(trades_data)
+            trade_batch = processor.process_trades_batch(trades_data, symbol, market_type.value)
+            cache.save_to_cache(
+                trade_batch.to_records(),
+                f"{symbol.lower()}_trades",
+                DataType.TRADE.value,
+                is_processed=True
+            )
+            if columnar:
+                columnar.append_trade_batch(trade_batch)
+            logger.debug(f"Cached recent trades for {symbol}")
+    
+        if liquidations:
+            cache.save_to_cache(
+                liquidations,
+                f"{symbol.lower()}_liquidations",
+                DataType.MARKET.value,
+                is_processed=False
+            )
+            logger.debug(f"Cached liquidations data for {symbol}")
+
 def fetch_and_process_data(fetcher: BinanceFetcher, processor: BinanceProcessor, 
                           cache: BinanceCache, symbol: str, 
-                          market_type: MarketType, data_types: list[DataType]) -> None:
+                          market_type: MarketType, data_types: list[DataType],
+                          columnar: Optional[ColumnarStore] = None,
+                          market_data: Optional[Dict] = None,
+                          trade_sync: Optional[TradeSync] = None,
+                          raw_passthrough: bool = False) -> None:
     """Fetch, process, and cache market data
     
     Args:
@@ -41,110 +185,204 @@ def fetch_and_process_data(fetcher: BinanceFetcher, processor: BinanceProcessor,
         symbol: Trading symbol (e.g., 'BTCUSDT')
         market_type: Market type (spot or futures)
         data_types: List of data types to collect
+        columnar: Optional Parquet sink for processed data
+        market_data: Ticker already fetched by a batch request; fetched
+            for this symbol alone when None
+        trade_sync: Optional incremental trade sync used instead of polling
+            recent trades
+        raw_passthrough: Cache orderbook and trade responses as received
     """
     logger = get_logger('data_pipeline')
     
     try:
-        # Fetch market data if requested
+        fetched = {}
         if DataType.MARKET in data_types:
-            logger.info(f"Fetching {market_type.value} market data for {symbol}")
-            market_data = fetcher.fetch_market_data(symbol, market_type.value)
-            if market_data:
-                # Cache raw data
-                cache.save_to_cache(
-                    market_data,
-                    f"{symbol.lower()}_market",
-                    DataType.MARKET.value,
-                    is_processed=False
-                )
-                logger.debug(f"Cached raw market data for {symbol}")
-                
-                # Process and cache processed data
-                processed_data = processor.process_market_data(
-                    market_data, symbol, market_type.value
-                )
-                cache.save_to_cache(
-                    processed_data,
-                    f"{symbol.lower()}_market",
-                    DataType.MARKET.value,
-                    is_processed=True
-                )
-                logger.debug(f"Cached processed market data for {symbol}")
-            
-        # Fetch and process orderbook if requested
+            if market_data is None:
+                logger.info(f"Fetching {market_type.value} market data for {symbol}")
+                market_data = fetcher.fetch_market_data(symbol, market_type.value)
+            fetched[DataType.MARKET] = market_data
+        
         if DataType.ORDERBOOK in data_types:
             logger.info(f"Fetching {market_type.value} orderbook for {symbol}")
-            orderbook_data = fetcher.fetch_orderbook(symbol, market_type=market_type.value)
-            if orderbook_data:
-                cache.save_to_cache(
-                    orderbook_data,
-                    f"{symbol.lower()}_orderbook",
-                    DataType.ORDERBOOK.value,
-                    is_processed=False
-                )
-                
-                processed_orderbook = processor.process_orderbook_data(
-                    orderbook_data, symbol, market_type.value
-                )
-                cache.save_to_cache(
-                    processed_orderbook,
-                    f"{symbol.lower()}_orderbook",
-                    DataType.ORDERBOOK.value,
-                    is_processed=True
-                )
-                logger.debug(f"Cached orderbook data for {symbol}")
-            
-        # Fetch and process trades if requested
-        if DataType.TRADE in data_types:
+            fetched[DataType.ORDERBOOK] = fetcher.fetch_orderbook(
+                symbol, market_type=market_type.value, raw=raw_passthrough
+            )
+        
+        if DataType.TRADE in data_types and trade_sync:
+            logger.info(f"Syncing {market_type.value} trades for {symbol}")
+            stored = trade_sync.sync(symbol, market_type.value)
+            logger.debug(f"Stored {stored} new trades for {symbol}")
+        elif DataType.TRADE in data_types:
             logger.info(f"Fetching {market_type.value} recent trades for {symbol}")
-            trades_data = fetcher.fetch_recent_trades(symbol, market_type=market_type.value)
-            if trades_data:
-                cache.save_to_cache(
-                    trades_data,
-                    f"{symbol.lower()}_trades",
-                    DataType.TRADE.value,
-                    is_processed=False
-                )
-                
-                processed_trades = [
-                    processor.process_trade_data(trade, symbol, market_type.value)
-                    for trade in trades_data
-                ]
-                cache.save_to_cache(
-                    processed_trades,
-                    f"{symbol.lower()}_trades",
-                    DataType.TRADE.value,
-                    is_processed=True
-                )
-                logger.debug(f"Cached recent trades for {symbol}")
-            
+            fetched[DataType.TRADE] = fetcher.fetch_recent_trades(
+                symbol, market_type=market_type.value, raw=raw_passthrough
+            )
+        
         # If futures market, fetch additional data
+        liquidations = None
         if market_type == MarketType.FUTURES:
             logger.info(f"Fetching futures-specific data for {symbol}")
             liquidations = fetcher.fetch_liquidations(symbol)
-            if liquidations:
-                cache.save_to_cache(
-                    liquidations,
-                    f"{symbol.lower()}_liquidations",
-                    DataType.MARKET.value,
-                    is_processed=False
-                )
-                logger.debug(f"Cached liquidations data for {symbol}")
-                
+        
+        cache_symbol_data(processor, cache, symbol, market_type, fetched, liquidations, columnar)
         logger.info(f"Completed data pipeline for {symbol} {market_type.value}")
         
     except Exception as e:
         logger.error(f"Error in data pipeline for {symbol}: {str(e)}")
         raise
 
-def setup_components(config: Config):
-    """Initialize system components based on configuration
+async def fetch_and_process_data_async(fetcher: AsyncBinanceFetcher, processor: BinanceProcessor,
+                                       cache: BinanceCache, symbols: List[str],
+                                       market_type: MarketType, data_types: list[DataType],
+                                       columnar: Optional[ColumnarStore] = None,
+                                       batch_market_data: bool = False,
+                                       trade_sync: Optional[TradeSync] = None,
+                                       raw_passthrough: bool = False) -> None:
+    """Fetch every symbol concurrently, then process and cache the results
+    
+    All requests for all symbols are issued at once; the shared rate limiter
+    and the per-host concurrency limit decide how fast they go out.
     
     Args:
-        config: Application configuration
+        fetcher: Initialized AsyncBinanceFetcher instance
+        processor: Initialized BinanceProcessor instance
+        cache: Initialized BinanceCache instance
+        symbols: Trading symbols to collect
+        market_type: Market type (spot or futures)
+        data_types: List of data types to collect
+        columnar: Optional Parquet sink for processed data
+        batch_market_data: Fetch tickers for all symbols in one batch request
+        trade_sync: Optional incremental trade sync used instead of polling
+            recent trades
+        raw_passthrough: Cache orderbook and trade responses as received
+    """
+    logger = get_logger('data_pipeline')
+    batch = batch_market_data and DataType.MARKET in data_types
+    
+    async def fetch_batch():
+        if not batch:
+            return {}
+        return await fetcher.fetch_market_data_batch(symbols, market_type.value) or {}
+    
+    async def fetch_symbol(symbol: str):
+        requests = {}
+        if DataType.MARKET in data_types and not batch:
+            requests[DataType.MARKET] = fetcher.fetch_market_data(symbol, market_type.value)
+        if DataType.ORDERBOOK in data_types:
+            requests[DataType.ORDERBOOK] = fetcher.fetch_orderbook(
+                symbol, market_type=market_type.value, raw=raw_passthrough
+            )
+        if DataType.TRADE in data_types and trade_sync:
+            requests['new_trades'] = trade_sync.fetch_new_trades_async(symbol, market_type.value)
+        elif DataType.TRADE in data_types:
+            requests[DataType.TRADE] = fetcher.fetch_recent_trades(
+                symbol, market_type=market_type.value, raw=raw_passthrough
+            )
+        if market_type == MarketType.FUTURES:
+            requests['liquidations'] = fetcher.fetch_liquidations(symbol)
         
+        results = await asyncio.gather(*requests.values())
+        return dict(zip(requests.keys(), results))
+    
+    logger.info(f"Fetching {market_type.value} data for {len(symbols)} symbols concurrently")
+    market_data, *sweep = await asyncio.gather(
+        fetch_batch(),
+        *(fetch_symbol(symbol) for symbol in symbols),
+        return_exceptions=True
+    )
+    if isinstance(market_data, Exception):
+        logger.error(f"Failed to fetch batch market data: {str(market_data)}")
+        market_data = {}
+    
+    # Like the sync path, fetch tickers the batch did not return one symbol at a time
+    missing = [symbol for symbol, fetched in zip(symbols, sweep)
+               if batch and not isinstance(fetched, Exception) and market_data.get(symbol) is None]
+    if missing:
+        logger.warning(f"No batch market data for {len(missing)} symbols, fetching them individually")
+        fallback = await asyncio.gather(
+            *(fetcher.fetch_market_data(symbol, market_type.value) for symbol in missing),
+            return_exceptions=True
+        )
+        for symbol, ticker in zip(missing, fallback):
+            if isinstance(ticker, Exception):
+                logger.error(f"Failed to fetch market data for {symbol}: {str(ticker)}")
+                continue
+            market_data[symbol] = ticker
+    
+    for symbol, fetched in zip(symbols, sweep):
+        if isinstance(fetched, Exception):
+            logger.error(f"Failed to process symbol {symbol}: {str(fetched)}")
+            continue
+        try:
+            if batch:
+                fetched[DataType.MARKET] = market_data.get(symbol)
+            liquidations = fetched.pop('liquidations', None)
+            if 'new_trades' in fetched:
+                trade_sync.store(symbol, market_type.value, fetched.pop('new_trades'))
+            cache_symbol_data(processor, cache, symbol, market_type, fetched, liquidations, columnar)
+            logger.info(f"Completed data pipeline for {symbol} {market_type.value}")
+        except Exception as e:
+            logger.error(f"Failed to process symbol {symbol}: {str(e)}")
+
+def stream_and_process_data(config: Config, fetcher, processor: BinanceProcessor,
+                            cache: BinanceCache, symbols: List[str], market_type: MarketType,
+                            columnar: Optional[ColumnarStore] = None) -> None:
+    """Stream trades, depth diffs and tickers into the cache until interrupted
+    
+    Args:
+        config: Application configuration
+        fetcher: BinanceFetcher or AsyncBinanceFetcher for order book snapshots
+        processor: Initialized BinanceProcessor instance
+        cache: Initialized BinanceCache instance
+        symbols: Trading symbols to stream
+        market_type: Market type (spot or futures)
+        columnar: Optional Parquet sink for processed trades and order books
+    """
+    logger = get_logger('data_pipeline')
+    
+    stream_url = config.binance.stream_url
+    if market_type == MarketType.FUTURES:
+        stream_url = config.binance.futures.stream_url if config.binance.futures else None
+    streams = tuple(
+        stream for data_type, stream in (
+            (DataType.TRADE, 'aggTrade'),
+            (DataType.ORDERBOOK, 'depth'),
+            (DataType.MARKET, 'miniTicker')
+        ) if data_type in config.data.types
+    )
+    
+    collector = BinanceStreamCollector(
+        symbols,
+        processor,
+        cache,
+        market_type=market_type.value,
+        stream_url=stream_url,
+        streams=streams,
+        flush_interval=config.data.stream_flush_interval,
+        columnar=columnar,
+        snapshot_fetcher=fetcher if config.data.local_order_book else None
+    )
+    
+    async def stream():
+        try:
+            await collector.run()
+        finally:
+            if isinstance(fetcher, AsyncBinanceFetcher):
+                await fetcher.close()
+    
+    logger.info(f"Streaming {market_type.value} data for {len(symbols)} symbols")
+    try:
+        asyncio.run(stream())
+    except KeyboardInterrupt:
+        logger.info("Streaming stopped")
+    logger.info(f"Streamed {collector.events} events over {collector.connects} connections "
+                f"with {len(collector.gaps)} sequence gaps")
+
+def fetcher_configs(config: Config):
+    """Spot and futures fetcher settings from the configuration
+    
     Returns:
-        tuple: (BinanceFetcher, BinanceProcessor, BinanceCache)
+        tuple: (spot config dict, futures config dict or None)
     """
     # Set up fetcher with appropriate URLs based on market type
     spot_config = {
@@ -161,21 +399,67 @@ def setup_components(config: Config):
             'base_url': config.binance.futures.base_url,
             'rate_limit': config.binance.futures.rate_limit
         }
+    return spot_config, futures_config
+
+def setup_components(config: Config):
+    """Initialize system components based on configuration
+    
+    Args:
+        config: Application configuration
+        
+    Returns:
+        tuple: (BinanceFetcher or AsyncBinanceFetcher, BinanceProcessor, BinanceCache,
+            Optional[ColumnarStore])
+    """
+    spot_config, futures_config = fetcher_configs(config)
     
-    fetcher = BinanceFetcher(
-        spot_config=spot_config,
-        futures_config=futures_config
+    # Every fetcher shares these connection pools and timeouts
+    configure_transport(
+        pool_size=config.http.pool_size,
+        pool_sizes=config.http.pool_sizes,
+        connect_timeout=config.http.connect_timeout,
+        read_timeout=config.http.read_timeout,
+        keepalive_seconds=config.http.keepalive_seconds,
+        http2=config.http.http2
     )
     
+    if config.data.async_fetch:
+        fetcher = AsyncBinanceFetcher(
+            spot_config=spot_config,
+            futures_config=futures_config,
+            max_concurrency=config.data.max_concurrency,
+            memoize=config.data.memoize_requests
+        )
+    else:
+        fetcher = BinanceFetcher(
+            spot_config=spot_config,
+            futures_config=futures_config,
+            memoize=config.data.memoize_requests
+        )
+    
     processor = BinanceProcessor()
     
     cache = BinanceCache(
         directory=config.cache.directory,
         max_age_hours=config.cache.max_age_hours,
-        compress=config.cache.compress
+        compress=config.cache.compress,
+        storage=config.cache.storage,
+        segment_max_bytes=config.cache.segment_max_mb * 1024 * 1024,
+        write_behind=config.cache.write_behind,
+        write_queue_size=config.cache.write_queue_size,
+        fsync_interval=config.cache.fsync_interval,
+        read_cache_bytes=config.cache.read_cache_mb * 1024 * 1024,
+        dedup=config.cache.dedup,
+        dedup_keyframe_seconds=config.cache.dedup_keyframe_seconds,
+        orderbook_deltas=config.cache.orderbook_deltas,
+        orderbook_keyframe_interval=config.cache.orderbook_keyframe_interval
     )
     
-    return fetcher, processor, cache
+    columnar = None
+    if config.cache.columnar_directory:
+        columnar = ColumnarStore(config.cache.columnar_directory)
+    
+    return fetcher, processor, cache, columnar
 
 def main():
     # Parse command line arguments
@@ -200,7 +484,7 @@ def main():
         logger.info(f"Loaded configuration from {config_path}")
         
         # Initialize components
-        fetcher, processor, cache = setup_components(config)
+        fetcher, processor, cache, columnar = setup_components(config)
         logger.info("Initialized all components successfully")
         
         # Determine market type (command line overrides config)
@@ -208,26 +492,91 @@ def main():
         
         # Process each configured symbol
         symbols = [args.symbol] if args.symbol else config.data.symbols
-        for symbol in symbols:
-            try:
-                fetch_and_process_data(
-                    fetcher=fetcher,
-                    processor=processor,
-                    cache=cache,
-                    symbol=symbol,
-                    market_type=market_type,
-                    data_types=config.data.types
-                )
-                
-                # Sleep between symbols to respect rate limits
-                if symbol != symbols[-1]:  # Don't sleep after last symbol
-                    time.sleep(1)  # Basic rate limiting
-                    
-            except Exception as e:
-                logger.error(f"Failed to process symbol {symbol}: {str(e)}")
-                # Continue with next symbol on error
-                continue
+
+        if args.backfill_start:
+            # Backfill runs instead of collection, on the thread-pooled fetcher
+            if not isinstance(fetcher, BinanceFetcher):
+                fetcher = BinanceFetcher(*fetcher_configs(config))
+            end_ms = parse_utc_ms(args.backfill_end) if args.backfill_end else int(time.time() * 1000)
+            backfill = KlinesBackfill(fetcher, processor, cache, columnar,
+                                      max_workers=config.data.max_concurrency)
+            backfill.run(symbols, args.backfill_interval, parse_utc_ms(args.backfill_start),
+                         end_ms, market_type.value)
+            cache.close()
+            if columnar:
+                columnar.close()
+            logger.info("Backfill completed successfully")
+            return
+
+        trade_sync = None
+        if config.data.trade_sync:
+            trade_sync = TradeSync(fetcher, processor, cache, columnar=columnar)
+        retention = None
+        if config.cache.retention:
+            max_bytes = config.cache.max_disk_mb * 1024 * 1024 if config.cache.max_disk_mb else None
+            retention = RetentionEngine(
+                cache,
+                default_policies(config.cache.max_age_hours),
+                max_bytes=max_bytes,
+                interval_seconds=config.cache.retention_interval
+            )
+            retention.start()
+        
+        if config.data.streaming:
+            stream_and_process_data(config, fetcher, processor, cache, symbols, market_type, columnar)
+        
+        elif isinstance(fetcher, AsyncBinanceFetcher):
+            async def sweep():
+                async with fetcher:
+                    await fetch_and_process_data_async(
+                        fetcher=fetcher,
+                        processor=processor,
+                        cache=cache,
+                        symbols=symbols,
+                        market_type=market_type,
+                        data_types=config.data.types,
+                        columnar=columnar,
+                        batch_market_data=config.data.batch_market_data,
+                        trade_sync=trade_sync,
+                        raw_passthrough=config.data.raw_passthrough
+                    )
+            
+            asyncio.run(sweep())
+        
+        else:
+            # One ticker + book ticker request for every symbol instead of one per symbol
+            market_data = {}
+            if config.data.batch_market_data and DataType.MARKET in config.data.types:
+                logger.info(f"Fetching {market_type.value} market data for {len(symbols)} symbols")
+                market_data = fetcher.fetch_market_data_batch(symbols, market_type.value) or {}
+            
+            # No pause between symbols: the weight-aware rate limiter paces requests
+            for symbol in symbols:
+                try:
+                    fetch_and_process_data(
+                        fetcher=fetcher,
+                        processor=processor,
+                        cache=cache,
+                        symbol=symbol,
+                        market_type=market_type,
+                        data_types=config.data.types,
+                        columnar=columnar,
+                        market_data=market_data.get(symbol),
+                        trade_sync=trade_sync,
+                        raw_passthrough=config.data.raw_passthrough
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to process symbol {symbol}: {str(e)}")
+                    # Continue with next symbol on error
+                    continue
+        
+        if retention:
+            retention.stop()
+            retention.run_once()
         
+        cache.close()
+        if columnar:
+            columnar.close()
         logger.info("Application completed successfully")
         
     except Exception as e:
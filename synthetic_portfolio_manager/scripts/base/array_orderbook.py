@@ -0,0 +1,167 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Metrics computed for every processed orderbook (see ArrayOrderBook.metrics)
+IMBALANCE_LEVELS = (1, 5, 10)
+DEPTH_BPS = (10, 50, 100)
+FILL_NOTIONALS = (10_000, 100_000)
+
+
+def _split_levels(levels: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    """Contiguous float64 (prices, quantities) from [[price, qty], ...] (strings or numbers)"""
+    array = np.asarray(levels, dtype=np.float64).reshape(-1, 2)
+    return np.ascontiguousarray(array[:, 0]), np.ascontiguousarray(array[:, 1])
+
+
+def _key(value: float) -> str:
+    """JSON object key for a metric parameter (10 -> '10', 0.5 -> '0.5')"""
+    return f"{value:g}"
+
+
+class ArrayOrderBook:
+    def __init__(self, bid_prices: np.ndarray, bid_quantities: np.ndarray,
+                 ask_prices: np.ndarray, ask_quantities: np.ndarray):
+        """Orderbook snapshot held in four contiguous float64 arrays
+
+        Bids are ordered best (highest) first and asks best (lowest) first,
+        as Binance sends them. Cumulative quantities and notionals are
+        computed once, so depth and fill metrics are a binary search each.
+
+        Args:
+            bid_prices: Bid prices, descending
+            bid_quantities: Quantities of the bid levels
+            ask_prices: Ask prices, ascending
+            ask_quantities: Quantities of the ask levels
+        """
+        self.bid_prices = np.ascontiguousarray(bid_prices, dtype=np.float64)
+        self.bid_quantities = np.ascontiguousarray(bid_quantities, dtype=np.float64)
+        self.ask_prices = np.ascontiguousarray(ask_prices, dtype=np.float64)
+        self.ask_quantities = np.ascontiguousarray(ask_quantities, dtype=np.float64)
+        self._bid_cum_qty = np.cumsum(self.bid_quantities)
+        self._ask_cum_qty = np.cumsum(self.ask_quantities)
+        self._bid_cum_notional = np.cumsum(self.bid_prices * self.bid_quantities)
+        self._ask_cum_notional = np.cumsum(self.ask_prices * self.ask_quantities)
+
+    @classmethod
+    def from_levels(cls, bids: Sequence, asks: Sequence) -> 'ArrayOrderBook':
+        """Build from [[price, qty], ...] lists as in Binance depth responses"""
+        return cls(*_split_levels(bids), *_split_levels(asks))
+
+    def levels(self, side: str) -> List[List[float]]:
+        """[[price, qty], ...] of 'bids' or 'asks', best first"""
+        if side == 'bids':
+            return np.column_stack((self.bid_prices, self.bid_quantities)).tolist()
+        return np.column_stack((self.ask_prices, self.ask_quantities)).tolist()
+
+    @property
+    def empty(self) -> bool:
+        """Whether either side has no levels"""
+        return not len(self.bid_prices) or not len(self.ask_prices)
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return float(self.bid_prices[0]) if len(self.bid_prices) else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return float(self.ask_prices[0]) if len(self.ask_prices) else None
+
+    @property
+    def mid(self) -> Optional[float]:
+        if self.empty:
+            return None
+        return (self.best_bid + self.best_ask) / 2
+
+    @property
+    def spread(self) -> Optional[float]:
+        if self.empty:
+            return None
+        return self.best_ask - self.best_bid
+
+    @property
+    def spread_bps(self) -> Optional[float]:
+        if self.empty or not self.mid:
+            return None
+        return self.spread / self.mid * 1e4
+
+    @property
+    def microprice(self) -> Optional[float]:
+        """Mid weighted towards the side with less quantity at the top of the book"""
+        if self.empty:
+            return None
+        bid_qty, ask_qty = self.bid_quantities[0], self.ask_quantities[0]
+        if bid_qty + ask_qty <= 0:
+            return self.mid
+        return float((self.best_bid * ask_qty + self.best_ask * bid_qty) / (bid_qty + ask_qty))
+
+    def imbalance(self, levels: int) -> Optional[float]:
+        """(bid qty - ask qty) / (bid qty + ask qty) over the best `levels` levels, in [-1, 1]"""
+        if self.empty:
+            return None
+        bid_qty = self._bid_cum_qty[min(levels, len(self._bid_cum_qty)) - 1]
+        ask_qty = self._ask_cum_qty[min(levels, len(self._ask_cum_qty)) - 1]
+        total = bid_qty + ask_qty
+        return float((bid_qty - ask_qty) / total) if total > 0 else 0.0
+
+    def depth_within(self, bps: float) -> Tuple[Optional[float], Optional[float]]:
+        """Cumulative (bid, ask) quantity priced within `bps` basis points of the mid"""
+        if self.empty:
+            return None, None
+        distance = self.mid * bps / 1e4
+        # Bids are descending, so search their negation
+        bid_count = np.searchsorted(-self.bid_prices, -(self.mid - distance), side='right')
+        ask_count = np.searchsorted(self.ask_prices, self.mid + distance, side='right')
+        bid_qty = float(self._bid_cum_qty[bid_count - 1]) if bid_count else 0.0
+        ask_qty = float(self._ask_cum_qty[ask_count - 1]) if ask_count else 0.0
+        return bid_qty, ask_qty
+
+    def vwap_to_fill(self, notional: float, side: str = 'buy') -> Optional[float]:
+        """Average price of a market order for `notional` quote currency
+
+        Buys walk the asks and sells walk the bids. Returns None if the book
+        is not deep enough to fill the order.
+        """
+        if side == 'buy':
+            prices, cum_qty, cum_notional = self.ask_prices, self._ask_cum_qty, self._ask_cum_notional
+        else:
+            prices, cum_qty, cum_notional = self.bid_prices, self._bid_cum_qty, self._bid_cum_notional
+        # First level at which the cumulative notional covers the order
+        level = int(np.searchsorted(cum_notional, notional, side='left'))
+        if level >= len(prices) or notional <= 0:
+            return None
+        filled_notional = cum_notional[level - 1] if level else 0.0
+        filled_qty = cum_qty[level - 1] if level else 0.0
+        quantity = filled_qty + (notional - filled_notional) / prices[level]
+        return float(notional / quantity)
+
+    def metrics(self, imbalance_levels: Sequence[int] = IMBALANCE_LEVELS,
+                depth_bps: Sequence[float] = DEPTH_BPS,
+                fill_notionals: Sequence[float] = FILL_NOTIONALS) -> Dict:
+        """Spread, microprice, imbalance, depth and fill metrics as a JSON-ready dict
+
+        Returns:
+        {
+            bestBid, bestAsk, midPrice, spread, spreadBps, microprice: Optional[float]
+            imbalance: {levels: Optional[float]}
+            depth: {bps: {'bid': quantity, 'ask': quantity}}
+            vwap: {notional: {'buy': price, 'sell': price}}  # None if too thin
+        }
+        """
+        depth = {}
+        for bps in depth_bps:
+            bid_qty, ask_qty = self.depth_within(bps)
+            depth[_key(bps)] = {'bid': bid_qty, 'ask': ask_qty}
+        return {
+            'bestBid': self.best_bid,
+            'bestAsk': self.best_ask,
+            'midPrice': self.mid,
+            'spread': self.spread,
+            'spreadBps': self.spread_bps,
+            'microprice': self.microprice,
+            'imbalance': {_key(levels): self.imbalance(levels) for levels in imbalance_levels},
+            'depth': depth,
+            'vwap': {_key(notional): {'buy': self.vwap_to_fill(notional, 'buy'),
+                                      'sell': self.vwap_to_fill(notional, 'sell')}
+                     for notional in fill_notionals},
+        }
@@ -0,0 +1,224 @@
+import asyncio
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+try:
+    import aiohttp
+except ImportError:  # optional async HTTP client
+    aiohttp = None
+
+from utilities.logging_config import get_logger
+from .base_fetcher import sign_params
+from .rate_limiter import RateLimiter, get_rate_limiter
+from .request_coalescer import RequestCoalescer, get_request_coalescer, request_key
+from .retry_policy import CircuitBreaker, RetryPolicy, get_circuit_breaker, handle_failure
+from .transport import DECODE_ERRORS, AsyncHttpTransport, transport_settings
+
+DEFAULT_MAX_CONCURRENCY = 10
+DEFAULT_TIMEOUT = 10.0
+
+# Event loop -> host -> semaphore; asyncio primitives are bound to one loop
+_SEMAPHORES: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]' = \
+    weakref.WeakKeyDictionary()
+_SEMAPHORES_LOCK = threading.Lock()
+
+
+def get_host_semaphore(url: str, max_concurrency: int) -> asyncio.Semaphore:
+    """Return the semaphore shared by every async fetcher that talks to the host of `url`
+
+    One semaphore exists per host and running event loop. The first caller
+    for a host decides its limit.
+    """
+    host = urlparse(url).netloc or url
+    loop = asyncio.get_running_loop()
+    with _SEMAPHORES_LOCK:
+        semaphores = _SEMAPHORES.setdefault(loop, {})
+        if host not in semaphores:
+            semaphores[host] = asyncio.Semaphore(max_concurrency)
+        return semaphores[host]
+
+
+class AsyncBaseFetcher:
+    def __init__(self, base_url: str, api_key: Optional[str] = None,
+                 api_secret: Optional[str] = None, rate_limit: int = 1200,
+                 request_weight: Optional[Callable[[str, Dict], int]] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 request_ttl: Optional[Callable[[str, Dict], Optional[float]]] = None,
+                 coalescer: Optional[RequestCoalescer] = None, coalesce: bool = True,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None, fail_fast: bool = True,
+                 transport: Optional[AsyncHttpTransport] = None):
+        """Asyncio counterpart of BaseFetcher built on a pooled aiohttp session
+
+        Requests share the host's rate limiter with synchronous fetchers, and
+        at most `max_concurrency` requests to the host are in flight at once
+        across every async fetcher in the event loop. Identical
+        unsigned GET requests are coalesced and memoized, and failures are
+        retried and circuit-broken, as in BaseFetcher. Fetchers given the
+        same AsyncHttpTransport share its connections; without one the
+        fetcher owns a transport configured like the synchronous one.
+
+        Args:
+            base_url: Base URL for API endpoints
+            api_key: Optional API key for authenticated endpoints
+            api_secret: Optional API secret for signing requests
+            rate_limit: Maximum request weight per minute (default: 1200), 0 to disable
+            request_weight: Optional function (endpoint, params) -> request weight
+            rate_limiter: Optional limiter to use instead of the shared one for the host
+            max_concurrency: Maximum concurrent requests to this host (the
+                first fetcher for a host decides it)
+            timeout: Total timeout per request in seconds, on top of the
+                transport's connect and read timeouts
+            request_ttl: Optional function (endpoint, params) -> seconds to
+                memoize the response for (None or 0: not memoized)
+            coalescer: Optional coalescer to use instead of the shared one for the host
+            coalesce: Whether to coalesce and memoize requests at all
+            retry_policy: Optional retry policy (default: RetryPolicy())
+            circuit_breaker: Optional breaker to use instead of the shared one for the host
+            fail_fast: Whether to use a circuit breaker at all
+            transport: Optional shared transport (closed by its owner, not here)
+        """
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for AsyncBaseFetcher")
+
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.rate_limit = rate_limit
+        self.request_weight = request_weight
+        self.rate_limiter = rate_limiter
+        if self.rate_limiter is None and rate_limit:
+            self.rate_limiter = get_rate_limiter(self.base_url, rate_limit)
+        self.request_ttl = request_ttl
+        self.coalescer = coalescer
+        if self.coalescer is None and coalesce:
+            self.coalescer = get_request_coalescer(self.base_url)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker
+        if self.circuit_breaker is None and fail_fast:
+            self.circuit_breaker = get_circuit_breaker(self.base_url)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.last_request_time = 0
+        self.logger = get_logger(self.__class__.__name__)
+
+        self._owns_transport = transport is None
+        if transport is None:
+            settings = transport_settings()
+            settings.setdefault('pool_size', max_concurrency)
+            transport = AsyncHttpTransport(**settings)
+        self.transport = transport
+        # The session is shared, so credentials travel with each request
+        self.headers = {'X-MBX-APIKEY': self.api_key} if self.api_key else None
+
+    async def fetch_data(self, endpoint: str, params: Optional[Dict] = None,
+                         method: str = 'GET', sign: bool = False,
+                         retry_count: int = 3, retry_delay: float = 1.0,
+                         weight: Optional[int] = None, raw: bool = False) -> Optional[Any]:
+        """Fetch data from API endpoint with rate limiting and retries
+
+        Args:
+            endpoint: API endpoint path
+            params: Optional query parameters
+            method: HTTP method (default: 'GET')
+            sign: Whether to sign the request
+            retry_count: Total attempts for retryable failures
+            retry_delay: Base of the jittered exponential delay between attempts
+            weight: Request weight (default: from request_weight, or 1)
+            raw: Return the undecoded response body (bytes) instead of parsed JSON
+
+        Returns:
+            Response data (bytes when raw) or None on error
+        """
+        params = params or {}
+        endpoint = endpoint.lstrip('/')
+        url = f"{self.base_url}/{endpoint}"
+
+        if sign:
+            params = sign_params(params, self.api_secret)
+
+        if weight is None:
+            weight = self.request_weight(endpoint, params) if self.request_weight else 1
+
+        def request():
+            return self._request(url, params, method, retry_count, retry_delay, weight, raw)
+
+        # Signed requests carry a timestamp and are never shared
+        if self.coalescer and method == 'GET' and not sign:
+            ttl = self.request_ttl(endpoint, params) if self.request_ttl else None
+            key = request_key(method, endpoint, params) + (raw,)
+            return await self.coalescer.fetch_async(key, request, ttl)
+        return await request()
+
+    async def _request(self, url: str, params: Dict, method: str, retry_count: int,
+                       retry_delay: float, weight: int, raw: bool = False) -> Optional[Any]:
+        """Send one request with rate limiting and retries (see `fetch_data`)"""
+        session = self.transport.session
+        timeout = self.transport.timeout(self.timeout)
+        for attempt in range(retry_count):
+            trial = self.circuit_breaker.before_request() if self.circuit_breaker else False
+            try:
+                if self.rate_limiter:
+                    await self.rate_limiter.acquire_async(weight)
+
+                async with get_host_semaphore(self.base_url, self.max_concurrency):
+                    async with session.request(
+                        method,
+                        url,
+                        params=params if method == 'GET' else None,
+                        json=params if method != 'GET' else None,
+                        headers=self.headers,
+                        timeout=timeout
+                    ) as response:
+                        self.last_request_time = time.time()
+                        if self.rate_limiter:
+                            self.rate_limiter.update_from_headers(response.headers)
+                        response.raise_for_status()
+                        if self.circuit_breaker:
+                            self.circuit_breaker.record_success()
+                        if raw:
+                            return await response.read()
+                        return await response.json(content_type=None)
+
+            except DECODE_ERRORS as e:
+                # The host answered; a bad body is neither an outage nor worth retrying
+                self.logger.error(f"Invalid JSON in response from {url}: {str(e)}")
+                return None
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = e.status if isinstance(e, aiohttp.ClientResponseError) else None
+                delay = handle_failure(
+                    self.retry_policy, self.circuit_breaker, self.rate_limiter, attempt,
+                    retry_count, retry_delay, status, getattr(e, 'headers', None)
+                )
+                self.logger.warning(
+                    f"Request failed (attempt {attempt + 1}/{retry_count}): {str(e)}"
+                    + (f"; retrying in {delay:.2f}s" if delay is not None else "")
+                )
+
+                # Client errors, bans and exhausted retries are final
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+            finally:
+                # Errors that record no outcome must not leave the trial held forever
+                if trial:
+                    self.circuit_breaker.release_trial()
+
+        return None
+
+    async def close(self) -> None:
+        """Close the pooled session if this fetcher owns it"""
+        if self._owns_transport:
+            await self.transport.close()
+
+    async def __aenter__(self) -> 'AsyncBaseFetcher':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
@@ -1,41 +1,148 @@
+import bisect
+import hashlib
 import json
-import os
+import threading
 import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Optional, List, Union, Iterator
 from pathlib import Path
+from utilities.logging_config import get_logger
+from .segment_store import SegmentStore, DEFAULT_SEGMENT_MAX_BYTES
+from .sqlite_store import SQLiteStore
+from .cache_index import CacheIndex
+from .durability import fsync_files, fsync_path
+from .compression import (CODEC_SUFFIXES, DECOMPRESSION_ERRORS, compress_bytes,
+                          open_for_read, open_for_write, resolve_codec)
+from .json_bytes import encode_envelope, is_raw, loads
+from .orderbook_store import OrderbookDeltaStore, DEFAULT_KEYFRAME_INTERVAL
+from .read_cache import ReadCache
+from .retention import HISTORY_DATA_TYPES, RetentionEngine, RetentionPolicy, RetentionTier
+from .write_behind import (BatchWriteError, WriteBehindWriter, DEFAULT_QUEUE_SIZE,
+                           DEFAULT_FSYNC_INTERVAL)
+
+STORAGE_MODES = ['files', 'segments', 'sqlite']
+# Written files tracked for the next sync; beyond this they are fsynced inline
+MAX_UNSYNCED_PATHS = 4096
+DEFAULT_DEDUP_KEYFRAME_SECONDS = 3600
 
 class BaseCache:
-    def __init__(self, cache_dir: str):
+    def __init__(self, cache_dir: str, storage: str = 'files',
+                 segment_max_bytes: int = DEFAULT_SEGMENT_MAX_BYTES,
+                 compress: Union[bool, str] = False, write_behind: bool = False,
+                 write_queue_size: int = DEFAULT_QUEUE_SIZE,
+                 fsync_interval: float = DEFAULT_FSYNC_INTERVAL,
+                 read_cache_bytes: int = 0, dedup: bool = False,
+                 dedup_keyframe_seconds: float = DEFAULT_DEDUP_KEYFRAME_SECONDS,
+                 orderbook_deltas: bool = False,
+                 orderbook_keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL):
         """Initialize cache with directory structure for different data types
         
         Args:
             cache_dir: Base directory for cache
+            storage: 'files' for one JSON file per snapshot, 'segments' for
+                append-only segment logs per filename prefix, 'sqlite' for a
+                single WAL-mode database with typed processed tables
+            segment_max_bytes: Size at which a segment is sealed (segments only)
+            compress: False for plain JSON, True for the fastest installed codec,
+                or a codec name ('gzip', 'zstd', 'lz4'). Reads detect the codec.
+            write_behind: Queue writes for a background writer thread instead
+                of writing inline in save_to_cache
+            write_queue_size: Queued writes before save_to_cache blocks (write-behind only)
+            fsync_interval: Seconds between fsyncs of written data (write-behind only)
+            read_cache_bytes: Memory budget for an in-process LRU cache of the
+                latest entry per filename (0 disables it)
+            dedup: Store a reference instead of the payload when a snapshot is
+                identical to the previous one saved under the same filename
+            dedup_keyframe_seconds: Maximum age of the full record a reference
+                may point to before the payload is written again (dedup only)
+            orderbook_deltas: Store orderbooks as periodic keyframes plus the
+                levels changed between them, whatever the storage mode
+            orderbook_keyframe_interval: Orderbook snapshots per keyframe
         """
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"Invalid storage mode: {storage}. Must be one of {STORAGE_MODES}")
+        
         self.base_dir = Path(cache_dir)
+        self.storage = storage
+        self.codec = resolve_codec(compress)
+        self.logger = get_logger('cache')
         
         # Create directory structure
-        self.data_types = ['market', 'orderbook', 'trade']
+        self.data_types = ['market', 'orderbook', 'trade', 'kline']
+        self.indexes = {}
         for data_type in self.data_types:
             for subdir in ['raw', 'processed']:
                 path = self.base_dir / data_type / subdir
                 path.mkdir(parents=True, exist_ok=True)
+                self.indexes[(data_type, subdir)] = CacheIndex(path)
+        
+        self.store = None
+        if storage == 'segments':
+            self.store = SegmentStore(self.base_dir, segment_max_bytes, self.codec)
+        elif storage == 'sqlite':
+            self.store = SQLiteStore(self.base_dir, self.codec)
+        
+        self.orderbook_store = None
+        if orderbook_deltas:
+            self.orderbook_store = OrderbookDeltaStore(
+                self.base_dir, orderbook_keyframe_interval, segment_max_bytes, self.codec
+            )
+        
+        self._lock = threading.RLock()
+        self._unsynced_paths = set()
+        self.writer = None
+        if write_behind:
+            self.writer = WriteBehindWriter(
+                self._write_batch, self.sync,
+                max_queue=write_queue_size, fsync_interval=fsync_interval
+            )
+        
+        self.read_cache = ReadCache(read_cache_bytes) if read_cache_bytes else None
+        
+        self.dedup = dedup
+        self.dedup_keyframe_ms = int(dedup_keyframe_seconds * 1000)
+        self._content_hashes = {}
+    
+    def _store_for(self, data_type: str):
+        """Storage backend for a data type (None for individual files)"""
+        if data_type == 'orderbook' and self.orderbook_store:
+            return self.orderbook_store
+        return self.store
+    
+    @staticmethod
+    def content_hash(data: Any) -> str:
+        """Stable digest of a payload, independent of dict key order
+        
+        Raw payloads are hashed as they are, byte for byte.
+        """
+        if is_raw(data):
+            return hashlib.blake2b(data, digest_size=16).hexdigest()
+        encoded = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).hexdigest()
     
-    def save_to_cache(self, data: Dict, filename: str, data_type: str = 'market',
-                      is_processed: bool = False) -> None:
+    def save_to_cache(self, data: Any, filename: str, data_type: str = 'market',
+                      is_processed: bool = False, timestamp: Optional[int] = None) -> None:
         """Save data to cache with metadata
         
+        Data given as bytes is taken to be an undecoded JSON response body
+        and written without a parse and re-serialization round trip; it
+        loads back as the parsed object like any other entry.
+        
         Args:
-            data: Data to cache
+            data: Data to cache, or raw JSON bytes
             filename: Base filename without extension
-            data_type: Type of data ('market', 'orderbook', 'trade')
+            data_type: Type of data ('market', 'orderbook', 'trade', 'kline')
             is_processed: Whether this is processed data
+            timestamp: Optional snapshot time in milliseconds (default: now)
         """
         if data_type not in self.data_types:
             raise ValueError(f"Invalid data type: {data_type}. Must be one of {self.data_types}")
         
         subdir = 'processed' if is_processed else 'raw'
-        timestamp = int(time.time() * 1000)
+        is_latest = timestamp is None
+        if timestamp is None:
+            timestamp = int(time.time() * 1000)
         
         # Add metadata
         cache_data = {
@@ -49,11 +156,150 @@ class BaseCache:
             }
         }
         
-        # Create filename with timestamp
-        path = self.base_dir / data_type / subdir / f"{filename}_{timestamp}.json"
+        if self.dedup:
+            self._deduplicate(data_type, subdir, cache_data)
+        
+        if self.writer:
+            self.writer.submit((data_type, subdir, filename, timestamp, cache_data))
+        else:
+            self._write(data_type, subdir, filename, timestamp, cache_data)
+        
+        if self.read_cache:
+            self._refresh_read_cache((filename, data_type, is_processed),
+                                     dict(cache_data, data=data), is_latest)
+    
+    def _deduplicate(self, data_type: str, subdir: str, cache_data: Dict) -> None:
+        """Replace an unchanged payload with a reference to the last full record
+        
+        The last content hash per filename is tracked in memory, so the first
+        save after start-up always writes the full payload.
+        """
+        metadata = cache_data['metadata']
+        digest = self.content_hash(cache_data['data'])
+        metadata['content_hash'] = digest
+        
+        key = (data_type, subdir, metadata['filename'])
+        with self._lock:
+            previous = self._content_hashes.get(key)
+            if (previous and previous[0] == digest
+                    and 0 <= metadata['timestamp'] - previous[1] <= self.dedup_keyframe_ms):
+                metadata['ref_timestamp'] = previous[1]
+                cache_data['data'] = None
+            else:
+                self._content_hashes[key] = (digest, metadata['timestamp'])
+    
+    def _refresh_read_cache(self, key: tuple, cache_data: Dict, is_latest: bool) -> None:
+        """Write-through: keep the cached latest entry for a key current
+        
+        Snapshots saved at the current time are the newest by definition.
+        Backfilled snapshots replace the cached entry only if they are newer;
+        if nothing is cached the newest entry on disk is unknown, so the
+        cache is left to fill on the next read. Raw payloads are not parsed
+        here; they only invalidate the entry they supersede.
+        """
+        current = self.read_cache.peek(key)
+        timestamp = cache_data['metadata']['timestamp']
+        if is_latest or (current is not None and
+                         current['metadata']['timestamp'] <= timestamp):
+            if is_raw(cache_data['data']):
+                self.read_cache.invalidate(key)
+            else:
+                self.read_cache.put(key, cache_data)
+    
+    def _write(self, data_type: str, subdir: str, filename: str,
+               timestamp: int, cache_data: Dict) -> None:
+        """Persist a cache envelope with the configured storage backend"""
+        with self._lock:
+            store = self._store_for(data_type)
+            if store is not None and store is self.orderbook_store and is_raw(cache_data['data']):
+                # Deltas are computed between parsed books
+                cache_data = dict(cache_data, data=loads(cache_data['data']))
+            if store:
+                store.append(data_type, subdir, filename, timestamp, cache_data)
+                return
+            
+            # Create filename with timestamp
+            suffix = '.json' + CODEC_SUFFIXES.get(self.codec, '')
+            path = self.base_dir / data_type / subdir / f"{filename}_{timestamp}{suffix}"
+            
+            if is_raw(cache_data['data']):
+                # Response bytes go to disk as they are, inside a compact envelope
+                path.write_bytes(compress_bytes(encode_envelope(cache_data), self.codec))
+            else:
+                # Compressed files are streamed compactly; plain files stay readable
+                with open_for_write(path, self.codec) as f:
+                    if self.codec:
+                        json.dump(cache_data, f, separators=(',', ':'))
+                    else:
+                        json.dump(cache_data, f, indent=2)
+            
+            self.indexes[(data_type, subdir)].add(filename, timestamp, path.name,
+                                                  path.stat().st_size)
+            self._unsynced_paths.add(path)
+            if not self.writer and len(self._unsynced_paths) >= MAX_UNSYNCED_PATHS:
+                # Nothing syncs periodically without write-behind; keep the set bounded
+                self.sync()
+    
+    def _write_batch(self, items: List[tuple]) -> None:
+        """Persist a group of queued writes (called by the write-behind thread)
+        
+        SQLite writes the group in one transaction, all or nothing; the other
+        backends report how many items were written before a failure.
+        """
+        if isinstance(self.store, SQLiteStore):
+            with self._store_batch():
+                for item in items:
+                    self._write(*item)
+            return
+        for written, item in enumerate(items):
+            try:
+                self._write(*item)
+            except Exception as e:
+                raise BatchWriteError(written, e) from e
+    
+    @property
+    def write_failures(self) -> int:
+        """Queued writes dropped after failing (write-behind only)"""
+        return self.writer.failed if self.writer else 0
+    
+    def sync(self) -> None:
+        """Flush written data to stable storage"""
+        with self._lock:
+            if self.orderbook_store:
+                self.orderbook_store.sync()
+            if self.store:
+                self.store.sync()
+                return
+            paths, self._unsynced_paths = self._unsynced_paths, set()
+        
+        for path in paths:
+            fsync_path(path)
+    
+    def sync_durable(self) -> None:
+        """Make every write made so far survive a crash, whatever the storage mode
+        
+        Files mode fsyncs the written files, their directories and the index
+        journals; segments fsync the active segments and their directories;
+        sqlite runs a full WAL checkpoint, which syncs the WAL and the
+        database. Queued write-behind items are not written by this; call
+        `flush` first. Must not be called inside an open `batch()` block.
+        """
+        with self._lock:
+            if self.orderbook_store:
+                self.orderbook_store.sync_durable()
+            if self.store:
+                self.store.sync_durable()
+                return
+            paths, self._unsynced_paths = self._unsynced_paths, set()
         
-        with open(path, 'w') as f:
-            json.dump(cache_data, f, indent=2)
+        fsync_files(paths, self.base_dir)
+        for index in self.indexes.values():
+            index.sync()
+    
+    def flush(self) -> None:
+        """Wait until all queued writes have been persisted (write-behind only)"""
+        if self.writer:
+            self.writer.flush()
     
     def load_from_cache(self, filename_pattern: str, data_type: str = 'market',
                        is_processed: bool = False, n_latest: int = 1,
@@ -74,75 +320,318 @@ class BaseCache:
             raise ValueError(f"Invalid data type: {data_type}")
         
         subdir = 'processed' if is_processed else 'raw'
-        cache_dir = self.base_dir / data_type / subdir
         
-        # Find matching files
-        matching_files = list(cache_dir.glob(f"{filename_pattern}_*.json"))
-        if not matching_files:
+        # Only single latest-entry lookups of a literal filename are cached
+        key = None
+        if (self.read_cache and n_latest == 1 and time_range is None
+                and not any(c in filename_pattern for c in '*?[')):
+            key = (filename_pattern, data_type, is_processed)
+            cached = self.read_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        # Make queued writes visible before reading
+        self.flush()
+        
+        with self._lock:
+            result = self._read(data_type, subdir, filename_pattern, n_latest, time_range)
+        
+        # A concurrent save may already have cached a newer entry
+        if key and result is not None:
+            current = self.read_cache.peek(key)
+            if current is None or (current['metadata']['timestamp']
+                                   <= result['metadata']['timestamp']):
+                self.read_cache.put(key, result)
+        return result
+    
+    def _read(self, data_type: str, subdir: str, filename_pattern: str, n_latest: int,
+              time_range: Optional[tuple[int, int]]) -> Union[Dict, List[Dict], None]:
+        """Read cache envelopes from the configured storage backend"""
+        results = self._read_entries(data_type, subdir, filename_pattern, n_latest, time_range)
+        if any('ref_timestamp' in entry['metadata'] for entry in results):
+            results = self._resolve_references(data_type, subdir, results)
+        
+        if not results:
             return None
-            
-        # Sort files by timestamp (extracted from filename)
-        matching_files.sort(key=lambda x: int(x.stem.split('_')[-1]), reverse=True)
         
+        return results[0] if n_latest == 1 else results
+    
+    def _read_entries(self, data_type: str, subdir: str, filename_pattern: str, n_latest: int,
+                      time_range: Optional[tuple[int, int]]) -> List[Dict]:
+        """Read stored envelopes newest first, leaving references unresolved"""
+        store = self._store_for(data_type)
+        if store:
+            return store.read(data_type, subdir, filename_pattern, n_latest, time_range)
+        return self._read_files(data_type, subdir, filename_pattern, n_latest, time_range)
+    
+    def _read_files(self, data_type: str, subdir: str, filename_pattern: str, n_latest: int,
+                    time_range: Optional[tuple[int, int]]) -> List[Dict]:
+        """Read cache envelopes from individual JSON files, newest first"""
+        cache_dir = self.base_dir / data_type / subdir
+        index = self.indexes[(data_type, subdir)]
+        
+        # Walk the index newest first, opening only files inside the time range
         results = []
-        for file_path in matching_files:
+        missing = []
+        for _, prefix, name in index.latest(filename_pattern, time_range):
+            file_path = cache_dir / name
             try:
-                with open(file_path, 'r') as f:
+                with open_for_read(file_path) as f:
                     cache_data = json.load(f)
                     
-                # Apply time range filter if specified
-                if time_range:
-                    start_ms, end_ms = time_range
-                    timestamp = cache_data['metadata']['timestamp']
-                    if timestamp < start_ms or timestamp > end_ms:
-                        continue
-                        
                 results.append(cache_data)
                 if len(results) == n_latest:
                     break
                     
-            except (json.JSONDecodeError, KeyError) as e:
+            except FileNotFoundError:
+                missing.append((prefix, name))
+                continue
+            except (json.JSONDecodeError, KeyError, *DECOMPRESSION_ERRORS) as e:
                 print(f"Error reading cache file {file_path}: {e}")
                 continue
-                
-        if not results:
-            return None
+        
+        for prefix, name in missing:
+            index.remove(prefix, name)
+        
+        return results
+    
+    def _resolve_references(self, data_type: str, subdir: str, results: List[Dict]) -> List[Dict]:
+        """Fill in the payload of deduplicated entries from their full records
+        
+        Retention keeps full records that surviving entries reference, so a
+        missing one means the cache was damaged; such entries are dropped.
+        """
+        payloads = {}
+        resolved = []
+        for entry in results:
+            metadata = entry['metadata']
+            ref_timestamp = metadata.get('ref_timestamp')
+            if ref_timestamp is None:
+                resolved.append(entry)
+                continue
             
-        return results[0] if n_latest == 1 else results
+            key = (metadata['filename'], ref_timestamp)
+            if key not in payloads:
+                full = self._read(data_type, subdir, metadata['filename'], 1,
+                                  (ref_timestamp, ref_timestamp))
+                payloads[key] = full
+                if full is None:
+                    self.logger.warning(
+                        f"Missing full record {key} referenced by deduplicated cache entries"
+                    )
+            if payloads[key] is not None:
+                resolved.append({'data': payloads[key]['data'], 'metadata': metadata})
+        return resolved
+    
+    def reconstruct_orderbook(self, filename: str, timestamp: int,
+                              is_processed: bool = True) -> Optional[Dict]:
+        """Return the orderbook as of a timestamp
+        
+        Args:
+            filename: Base filename the orderbook is stored under
+            timestamp: Time in milliseconds
+            is_processed: Whether to use processed or raw snapshots
+            
+        Returns:
+            The newest snapshot at or before the timestamp, or None
+        """
+        return self.load_from_cache(filename, 'orderbook', is_processed,
+                                    time_range=(0, timestamp))
     
     def clear_old_cache(self, max_age_hours: int = 24, data_type: Optional[str] = None) -> None:
-        """Clear cache files older than specified age
+        """Clear cache entries older than specified age
+        
+        Shorthand for a single-tier retention pass; see RetentionEngine for
+        tiered downsampling and disk budgets.
         
         Args:
-            max_age_hours: Maximum age of cache files in hours
-            data_type: Optional specific data type to clear, or None for all
+            max_age_hours: Maximum age of cache entries in hours
+            data_type: Optional specific data type to clear, or None for every
+                data type except history (backfilled klines)
         """
-        data_types = [data_type] if data_type else self.data_types
-        max_age_ms = max_age_hours * 3600 * 1000
-        current_time = int(time.time() * 1000)
+        data_types = ([data_type] if data_type else
+                      [dt for dt in self.data_types if dt not in HISTORY_DATA_TYPES])
+        policies = [
+            RetentionPolicy(tiers=[RetentionTier(max_age_hours)], data_type=dt,
+                            is_processed=is_processed)
+            for dt in data_types
+            for is_processed in (False, True)
+        ]
+        RetentionEngine(self, policies).run_once()
+    
+    def entry_timestamps(self, data_type: str, is_processed: bool) -> Dict[str, List[int]]:
+        """Return the sorted entry timestamps of every filename prefix"""
+        subdir = 'processed' if is_processed else 'raw'
+        self.flush()
+        with self._lock:
+            return self._timestamps(data_type, subdir)
+    
+    def delete_entries(self, data_type: str, is_processed: bool, filename: str,
+                       timestamps: set) -> int:
+        """Delete the entries of a filename prefix with the given timestamps
         
-        for dt in data_types:
-            for subdir in ['raw', 'processed']:
-                cache_dir = self.base_dir / dt / subdir
-                for file_path in cache_dir.glob("*.json"):
-                    try:
-                        # Extract timestamp from filename
-                        timestamp = int(file_path.stem.split('_')[-1])
-                        if current_time - timestamp > max_age_ms:
-                            file_path.unlink()
-                    except (ValueError, IndexError):
-                        continue
+        Returns:
+            Number of entries removed
+        """
+        subdir = 'processed' if is_processed else 'raw'
+        self.flush()
+        if self.read_cache:
+            self.read_cache.invalidate((filename, data_type, is_processed))
+        with self._lock:
+            previous = self._content_hashes.get((data_type, subdir, filename))
+            if previous and previous[1] in timestamps:
+                del self._content_hashes[(data_type, subdir, filename)]
+            if self.dedup:
+                prefix_timestamps = self._timestamps(data_type, subdir).get(filename, [])
+                timestamps = set(timestamps) - self._referenced_by_survivors(
+                    data_type, subdir, filename, prefix_timestamps, set(timestamps)
+                )
+            return self._delete(data_type, subdir, filename, timestamps)
+    
+    def _timestamps(self, data_type: str, subdir: str) -> Dict[str, List[int]]:
+        store = self._store_for(data_type)
+        if store:
+            return store.timestamps(data_type, subdir)
+        return self.indexes[(data_type, subdir)].timestamps()
+    
+    def _delete(self, data_type: str, subdir: str, filename: str, timestamps: set) -> int:
+        if not timestamps:
+            return 0
+        store = self._store_for(data_type)
+        if store:
+            return store.delete(data_type, subdir, filename, timestamps)
+        index = self.indexes[(data_type, subdir)]
+        return self._unlink_indexed(data_type, subdir, index.names_at(filename, timestamps))
+    
+    def _referenced_by_survivors(self, data_type: str, subdir: str, filename: str,
+                                 timestamps: List[int], drop: set) -> set:
+        """Timestamps in `drop` holding the full record of an entry that stays
+        
+        A reference always points to the last full record saved before it,
+        so if any surviving entry references a dropped record, the first
+        survivor after that run of dropped entries does. Only those
+        survivors are read.
+        """
+        keep = set()
+        for previous, timestamp in zip(timestamps, timestamps[1:]):
+            if previous in drop and timestamp not in drop:
+                entries = self._read_entries(data_type, subdir, filename, 1, (timestamp, timestamp))
+                ref_timestamp = entries[0]['metadata'].get('ref_timestamp') if entries else None
+                if ref_timestamp in drop:
+                    keep.add(ref_timestamp)
+        return keep
+    
+    def expire_entries(self, data_type: str, is_processed: bool, cutoff_ms: int) -> int:
+        """Delete every entry older than a cutoff
+        
+        Returns:
+            Number of entries removed
+        """
+        subdir = 'processed' if is_processed else 'raw'
+        self.flush()
+        if self.read_cache:
+            self.read_cache.invalidate_where(
+                lambda key, entry: key[1:] == (data_type, is_processed)
+                and entry['metadata']['timestamp'] < cutoff_ms
+            )
+        with self._lock:
+            # New duplicates must not reference a full record that is about to go
+            for key in [k for k, (_, ts) in self._content_hashes.items()
+                        if k[:2] == (data_type, subdir) and ts < cutoff_ms]:
+                del self._content_hashes[key]
+            if self.dedup:
+                # Per prefix, so full records still referenced can be kept
+                removed = 0
+                for filename, timestamps in self._timestamps(data_type, subdir).items():
+                    drop = set(timestamps[:bisect.bisect_left(timestamps, cutoff_ms)])
+                    if drop:
+                        drop -= self._referenced_by_survivors(data_type, subdir, filename,
+                                                              timestamps, drop)
+                        removed += self._delete(data_type, subdir, filename, drop)
+                return removed
+            store = self._store_for(data_type)
+            if store:
+                return store.expire(data_type, subdir, cutoff_ms)
+            index = self.indexes[(data_type, subdir)]
+            return self._unlink_indexed(data_type, subdir, index.older_than(cutoff_ms))
+    
+    def _unlink_indexed(self, data_type: str, subdir: str, entries: List[tuple]) -> int:
+        cache_dir = self.base_dir / data_type / subdir
+        for _, name in entries:
+            try:
+                (cache_dir / name).unlink()
+            except FileNotFoundError:
+                continue
+        if entries:
+            self.indexes[(data_type, subdir)].discard(entries)
+        return len(entries)
+    
+    def disk_usage(self, data_type: Optional[str] = None) -> int:
+        """Approximate bytes used by cached entries, from the indexes"""
+        self.flush()
+        total = 0
+        with self._lock:
+            for dt in ([data_type] if data_type else self.data_types):
+                store = self._store_for(dt)
+                for subdir in ['raw', 'processed']:
+                    if store:
+                        total += store.usage(dt, subdir)
+                    else:
+                        total += self.indexes[(dt, subdir)].usage()
+        return total
     
     def get_cache_info(self) -> Dict[str, Dict[str, int]]:
         """Get information about cached data
         
         Returns:
-            Dict with counts of files per data type and processing state
+            Dict with counts of cached entries per data type and processing state
         """
+        self.flush()
         info = {}
-        for data_type in self.data_types:
-            info[data_type] = {
-                'raw': len(list((self.base_dir / data_type / 'raw').glob('*.json'))),
-                'processed': len(list((self.base_dir / data_type / 'processed').glob('*.json')))
-            }
+        with self._lock:
+            for data_type in self.data_types:
+                store = self._store_for(data_type)
+                if store:
+                    info[data_type] = {
+                        'raw': store.count(data_type, 'raw'),
+                        'processed': store.count(data_type, 'processed')
+                    }
+                    continue
+                info[data_type] = {
+                    'raw': self.indexes[(data_type, 'raw')].count(),
+                    'processed': self.indexes[(data_type, 'processed')].count()
+                }
         return info
+    
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group writes made inside the block (one transaction for sqlite)
+        
+        With write-behind enabled the writer thread already groups writes,
+        so this is a no-op.
+        """
+        if self.writer:
+            yield
+            return
+        with self._store_batch():
+            yield
+    
+    @contextmanager
+    def _store_batch(self) -> Iterator[None]:
+        # The cache lock is always taken before the store lock; the store
+        # holds its lock for the whole transaction, so taking them the other
+        # way round here would deadlock with retention or other writers
+        if isinstance(self.store, SQLiteStore):
+            with self._lock, self.store.batch():
+                yield
+        else:
+            yield
+    
+    def close(self) -> None:
+        """Flush pending writes and release resources held by the storage backend"""
+        if self.writer:
+            self.writer.close()
+        if self.orderbook_store:
+            self.orderbook_store.close()
+        if self.store:
+            self.store.close()
@@ -1,36 +1,106 @@
 import time
 import hmac
 import hashlib
-import requests
-from typing import Dict, Optional, Any
+from collections.abc import Mapping
+from typing import Callable, Dict, Optional, Any
 from urllib.parse import urlencode
 from datetime import datetime
 from utilities.logging_config import get_logger
+from .rate_limiter import RateLimiter, get_rate_limiter
+from .request_coalescer import RequestCoalescer, get_request_coalescer, request_key
+from .retry_policy import CircuitBreaker, RetryPolicy, get_circuit_breaker, handle_failure
+from .transport import DECODE_ERRORS, TRANSPORT_ERRORS, HttpTransport, get_transport
+
+def sign_params(params: Dict, api_secret: Optional[str]) -> Dict:
+    """Add a timestamp and HMAC SHA256 signature to request parameters
+    
+    Args:
+        params: Request parameters to sign
+        api_secret: API secret (parameters are returned unchanged without one)
+        
+    Returns:
+        Dict with signature added
+    """
+    if not api_secret:
+        return params
+        
+    # Add timestamp if not present
+    if 'timestamp' not in params:
+        params['timestamp'] = int(time.time() * 1000)
+        
+    # Create signature
+    query_string = urlencode(params)
+    signature = hmac.new(
+        api_secret.encode('utf-8'),
+        query_string.encode('utf-8'),
+        hashlib.sha256
+    ).hexdigest()
+    
+    params['signature'] = signature
+    return params
 
 class BaseFetcher:
     def __init__(self, base_url: str, api_key: Optional[str] = None, 
-                 api_secret: Optional[str] = None, rate_limit: int = 1200):
+                 api_secret: Optional[str] = None, rate_limit: int = 1200,
+                 request_weight: Optional[Callable[[str, Dict], int]] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 request_ttl: Optional[Callable[[str, Dict], Optional[float]]] = None,
+                 coalescer: Optional[RequestCoalescer] = None, coalesce: bool = True,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None, fail_fast: bool = True,
+                 transport: Optional[HttpTransport] = None):
         """Initialize base fetcher with API configuration
         
+        Identical unsigned GET requests in flight at the same time share one
+        HTTP call, and results with a TTL are memoized for that long (see
+        RequestCoalescer). Failures are retried per RetryPolicy, and a
+        per-host CircuitBreaker fails requests fast while the host is down
+        or has banned this IP. Requests go through the process-wide
+        HttpTransport, so every fetcher reuses the same keep-alive connections.
+        
         Args:
             base_url: Base URL for API endpoints
             api_key: Optional API key for authenticated endpoints
             api_secret: Optional API secret for signing requests
-            rate_limit: Maximum requests per minute (default: 1200)
+            rate_limit: Maximum request weight per minute (default: 1200), 0 to disable
+            request_weight: Optional function (endpoint, params) -> request weight;
+                every request costs 1 without it
+            rate_limiter: Optional limiter to use instead of the one shared by
+                all fetchers for the same host
+            request_ttl: Optional function (endpoint, params) -> seconds to
+                memoize the response for (None or 0: not memoized)
+            coalescer: Optional coalescer to use instead of the one shared by
+                all fetchers for the same host
+            coalesce: Whether to coalesce and memoize requests at all
+            retry_policy: Optional retry policy (default: RetryPolicy())
+            circuit_breaker: Optional breaker to use instead of the one shared
+                by all fetchers for the same host
+            fail_fast: Whether to use a circuit breaker at all
+            transport: Optional transport to use instead of the shared one
         """
         self.base_url = base_url.rstrip('/')
         self.api_key = api_key
         self.api_secret = api_secret
         self.rate_limit = rate_limit
-        self.session = requests.Session()
+        self.request_weight = request_weight
+        self.rate_limiter = rate_limiter
+        if self.rate_limiter is None and rate_limit:
+            self.rate_limiter = get_rate_limiter(self.base_url, rate_limit)
+        self.request_ttl = request_ttl
+        self.coalescer = coalescer
+        if self.coalescer is None and coalesce:
+            self.coalescer = get_request_coalescer(self.base_url)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker
+        if self.circuit_breaker is None and fail_fast:
+            self.circuit_breaker = get_circuit_breaker(self.base_url)
+        self.transport = transport or get_transport()
+        self.transport.mount(self.base_url)
         self.last_request_time = 0
         self.logger = get_logger(self.__class__.__name__)
         
-        # Set up session headers
-        if self.api_key:
-            self.session.headers.update({
-                'X-MBX-APIKEY': self.api_key
-            })
+        # The transport is shared, so credentials travel with each request
+        self.headers = {'X-MBX-APIKEY': self.api_key} if self.api_key else None
     
     def _add_signature(self, params: Dict) -> Dict:
         """Add HMAC SHA256 signature to request parameters
@@ -41,40 +111,23 @@ class BaseFetcher:
         Returns:
             Dict with signature added
         """
-        if not self.api_secret:
-            return params
-            
-        # Add timestamp if not present
-        if 'timestamp' not in params:
-            params['timestamp'] = int(time.time() * 1000)
-            
-        # Create signature
-        query_string = urlencode(params)
-        signature = hmac.new(
-            self.api_secret.encode('utf-8'),
-            query_string.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
-        
-        params['signature'] = signature
-        return params
+        return sign_params(params, self.api_secret)
     
-    def _wait_for_rate_limit(self):
-        """Implement rate limiting by waiting if necessary"""
-        if not self.rate_limit:
-            return
-            
-        # Calculate minimum time between requests
-        min_interval = 60.0 / self.rate_limit  # seconds per request
-        
-        # Wait if necessary
-        elapsed = time.time() - self.last_request_time
-        if elapsed < min_interval:
-            time.sleep(min_interval - elapsed)
+    def _wait_for_rate_limit(self, weight: int = 1):
+        """Wait until the host's weight budget allows a request of this weight"""
+        if self.rate_limiter:
+            self.rate_limiter.acquire(weight)
+    
+    def _update_rate_limit(self, response: Any) -> None:
+        """Resynchronise the limiter from the usage headers of a response"""
+        headers = getattr(response, 'headers', None)
+        if self.rate_limiter and isinstance(headers, Mapping):
+            self.rate_limiter.update_from_headers(headers)
     
     def fetch_data(self, endpoint: str, params: Optional[Dict] = None,
                   method: str = 'GET', sign: bool = False,
-                  retry_count: int = 3, retry_delay: float = 1.0) -> Optional[Any]:
+                  retry_count: int = 3, retry_delay: float = 1.0,
+                  weight: Optional[int] = None, raw: bool = False) -> Optional[Any]:
         """Fetch data from API endpoint with rate limiting and retries
         
         Args:
@@ -82,11 +135,13 @@ class BaseFetcher:
             params: Optional query parameters
             method: HTTP method (default: 'GET')
             sign: Whether to sign the request
-            retry_count: Number of retries on failure
-            retry_delay: Delay between retries in seconds
+            retry_count: Total attempts for retryable failures
+            retry_delay: Base of the jittered exponential delay between attempts
+            weight: Request weight (default: from request_weight, or 1)
+            raw: Return the undecoded response body (bytes) instead of parsed JSON
             
         Returns:
-            Response data or None on error
+            Response data (bytes when raw) or None on error
         """
         params = params or {}
         endpoint = endpoint.lstrip('/')
@@ -96,35 +151,71 @@ class BaseFetcher:
         if sign:
             params = self._add_signature(params)
         
+        if weight is None:
+            weight = self.request_weight(endpoint, params) if self.request_weight else 1
+        
+        def request():
+            return self._request(url, params, method, retry_count, retry_delay, weight, raw)
+        
+        # Signed requests carry a timestamp and are never shared
+        if self.coalescer and method == 'GET' and not sign:
+            ttl = self.request_ttl(endpoint, params) if self.request_ttl else None
+            key = request_key(method, endpoint, params) + (raw,)
+            return self.coalescer.fetch(key, request, ttl)
+        return request()
+    
+    def _request(self, url: str, params: Dict, method: str, retry_count: int,
+                 retry_delay: float, weight: int, raw: bool = False) -> Optional[Any]:
+        """Send one request with rate limiting and retries (see `fetch_data`)"""
         for attempt in range(retry_count):
+            trial = self.circuit_breaker.before_request() if self.circuit_breaker else False
             try:
                 # Rate limiting
-                self._wait_for_rate_limit()
+                self._wait_for_rate_limit(weight)
                 
                 # Make request
-                response = self.session.request(
-                    method=method,
-                    url=url,
+                response = self.transport.request(
+                    method,
+                    url,
                     params=params if method == 'GET' else None,
-                    json=params if method != 'GET' else None
+                    json=params if method != 'GET' else None,
+                    headers=self.headers
                 )
                 self.last_request_time = time.time()
+                self._update_rate_limit(response)
                 
                 # Check for errors
                 response.raise_for_status()
+                if self.circuit_breaker:
+                    self.circuit_breaker.record_success()
                 
-                return response.json()
+                return response.content if raw else response.json()
                 
-            except requests.exceptions.RequestException as e:
+            except DECODE_ERRORS as e:
+                # The host answered; a bad body is neither an outage nor worth retrying
+                self.logger.error(f"Invalid JSON in response from {url}: {str(e)}")
+                return None
+                
+            except TRANSPORT_ERRORS as e:
+                failed = getattr(e, 'response', None)
+                status = failed.status_code if failed is not None else None
+                delay = handle_failure(
+                    self.retry_policy, self.circuit_breaker, self.rate_limiter, attempt,
+                    retry_count, retry_delay, status,
+                    failed.headers if failed is not None else None
+                )
                 self.logger.warning(
                     f"Request failed (attempt {attempt + 1}/{retry_count}): {str(e)}"
+                    + (f"; retrying in {delay:.2f}s" if delay is not None else "")
                 )
                 
-                # Break if it's our last attempt
-                if attempt == retry_count - 1:
+                # Client errors, bans and exhausted retries are final
+                if delay is None:
                     raise
-                    
-                # Wait before retrying
-                time.sleep(retry_delay * (attempt + 1))  # Exponential backoff
+                time.sleep(delay)
+            finally:
+                # Errors that record no outcome must not leave the trial held forever
+                if trial:
+                    self.circuit_breaker.release_trial()
                 
         return None
\ No newline at end of file
@@ -1,5 +1,6 @@
 from typing import Dict, List, Union, Optional, Tuple
 from datetime import datetime
+from .trade_batch import TradeBatch
 
 class BaseProcessor:
     def process_market_data(self, raw_data: Dict, symbol: str, market_type: str = 'spot') -> Dict:
@@ -38,6 +39,7 @@ class BaseProcessor:
             asks: List[Tuple[float, float]]  # price, quantity pairs
             timestamp: int  # milliseconds since epoch
             lastUpdateId: int
+            metrics: Dict  # see ArrayOrderBook.metrics
         }
         """
         raise NotImplementedError
@@ -58,6 +60,20 @@ class BaseProcessor:
         """
         raise NotImplementedError
     
+    def process_trades_batch(self, raw_trades: List[Dict], symbol: str,
+                             market_type: str = 'spot') -> TradeBatch:
+        """Process a list of raw trades into one columnar batch
+        
+        Returns:
+        TradeBatch(
+            symbol: str
+            type: 'spot' | 'futures'
+            trades: numpy structured array of TRADE_DTYPE
+                (price, quantity, timestamp, isBuyerMaker, tradeId)
+        )
+        """
+        raise NotImplementedError
+    
     def _convert_timestamp(self, ts: Union[int, str]) -> int:
         """Convert various timestamp formats to milliseconds since epoch"""
         if isinstance(ts, str):
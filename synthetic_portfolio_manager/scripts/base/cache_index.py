@@ -0,0 +1,297 @@
+import bisect
+import heapq
+import json
+import os
+import uuid
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utilities.logging_config import get_logger
+from .durability import fsync_path
+
+INDEX_FILENAME = '.index.jsonl'
+
+
+class PrefixIndex:
+    def __init__(self):
+        """Sorted timestamps, file names and sizes for a single filename prefix"""
+        self.timestamps: List[int] = []
+        self.names: List[str] = []
+        self.sizes: List[int] = []
+
+    def add(self, timestamp: int, name: str, size: int = 0) -> None:
+        if not self.timestamps or timestamp > self.timestamps[-1]:
+            self.timestamps.append(timestamp)
+            self.names.append(name)
+            self.sizes.append(size)
+            return
+        lo = bisect.bisect_left(self.timestamps, timestamp)
+        pos = bisect.bisect_right(self.timestamps, timestamp)
+        if name in self.names[lo:pos]:
+            return
+        self.timestamps.insert(pos, timestamp)
+        self.names.insert(pos, name)
+        self.sizes.insert(pos, size)
+
+    def remove(self, name: str) -> None:
+        try:
+            pos = self.names.index(name)
+        except ValueError:
+            return
+        del self.timestamps[pos]
+        del self.names[pos]
+        del self.sizes[pos]
+
+    def keep(self, keep_mask: List[bool]) -> None:
+        """Retain only the entries whose mask value is True"""
+        self.timestamps = [v for v, k in zip(self.timestamps, keep_mask) if k]
+        self.names = [v for v, k in zip(self.names, keep_mask) if k]
+        self.sizes = [v for v, k in zip(self.sizes, keep_mask) if k]
+
+    def range(self, time_range: Optional[Tuple[int, int]] = None) -> Tuple[int, int]:
+        """Return the [lo, hi) positions of entries inside an inclusive time range"""
+        if not time_range:
+            return 0, len(self.timestamps)
+        start_ms, end_ms = time_range
+        return (bisect.bisect_left(self.timestamps, start_ms),
+                bisect.bisect_right(self.timestamps, end_ms))
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+
+class CacheIndex:
+    def __init__(self, directory: Path):
+        """Persistent timestamp index for one cache directory
+
+        Keeps a sorted (timestamp, file name) list per filename prefix so
+        latest-N and time-range lookups are binary searches. The index is
+        persisted as an append-only journal next to the data; it is rebuilt
+        from a single directory scan if the journal is missing, and replays
+        entries appended by other cache instances before each lookup.
+        Compaction writes a new file headed by a fresh generation id; a
+        reader that sees another file or generation reloads from the start
+        instead of resuming at its old offset.
+
+        Args:
+            directory: Cache directory holding `{prefix}_{timestamp}` files
+        """
+        self.directory = Path(directory)
+        self.path = self.directory / INDEX_FILENAME
+        self.logger = get_logger('cache.index')
+        self.prefixes: Dict[str, PrefixIndex] = {}
+        self._offset = 0
+        self._loaded = False
+        self._unsynced = False
+        # Identity of the journal file read so far: (st_dev, st_ino) and generation id
+        self._file_id: Optional[Tuple[int, int]] = None
+        self._generation: Optional[str] = None
+
+    @staticmethod
+    def parse_name(name: str) -> Optional[Tuple[str, int]]:
+        """Split a cache file name into (prefix, timestamp)"""
+        stem = name.split('.', 1)[0]
+        prefix, _, suffix = stem.rpartition('_')
+        if not prefix or not suffix.isdigit():
+            return None
+        return prefix, int(suffix)
+
+    def _apply(self, op: List) -> None:
+        if op[0] == '#':
+            self._generation = op[1]
+        elif op[0] == '+':
+            prefix, timestamp, name = op[1:4]
+            size = op[4] if len(op) > 4 else 0
+            self.prefixes.setdefault(prefix, PrefixIndex()).add(timestamp, name, size)
+        elif op[0] == '-':
+            _, prefix, name = op
+            if prefix in self.prefixes:
+                self.prefixes[prefix].remove(name)
+
+    def _rebuild(self) -> None:
+        """Rebuild the index from a directory scan and persist it"""
+        self.prefixes = {}
+        for path in self.directory.iterdir():
+            if path.name.startswith('.') or not path.is_file():
+                continue
+            parsed = self.parse_name(path.name)
+            if parsed:
+                prefix, timestamp = parsed
+                self.prefixes.setdefault(prefix, PrefixIndex()).add(
+                    timestamp, path.name, path.stat().st_size
+                )
+        self.compact()
+
+    def _reset(self) -> None:
+        self.prefixes = {}
+        self._offset = 0
+        self._generation = None
+
+    def _refresh(self) -> None:
+        """Load the journal on first use, then replay entries appended since"""
+        if not self._loaded:
+            self._loaded = True
+            if not self.path.exists():
+                self._rebuild()
+                return
+
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            self._rebuild()
+            return
+
+        if (stat.st_dev, stat.st_ino) != self._file_id or stat.st_size < self._offset:
+            # Journal was compacted by another instance (or not read yet)
+            self._reset()
+        if stat.st_size == self._offset:
+            return
+
+        with open(self.path, 'r') as f:
+            fstat = os.fstat(f.fileno())
+            if (fstat.st_dev, fstat.st_ino) != self._file_id and self._offset:
+                # Replaced between the stat and the open
+                self._reset()
+            elif self._offset:
+                # A recycled inode is not enough; the generation must match too
+                header = f.readline()
+                generation = None
+                if header.startswith('["#"'):
+                    generation = json.loads(header)[1]
+                if generation != self._generation:
+                    self._reset()
+            self._file_id = (fstat.st_dev, fstat.st_ino)
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith('\n'):
+                    break
+                try:
+                    self._apply(json.loads(line))
+                except (json.JSONDecodeError, ValueError) as e:
+                    self.logger.warning(f"Skipping bad index entry in {self.path}: {e}")
+                self._offset += len(line.encode('utf-8'))
+
+    def _append(self, op: List) -> None:
+        self._refresh()
+        line = json.dumps(op, separators=(',', ':')) + '\n'
+        with open(self.path, 'a') as f:
+            f.write(line)
+            f.flush()
+            fstat = os.fstat(f.fileno())
+            end = f.tell()
+        self._unsynced = True
+        encoded = len(line.encode('utf-8'))
+        if (fstat.st_dev, fstat.st_ino) == self._file_id and end - encoded == self._offset:
+            self._offset = end
+            self._apply(op)
+        else:
+            # Another instance appended or compacted in between; replay from the file
+            self._refresh()
+
+    def add(self, prefix: str, timestamp: int, name: str, size: int = 0) -> None:
+        """Record a newly written cache file"""
+        self._append(['+', prefix, timestamp, name, size])
+
+    def remove(self, prefix: str, name: str) -> None:
+        """Forget a cache file that no longer exists"""
+        self._append(['-', prefix, name])
+
+    def compact(self) -> None:
+        """Rewrite the journal to contain only live entries"""
+        generation = uuid.uuid4().hex
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            f.write(json.dumps(['#', generation], separators=(',', ':')) + '\n')
+            for prefix, entries in self.prefixes.items():
+                for timestamp, name, size in zip(entries.timestamps, entries.names, entries.sizes):
+                    f.write(json.dumps(['+', prefix, timestamp, name, size],
+                                       separators=(',', ':')) + '\n')
+        os.replace(tmp_path, self.path)
+        stat = self.path.stat()
+        self._offset = stat.st_size
+        self._file_id = (stat.st_dev, stat.st_ino)
+        self._generation = generation
+        self._unsynced = True
+
+    def sync(self) -> None:
+        """fsync the journal and its directory if they changed since the last sync"""
+        if not self._unsynced:
+            return
+        self._unsynced = False
+        fsync_path(self.path)
+        fsync_path(self.directory)
+
+    def matching(self, pattern: str) -> List[str]:
+        """Return indexed prefixes matching a filename or glob pattern"""
+        self._refresh()
+        if not any(c in pattern for c in '*?['):
+            return [pattern] if self.prefixes.get(pattern) else []
+        return [prefix for prefix in self.prefixes if fnmatch(prefix, pattern)]
+
+    def latest(self, pattern: str,
+               time_range: Optional[Tuple[int, int]] = None) -> Iterator[Tuple[int, str, str]]:
+        """Yield (timestamp, prefix, name) entries newest first
+
+        Args:
+            pattern: Filename prefix or glob pattern
+            time_range: Optional (start_ms, end_ms) inclusive filter
+        """
+        def newest_first(prefix: str) -> Iterator[Tuple[int, str, str]]:
+            entries = self.prefixes[prefix]
+            lo, hi = entries.range(time_range)
+            for i in range(hi - 1, lo - 1, -1):
+                yield entries.timestamps[i], prefix, entries.names[i]
+
+        streams = [newest_first(prefix) for prefix in self.matching(pattern)]
+        if len(streams) == 1:
+            return streams[0]
+        return heapq.merge(*streams, key=lambda entry: entry[0], reverse=True)
+
+    def older_than(self, cutoff_ms: int) -> List[Tuple[str, str]]:
+        """Return (prefix, name) pairs for entries older than a cutoff"""
+        self._refresh()
+        expired = []
+        for prefix, entries in self.prefixes.items():
+            pos = bisect.bisect_left(entries.timestamps, cutoff_ms)
+            expired.extend((prefix, name) for name in entries.names[:pos])
+        return expired
+
+    def discard(self, entries: List[Tuple[str, str]]) -> None:
+        """Drop many entries at once and compact the journal"""
+        by_prefix: Dict[str, set] = {}
+        for prefix, name in entries:
+            by_prefix.setdefault(prefix, set()).add(name)
+
+        for prefix, names in by_prefix.items():
+            index = self.prefixes.get(prefix)
+            if index is None:
+                continue
+            index.keep([name not in names for name in index.names])
+            if not len(index):
+                del self.prefixes[prefix]
+        self.compact()
+
+    def timestamps(self) -> Dict[str, List[int]]:
+        """Return the sorted timestamps of every prefix"""
+        self._refresh()
+        return {prefix: list(entries.timestamps) for prefix, entries in self.prefixes.items()}
+
+    def names_at(self, prefix: str, timestamps: set) -> List[Tuple[str, str]]:
+        """Return (prefix, name) pairs for the given timestamps of a prefix"""
+        self._refresh()
+        entries = self.prefixes.get(prefix)
+        if entries is None:
+            return []
+        return [(prefix, name) for ts, name in zip(entries.timestamps, entries.names)
+                if ts in timestamps]
+
+    def usage(self) -> int:
+        """Total size in bytes of the indexed files"""
+        self._refresh()
+        return sum(sum(entries.sizes) for entries in self.prefixes.values())
+
+    def count(self) -> int:
+        """Total number of indexed files"""
+        self._refresh()
+        return sum(len(entries) for entries in self.prefixes.values())
@@ -0,0 +1,212 @@
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+
+from utilities.logging_config import get_logger
+from .durability import fsync_files
+from .trade_batch import TradeBatch
+
+DATASETS = ['trades', 'market', 'orderbook', 'klines']
+
+# Fixed column types per dataset, so every part file agrees even when a
+# column is all-null in one batch or only present for futures rows
+SCHEMAS = {
+    'trades': pa.schema([
+        ('symbol', pa.string()), ('type', pa.string()), ('price', pa.float64()),
+        ('quantity', pa.float64()), ('timestamp', pa.int64()),
+        ('isBuyerMaker', pa.bool_()), ('tradeId', pa.int64()),
+    ]),
+    'market': pa.schema([
+        ('symbol', pa.string()), ('exchange', pa.string()), ('type', pa.string()),
+        ('price', pa.float64()), ('timestamp', pa.int64()), ('volume24h', pa.float64()),
+        ('priceChange24h', pa.float64()), ('price24hHigh', pa.float64()),
+        ('price24hLow', pa.float64()), ('tradeCount24h', pa.int64()),
+        ('volumeDelta24h', pa.float64()), ('priceChange1h', pa.float64()),
+        ('bidAskSpread', pa.float64()), ('openInterest', pa.float64()),
+        ('fundingRate', pa.float64()), ('liquidations24h', pa.float64()),
+        ('markPrice', pa.float64()), ('indexPrice', pa.float64()),
+        ('nextFundingTime', pa.int64()),
+    ]),
+    'orderbook': pa.schema([
+        ('symbol', pa.string()), ('type', pa.string()), ('timestamp', pa.int64()),
+        ('lastUpdateId', pa.int64()), ('side', pa.string()), ('level', pa.int64()),
+        ('price', pa.float64()), ('quantity', pa.float64()),
+    ]),
+    'klines': pa.schema([
+        ('symbol', pa.string()), ('type', pa.string()), ('interval', pa.string()),
+        ('timestamp', pa.int64()), ('open', pa.float64()), ('high', pa.float64()),
+        ('low', pa.float64()), ('close', pa.float64()), ('volume', pa.float64()),
+        ('closeTime', pa.int64()), ('quoteVolume', pa.float64()), ('tradeCount', pa.int64()),
+        ('takerBuyVolume', pa.float64()), ('takerBuyQuoteVolume', pa.float64()),
+    ]),
+}
+DEFAULT_FLUSH_ROWS = 50000
+# Part files tracked for the next sync; beyond this they are fsynced on flush
+MAX_UNSYNCED_PARTS = 1024
+
+
+class ColumnarStore:
+    def __init__(self, directory: str, flush_rows: int = DEFAULT_FLUSH_ROWS):
+        """Partitioned Parquet sink for processed data
+
+        Rows are buffered per (dataset, symbol, date) and written as Parquet
+        part files under `{directory}/{dataset}/symbol=.../date=YYYY-MM-DD/`,
+        so readers can prune partitions and row groups by symbol and time.
+
+        Args:
+            directory: Base directory for Parquet datasets
+            flush_rows: Buffered row count at which a partition is written out
+        """
+        self.base_dir = Path(directory)
+        self.flush_rows = flush_rows
+        self.logger = get_logger('cache.columnar')
+        self._buffers: Dict[Tuple[str, str, str], List[Dict]] = {}
+        self._frames: Dict[Tuple[str, str, str], List[pd.DataFrame]] = {}
+        self._buffered_rows = 0
+        self._unsynced: List[Path] = []
+
+    @staticmethod
+    def _partition_date(timestamp_ms: int) -> str:
+        return datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+
+    def _append(self, dataset: str, rows: List[Dict]) -> None:
+        for row in rows:
+            key = (dataset, row['symbol'], self._partition_date(row['timestamp']))
+            self._buffers.setdefault(key, []).append(row)
+        self._buffered_rows += len(rows)
+        if self._buffered_rows >= self.flush_rows:
+            self.flush()
+
+    def append_trades(self, trades: List[Dict]) -> None:
+        """Buffer processed trades (output of `process_trade_data`)"""
+        self._append('trades', trades)
+
+    def append_trade_batch(self, batch: TradeBatch) -> None:
+        """Buffer a TradeBatch (output of `process_trades_batch`) without per-trade rows"""
+        if not len(batch):
+            return
+        df = batch.to_frame()
+        dates = pd.to_datetime(df['timestamp'], unit='ms', utc=True).dt.strftime('%Y-%m-%d')
+        for date, part in df.groupby(dates, sort=False):
+            self._frames.setdefault(('trades', batch.symbol, date), []).append(part)
+        self._buffered_rows += len(df)
+        if self._buffered_rows >= self.flush_rows:
+            self.flush()
+
+    def append_market(self, market_data: Dict) -> None:
+        """Buffer a processed market ticker (output of `process_market_data`)"""
+        self._append('market', [market_data])
+
+    def append_klines(self, klines: List[Dict]) -> None:
+        """Buffer processed klines (output of `process_kline_data`)"""
+        self._append('klines', klines)
+
+    def append_orderbook(self, orderbook: Dict) -> None:
+        """Buffer a processed orderbook snapshot as one row per price level"""
+        timestamp = orderbook['timestamp'] or int(time.time() * 1000)
+        rows = []
+        for side, levels in (('bid', orderbook.get('bids', [])), ('ask', orderbook.get('asks', []))):
+            for level, (price, quantity) in enumerate(levels):
+                rows.append({
+                    'symbol': orderbook['symbol'],
+                    'type': orderbook['type'],
+                    'timestamp': timestamp,
+                    'lastUpdateId': orderbook['lastUpdateId'],
+                    'side': side,
+                    'level': level,
+                    'price': price,
+                    'quantity': quantity
+                })
+        self._append('orderbook', rows)
+
+    def flush(self) -> None:
+        """Write all buffered rows to new Parquet part files"""
+        for key in list(self._buffers) + [key for key in self._frames if key not in self._buffers]:
+            dataset, symbol, date = key
+            partition_dir = self.base_dir / dataset / f"symbol={symbol}" / f"date={date}"
+            partition_dir.mkdir(parents=True, exist_ok=True)
+
+            frames = self._frames.get(key, [])
+            if key in self._buffers:
+                frames = [pd.DataFrame(self._buffers[key])] + frames
+            df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+            # Partition columns live in the directory names, not the file
+            schema = SCHEMAS[dataset].remove(SCHEMAS[dataset].get_field_index('symbol'))
+            df = df.sort_values('timestamp').reindex(columns=schema.names)
+            path = partition_dir / f"part-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}.parquet"
+            df.to_parquet(path, index=False, schema=schema)
+            self._unsynced.append(path)
+            self.logger.debug(f"Wrote {len(df)} {dataset} rows to {path}")
+
+        self._buffers.clear()
+        self._frames.clear()
+        self._buffered_rows = 0
+        if len(self._unsynced) >= MAX_UNSYNCED_PARTS:
+            self.sync()
+
+    def sync(self) -> None:
+        """fsync the part files written since the last sync and their directories"""
+        paths, self._unsynced = self._unsynced, []
+        fsync_files(paths, self.base_dir)
+
+    def read(self, dataset: str, symbols: Optional[List[str]] = None,
+             time_range: Optional[Tuple[int, int]] = None,
+             columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Read a dataset with symbol and time-range predicates pushed down
+
+        Symbol and date filters prune whole partition directories; the
+        timestamp filter is applied against Parquet row-group statistics.
+
+        Args:
+            dataset: One of 'trades', 'market', 'orderbook', 'klines'
+            symbols: Optional list of symbols to include
+            time_range: Optional (start_ms, end_ms) inclusive filter
+            columns: Optional subset of columns to load
+
+        Returns:
+            DataFrame sorted by timestamp (empty if nothing matches)
+        """
+        if dataset not in DATASETS:
+            raise ValueError(f"Invalid dataset: {dataset}. Must be one of {DATASETS}")
+
+        dataset_dir = self.base_dir / dataset
+        if not dataset_dir.exists():
+            return pd.DataFrame(columns=columns)
+
+        filters = []
+        if symbols:
+            filters.append(('symbol', 'in', list(symbols)))
+        if time_range:
+            start_ms, end_ms = time_range
+            filters.extend([
+                ('date', '>=', self._partition_date(start_ms)),
+                ('date', '<=', self._partition_date(end_ms)),
+                ('timestamp', '>=', start_ms),
+                ('timestamp', '<=', end_ms)
+            ])
+
+        # Reading with the declared schema also casts parts written before
+        # it existed (e.g. an all-null column stored as type null)
+        df = pd.read_parquet(
+            dataset_dir,
+            columns=columns,
+            filters=filters or None,
+            partitioning='hive',
+            schema=SCHEMAS[dataset].append(pa.field('date', pa.string()))
+        )
+        for partition_column in ('symbol', 'date'):
+            if partition_column in df.columns:
+                df[partition_column] = df[partition_column].astype(str)
+        if 'timestamp' in df.columns:
+            df = df.sort_values('timestamp', kind='stable').reset_index(drop=True)
+        return df
+
+    def close(self) -> None:
+        """Flush any buffered rows and sync the part files"""
+        self.flush()
+        self.sync()
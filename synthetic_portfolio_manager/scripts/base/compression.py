@@ -0,0 +1,135 @@
+import gzip
+import zlib
+from pathlib import Path
+from typing import IO, Optional, Union
+
+try:
+    import zstandard
+except ImportError:  # optional faster codec
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:  # optional faster codec
+    lz4 = None
+
+# Leading bytes written by each codec, used to detect the format on read
+CODEC_MAGIC = {
+    'gzip': b'\x1f\x8b',
+    'zstd': b'\x28\xb5\x2f\xfd',
+    'lz4': b'\x04\x22\x4d\x18',
+}
+
+CODEC_SUFFIXES = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+    'lz4': '.lz4',
+}
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def available_codecs() -> list:
+    """Return the codecs usable in this environment, fastest first"""
+    codecs = []
+    if zstandard is not None:
+        codecs.append('zstd')
+    if lz4 is not None:
+        codecs.append('lz4')
+    codecs.append('gzip')
+    return codecs
+
+
+def resolve_codec(compress: Union[bool, str, None]) -> Optional[str]:
+    """Turn a `compress` setting into a codec name
+
+    Args:
+        compress: False/None for no compression, True for the fastest
+            installed codec, or an explicit codec name
+
+    Returns:
+        Codec name or None
+    """
+    if not compress:
+        return None
+    if compress is True:
+        return available_codecs()[0]
+    if compress not in CODEC_MAGIC:
+        raise ValueError(f"Invalid codec: {compress}. Must be one of {list(CODEC_MAGIC)}")
+    if compress not in available_codecs():
+        raise ValueError(f"Codec {compress} is not installed")
+    return compress
+
+
+def detect_codec(head: bytes) -> Optional[str]:
+    """Detect the codec from the leading bytes of a file or record"""
+    for codec, magic in CODEC_MAGIC.items():
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+# Errors raised while decoding a corrupt or truncated compressed stream
+DECOMPRESSION_ERRORS = (OSError, EOFError, zlib.error) + (
+    (zstandard.ZstdError,) if zstandard is not None else ()
+) + (
+    (RuntimeError,) if lz4 is not None else ()
+)
+
+
+def open_for_write(path: Path, codec: Optional[str]) -> IO[str]:
+    """Open a text stream that encodes with the given codec while writing"""
+    if codec == 'gzip':
+        return gzip.open(path, 'wt', compresslevel=GZIP_LEVEL, encoding='utf-8')
+    if codec == 'zstd':
+        return zstandard.open(path, 'wt', cctx=zstandard.ZstdCompressor(level=ZSTD_LEVEL),
+                              encoding='utf-8')
+    if codec == 'lz4':
+        return lz4.frame.open(path, 'wt', encoding='utf-8')
+    return open(path, 'w')
+
+
+def open_for_read(path: Path) -> IO[str]:
+    """Open a text stream, decoding whatever codec the file was written with"""
+    with open(path, 'rb') as f:
+        codec = detect_codec(f.read(4))
+
+    if codec == 'gzip':
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if codec == 'zstd':
+        if zstandard is None:
+            raise OSError(f"zstandard is required to read {path}")
+        return zstandard.open(path, 'rt', encoding='utf-8')
+    if codec == 'lz4':
+        if lz4 is None:
+            raise OSError(f"lz4 is required to read {path}")
+        return lz4.frame.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r')
+
+
+def compress_bytes(data: bytes, codec: Optional[str]) -> bytes:
+    """Encode a single record payload"""
+    if codec == 'gzip':
+        return gzip.compress(data, compresslevel=GZIP_LEVEL)
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if codec == 'lz4':
+        return lz4.frame.compress(data)
+    return data
+
+
+def decompress_bytes(data: bytes) -> bytes:
+    """Decode a single record payload, detecting its codec"""
+    codec = detect_codec(data[:4])
+    if codec == 'gzip':
+        return gzip.decompress(data)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise OSError("zstandard is required to read this record")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == 'lz4':
+        if lz4 is None:
+            raise OSError("lz4 is required to read this record")
+        return lz4.frame.decompress(data)
+    return data
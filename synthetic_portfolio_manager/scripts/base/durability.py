@@ -0,0 +1,38 @@
+import os
+from pathlib import Path
+from typing import Iterable, Union
+
+
+def fsync_path(path: Union[str, Path]) -> None:
+    """fsync a file or directory by path; missing paths are skipped
+
+    Directories are fsynced so that entries for newly created or renamed
+    files survive a crash. Windows cannot open directories, so there they
+    are skipped.
+    """
+    if os.name == 'nt' and os.path.isdir(path):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_files(paths: Iterable[Path], root: Union[str, Path]) -> None:
+    """fsync files, then every directory between them and `root` (inclusive)"""
+    root = Path(root)
+    directories = set()
+    for path in paths:
+        fsync_path(path)
+        parent = Path(path).parent
+        while parent not in directories:
+            directories.add(parent)
+            if parent == root or parent == parent.parent:
+                break
+            parent = parent.parent
+    for directory in sorted(directories, key=lambda d: len(d.parts), reverse=True):
+        fsync_path(directory)
@@ -0,0 +1,39 @@
+import json
+from typing import Any, Dict, Union
+
+try:
+    import orjson
+except ImportError:  # optional faster JSON parser
+    orjson = None
+
+JSONBytes = Union[bytes, bytearray, memoryview]
+
+
+def loads(body: Union[JSONBytes, str]) -> Any:
+    """Parse a JSON document, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(body)
+    if isinstance(body, memoryview):
+        body = body.tobytes()
+    return json.loads(body)
+
+
+def is_raw(data: Any) -> bool:
+    """Whether a cache payload is an undecoded JSON body"""
+    return isinstance(data, (bytes, bytearray, memoryview))
+
+
+def encode_envelope(cache_data: Dict) -> bytes:
+    """Compact UTF-8 JSON for a cache envelope or store record
+
+    A raw payload (an undecoded response body) is spliced in as it is, so
+    it is never parsed and re-serialized on the way to disk. Other
+    payloads are serialized normally.
+    """
+    data = cache_data.get('data')
+    if not is_raw(data):
+        return json.dumps(cache_data, separators=(',', ':')).encode('utf-8')
+    rest = json.dumps({key: value for key, value in cache_data.items() if key != 'data'},
+                      separators=(',', ':')).encode('utf-8')
+    separator = b',' if len(rest) > 2 else b''
+    return b''.join((b'{"data":', data, separator, rest[1:]))
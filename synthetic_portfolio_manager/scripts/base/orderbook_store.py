@@ -0,0 +1,327 @@
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from utilities.logging_config import get_logger
+from .segment_store import SegmentStore, DEFAULT_SEGMENT_MAX_BYTES
+
+DELTA_DIRNAME = 'orderbook_deltas'
+DEFAULT_KEYFRAME_INTERVAL = 100
+
+# Book state: (fields other than levels, bids price -> qty, asks price -> qty)
+BookState = Tuple[Dict[str, Any], Dict[Any, Any], Dict[Any, Any]]
+
+
+def _is_book(data: Any) -> bool:
+    """Whether data looks like an orderbook with [price, quantity] levels"""
+    if not isinstance(data, dict):
+        return False
+    for side in ('bids', 'asks'):
+        levels = data.get(side)
+        if not isinstance(levels, list):
+            return False
+        if not all(isinstance(level, (list, tuple)) and len(level) == 2 for level in levels):
+            return False
+    return True
+
+
+def _book_state(data: Dict) -> BookState:
+    fields = {key: value for key, value in data.items() if key not in ('bids', 'asks')}
+    return fields, {p: q for p, q in data['bids']}, {p: q for p, q in data['asks']}
+
+
+def _book_data(state: BookState) -> Dict:
+    fields, bids, asks = state
+    data = dict(fields)
+    data['bids'] = [[p, q] for p, q in sorted(bids.items(), key=lambda l: float(l[0]), reverse=True)]
+    data['asks'] = [[p, q] for p, q in sorted(asks.items(), key=lambda l: float(l[0]))]
+    return data
+
+
+def _diff(previous: Dict, current: Dict) -> Tuple[List, List]:
+    """Return ([price, qty] levels added or changed, prices removed)"""
+    changed = [[p, q] for p, q in current.items() if p not in previous or previous[p] != q]
+    removed = [p for p in previous if p not in current]
+    return changed, removed
+
+
+class OrderbookDeltaStore:
+    def __init__(self, base_dir: Path, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+                 max_segment_bytes: int = DEFAULT_SEGMENT_MAX_BYTES,
+                 codec: Optional[str] = None):
+        """Delta-encoded orderbook storage on top of segment logs
+
+        Every `keyframe_interval` records per prefix a full snapshot
+        (keyframe) is written; the records in between only hold the levels
+        that changed since the previous snapshot, plus the non-level fields.
+        Each record carries the timestamp of its keyframe (its chain), so a
+        book can be rebuilt from the keyframe and the chain's deltas alone.
+        Snapshots saved out of order, or payloads that are not books, are
+        written as standalone records outside any chain.
+
+        Implements the same interface as SegmentStore so BaseCache can route
+        orderbook data to it.
+
+        Args:
+            base_dir: Base cache directory
+            keyframe_interval: Records between full snapshots
+            max_segment_bytes: Size at which a segment is sealed
+            codec: Optional codec applied to each record payload
+        """
+        self.segments = SegmentStore(Path(base_dir) / DELTA_DIRNAME, max_segment_bytes, codec)
+        self.keyframe_interval = keyframe_interval
+        self.logger = get_logger('cache.orderbook')
+
+        # (data_type, subdir, prefix) -> (book state, chain timestamp, last timestamp, deltas)
+        self._chains: Dict[Tuple[str, str, str], Tuple[BookState, int, int, int]] = {}
+
+    def append(self, data_type: str, subdir: str, prefix: str,
+               timestamp: int, cache_data: Dict) -> None:
+        """Append an orderbook snapshot as a keyframe or delta record
+
+        Args:
+            data_type: Type of data (always 'orderbook' when routed by BaseCache)
+            subdir: 'raw' or 'processed'
+            prefix: Base filename the record is stored under
+            timestamp: Record timestamp in milliseconds
+            cache_data: Cache envelope with data and metadata
+        """
+        key = (data_type, subdir, prefix)
+        data = cache_data['data']
+        chain = self._chains.get(key)
+
+        if not _is_book(data) or (chain and timestamp < chain[2]):
+            record = {'data': data, 'metadata': cache_data['metadata'], 'standalone': True}
+        elif chain is None or chain[3] + 1 >= self.keyframe_interval:
+            record = {'data': data, 'metadata': cache_data['metadata'], 'chain': timestamp}
+            self._chains[key] = (_book_state(data), timestamp, timestamp, 0)
+        else:
+            (_, bids, asks), chain_timestamp, _, deltas = chain
+            state = _book_state(data)
+            changed_bids, removed_bids = _diff(bids, state[1])
+            changed_asks, removed_asks = _diff(asks, state[2])
+            record = {
+                'delta': {
+                    'fields': state[0],
+                    'bids': changed_bids,
+                    'asks': changed_asks,
+                    'bids_removed': removed_bids,
+                    'asks_removed': removed_asks
+                },
+                'metadata': cache_data['metadata'],
+                'chain': chain_timestamp
+            }
+            self._chains[key] = (state, chain_timestamp, timestamp, deltas + 1)
+
+        self.segments.append(data_type, subdir, prefix, timestamp, record)
+
+    @staticmethod
+    def _apply(state: BookState, delta: Dict) -> BookState:
+        _, bids, asks = state
+        bids, asks = dict(bids), dict(asks)
+        for levels, changed, removed in ((bids, delta['bids'], delta['bids_removed']),
+                                         (asks, delta['asks'], delta['asks_removed'])):
+            for price in removed:
+                levels.pop(price, None)
+            for price, quantity in changed:
+                levels[price] = quantity
+        return delta['fields'], bids, asks
+
+    def _replay(self, data_type: str, subdir: str, prefix: str, record: Dict) -> Optional[BookState]:
+        """Rebuild the book for a delta record from its keyframe"""
+        chain = record['chain']
+        timestamp = record['metadata']['timestamp']
+        records = self.segments.read(data_type, subdir, prefix, sys.maxsize,
+                                     (chain, timestamp), oldest_first=True)
+
+        state = None
+        for item in records:
+            if item.get('chain') != chain:
+                continue
+            if 'delta' not in item:
+                state = _book_state(item['data'])
+            elif state is not None:
+                state = self._apply(state, item['delta'])
+
+        if state is None:
+            self.logger.warning(f"Missing keyframe {chain} for orderbook {prefix}")
+        return state
+
+    def read(self, data_type: str, subdir: str, pattern: str, n_latest: int = 1,
+             time_range: Optional[Tuple[int, int]] = None) -> List[Dict]:
+        """Read the newest snapshots matching a filename pattern
+
+        Args:
+            data_type: Type of data to load
+            subdir: 'raw' or 'processed'
+            pattern: Base filename or glob pattern to match
+            n_latest: Maximum number of snapshots to return
+            time_range: Optional (start_ms, end_ms) inclusive filter
+
+        Returns:
+            List of cache envelopes with full books, newest first
+        """
+        records = self.segments.read(data_type, subdir, pattern, n_latest, time_range)
+
+        # Walk oldest to newest so consecutive deltas build on each other
+        states: Dict[Tuple[str, int], BookState] = {}
+        results = []
+        for record in reversed(records):
+            metadata = record['metadata']
+            if 'delta' not in record:
+                if not record.get('standalone'):
+                    states[(metadata['filename'], record['chain'])] = _book_state(record['data'])
+                results.append({'data': record['data'], 'metadata': metadata})
+                continue
+
+            key = (metadata['filename'], record['chain'])
+            if key in states:
+                state = self._apply(states[key], record['delta'])
+            else:
+                state = self._replay(data_type, subdir, metadata['filename'], record)
+                if state is None:
+                    continue
+            states[key] = state
+            results.append({'data': _book_data(state), 'metadata': metadata})
+
+        results.reverse()
+        return results
+
+    def reconstruct(self, data_type: str, subdir: str, prefix: str,
+                    timestamp: int) -> Optional[Dict]:
+        """Return the book as of a timestamp (the newest snapshot at or before it)"""
+        results = self.read(data_type, subdir, prefix, 1, (float('-inf'), timestamp))
+        return results[0] if results else None
+
+    def _chain_start(self, data_type: str, subdir: str, prefix: str, cutoff_ms: int) -> int:
+        """Earliest timestamp that must be kept so records after a cutoff stay readable"""
+        n = self.keyframe_interval + 1
+        while True:
+            records = self.segments.read(data_type, subdir, prefix, n,
+                                         (cutoff_ms, float('inf')), oldest_first=True)
+            for record in records:
+                if not record.get('standalone'):
+                    return min(cutoff_ms, record['chain'])
+            if len(records) < n:
+                return cutoff_ms
+            n *= 2
+
+    def expire(self, data_type: str, subdir: str, cutoff_ms: int) -> int:
+        """Remove records older than a cutoff
+
+        Records before the cutoff that a newer delta still depends on are kept
+        until their whole chain has aged out.
+
+        Returns:
+            Number of records removed
+        """
+        removed = 0
+        for prefix, timestamps in self.segments.timestamps(data_type, subdir).items():
+            if timestamps[0] >= cutoff_ms:
+                continue
+            keep_from = self._chain_start(data_type, subdir, prefix, cutoff_ms)
+            expired = {timestamp for timestamp in timestamps if timestamp < keep_from}
+            if expired:
+                removed += self.segments.delete(data_type, subdir, prefix, expired)
+
+            # Start a new chain if the current keyframe was removed
+            chain = self._chains.get((data_type, subdir, prefix))
+            if chain and chain[1] < keep_from:
+                del self._chains[(data_type, subdir, prefix)]
+        return removed
+
+    def delete(self, data_type: str, subdir: str, prefix: str, timestamps: set) -> int:
+        """Remove the records of a prefix with the given timestamps
+
+        A delta only holds the changes since the record before it, so the
+        first record kept after removed ones in a chain is rewritten: as a
+        delta from the last kept record of the chain, or as a full book if
+        none is left before it. Later deltas of the chain stay valid.
+
+        Returns:
+            Number of records removed
+        """
+        if not timestamps:
+            return 0
+        start = self._chain_start(data_type, subdir, prefix, min(timestamps))
+        records = self.segments.read(data_type, subdir, prefix, sys.maxsize,
+                                     (start, float('inf')), oldest_first=True)
+
+        states: Dict[int, BookState] = {}        # chain -> book after its latest record
+        kept: Dict[int, Optional[BookState]] = {}  # chain -> book after its latest kept record
+        dirty = set()                            # chains with removals since their last kept record
+        removed, rewritten = set(), []
+        for record in records:
+            timestamp = record['metadata']['timestamp']
+            if record.get('standalone'):
+                if timestamp in timestamps:
+                    removed.add(timestamp)
+                continue
+
+            chain = record['chain']
+            if 'delta' not in record:
+                states[chain] = _book_state(record['data'])
+            elif chain in states:
+                states[chain] = self._apply(states[chain], record['delta'])
+            else:
+                continue   # Keyframe already gone; the chain cannot be rebuilt
+
+            if timestamp in timestamps:
+                removed.add(timestamp)
+                dirty.add(chain)
+                continue
+            if chain in dirty:
+                dirty.discard(chain)
+                state = states[chain]
+                if kept.get(chain) is None:
+                    replacement = {'data': _book_data(state), 'chain': chain}
+                else:
+                    previous = kept[chain]
+                    changed_bids, removed_bids = _diff(previous[1], state[1])
+                    changed_asks, removed_asks = _diff(previous[2], state[2])
+                    replacement = {'delta': {'fields': state[0],
+                                             'bids': changed_bids, 'asks': changed_asks,
+                                             'bids_removed': removed_bids,
+                                             'asks_removed': removed_asks},
+                                   'chain': chain}
+                replacement['metadata'] = record['metadata']
+                rewritten.append((timestamp, replacement))
+            kept[chain] = states[chain]
+
+        if not removed:
+            return 0
+        self.segments.delete(data_type, subdir, prefix,
+                             removed | {timestamp for timestamp, _ in rewritten})
+        for timestamp, replacement in rewritten:
+            self.segments.append(data_type, subdir, prefix, timestamp, replacement)
+
+        # New deltas must not build on a book that was just removed
+        key = (data_type, subdir, prefix)
+        chain = self._chains.get(key)
+        if chain and chain[1] in dirty:
+            del self._chains[key]
+        return len(removed)
+
+    def timestamps(self, data_type: str, subdir: str) -> Dict[str, List[int]]:
+        """Return the sorted record timestamps of every prefix"""
+        return self.segments.timestamps(data_type, subdir)
+
+    def usage(self, data_type: str, subdir: str) -> int:
+        """Total size in bytes of the segment files"""
+        return self.segments.usage(data_type, subdir)
+
+    def count(self, data_type: str, subdir: str) -> int:
+        """Count stored snapshots"""
+        return self.segments.count(data_type, subdir)
+
+    def sync(self) -> None:
+        """fsync every active segment"""
+        self.segments.sync()
+
+    def sync_durable(self) -> None:
+        """fsync every active segment and the directories leading to it"""
+        self.segments.sync_durable()
+
+    def close(self) -> None:
+        """Close open append handles"""
+        self.segments.close()
@@ -0,0 +1,157 @@
+import asyncio
+import re
+import threading
+import time
+from typing import Callable, Dict, Mapping, Optional
+from urllib.parse import urlparse
+
+from utilities.logging_config import get_logger
+
+INTERVAL_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# e.g. X-MBX-USED-WEIGHT-1M, X-MBX-ORDER-COUNT-10S (case varies by API)
+USAGE_HEADER = re.compile(r'^x-mbx-(used-weight|order-count)-(\d+[smhd])$')
+
+_LIMITERS: Dict[str, 'RateLimiter'] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def interval_seconds(interval: str) -> int:
+    """Convert a Binance interval such as '1m' or '10s' to seconds"""
+    return int(interval[:-1]) * INTERVAL_SECONDS[interval[-1].lower()]
+
+
+class TokenBucket:
+    def __init__(self, capacity: int, period_seconds: float,
+                 clock: Callable[[], float] = time.monotonic):
+        """Token bucket holding `capacity` tokens, refilled evenly over `period_seconds`
+
+        Args:
+            capacity: Maximum tokens (the limit per period)
+            period_seconds: Time for an empty bucket to refill completely
+            clock: Monotonic time source
+        """
+        self.capacity = capacity
+        self.rate = capacity / period_seconds
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take tokens, returning how long the caller must wait before using them
+
+        The balance may go negative so that concurrent callers queue up
+        behind each other instead of racing for the same refill.
+        """
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+        return max(0.0, -self.tokens / self.rate)
+
+    def sync_used(self, used: float) -> None:
+        """Lower the balance to match usage reported by the server"""
+        self._refill()
+        self.tokens = min(self.tokens, self.capacity - used)
+
+    def hold(self, seconds: float) -> None:
+        """Lower the balance so the next reservation waits at least `seconds`"""
+        self._refill()
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class RateLimiter:
+    def __init__(self, weight_limit: int, weight_interval: str = '1m',
+                 order_limits: Optional[Dict[str, int]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """Request-weight limiter for one API host
+
+        Callers reserve the weight of each request before sending it, and
+        the buckets are corrected from the usage headers of each response,
+        so requests made by other fetchers or processes sharing the same IP
+        are accounted for. Safe to share between threads and coroutines.
+
+        Args:
+            weight_limit: Request weight allowed per weight_interval
+            weight_interval: Interval of the weight limit ('1m' on Binance)
+            order_limits: Optional order-count limits by interval, e.g. {'10s': 50}
+            clock: Monotonic time source
+        """
+        self.weight_interval = weight_interval.lower()
+        self.weight = TokenBucket(weight_limit, interval_seconds(weight_interval), clock)
+        self.orders = {
+            interval.lower(): TokenBucket(limit, interval_seconds(interval), clock)
+            for interval, limit in (order_limits or {}).items()
+        }
+        self.logger = get_logger('rate_limiter')
+        self._lock = threading.Lock()
+
+    def _reserve(self, weight: int, orders: int) -> float:
+        with self._lock:
+            wait = self.weight.reserve(weight)
+            if orders:
+                for bucket in self.orders.values():
+                    wait = max(wait, bucket.reserve(orders))
+            return wait
+
+    def acquire(self, weight: int = 1, orders: int = 0) -> float:
+        """Block until a request of the given weight may be sent
+
+        Returns:
+            Seconds waited
+        """
+        wait = self._reserve(weight, orders)
+        if wait > 0:
+            self.logger.debug(f"Request weight budget exhausted, waiting {wait:.2f}s")
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, weight: int = 1, orders: int = 0) -> float:
+        """Wait without blocking the event loop until a request may be sent
+
+        Returns:
+            Seconds waited
+        """
+        wait = self._reserve(weight, orders)
+        if wait > 0:
+            self.logger.debug(f"Request weight budget exhausted, waiting {wait:.2f}s")
+            await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every request to the host for `seconds` (e.g. after a 429)"""
+        with self._lock:
+            self.weight.hold(seconds)
+        self.logger.warning(f"Rate limited by the server, pausing requests for {seconds:.1f}s")
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Resynchronise buckets from X-MBX-USED-WEIGHT-* / X-MBX-ORDER-COUNT-* headers"""
+        with self._lock:
+            for name, value in headers.items():
+                match = USAGE_HEADER.match(name.lower())
+                if not match:
+                    continue
+                try:
+                    used = float(value)
+                except (TypeError, ValueError):
+                    continue
+                kind, interval = match.groups()
+                if kind == 'used-weight' and interval == self.weight_interval:
+                    self.weight.sync_used(used)
+                elif kind == 'order-count' and interval in self.orders:
+                    self.orders[interval].sync_used(used)
+
+
+def get_rate_limiter(url: str, weight_limit: int, **kwargs) -> RateLimiter:
+    """Return the limiter shared by every fetcher that talks to the host of `url`
+
+    The first caller for a host decides its limits.
+    """
+    host = urlparse(url).netloc or url
+    with _LIMITERS_LOCK:
+        if host not in _LIMITERS:
+            _LIMITERS[host] = RateLimiter(weight_limit, **kwargs)
+        return _LIMITERS[host]
@@ -0,0 +1,114 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+# Elements of a list measured before the rest is extrapolated
+SIZE_SAMPLE = 8
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate compact JSON size of a cache envelope without serializing it
+
+    Long lists (depth levels, trades) are estimated from their first
+    SIZE_SAMPLE elements, so the cost does not grow with the payload.
+    """
+    if isinstance(value, dict):
+        return 2 + sum(len(str(key)) + 4 + estimate_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        if len(value) <= SIZE_SAMPLE:
+            return 2 + sum(estimate_size(item) + 1 for item in value)
+        sample = sum(estimate_size(item) + 1 for item in value[:SIZE_SAMPLE])
+        return 2 + sample * len(value) // SIZE_SAMPLE
+    if isinstance(value, str):
+        return len(value) + 2
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, (bool, int, float)) or value is None:
+        return 8
+    return len(str(value))
+
+
+class ReadCache:
+    def __init__(self, max_bytes: int):
+        """Bounded in-process LRU cache of the latest envelope per cache key
+
+        Entries are accounted by their estimated size and the least recently
+        used ones are evicted once `max_bytes` is exceeded. Values are shared
+        with callers, so returned envelopes must be treated as read-only.
+
+        Args:
+            max_bytes: Total estimated size of cached envelopes
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for a key (None on a miss) and mark it recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value without touching counters or recency"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry is not None else None
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None) -> None:
+        """Store a value, evicting least recently used entries beyond the budget"""
+        size = size if size is not None else estimate_size(value)
+        with self._lock:
+            self._pop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def _pop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single key"""
+        with self._lock:
+            self._pop(key)
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> None:
+        """Drop every entry for which predicate(key, value) is true"""
+        with self._lock:
+            for key in [k for k, (v, _) in self._entries.items() if predicate(k, v)]:
+                self._pop(key)
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters and current usage"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes
+            }
@@ -0,0 +1,196 @@
+import asyncio
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from urllib.parse import urlparse
+
+DEFAULT_MAX_ENTRIES = 1024
+
+_COALESCERS: Dict[str, 'RequestCoalescer'] = {}
+_COALESCERS_LOCK = threading.Lock()
+
+
+def request_key(method: str, endpoint: str, params: Optional[Dict] = None) -> Tuple[str, str, str]:
+    """Key identifying a request by method, endpoint and parameters (in any order)"""
+    return (method.upper(), endpoint.lstrip('/'),
+            json.dumps(params or {}, sort_keys=True, default=str))
+
+
+class _Call:
+    """A request in flight and the callers waiting for it"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _AsyncCall:
+    """A coroutine request in flight, run as a task on the event loop that started it"""
+    def __init__(self, loop: 'asyncio.AbstractEventLoop'):
+        self.loop = loop
+        self.task: Optional['asyncio.Task'] = None
+        self.waiters = 0
+        self.shared = False
+
+
+def _retrieve_exception(task: 'asyncio.Task') -> None:
+    # Callers re-raise it; this only stops warnings when every caller was cancelled
+    if not task.cancelled():
+        task.exception()
+
+
+class RequestCoalescer:
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 clock: Callable[[], float] = time.monotonic):
+        """Single-flight coalescing of identical requests plus a TTL memo
+
+        Concurrent callers with the same key share one call: the first runs
+        it and the others wait for its result (or its exception). A result
+        fetched with a TTL is also memoized and served to later callers
+        until it expires. Shared results are deep-copied for every caller
+        after the first, so callers may modify what they get back.
+
+        Thread callers (`fetch`) and asyncio callers (`fetch_async`) are
+        coalesced separately; both use the same memo.
+
+        Args:
+            max_entries: Memoized results kept; the oldest are dropped beyond it
+            clock: Monotonic time source
+        """
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Hashable, _AsyncCall] = {}
+        self._memo: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    def _memo_get(self, key: Hashable) -> Tuple[bool, Any]:
+        """(True, value) for an unexpired memo entry, else (False, None)"""
+        entry = self._memo.get(key)
+        if entry is None:
+            return False, None
+        expires, value = entry
+        if self.clock() >= expires:
+            del self._memo[key]
+            return False, None
+        self.hits += 1
+        return True, value
+
+    def _memo_put(self, key: Hashable, value: Any, ttl: Optional[float]) -> None:
+        if not ttl or ttl <= 0 or value is None:
+            return
+        self._memo[key] = (self.clock() + ttl, value)
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.max_entries:
+            self._memo.popitem(last=False)
+
+    def fetch(self, key: Hashable, call: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Return the memoized result for `key`, join its call in flight, or run `call`
+
+        Args:
+            key: Request key (see `request_key`)
+            call: Function performing the request
+            ttl: Seconds to memoize the result for (None or 0: coalesce only)
+
+        Returns:
+            The call's result; exceptions propagate to every waiting caller
+        """
+        with self._lock:
+            found, value = self._memo_get(key)
+            pending = None if found else self._calls.get(key)
+            if found:
+                leader = False
+            elif pending is None:
+                pending = self._calls[key] = _Call()
+                leader = True
+                self.misses += 1
+            else:
+                pending.waiters += 1
+                leader = False
+                self.coalesced += 1
+
+        if found:
+            return copy.deepcopy(value)
+        if not leader:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return copy.deepcopy(pending.value)
+
+        try:
+            pending.value = call()
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if pending.error is None:
+                    self._memo_put(key, pending.value, ttl)
+                shared = pending.waiters > 0 or key in self._memo
+            pending.done.set()
+        return copy.deepcopy(pending.value) if shared else pending.value
+
+    async def fetch_async(self, key: Hashable, call: Callable[[], Awaitable[Any]],
+                          ttl: Optional[float] = None) -> Any:
+        """Asyncio counterpart of `fetch` for a coroutine function `call`"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            found, value = self._memo_get(key)
+            pending = None if found else self._async_calls.get(key)
+            if found:
+                leader = False
+            elif pending is None or pending.loop is not loop:
+                pending = self._async_calls[key] = _AsyncCall(loop)
+                pending.task = loop.create_task(self._run_async(key, pending, call, ttl))
+                pending.task.add_done_callback(_retrieve_exception)
+                leader = True
+                self.misses += 1
+            else:
+                pending.waiters += 1
+                leader = False
+                self.coalesced += 1
+
+        if found:
+            return copy.deepcopy(value)
+        # Shield so a cancelled caller, the first one included, does not
+        # cancel the request for the others
+        value = await asyncio.shield(pending.task)
+        return copy.deepcopy(value) if not leader or pending.shared else value
+
+    async def _run_async(self, key: Hashable, pending: _AsyncCall,
+                         call: Callable[[], Awaitable[Any]], ttl: Optional[float]) -> Any:
+        try:
+            value = await call()
+        except BaseException:
+            with self._lock:
+                if self._async_calls.get(key) is pending:
+                    del self._async_calls[key]
+            raise
+        with self._lock:
+            if self._async_calls.get(key) is pending:
+                del self._async_calls[key]
+            self._memo_put(key, value, ttl)
+            pending.shared = pending.waiters > 0 or key in self._memo
+        return value
+
+    def clear(self) -> None:
+        """Drop every memoized result"""
+        with self._lock:
+            self._memo.clear()
+
+
+def get_request_coalescer(url: str) -> RequestCoalescer:
+    """Return the coalescer shared by every fetcher that talks to the host of `url`"""
+    host = urlparse(url).netloc or url
+    with _COALESCERS_LOCK:
+        if host not in _COALESCERS:
+            _COALESCERS[host] = RequestCoalescer()
+        return _COALESCERS[host]
@@ -0,0 +1,231 @@
+import bisect
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from utilities.logging_config import get_logger
+
+MAX_BUDGET_PASSES = 8
+# Backfilled klines are history, not snapshots; keep them for ten years
+KLINE_RETENTION_HOURS = 10 * 365 * 24
+# Data types holding history: left out of catch-all age passes and the disk budget
+HISTORY_DATA_TYPES = ['kline']
+
+
+@dataclass
+class RetentionTier:
+    """Keep entries younger than `max_age_hours`, thinned to one entry per
+    `resolution_seconds` bucket (None keeps full resolution)"""
+    max_age_hours: float
+    resolution_seconds: Optional[int] = None
+
+
+@dataclass
+class RetentionPolicy:
+    """Tiers applied to one data type (None for all) and processing state.
+    Entries older than the last tier are deleted. With `budget` False the
+    disk budget never removes them."""
+    tiers: List[RetentionTier]
+    data_type: Optional[str] = None
+    is_processed: bool = False
+    budget: bool = True
+
+
+def default_policies(raw_max_age_hours: float = 24) -> List[RetentionPolicy]:
+    """Raw data for a day; processed snapshots at full resolution for a week,
+    then 1-minute for a month and 1-hour for a year; processed trades for a week;
+    klines for ten years"""
+    snapshot_tiers = [
+        RetentionTier(7 * 24),
+        RetentionTier(30 * 24, resolution_seconds=60),
+        RetentionTier(365 * 24, resolution_seconds=3600),
+    ]
+    return [
+        RetentionPolicy(tiers=[RetentionTier(raw_max_age_hours)]),
+        RetentionPolicy(tiers=snapshot_tiers, is_processed=True),
+        RetentionPolicy(tiers=[RetentionTier(7 * 24)], data_type='trade', is_processed=True),
+    ] + [
+        RetentionPolicy(tiers=[RetentionTier(KLINE_RETENTION_HOURS)], data_type=data_type,
+                        is_processed=is_processed, budget=False)
+        for data_type in HISTORY_DATA_TYPES
+        for is_processed in (False, True)
+    ]
+
+
+class RetentionEngine:
+    def __init__(self, cache: Any, policies: Optional[List[RetentionPolicy]] = None,
+                 max_bytes: Optional[int] = None, interval_seconds: float = 300.0):
+        """Tiered retention, downsampling and disk budget for a BaseCache
+
+        Expirable entries are found from the cache indexes, never by walking
+        directories. Each `step` handles one (data type, raw/processed)
+        pair, so running in the background spreads the work out; `run_once`
+        applies every policy in one go.
+
+        Args:
+            cache: BaseCache (or subclass) to manage
+            policies: Retention policies; later, more specific policies win
+            max_bytes: Optional disk budget; oldest entries are removed above
+                it, except those of policies with `budget` False
+            interval_seconds: Time for the background thread to cover every policy
+        """
+        self.cache = cache
+        self.max_bytes = max_bytes
+        self.interval_seconds = interval_seconds
+        self.logger = get_logger('cache.retention')
+
+        # Resolve policies to one tier list per (data_type, is_processed)
+        resolved: Dict[Tuple[str, bool], List[RetentionTier]] = {}
+        budgeted: Dict[Tuple[str, bool], bool] = {}
+        for policy in policies if policies is not None else default_policies():
+            ages = [tier.max_age_hours for tier in policy.tiers]
+            if not ages or ages != sorted(ages):
+                raise ValueError("Retention tiers must be ordered by increasing max_age_hours")
+            data_types = [policy.data_type] if policy.data_type else cache.data_types
+            for data_type in data_types:
+                resolved[(data_type, policy.is_processed)] = policy.tiers
+                budgeted[(data_type, policy.is_processed)] = policy.budget
+        # Visit data types in the cache's order, raw before processed
+        self.tasks = sorted(
+            resolved.items(),
+            key=lambda task: (cache.data_types.index(task[0][0]), task[0][1])
+        )
+
+        # (data type, is_processed) pairs the disk budget may remove entries from
+        self.budget_pairs = [
+            (data_type, is_processed)
+            for data_type in cache.data_types
+            for is_processed in (False, True)
+            if budgeted.get((data_type, is_processed), True)
+        ]
+
+        self._next_task = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _downsample(timestamps: List[int], tiers: List[RetentionTier], now_ms: int) -> set:
+        """Return timestamps to drop so each tier keeps the newest entry per bucket"""
+        drop = set()
+        upper = now_ms
+        for tier in tiers:
+            lower = now_ms - int(tier.max_age_hours * 3600 * 1000)
+            if tier.resolution_seconds:
+                bucket_ms = tier.resolution_seconds * 1000
+                lo = bisect.bisect_right(timestamps, lower)
+                hi = bisect.bisect_right(timestamps, upper)
+                for i in range(lo, hi - 1):
+                    if timestamps[i] // bucket_ms == timestamps[i + 1] // bucket_ms:
+                        drop.add(timestamps[i])
+            upper = lower
+        return drop
+
+    def apply_policy(self, data_type: str, is_processed: bool, tiers: List[RetentionTier],
+                     now_ms: Optional[int] = None) -> Dict[str, int]:
+        """Expire and downsample one data type and processing state
+
+        Returns:
+            Dict with counts of 'expired' and 'downsampled' entries
+        """
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        cutoff = now_ms - int(tiers[-1].max_age_hours * 3600 * 1000)
+        stats = {'expired': self.cache.expire_entries(data_type, is_processed, cutoff),
+                 'downsampled': 0}
+
+        if any(tier.resolution_seconds for tier in tiers):
+            for prefix, timestamps in self.cache.entry_timestamps(data_type, is_processed).items():
+                drop = self._downsample(timestamps, tiers, now_ms)
+                if drop:
+                    stats['downsampled'] += self.cache.delete_entries(
+                        data_type, is_processed, prefix, drop
+                    )
+        return stats
+
+    def enforce_budget(self) -> int:
+        """Remove the oldest entries until disk usage fits the budget
+
+        Only entries of budgeted policies count as candidates, so history
+        kept by a `budget=False` policy is never removed, however old.
+
+        Returns:
+            Number of entries removed
+        """
+        if not self.max_bytes:
+            return 0
+
+        removed = 0
+        for _ in range(MAX_BUDGET_PASSES):
+            usage = self.cache.disk_usage()
+            if usage <= self.max_bytes:
+                break
+
+            all_timestamps = sorted(
+                timestamp
+                for data_type, is_processed in self.budget_pairs
+                for timestamps in self.cache.entry_timestamps(data_type, is_processed).values()
+                for timestamp in timestamps
+            )
+            if not all_timestamps:
+                break
+
+            # Estimate how many entries to drop from the average size of the candidates
+            budget_types = {data_type for data_type, _ in self.budget_pairs}
+            candidate_usage = sum(self.cache.disk_usage(data_type) for data_type in budget_types)
+            average = max(candidate_usage, 1) / len(all_timestamps)
+            n_drop = min(math.ceil((usage - self.max_bytes) / average), len(all_timestamps))
+            cutoff = all_timestamps[n_drop - 1] + 1
+            for data_type, is_processed in self.budget_pairs:
+                removed += self.cache.expire_entries(data_type, is_processed, cutoff)
+
+        if removed:
+            self.logger.info(f"Removed {removed} cache entries to stay within disk budget")
+        return removed
+
+    def step(self, now_ms: Optional[int] = None) -> Dict[str, int]:
+        """Apply the next policy in round-robin order, then the disk budget"""
+        if not self.tasks:
+            return {'expired': 0, 'downsampled': 0, 'budget': self.enforce_budget()}
+        (data_type, is_processed), tiers = self.tasks[self._next_task]
+        self._next_task = (self._next_task + 1) % len(self.tasks)
+        stats = self.apply_policy(data_type, is_processed, tiers, now_ms)
+        stats['budget'] = self.enforce_budget()
+        return stats
+
+    def run_once(self, now_ms: Optional[int] = None) -> Dict[str, int]:
+        """Apply every policy and the disk budget
+
+        Returns:
+            Dict with total 'expired', 'downsampled' and 'budget' removals
+        """
+        totals = {'expired': 0, 'downsampled': 0}
+        for (data_type, is_processed), tiers in self.tasks:
+            stats = self.apply_policy(data_type, is_processed, tiers, now_ms)
+            for key in totals:
+                totals[key] += stats[key]
+        totals['budget'] = self.enforce_budget()
+        return totals
+
+    def _run(self) -> None:
+        step_interval = self.interval_seconds / max(len(self.tasks), 1)
+        while not self._stop.wait(step_interval):
+            try:
+                self.step()
+            except Exception as e:
+                self.logger.error(f"Error applying retention policy: {str(e)}")
+
+    def start(self) -> None:
+        """Run retention incrementally on a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='cache-retention', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,228 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional
+from urllib.parse import urlparse
+
+from utilities.logging_config import get_logger
+
+# Statuses worth retrying: rate limited, or a server-side failure
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Binance answers 418 once an IP is banned for ignoring 429s
+BAN_STATUS = 418
+RATE_LIMIT_STATUS = 429
+DEFAULT_BAN_SECONDS = 120.0
+
+DEFAULT_MAX_DELAY = 30.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+
+_BREAKERS: Dict[str, 'CircuitBreaker'] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Seconds from a Retry-After header, or None if absent or not a number"""
+    if not headers:
+        return None
+    value = headers.get('Retry-After')
+    if value is None:
+        value = headers.get('retry-after')
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while a host's circuit is open"""
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"Circuit open for {host}, retry in {retry_after:.1f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class RetryPolicy:
+    def __init__(self, max_delay: float = DEFAULT_MAX_DELAY,
+                 retry_statuses: frozenset = RETRY_STATUSES,
+                 rand: Callable[[], float] = random.random):
+        """When and how long to wait before retrying a failed request
+
+        Delays grow exponentially from the caller's base delay with full
+        jitter, so clients that failed together do not retry together.
+        A 429 waits for its Retry-After instead. Client errors (other 4xx)
+        and 418 bans are not retried, nor is anything that would wait
+        longer than `max_delay`.
+
+        Args:
+            max_delay: Longest single wait in seconds; longer waits give up
+            retry_statuses: HTTP statuses that may succeed on a retry
+            rand: Source of uniform [0, 1) numbers for jitter
+        """
+        self.max_delay = max_delay
+        self.retry_statuses = retry_statuses
+        self.rand = rand
+
+    def backoff(self, attempt: int, base_delay: float) -> float:
+        """Jittered exponential delay before retry number `attempt` + 1"""
+        return self.rand() * min(self.max_delay, base_delay * 2 ** attempt)
+
+    def delay(self, attempt: int, retry_count: int, base_delay: float,
+              status: Optional[int] = None,
+              retry_after: Optional[float] = None) -> Optional[float]:
+        """Seconds to wait before retrying, or None to give up
+
+        Args:
+            attempt: Zero-based number of the attempt that failed
+            retry_count: Total attempts allowed
+            base_delay: Delay scale in seconds
+            status: HTTP status of the failure (None for connection errors
+                and timeouts)
+            retry_after: Seconds from the response's Retry-After header
+        """
+        if attempt >= retry_count - 1:
+            return None
+        if status is not None and status not in self.retry_statuses:
+            return None
+        if status == RATE_LIMIT_STATUS and retry_after is not None:
+            return retry_after if retry_after <= self.max_delay else None
+        return self.backoff(attempt, base_delay)
+
+
+class CircuitBreaker:
+    def __init__(self, host: str, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+                 clock: Callable[[], float] = time.monotonic):
+        """Per-host circuit breaker shared by every fetcher talking to the host
+
+        After `failure_threshold` consecutive failures (connection errors,
+        timeouts, 5xx) the circuit opens and requests fail fast with
+        CircuitOpenError for `reset_timeout` seconds. Then one trial
+        request is let through: success closes the circuit, failure opens
+        it again. A 418 ban opens it for the ban's Retry-After.
+
+        Args:
+            host: Host name, for messages
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a trial request
+            clock: Monotonic time source
+        """
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.open_until = 0.0
+        self.opened = 0
+        self._trial = False
+        self._lock = threading.Lock()
+        self.logger = get_logger('circuit_breaker')
+
+    @property
+    def is_open(self) -> bool:
+        return self.clock() < self.open_until
+
+    def before_request(self) -> bool:
+        """Raise CircuitOpenError if the host should not be called now
+
+        Returns:
+            Whether this request is the half-open trial; if so, call
+            `release_trial` once it ends, however it ends
+        """
+        with self._lock:
+            now = self.clock()
+            if now < self.open_until:
+                raise CircuitOpenError(self.host, self.open_until - now)
+            if self.failures >= self.failure_threshold:
+                # Half-open: one trial request, the rest keep failing fast
+                if self._trial:
+                    raise CircuitOpenError(self.host, 0.0)
+                self._trial = True
+                return True
+            return False
+
+    def release_trial(self) -> None:
+        """End the trial request, letting another one through if it recorded no outcome"""
+        with self._lock:
+            self._trial = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.failures >= self.failure_threshold:
+                self.logger.info(f"Circuit for {self.host} closed")
+            self.failures = 0
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.failures >= self.failure_threshold:
+                self._open(self.reset_timeout,
+                           f"{self.failures} consecutive failures")
+
+    def record_ban(self, retry_after: Optional[float]) -> None:
+        """Open the circuit for the duration of an IP ban"""
+        with self._lock:
+            self._trial = False
+            self._open(retry_after if retry_after is not None else DEFAULT_BAN_SECONDS,
+                       "IP ban (418)")
+
+    def record(self, status: Optional[int], retry_after: Optional[float] = None) -> None:
+        """Record the outcome of a request
+
+        Args:
+            status: HTTP status, or None if no response arrived
+            retry_after: Seconds from the response's Retry-After header
+        """
+        if status == BAN_STATUS:
+            self.record_ban(retry_after)
+        elif status is None or status >= 500:
+            self.record_failure()
+        else:
+            # Any other answer, even a 4xx, shows the host is up
+            self.record_success()
+
+    def _open(self, seconds: float, reason: str) -> None:
+        self.open_until = max(self.open_until, self.clock() + seconds)
+        self.opened += 1
+        self.logger.warning(f"Circuit for {self.host} open for {seconds:.1f}s after {reason}")
+
+
+def handle_failure(policy: RetryPolicy, breaker: Optional[CircuitBreaker], rate_limiter: Any,
+                   attempt: int, retry_count: int, base_delay: float, status: Optional[int],
+                   headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Record a failed attempt and decide how long to wait before the next one
+
+    A 429 pauses the host's rate limiter for its Retry-After, so every
+    caller sharing the host backs off, not just this one.
+
+    Args:
+        policy: Retry policy
+        breaker: Optional circuit breaker of the host
+        rate_limiter: Optional RateLimiter of the host
+        attempt: Zero-based number of the attempt that failed
+        retry_count: Total attempts allowed
+        base_delay: Delay scale in seconds
+        status: HTTP status of the failure (None if no response arrived)
+        headers: Response headers, if any
+
+    Returns:
+        Seconds to wait before retrying, or None to give up
+    """
+    retry_after = parse_retry_after(headers)
+    if breaker:
+        breaker.record(status, retry_after)
+    if status == RATE_LIMIT_STATUS and rate_limiter:
+        rate_limiter.pause(retry_after if retry_after is not None
+                           else policy.backoff(attempt, base_delay))
+    return policy.delay(attempt, retry_count, base_delay, status, retry_after)
+
+
+def get_circuit_breaker(url: str) -> CircuitBreaker:
+    """Return the circuit breaker shared by every fetcher that talks to the host of `url`"""
+    host = urlparse(url).netloc or url
+    with _BREAKERS_LOCK:
+        if host not in _BREAKERS:
+            _BREAKERS[host] = CircuitBreaker(host)
+        return _BREAKERS[host]
@@ -0,0 +1,401 @@
+import bisect
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, BinaryIO
+
+from utilities.logging_config import get_logger
+from .compression import DECOMPRESSION_ERRORS, compress_bytes, decompress_bytes
+from .durability import fsync_files
+from .json_bytes import encode_envelope
+
+# Record header: timestamp (ms), payload length
+RECORD_HEADER = struct.Struct('<qI')
+# Footer index entry: timestamp (ms), record offset
+INDEX_ENTRY = struct.Struct('<qQ')
+# Segment trailer: index offset, entry count, magic
+FOOTER = struct.Struct('<QI4s')
+FOOTER_MAGIC = b'SPMI'
+
+SEGMENT_SUFFIX = '.seg'
+SEGMENT_DIR_SUFFIX = '.segments'
+DEFAULT_SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class Segment:
+    def __init__(self, path: Path, seq: int, entries: List[Tuple[int, int]],
+                 size: int, sealed: bool):
+        """A single segment file and its timestamp index
+
+        Args:
+            path: Path of the segment file
+            seq: Sequence number of the segment within its prefix
+            entries: Sorted (timestamp, offset) pairs for every record
+            size: Size of the record area in bytes
+            sealed: Whether the footer index has been written
+        """
+        self.path = path
+        self.seq = seq
+        self.entries = entries
+        self.size = size
+        self.sealed = sealed
+
+    @property
+    def min_timestamp(self) -> Optional[int]:
+        return self.entries[0][0] if self.entries else None
+
+    @property
+    def max_timestamp(self) -> Optional[int]:
+        return self.entries[-1][0] if self.entries else None
+
+
+class SegmentStore:
+    def __init__(self, base_dir: Path, max_segment_bytes: int = DEFAULT_SEGMENT_MAX_BYTES,
+                 codec: Optional[str] = None):
+        """Append-only segment log storage
+
+        Records for each (data_type, raw/processed, filename prefix) are
+        appended to rolling segment files. Each record is a small binary
+        header followed by the JSON payload. When a segment reaches
+        `max_segment_bytes` it is sealed with a footer index of
+        (timestamp, offset) pairs, so opening it later costs a single seek.
+
+        Args:
+            base_dir: Base cache directory
+            max_segment_bytes: Size at which the active segment is sealed
+            codec: Optional codec applied to each record payload
+        """
+        self.base_dir = Path(base_dir)
+        self.max_segment_bytes = max_segment_bytes
+        self.codec = codec
+        self.logger = get_logger('cache.segments')
+
+        # (data_type, subdir, prefix) -> segments ordered by sequence number
+        self._segments: Dict[Tuple[str, str, str], List[Segment]] = {}
+        # (data_type, subdir, prefix) -> open append handle of the active segment
+        self._handles: Dict[Tuple[str, str, str], BinaryIO] = {}
+
+    def _prefix_dir(self, data_type: str, subdir: str, prefix: str) -> Path:
+        return self.base_dir / data_type / subdir / f"{prefix}{SEGMENT_DIR_SUFFIX}"
+
+    def _load_segment(self, path: Path) -> Segment:
+        """Read a segment's index from its footer, or scan it if unsealed"""
+        seq = int(path.stem)
+        file_size = path.stat().st_size
+
+        with open(path, 'rb') as f:
+            if file_size >= FOOTER.size:
+                f.seek(file_size - FOOTER.size)
+                index_offset, count, magic = FOOTER.unpack(f.read(FOOTER.size))
+                if (magic == FOOTER_MAGIC and
+                        index_offset + count * INDEX_ENTRY.size + FOOTER.size == file_size):
+                    f.seek(index_offset)
+                    raw_index = f.read(count * INDEX_ENTRY.size)
+                    entries = [
+                        INDEX_ENTRY.unpack_from(raw_index, i * INDEX_ENTRY.size)
+                        for i in range(count)
+                    ]
+                    return Segment(path, seq, entries, index_offset, sealed=True)
+
+            # Unsealed (active) segment: rebuild the index by scanning records
+            f.seek(0)
+            entries = []
+            offset = 0
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                timestamp, length = RECORD_HEADER.unpack(header)
+                f.seek(length, os.SEEK_CUR)
+                if offset + RECORD_HEADER.size + length > file_size:
+                    break
+                entries.append((timestamp, offset))
+                offset += RECORD_HEADER.size + length
+
+        if offset < file_size:
+            # Drop a partially written tail record left by an interrupted write
+            self.logger.warning(f"Truncating incomplete record in segment {path}")
+            with open(path, 'r+b') as f:
+                f.truncate(offset)
+
+        entries.sort()
+        return Segment(path, seq, entries, offset, sealed=False)
+
+    def _get_segments(self, data_type: str, subdir: str, prefix: str) -> List[Segment]:
+        """Return the segments for a prefix, loading their indexes on first use"""
+        key = (data_type, subdir, prefix)
+        if key not in self._segments:
+            prefix_dir = self._prefix_dir(data_type, subdir, prefix)
+            paths = sorted(prefix_dir.glob(f"*{SEGMENT_SUFFIX}")) if prefix_dir.exists() else []
+            self._segments[key] = [self._load_segment(path) for path in paths]
+        return self._segments[key]
+
+    def _matching_prefixes(self, data_type: str, subdir: str, pattern: str) -> List[str]:
+        """Resolve a filename pattern (which may contain glob characters) to prefixes"""
+        if not any(c in pattern for c in '*?['):
+            return [pattern]
+        parent = self.base_dir / data_type / subdir
+        return [
+            path.name[:-len(SEGMENT_DIR_SUFFIX)]
+            for path in parent.glob(f"{pattern}{SEGMENT_DIR_SUFFIX}")
+        ]
+
+    def _all_prefixes(self, data_type: str, subdir: str) -> List[str]:
+        return self._matching_prefixes(data_type, subdir, '*')
+
+    def _seal(self, key: Tuple[str, str, str], segment: Segment) -> None:
+        """Write the footer index and close the active segment"""
+        handle = self._handles.pop(key, None)
+        if handle is None:
+            handle = open(segment.path, 'ab')
+
+        with handle:
+            for timestamp, offset in segment.entries:
+                handle.write(INDEX_ENTRY.pack(timestamp, offset))
+            handle.write(FOOTER.pack(segment.size, len(segment.entries), FOOTER_MAGIC))
+            # Sealed segments are never synced again
+            handle.flush()
+            os.fsync(handle.fileno())
+        segment.sealed = True
+
+    def _active_segment(self, data_type: str, subdir: str, prefix: str,
+                        record_size: int) -> Segment:
+        """Return the segment to append to, rolling over when it is full"""
+        key = (data_type, subdir, prefix)
+        segments = self._get_segments(data_type, subdir, prefix)
+
+        active = segments[-1] if segments and not segments[-1].sealed else None
+        if active and active.entries and active.size + record_size > self.max_segment_bytes:
+            self._seal(key, active)
+            active = None
+
+        if active is None:
+            prefix_dir = self._prefix_dir(data_type, subdir, prefix)
+            prefix_dir.mkdir(parents=True, exist_ok=True)
+            seq = segments[-1].seq + 1 if segments else 0
+            active = Segment(prefix_dir / f"{seq:08d}{SEGMENT_SUFFIX}", seq, [], 0, sealed=False)
+            segments.append(active)
+
+        if key not in self._handles:
+            self._handles[key] = open(active.path, 'ab')
+        return active
+
+    def append(self, data_type: str, subdir: str, prefix: str,
+               timestamp: int, cache_data: Dict) -> None:
+        """Append a cache record to the active segment for its prefix
+
+        Args:
+            data_type: Type of data ('market', 'orderbook', 'trade', 'kline')
+            subdir: 'raw' or 'processed'
+            prefix: Base filename the record is stored under
+            timestamp: Record timestamp in milliseconds
+            cache_data: Cache envelope with data and metadata
+        """
+        payload = compress_bytes(encode_envelope(cache_data), self.codec)
+        record_size = RECORD_HEADER.size + len(payload)
+        segment = self._active_segment(data_type, subdir, prefix, record_size)
+
+        handle = self._handles[(data_type, subdir, prefix)]
+        handle.write(RECORD_HEADER.pack(timestamp, len(payload)))
+        handle.write(payload)
+        handle.flush()
+
+        entry = (timestamp, segment.size)
+        if not segment.entries or timestamp >= segment.entries[-1][0]:
+            segment.entries.append(entry)
+        else:
+            bisect.insort(segment.entries, entry)
+        segment.size += record_size
+
+    def _read_record(self, f: BinaryIO, offset: int) -> Optional[Dict]:
+        f.seek(offset)
+        _, length = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+        try:
+            return json.loads(decompress_bytes(f.read(length)))
+        except (json.JSONDecodeError, UnicodeDecodeError, *DECOMPRESSION_ERRORS) as e:
+            self.logger.warning(f"Error reading record at {offset} in {f.name}: {e}")
+            return None
+
+    def read(self, data_type: str, subdir: str, pattern: str, n_latest: int = 1,
+             time_range: Optional[Tuple[int, int]] = None,
+             oldest_first: bool = False) -> List[Dict]:
+        """Read the newest records matching a filename pattern
+
+        Args:
+            data_type: Type of data to load
+            subdir: 'raw' or 'processed'
+            pattern: Base filename or glob pattern to match
+            n_latest: Maximum number of records to return
+            time_range: Optional (start_ms, end_ms) inclusive filter
+            oldest_first: Return the oldest records in the range instead
+
+        Returns:
+            List of cache envelopes, newest first (oldest first if requested)
+        """
+        start_ms, end_ms = time_range if time_range else (float('-inf'), float('inf'))
+
+        # Collect candidate (timestamp, segment, offset) triples via the indexes
+        candidates = []
+        for prefix in self._matching_prefixes(data_type, subdir, pattern):
+            for segment in self._get_segments(data_type, subdir, prefix):
+                if not segment.entries:
+                    continue
+                if segment.max_timestamp < start_ms or segment.min_timestamp > end_ms:
+                    continue
+                lo = bisect.bisect_left(segment.entries, (start_ms, -1)) if time_range else 0
+                hi = (bisect.bisect_right(segment.entries, (end_ms, float('inf')))
+                      if time_range else len(segment.entries))
+                candidates.extend(
+                    (timestamp, segment.seq, offset, segment)
+                    for timestamp, offset in segment.entries[lo:hi]
+                )
+
+        candidates.sort(key=lambda c: (c[0], c[1], c[2]), reverse=not oldest_first)
+
+        results = []
+        open_files: Dict[Path, BinaryIO] = {}
+        try:
+            for _, _, offset, segment in candidates:
+                f = open_files.get(segment.path)
+                if f is None:
+                    f = open_files[segment.path] = open(segment.path, 'rb')
+                record = self._read_record(f, offset)
+                if record is None:
+                    continue
+                results.append(record)
+                if len(results) == n_latest:
+                    break
+        finally:
+            for f in open_files.values():
+                f.close()
+
+        return results
+
+    def _compact(self, key: Tuple[str, str, str], segment: Segment,
+                 keep: List[Tuple[int, int]]) -> None:
+        """Rewrite a segment keeping only the given index entries"""
+        tmp_path = segment.path.with_suffix('.tmp')
+        new_entries = []
+        with open(segment.path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            for timestamp, offset in keep:
+                src.seek(offset)
+                header = src.read(RECORD_HEADER.size)
+                _, length = RECORD_HEADER.unpack(header)
+                new_entries.append((timestamp, dst.tell()))
+                dst.write(header)
+                dst.write(src.read(length))
+            size = dst.tell()
+            if segment.sealed:
+                for timestamp, offset in new_entries:
+                    dst.write(INDEX_ENTRY.pack(timestamp, offset))
+                dst.write(FOOTER.pack(size, len(new_entries), FOOTER_MAGIC))
+
+        handle = self._handles.pop(key, None)
+        if handle:
+            handle.close()
+        os.replace(tmp_path, segment.path)
+        segment.entries = new_entries
+        segment.size = size
+
+    def _retain(self, key: Tuple[str, str, str], segment: Segment,
+                keep: List[Tuple[int, int]]) -> int:
+        """Keep only the given entries of a segment, returning how many were dropped"""
+        dropped = len(segment.entries) - len(keep)
+        if not dropped:
+            return 0
+
+        if not keep:
+            handle = self._handles.pop(key, None) if not segment.sealed else None
+            if handle:
+                handle.close()
+            segment.path.unlink()
+            self._segments[key].remove(segment)
+        else:
+            self._compact(key, segment, sorted(keep, key=lambda e: e[1]))
+            segment.entries.sort()
+        return dropped
+
+    def expire(self, data_type: str, subdir: str, cutoff_ms: int) -> int:
+        """Remove records older than a cutoff
+
+        Segments that are entirely older than the cutoff are unlinked,
+        segments that straddle it are compacted in place.
+
+        Args:
+            data_type: Type of data to expire
+            subdir: 'raw' or 'processed'
+            cutoff_ms: Records with timestamps before this are removed
+
+        Returns:
+            Number of records removed
+        """
+        removed = 0
+        for prefix in self._all_prefixes(data_type, subdir):
+            key = (data_type, subdir, prefix)
+            for segment in list(self._get_segments(data_type, subdir, prefix)):
+                if not segment.entries or segment.min_timestamp >= cutoff_ms:
+                    continue
+                keep = [entry for entry in segment.entries if entry[0] >= cutoff_ms]
+                removed += self._retain(key, segment, keep)
+        return removed
+
+    def delete(self, data_type: str, subdir: str, prefix: str, timestamps: set) -> int:
+        """Remove the records of a prefix with the given timestamps
+
+        Returns:
+            Number of records removed
+        """
+        key = (data_type, subdir, prefix)
+        removed = 0
+        for segment in list(self._get_segments(data_type, subdir, prefix)):
+            keep = [entry for entry in segment.entries if entry[0] not in timestamps]
+            removed += self._retain(key, segment, keep)
+        return removed
+
+    def timestamps(self, data_type: str, subdir: str) -> Dict[str, List[int]]:
+        """Return the sorted record timestamps of every prefix"""
+        result = {}
+        for prefix in self._all_prefixes(data_type, subdir):
+            timestamps = sorted(
+                timestamp
+                for segment in self._get_segments(data_type, subdir, prefix)
+                for timestamp, _ in segment.entries
+            )
+            if timestamps:
+                result[prefix] = timestamps
+        return result
+
+    def usage(self, data_type: str, subdir: str) -> int:
+        """Total size in bytes of the segment files"""
+        return sum(
+            segment.path.stat().st_size
+            for prefix in self._all_prefixes(data_type, subdir)
+            for segment in self._get_segments(data_type, subdir, prefix)
+        )
+
+    def count(self, data_type: str, subdir: str) -> int:
+        """Count stored records for a data type and processing state"""
+        return sum(
+            len(segment.entries)
+            for prefix in self._all_prefixes(data_type, subdir)
+            for segment in self._get_segments(data_type, subdir, prefix)
+        )
+
+    def sync(self) -> None:
+        """fsync every active segment"""
+        for handle in self._handles.values():
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def sync_durable(self) -> None:
+        """fsync every active segment and the directories leading to it"""
+        for handle in self._handles.values():
+            handle.flush()
+        fsync_files([Path(handle.name) for handle in self._handles.values()], self.base_dir)
+
+    def close(self) -> None:
+        """Close open append handles; active segments stay unsealed"""
+        for handle in self._handles.values():
+            handle.close()
+        self._handles.clear()
@@ -0,0 +1,370 @@
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utilities.logging_config import get_logger
+from .compression import DECOMPRESSION_ERRORS, compress_bytes, decompress_bytes
+from .json_bytes import is_raw
+
+DATABASE_FILENAME = 'cache.sqlite3'
+
+# Standardized processed fields that get typed columns (see BaseProcessor)
+MARKET_COLUMNS = [
+    ('symbol', 'TEXT'), ('exchange', 'TEXT'), ('type', 'TEXT'), ('price', 'REAL'),
+    ('timestamp', 'INTEGER'), ('volume24h', 'REAL'), ('volumeDelta24h', 'REAL'),
+    ('priceChange24h', 'REAL'), ('priceChange1h', 'REAL'), ('price24hHigh', 'REAL'),
+    ('price24hLow', 'REAL'), ('tradeCount24h', 'INTEGER'), ('bidAskSpread', 'REAL'),
+    ('openInterest', 'REAL'), ('fundingRate', 'REAL'), ('liquidations24h', 'REAL'),
+]
+# Fields the processor only emits for some markets; omitted on load when NULL
+MARKET_OPTIONAL = {'bidAskSpread', 'openInterest', 'fundingRate', 'liquidations24h'}
+ORDERBOOK_COLUMNS = [
+    ('symbol', 'TEXT'), ('type', 'TEXT'), ('timestamp', 'INTEGER'),
+    ('lastUpdateId', 'INTEGER'), ('bids', 'TEXT'), ('asks', 'TEXT'),
+]
+TRADE_COLUMNS = [
+    ('symbol', 'TEXT'), ('type', 'TEXT'), ('price', 'REAL'), ('quantity', 'REAL'),
+    ('timestamp', 'INTEGER'), ('isBuyerMaker', 'INTEGER'), ('tradeId', 'INTEGER'),
+]
+TYPED_TABLES = {
+    'market': ('processed_market', MARKET_COLUMNS),
+    'orderbook': ('processed_orderbook', ORDERBOOK_COLUMNS),
+    'trade': ('processed_trade', TRADE_COLUMNS),
+}
+JSON_COLUMNS = {'bids', 'asks'}
+
+
+def _column_sql(columns: List[Tuple[str, str]]) -> str:
+    return ', '.join(f'"{name}" {sql_type}' for name, sql_type in columns)
+
+
+class SQLiteStore:
+    def __init__(self, base_dir: Path, codec: Optional[str] = None):
+        """SQLite cache backend
+
+        All records live in a single database file using WAL mode. Every
+        cache entry has a row in `records` (prefix, timestamp, metadata).
+        Processed market, orderbook and trade data is stored in typed
+        tables indexed by (symbol, type, timestamp); anything else is kept
+        as a JSON payload on the record row.
+
+        Args:
+            base_dir: Base cache directory holding the database file
+            codec: Optional codec applied to JSON payloads
+        """
+        self.path = Path(base_dir) / DATABASE_FILENAME
+        self.codec = codec
+        self.logger = get_logger('cache.sqlite')
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False,
+                                    isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        self.conn.executescript(f'''
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY,
+                data_type TEXT NOT NULL,
+                processed INTEGER NOT NULL,
+                prefix TEXT NOT NULL,
+                timestamp INTEGER NOT NULL,
+                cache_time TEXT,
+                payload BLOB,
+                ref_timestamp INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_records_lookup
+                ON records (data_type, processed, prefix, timestamp);
+            CREATE INDEX IF NOT EXISTS idx_records_age
+                ON records (data_type, processed, timestamp);
+
+            CREATE TABLE IF NOT EXISTS processed_market (
+                record_id INTEGER NOT NULL REFERENCES records(id) ON DELETE CASCADE,
+                {_column_sql(MARKET_COLUMNS)},
+                extra TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_market_symbol_time
+                ON processed_market (symbol, type, timestamp);
+            CREATE INDEX IF NOT EXISTS idx_market_record ON processed_market (record_id);
+
+            CREATE TABLE IF NOT EXISTS processed_orderbook (
+                record_id INTEGER NOT NULL REFERENCES records(id) ON DELETE CASCADE,
+                {_column_sql(ORDERBOOK_COLUMNS)},
+                extra TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_orderbook_symbol_time
+                ON processed_orderbook (symbol, type, timestamp);
+            CREATE INDEX IF NOT EXISTS idx_orderbook_record ON processed_orderbook (record_id);
+
+            CREATE TABLE IF NOT EXISTS processed_trade (
+                record_id INTEGER NOT NULL REFERENCES records(id) ON DELETE CASCADE,
+                seq INTEGER NOT NULL,
+                {_column_sql(TRADE_COLUMNS)},
+                extra TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_trade_symbol_time
+                ON processed_trade (symbol, type, timestamp);
+            CREATE INDEX IF NOT EXISTS idx_trade_record ON processed_trade (record_id, seq);
+        ''')
+
+        # Databases created before deduplication lack the reference column
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(records)')}
+        if 'ref_timestamp' not in columns:
+            self.conn.execute('ALTER TABLE records ADD COLUMN ref_timestamp INTEGER')
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group every write inside the block into a single transaction
+
+        The store lock is held until the transaction ends, so callers that
+        have their own lock (BaseCache) must take it before entering.
+        """
+        with self._lock:
+            if self._batch_depth == 0:
+                self.conn.execute('BEGIN')
+            self._batch_depth += 1
+            try:
+                yield
+            except BaseException:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.conn.execute('ROLLBACK')
+                raise
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.conn.execute('COMMIT')
+
+    def _encode(self, data: Any) -> bytes:
+        if is_raw(data):
+            return compress_bytes(bytes(data), self.codec)
+        return compress_bytes(json.dumps(data, separators=(',', ':')).encode('utf-8'), self.codec)
+
+    @staticmethod
+    def _typed_rows(data_type: str, data: Any) -> Optional[List[Tuple]]:
+        """Split processed data into typed table rows, or None if it does not fit"""
+        _, columns = TYPED_TABLES[data_type]
+        names = [name for name, _ in columns]
+        items = data if data_type == 'trade' else [data]
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            return None
+
+        rows = []
+        for seq, item in enumerate(items):
+            if 'symbol' not in item or 'timestamp' not in item:
+                return None
+            values = [
+                json.dumps(item.get(name)) if name in JSON_COLUMNS else item.get(name)
+                for name in names
+            ]
+            extra = {key: value for key, value in item.items() if key not in names}
+            row = tuple(values) + (json.dumps(extra) if extra else None,)
+            rows.append((seq,) + row if data_type == 'trade' else row)
+        return rows
+
+    def append(self, data_type: str, subdir: str, prefix: str,
+               timestamp: int, cache_data: Dict) -> None:
+        """Insert a cache record
+
+        Args:
+            data_type: Type of data ('market', 'orderbook', 'trade', 'kline')
+            subdir: 'raw' or 'processed'
+            prefix: Base filename the record is stored under
+            timestamp: Record timestamp in milliseconds
+            cache_data: Cache envelope with data and metadata
+        """
+        processed = subdir == 'processed'
+        data = cache_data['data']
+        typed_rows = self._typed_rows(data_type, data) if processed and data_type in TYPED_TABLES else None
+        payload = None if typed_rows is not None else self._encode(data)
+
+        with self._lock, self.batch():
+            cursor = self.conn.execute(
+                'INSERT INTO records (data_type, processed, prefix, timestamp, cache_time, payload, '
+                'ref_timestamp) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (data_type, int(processed), prefix, timestamp,
+                 cache_data['metadata'].get('cache_time'), payload,
+                 cache_data['metadata'].get('ref_timestamp'))
+            )
+            if typed_rows:
+                table, columns = TYPED_TABLES[data_type]
+                names = (['seq'] if data_type == 'trade' else []) + [n for n, _ in columns] + ['extra']
+                placeholders = ', '.join('?' for _ in range(len(names) + 1))
+                column_list = ', '.join(f'"{name}"' for name in names)
+                self.conn.executemany(
+                    f'INSERT INTO {table} (record_id, {column_list}) VALUES ({placeholders})',
+                    [(cursor.lastrowid,) + row for row in typed_rows]
+                )
+
+    def _load_typed(self, data_type: str, record_id: int) -> Any:
+        table, columns = TYPED_TABLES[data_type]
+        names = [name for name, _ in columns]
+        order = ' ORDER BY seq' if data_type == 'trade' else ''
+        column_list = ', '.join(f'"{name}"' for name in names)
+        rows = self.conn.execute(
+            f'SELECT {column_list}, extra FROM {table} WHERE record_id = ?{order}', (record_id,)
+        ).fetchall()
+
+        items = []
+        for row in rows:
+            item = {}
+            for name, value in zip(names, row[:-1]):
+                if data_type == 'market' and name in MARKET_OPTIONAL and value is None:
+                    continue
+                if name in JSON_COLUMNS:
+                    value = json.loads(value)
+                elif name == 'isBuyerMaker':
+                    value = bool(value)
+                item[name] = value
+            if row[-1]:
+                item.update(json.loads(row[-1]))
+            items.append(item)
+
+        if data_type == 'trade':
+            return items
+        return items[0] if items else None
+
+    def read(self, data_type: str, subdir: str, pattern: str, n_latest: int = 1,
+             time_range: Optional[Tuple[int, int]] = None) -> List[Dict]:
+        """Read the newest records matching a filename pattern
+
+        Args:
+            data_type: Type of data to load
+            subdir: 'raw' or 'processed'
+            pattern: Base filename or glob pattern to match
+            n_latest: Maximum number of records to return
+            time_range: Optional (start_ms, end_ms) inclusive filter
+
+        Returns:
+            List of cache envelopes, newest first
+        """
+        processed = subdir == 'processed'
+        operator = 'GLOB' if any(c in pattern for c in '*?[') else '='
+        query = (f'SELECT id, prefix, timestamp, cache_time, payload, ref_timestamp FROM records '
+                 f'WHERE data_type = ? AND processed = ? AND prefix {operator} ?')
+        params: List[Any] = [data_type, int(processed), pattern]
+        if time_range:
+            query += ' AND timestamp BETWEEN ? AND ?'
+            params.extend(time_range)
+        query += ' ORDER BY timestamp DESC, id DESC LIMIT ?'
+        params.append(n_latest)
+
+        results = []
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+            for record_id, prefix, timestamp, cache_time, payload, ref_timestamp in rows:
+                try:
+                    if payload is None:
+                        data = self._load_typed(data_type, record_id)
+                    else:
+                        data = json.loads(decompress_bytes(payload))
+                except (json.JSONDecodeError, UnicodeDecodeError, *DECOMPRESSION_ERRORS) as e:
+                    self.logger.warning(f"Error reading cache record {record_id}: {e}")
+                    continue
+                metadata = {
+                    'timestamp': timestamp,
+                    'filename': prefix,
+                    'data_type': data_type,
+                    'is_processed': processed,
+                    'cache_time': cache_time
+                }
+                if ref_timestamp is not None:
+                    metadata['ref_timestamp'] = ref_timestamp
+                results.append({'data': data, 'metadata': metadata})
+        return results
+
+    def expire(self, data_type: str, subdir: str, cutoff_ms: int) -> int:
+        """Delete records older than a cutoff, returning how many were removed"""
+        with self._lock, self.batch():
+            cursor = self.conn.execute(
+                'DELETE FROM records WHERE data_type = ? AND processed = ? AND timestamp < ?',
+                (data_type, int(subdir == 'processed'), cutoff_ms)
+            )
+        return cursor.rowcount
+
+    def delete(self, data_type: str, subdir: str, prefix: str, timestamps: set) -> int:
+        """Delete the records of a prefix with the given timestamps"""
+        processed = int(subdir == 'processed')
+        removed = 0
+        ordered = sorted(timestamps)
+        with self._lock, self.batch():
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(ordered), 500):
+                chunk = ordered[start:start + 500]
+                placeholders = ', '.join('?' for _ in chunk)
+                cursor = self.conn.execute(
+                    f'DELETE FROM records WHERE data_type = ? AND processed = ? AND prefix = ? '
+                    f'AND timestamp IN ({placeholders})',
+                    [data_type, processed, prefix] + chunk
+                )
+                removed += cursor.rowcount
+        return removed
+
+    def timestamps(self, data_type: str, subdir: str) -> Dict[str, List[int]]:
+        """Return the sorted record timestamps of every prefix"""
+        result: Dict[str, List[int]] = {}
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT prefix, timestamp FROM records WHERE data_type = ? AND processed = ? '
+                'ORDER BY prefix, timestamp',
+                (data_type, int(subdir == 'processed'))
+            ).fetchall()
+        for prefix, timestamp in rows:
+            result.setdefault(prefix, []).append(timestamp)
+        return result
+
+    def usage(self, data_type: str, subdir: str) -> int:
+        """Approximate bytes used by a data type, pro-rated by record count"""
+        with self._lock:
+            page_size, page_count, free_pages = (
+                self.conn.execute(f'PRAGMA {pragma}').fetchone()[0]
+                for pragma in ('page_size', 'page_count', 'freelist_count')
+            )
+            total = self.conn.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+        if not total:
+            return 0
+        used = page_size * (page_count - free_pages)
+        return used * self.count(data_type, subdir) // total
+
+    def count(self, data_type: str, subdir: str) -> int:
+        """Count stored records for a data type and processing state"""
+        with self._lock:
+            return self.conn.execute(
+                'SELECT COUNT(*) FROM records WHERE data_type = ? AND processed = ?',
+                (data_type, int(subdir == 'processed'))
+            ).fetchone()[0]
+
+    def sync(self) -> None:
+        """Checkpoint the WAL so committed transactions reach the main database"""
+        with self._lock:
+            if self._batch_depth == 0:
+                self.conn.execute('PRAGMA wal_checkpoint(PASSIVE)')
+
+    def sync_durable(self) -> None:
+        """Make every committed transaction survive a crash
+
+        Commits under synchronous=NORMAL are not synced; a complete
+        checkpoint syncs the WAL and then the database, the guarantee
+        synchronous=FULL would give each commit.
+
+        Raises:
+            RuntimeError: Inside an open batch, whose writes are not committed yet
+            sqlite3.OperationalError: If other connections blocked the checkpoint
+        """
+        with self._lock:
+            if self._batch_depth:
+                raise RuntimeError("Cannot make writes durable inside an open batch")
+            busy, _, _ = self.conn.execute('PRAGMA wal_checkpoint(FULL)').fetchone()
+            if busy:
+                raise sqlite3.OperationalError(f"WAL checkpoint of {self.path} was blocked")
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self.conn.close()
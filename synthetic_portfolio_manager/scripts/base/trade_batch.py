@@ -0,0 +1,49 @@
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# One standardized trade per element; symbol and type are kept once per batch
+TRADE_DTYPE = np.dtype([
+    ('price', np.float64),
+    ('quantity', np.float64),
+    ('timestamp', np.int64),
+    ('isBuyerMaker', np.bool_),
+    ('tradeId', np.int64),
+])
+
+
+@dataclass
+class TradeBatch:
+    """Standardized trades of one symbol as a NumPy structured array
+
+    Fields are those of `process_trade_data` except `symbol` and `type`,
+    which are the same for every trade and stored once on the batch.
+    """
+    symbol: str
+    type: str
+    trades: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.trades)
+
+    @classmethod
+    def empty(cls, symbol: str, market_type: str) -> 'TradeBatch':
+        return cls(symbol, market_type, np.empty(0, dtype=TRADE_DTYPE))
+
+    def to_records(self) -> List[Dict]:
+        """Trades as `process_trade_data` dicts, for the JSON and SQLite caches"""
+        columns = [self.trades[name].tolist() for name in TRADE_DTYPE.names]
+        return [
+            {'symbol': self.symbol, 'type': self.type, 'price': price, 'quantity': quantity,
+             'timestamp': timestamp, 'isBuyerMaker': maker, 'tradeId': trade_id}
+            for price, quantity, timestamp, maker, trade_id in zip(*columns)
+        ]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Trades as a DataFrame with `symbol` and `type` columns"""
+        df = pd.DataFrame(self.trades)
+        df.insert(0, 'type', self.type)
+        df.insert(0, 'symbol', self.symbol)
+        return df
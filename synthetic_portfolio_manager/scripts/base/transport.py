@@ -0,0 +1,241 @@
+import json
+import socket
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+try:
+    import aiohttp
+except ImportError:  # optional async HTTP client
+    aiohttp = None
+
+try:
+    import httpx
+except ImportError:  # optional HTTP/2 client
+    httpx = None
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10.0
+DEFAULT_KEEPALIVE_SECONDS = 30.0
+
+# Errors a request through either HTTP client can raise
+TRANSPORT_ERRORS = (requests.exceptions.RequestException,) + (
+    (httpx.HTTPError,) if httpx is not None else ()
+)
+# A response body that is not valid JSON; requests' variant is also a RequestException
+DECODE_ERRORS = (json.JSONDecodeError, requests.exceptions.JSONDecodeError)
+
+_SETTINGS: Dict[str, Any] = {}
+_TRANSPORT: Optional['HttpTransport'] = None
+_TRANSPORT_LOCK = threading.Lock()
+
+
+def keepalive_socket_options(idle_seconds: float) -> list:
+    """Socket options enabling TCP keep-alive probes after `idle_seconds` idle
+
+    Probes keep pooled connections from being dropped silently by NATs and
+    load balancers between requests.
+    """
+    options = list(HTTPConnection.default_socket_options)
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    idle = max(1, int(idle_seconds))
+    if hasattr(socket, 'TCP_KEEPIDLE'):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle))
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, idle))
+    elif hasattr(socket, 'TCP_KEEPALIVE'):  # macOS
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, idle))
+    return options
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections use TCP keep-alive"""
+    def __init__(self, keepalive_seconds: float = DEFAULT_KEEPALIVE_SECONDS, **kwargs):
+        self.socket_options = keepalive_socket_options(keepalive_seconds)
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+
+class HttpTransport:
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE,
+                 pool_sizes: Optional[Dict[str, int]] = None,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 keepalive_seconds: float = DEFAULT_KEEPALIVE_SECONDS,
+                 http2: bool = False):
+        """Pooled HTTP client shared by every fetcher in the process
+
+        Each host gets its own connection pool of `pool_size` connections
+        (or its entry in `pool_sizes`), kept alive between requests, so
+        fetchers for different markets and exchanges reuse connections
+        instead of reconnecting and repeating the TLS handshake. Threads
+        beyond the pool size wait for a free connection rather than opening
+        one that would be discarded afterwards. Every request has a connect
+        and a read timeout.
+
+        With `http2` (requires httpx with the http2 extra) requests to a host
+        are multiplexed over a single connection instead.
+
+        Args:
+            pool_size: Connections kept per host
+            pool_sizes: Optional host -> connections overrides
+            connect_timeout: Seconds to wait for a connection
+            read_timeout: Seconds to wait between bytes of a response
+            keepalive_seconds: Idle seconds before TCP keep-alive probes start
+                (HTTP/2: before an idle connection is closed)
+            http2: Whether to speak HTTP/2 through httpx
+        """
+        self.pool_size = pool_size
+        self.pool_sizes = dict(pool_sizes or {})
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.keepalive_seconds = keepalive_seconds
+        self.http2 = http2
+        self._mounted = set()
+        self._lock = threading.Lock()
+
+        self.session = None
+        self.client = None
+        if http2:
+            if httpx is None:
+                raise ImportError("httpx[http2] is required for HTTP/2")
+            # One multiplexed connection per host; the pool only bounds idle ones
+            self.client = httpx.Client(
+                http2=True,
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(max_keepalive_connections=pool_size,
+                                    keepalive_expiry=keepalive_seconds)
+            )
+        else:
+            self.session = requests.Session()
+
+    @property
+    def timeout(self) -> tuple:
+        """(connect, read) timeout of every request"""
+        return (self.connect_timeout, self.read_timeout)
+
+    def mount(self, base_url: str) -> None:
+        """Give the host of `base_url` its own keep-alive connection pool"""
+        if self.session is None:
+            return
+        parsed = urlparse(base_url)
+        prefix = f"{parsed.scheme}://{parsed.netloc}/"
+        with self._lock:
+            if prefix in self._mounted:
+                return
+            size = self.pool_sizes.get(parsed.netloc, self.pool_size)
+            self.session.mount(prefix, KeepAliveAdapter(
+                self.keepalive_seconds, pool_connections=1, pool_maxsize=size,
+                pool_block=True
+            ))
+            self._mounted.add(prefix)
+
+    def request(self, method: str, url: str, params: Optional[Dict] = None,
+                json: Optional[Any] = None, headers: Optional[Dict] = None) -> Any:
+        """Send one request on a pooled connection
+
+        Returns:
+            requests.Response, or httpx.Response with HTTP/2; both provide
+            status_code, headers, content, json() and raise_for_status()
+        """
+        if self.client is not None:
+            return self.client.request(method, url, params=params, json=json, headers=headers)
+        return self.session.request(method=method, url=url, params=params, json=json,
+                                    headers=headers, timeout=self.timeout)
+
+    def close(self) -> None:
+        """Close every pooled connection"""
+        if self.client is not None:
+            self.client.close()
+        if self.session is not None:
+            self.session.close()
+            self._mounted.clear()
+
+
+class AsyncHttpTransport:
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE,
+                 pool_sizes: Optional[Dict[str, int]] = None,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 keepalive_seconds: float = DEFAULT_KEEPALIVE_SECONDS,
+                 http2: bool = False):
+        """Asyncio counterpart of HttpTransport: one aiohttp session for many fetchers
+
+        aiohttp speaks HTTP/1.1 only, so `http2` is accepted for symmetry
+        and ignored. The session is created on first use inside the running
+        loop and must be closed in the same loop.
+
+        Args:
+            pool_size: Connections kept per host
+            pool_sizes: Optional host -> connections overrides (the largest
+                bounds every host; fetchers bound their own concurrency)
+            connect_timeout: Seconds to wait for a connection
+            read_timeout: Seconds to wait between bytes of a response
+            keepalive_seconds: Seconds an idle connection is kept open
+            http2: Ignored
+        """
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for AsyncHttpTransport")
+        self.pool_size = max([pool_size, *(pool_sizes or {}).values()])
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.keepalive_seconds = keepalive_seconds
+        self._session: Optional['aiohttp.ClientSession'] = None
+
+    def timeout(self, total: Optional[float] = None) -> 'aiohttp.ClientTimeout':
+        """Per-request timeout: connect and read, plus an optional overall cap"""
+        return aiohttp.ClientTimeout(total=total, connect=self.connect_timeout,
+                                     sock_read=self.read_timeout)
+
+    @property
+    def session(self) -> 'aiohttp.ClientSession':
+        """The shared session, created on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=0, limit_per_host=self.pool_size,
+                    keepalive_timeout=self.keepalive_seconds, ttl_dns_cache=300
+                ),
+                timeout=self.timeout()
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the shared session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+def configure_transport(**settings) -> None:
+    """Set the HttpTransport/AsyncHttpTransport arguments used from now on
+
+    The shared transport is replaced; fetchers created earlier keep theirs.
+    """
+    global _TRANSPORT
+    with _TRANSPORT_LOCK:
+        _SETTINGS.clear()
+        _SETTINGS.update(settings)
+        _TRANSPORT = None
+
+
+def transport_settings() -> Dict[str, Any]:
+    """Arguments given to the last configure_transport call"""
+    with _TRANSPORT_LOCK:
+        return dict(_SETTINGS)
+
+
+def get_transport() -> HttpTransport:
+    """Return the HttpTransport shared by every synchronous fetcher"""
+    global _TRANSPORT
+    with _TRANSPORT_LOCK:
+        if _TRANSPORT is None:
+            _TRANSPORT = HttpTransport(**_SETTINGS)
+        return _TRANSPORT
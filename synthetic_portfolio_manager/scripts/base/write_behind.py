@@ -0,0 +1,152 @@
+import atexit
+import queue
+import threading
+import time
+from typing import Any, Callable, List
+
+from utilities.logging_config import get_logger
+
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_FSYNC_INTERVAL = 1.0
+
+_STOP = object()
+
+
+class BatchWriteError(Exception):
+    """Raised by a `write_batch` callable that persisted only the first `written` items"""
+    def __init__(self, written: int, error: Exception):
+        super().__init__(str(error))
+        self.written = written
+        self.error = error
+
+
+class WriteBehindWriter:
+    def __init__(self, write_batch: Callable[[List[Any]], None], sync: Callable[[], None],
+                 max_queue: int = DEFAULT_QUEUE_SIZE, batch_size: int = DEFAULT_BATCH_SIZE,
+                 fsync_interval: float = DEFAULT_FSYNC_INTERVAL):
+        """Background writer that drains a bounded queue of cache writes
+
+        Producers call `submit`, which returns as soon as the item is queued
+        and blocks only while the queue is full (backpressure). A single
+        writer thread groups queued items into batches, and calls `sync`
+        at most every `fsync_interval` seconds and on shutdown.
+
+        If a batch fails, its items are retried one at a time so a single bad
+        entry does not discard the rest. Items that still fail are dropped
+        and counted in `failed`.
+
+        Args:
+            write_batch: Callable that persists a list of queued items, either
+                all or none of them, or raising BatchWriteError after a prefix
+            sync: Callable that makes persisted items durable (fsync)
+            max_queue: Maximum number of queued items before producers block
+            batch_size: Maximum items handed to `write_batch` at once
+            fsync_interval: Seconds between sync calls while writes are pending
+        """
+        self.write_batch = write_batch
+        self.sync = sync
+        self.batch_size = batch_size
+        self.fsync_interval = fsync_interval
+        self.logger = get_logger('cache.writer')
+
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.closed = False
+        self.failed = 0
+        self.last_error = None
+        self._dirty = False
+        self._last_sync = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name='cache-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, item: Any) -> None:
+        """Queue an item for writing, blocking while the queue is full"""
+        if self.closed:
+            raise RuntimeError("Write-behind writer is closed")
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.logger.debug("Write queue full, waiting for writer to catch up")
+            self.queue.put(item)
+
+    def _maybe_sync(self, force: bool = False) -> None:
+        if not self._dirty:
+            return
+        if force or time.monotonic() - self._last_sync >= self.fsync_interval:
+            try:
+                self.sync()
+            except Exception as e:
+                self.logger.error(f"Error syncing cache writes: {str(e)}")
+            self._dirty = False
+            self._last_sync = time.monotonic()
+
+    def _write(self, items: List[Any]) -> None:
+        try:
+            self.write_batch(items)
+            self._dirty = True
+            return
+        except BatchWriteError as e:
+            written, error = e.written, e.error
+        except Exception as e:
+            written, error = 0, e
+        self._dirty = self._dirty or written > 0
+
+        remaining = items[written:]
+        if len(items) > 1:
+            self.logger.warning(f"Error writing {len(items)} cache entries, retrying "
+                                f"{len(remaining)} one at a time: {str(error)}")
+            for item in remaining:
+                try:
+                    self.write_batch([item])
+                    self._dirty = True
+                except Exception as e:
+                    self._record_failure(e)
+        else:
+            self._record_failure(error)
+
+    def _record_failure(self, error: Exception) -> None:
+        self.failed += 1
+        self.last_error = error
+        self.logger.error(f"Error writing cache entry, dropping it: {str(error)}")
+
+    def _run(self) -> None:
+        while True:
+            timeout = max(self.fsync_interval - (time.monotonic() - self._last_sync), 0.01)
+            try:
+                first = self.queue.get(timeout=timeout if self._dirty else None)
+            except queue.Empty:
+                self._maybe_sync()
+                continue
+
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(item is _STOP for item in batch)
+            items = [item for item in batch if item is not _STOP]
+            if items:
+                self._write(items)
+            for _ in batch:
+                self.queue.task_done()
+
+            self._maybe_sync(force=stop)
+            if stop:
+                return
+
+    def flush(self) -> None:
+        """Block until every queued item has been written"""
+        if not self.closed:
+            self.queue.join()
+
+    def close(self) -> None:
+        """Write and sync everything still queued, then stop the thread"""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(_STOP)
+        self._thread.join()
+        atexit.unregister(self.close)
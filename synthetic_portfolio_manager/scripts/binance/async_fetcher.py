@@ -0,0 +1,375 @@
+import asyncio
+from typing import Dict, Optional, List
+from ..base.async_base_fetcher import AsyncBaseFetcher, DEFAULT_MAX_CONCURRENCY
+from ..base.transport import AsyncHttpTransport, transport_settings
+from .fetcher import agg_trades_params, batch_params, futures_snapshot, klines_params, merge_tickers
+from .endpoint_ttls import endpoint_ttl
+from .weights import endpoint_weight
+
+class AsyncBinanceFetcher:
+    def __init__(self, spot_config: Dict, futures_config: Optional[Dict] = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, memoize: bool = False,
+                 transport: Optional[AsyncHttpTransport] = None):
+        """Asyncio counterpart of BinanceFetcher with the same methods
+
+        Spot and futures requests share one aiohttp session, created here
+        and closed by `close` unless `transport` is given.
+
+        Args:
+            spot_config: Spot API settings (base_url, api_key, api_secret, rate_limit)
+            futures_config: Optional futures API settings (base_url, rate_limit)
+            max_concurrency: Maximum concurrent requests per host
+            memoize: Reuse responses of slow-changing endpoints for their TTL
+            transport: Optional shared transport owned by the caller
+        """
+        request_ttl = endpoint_ttl if memoize else None
+        self._owns_transport = transport is None
+        if transport is None:
+            settings = transport_settings()
+            settings.setdefault('pool_size', max_concurrency)
+            transport = AsyncHttpTransport(**settings)
+        self.transport = transport
+        self.spot_fetcher = AsyncBaseFetcher(
+            base_url=spot_config['base_url'],
+            api_key=spot_config.get('api_key'),
+            api_secret=spot_config.get('api_secret'),
+            rate_limit=spot_config.get('rate_limit', 1200),
+            request_weight=endpoint_weight,
+            max_concurrency=max_concurrency,
+            request_ttl=request_ttl,
+            transport=transport
+        )
+
+        self.futures_fetcher = None
+        if futures_config:
+            self.futures_fetcher = AsyncBaseFetcher(
+                base_url=futures_config['base_url'],
+                api_key=spot_config.get('api_key'),  # Use same keys as spot
+                api_secret=spot_config.get('api_secret'),
+                rate_limit=futures_config.get('rate_limit', 1200),
+                request_weight=endpoint_weight,
+                max_concurrency=max_concurrency,
+                request_ttl=request_ttl,
+                transport=transport
+            )
+
+    def _get_fetcher(self, market_type: str) -> AsyncBaseFetcher:
+        """Get appropriate fetcher based on market type"""
+        if market_type == 'futures':
+            if not self.futures_fetcher:
+                raise ValueError("Futures market not configured")
+            return self.futures_fetcher
+        return self.spot_fetcher
+
+    async def fetch_market_data(self, symbol: str, market_type: str = 'spot') -> Optional[Dict]:
+        """Fetch comprehensive market data including price, volume, etc.
+
+        Args:
+            symbol: Trading pair symbol (e.g., 'BTCUSDT')
+            market_type: 'spot' or 'futures'
+
+        Returns:
+            Dict containing market data or None on error
+        """
+        try:
+            fetcher = self._get_fetcher(market_type)
+            endpoint = '/api/v3/ticker/24hr' if market_type == 'spot' else '/fapi/v1/ticker/24hr'
+
+            if market_type != 'futures':
+                return await fetcher.fetch_data(endpoint=endpoint, params={'symbol': symbol})
+
+            # For futures, fetch mark price, funding and open interest alongside the ticker
+            ticker_data, snapshot = await asyncio.gather(
+                fetcher.fetch_data(endpoint=endpoint, params={'symbol': symbol}),
+                self.fetch_futures_snapshot([symbol])
+            )
+            if ticker_data and snapshot and symbol in snapshot:
+                ticker_data.update(snapshot[symbol])
+            return ticker_data
+
+        except Exception as e:
+            self._get_fetcher(market_type).logger.error(
+                f"Error fetching market data for {symbol}: {str(e)}"
+            )
+            return None
+
+    async def fetch_market_data_batch(self, symbols: List[str],
+                                      market_type: str = 'spot') -> Optional[Dict[str, Dict]]:
+        """Fetch tickers and best bid/ask for several symbols in two requests
+
+        Args:
+            symbols: Trading pair symbols
+            market_type: 'spot' or 'futures'
+
+        Returns:
+            Dict of symbol -> market data (as from `fetch_market_data`, plus
+            bidPrice/bidQty/askPrice/askQty) or None on error
+        """
+        try:
+            fetcher = self._get_fetcher(market_type)
+            prefix = '/api/v3' if market_type == 'spot' else '/fapi/v1'
+            params = batch_params(symbols, market_type)
+
+            requests = [
+                fetcher.fetch_data(endpoint=f"{prefix}/ticker/24hr", params=dict(params)),
+                fetcher.fetch_data(endpoint=f"{prefix}/ticker/bookTicker", params=dict(params))
+            ]
+            if market_type == 'futures':
+                requests.append(self.fetch_futures_snapshot(symbols))
+            tickers, book_tickers, *snapshot = await asyncio.gather(*requests)
+            if not tickers:
+                return None
+            market_data = merge_tickers(symbols, tickers, book_tickers)
+
+            if snapshot and snapshot[0]:
+                for symbol, ticker_data in market_data.items():
+                    ticker_data.update(snapshot[0].get(symbol, {}))
+
+            return market_data
+
+        except Exception as e:
+            self._get_fetcher(market_type).logger.error(
+                f"Error fetching batch market data for {len(symbols)} symbols: {str(e)}"
+            )
+            return None
+
+    async def _fetch_open_interest(self, symbol: str) -> Optional[Dict]:
+        """Fetch open interest for one futures symbol, None on error"""
+        try:
+            return await self.futures_fetcher.fetch_data(
+                endpoint='/fapi/v1/openInterest',
+                params={'symbol': symbol}
+            )
+        except Exception as e:
+            self.futures_fetcher.logger.warning(
+                f"Error fetching open interest for {symbol}: {str(e)}"
+            )
+            return None
+
+    async def fetch_futures_snapshot(self, symbols: List[str]) -> Optional[Dict[str, Dict]]:
+        """Fetch mark price, funding and open interest for futures symbols
+
+        One premiumIndex request covers every symbol; open interest requests
+        run concurrently with it.
+
+        Args:
+            symbols: Trading pair symbols
+
+        Returns:
+            Dict of symbol -> futures fields (see `futures_snapshot`) or None on error
+        """
+        try:
+            if not self.futures_fetcher:
+                raise ValueError("Futures market not configured")
+
+            premium_index, *open_interest = await asyncio.gather(
+                self.futures_fetcher.fetch_data(
+                    endpoint='/fapi/v1/premiumIndex',
+                    params=batch_params(symbols, 'futures')
+                ),
+                *(self._fetch_open_interest(symbol) for symbol in symbols)
+            )
+            if not premium_index:
+                return None
+            return futures_snapshot(symbols, premium_index, dict(zip(symbols, open_interest)))
+
+        except Exception as e:
+            if self.futures_fetcher:
+                self.futures_fetcher.logger.error(
+                    f"Error fetching futures snapshot for {len(symbols)} symbols: {str(e)}"
+                )
+            return None
+
+    async def fetch_orderbook(self, symbol: str, limit: int = 100,
+                              market_type: str = 'spot', raw: bool = False) -> Optional[Dict]:
+        """Fetch orderbook data
+
+        Args:
+            symbol: Trading pair symbol
+            limit: Number of price levels to fetch
+            market_type: 'spot' or 'futures'
+            raw: Return the undecoded response body (bytes) for the cache
+
+        Returns:
+            Dict containing orderbook data (bytes when raw) or None on error
+        """
+        try:
+            fetcher = self._get_fetcher(market_type)
+            endpoint = '/api/v3/depth' if market_type == 'spot' else '/fapi/v1/depth'
+            return await fetcher.fetch_data(
+                endpoint=endpoint,
+                params={'symbol': symbol, 'limit': limit},
+                raw=raw
+            )
+        except Exception as e:
+            self._get_fetcher(market_type).logger.error(
+                f"Error fetching orderbook for {symbol}: {str(e)}"
+            )
+            return None
+
+    async def fetch_recent_trades(self, symbol: str, limit: int = 100,
+                                  market_type: str = 'spot',
+                                  raw: bool = False) -> Optional[List[Dict]]:
+        """Fetch recent trades
+
+        Args:
+            symbol: Trading pair symbol
+            limit: Number of trades to fetch
+            market_type: 'spot' or 'futures'
+            raw: Return the undecoded response body (bytes) for the cache
+
+        Returns:
+            List of trade dictionaries (bytes when raw) or None on error
+        """
+        try:
+            fetcher = self._get_fetcher(market_type)
+            endpoint = '/api/v3/trades' if market_type == 'spot' else '/fapi/v1/trades'
+            return await fetcher.fetch_data(
+                endpoint=endpoint,
+                params={'symbol': symbol, 'limit': limit},
+                raw=raw
+            )
+        except Exception as e:
+            self._get_fetcher(market_type).logger.error(
+                f"Error fetching trades for {symbol}: {str(e)}"
+            )
+            return None
+
+    async def fetch_agg_trades(self, symbol: str, limit: int = 1000, from_id: Optional[int] = None,
+                               start_time: Optional[int] = None, end_time: Optional[int] = None,
+                               market_type: str = 'spot') -> Optional[List[Dict]]:
+        """Fetch aggregate trades, optionally from an id or within a time window
+
+        Args:
+            symbol: Trading pair symbol
+            limit: Number of aggregate trades to fetch (max 1000)
+            from_id: Optional aggregate trade id to start from (inclusive)
+            start_time: Optional start time in milliseconds (inclusive)
+            end_time: Optional end time in milliseconds (inclusive)
+            market_type: 'spot' or 'futures'
+
+        Returns:
+            List of aggregate trade dictionaries (oldest first) or None on error
+        """
+        try:
+            fetcher = self._get_fetcher(market_type)
+            endpoint = '/api/v3/aggTrades' if market_type == 'spot' else '/fapi/v1/aggTrades'
+            return await fetcher.fetch_data(
+                endpoint=endpoint,
+                params=agg_trades_params(symbol, limit, from_id, start_time, end_time)
+            )
+        except Exception as e:
+            self._get_fetcher(market_type).logger.error(
+                f"Error fetching aggregate trades for {symbol}: {str(e)}"
+            )
+            return None
+
+    async def fetch_klines(self, symbol: str, interval: str, start_time: Optional[int] = None,
+                           end_time: Optional[int] = None, limit: int = 500,
+                           market_type: str = 'spot') -> Optional[List[List]]:
+        """Fetch klines (candlesticks)
+
+        Args:
+            symbol: Trading pair symbol
+            interval: Kline interval (e.g. '1m', '1h', '1d')
+            start_time: Optional open time in milliseconds of the first kline
+            end_time: Optional open time in milliseconds of the last kline
+            limit: Number of klines to fetch (max 1000)
+            market_type: 'spot' or 'futures'
+
+        Returns:
+            List of kline arrays (oldest first) or None on error
+        """
+        try:
+            fetcher = self._get_fetcher(market_type)
+            endpoint = '/api/v3/klines' if market_type == 'spot' else '/fapi/v1/klines'
+            return await fetcher.fetch_data(
+                endpoint=endpoint,
+                params=klines_params(symbol, interval, start_time, end_time, limit)
+            )
+        except Exception as e:
+            self._get_fetcher(market_type).logger.error(
+                f"Error fetching {interval} klines for {symbol}: {str(e)}"
+            )
+            return None
+
+    async def fetch_liquidations(self, symbol: str, limit: int = 100) -> Optional[List[Dict]]:
+        """Fetch recent liquidations (futures only)
+
+        Args:
+            symbol: Trading pair symbol
+            limit: Number of liquidation events to fetch
+
+        Returns:
+            List of liquidation dictionaries or None on error
+        """
+        try:
+            if not self.futures_fetcher:
+                raise ValueError("Futures market not configured")
+            return await self.futures_fetcher.fetch_data(
+                endpoint='/fapi/v1/allForceOrders',
+                params={'symbol': symbol, 'limit': limit}
+            )
+        except Exception as e:
+            if self.futures_fetcher:
+                self.futures_fetcher.logger.error(
+                    f"Error fetching liquidations for {symbol}: {str(e)}"
+                )
+            return None
+
+    async def fetch_funding_rate_history(self, symbol: str,
+                                         limit: int = 100) -> Optional[List[Dict]]:
+        """Fetch funding rate history (futures only)
+
+        Args:
+            symbol: Trading pair symbol
+            limit: Number of funding rate records to fetch
+
+        Returns:
+            List of funding rate dictionaries or None on error
+        """
+        try:
+            if not self.futures_fetcher:
+                raise ValueError("Futures market not configured")
+            return await self.futures_fetcher.fetch_data(
+                endpoint='/fapi/v1/fundingRate',
+                params={'symbol': symbol, 'limit': limit}
+            )
+        except Exception as e:
+            if self.futures_fetcher:
+                self.futures_fetcher.logger.error(
+                    f"Error fetching funding rate history for {symbol}: {str(e)}"
+                )
+            return None
+
+    async def fetch_market_info(self, market_type: str = 'spot',
+                                raw: bool = False) -> Optional[Dict]:
+        """Fetch exchange information including trading rules
+
+        Args:
+            market_type: 'spot' or 'futures'
+            raw: Return the undecoded response body (bytes) for the cache
+
+        Returns:
+            Dict containing exchange information (bytes when raw) or None on error
+        """
+        try:
+            fetcher = self._get_fetcher(market_type)
+            endpoint = '/api/v3/exchangeInfo' if market_type == 'spot' else '/fapi/v1/exchangeInfo'
+            return await fetcher.fetch_data(endpoint=endpoint, raw=raw)
+        except Exception as e:
+            self._get_fetcher(market_type).logger.error(
+                f"Error fetching {market_type} market info: {str(e)}"
+            )
+            return None
+
+    async def close(self) -> None:
+        """Close the pooled session"""
+        if self._owns_transport:
+            await self.transport.close()
+
+    async def __aenter__(self) -> 'AsyncBinanceFetcher':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
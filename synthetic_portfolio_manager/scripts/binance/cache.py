@@ -1,14 +1,40 @@
-from scripts.base.base_cache import BaseCache
+from typing import Union
+from scripts.base.base_cache import BaseCache, DEFAULT_DEDUP_KEYFRAME_SECONDS
+from scripts.base.orderbook_store import DEFAULT_KEYFRAME_INTERVAL
+from scripts.base.segment_store import DEFAULT_SEGMENT_MAX_BYTES
+from scripts.base.write_behind import DEFAULT_QUEUE_SIZE, DEFAULT_FSYNC_INTERVAL
 
 class BinanceCache(BaseCache):
-    def __init__(self, directory: str = 'data/cache/binance', max_age_hours: int = 24, compress: bool = False):
+    def __init__(self, directory: str = 'data/cache/binance', max_age_hours: int = 24, compress: Union[bool, str] = False,
+                 storage: str = 'files', segment_max_bytes: int = DEFAULT_SEGMENT_MAX_BYTES,
+                 write_behind: bool = False, write_queue_size: int = DEFAULT_QUEUE_SIZE,
+                 fsync_interval: float = DEFAULT_FSYNC_INTERVAL, read_cache_bytes: int = 0,
+                 dedup: bool = False, dedup_keyframe_seconds: float = DEFAULT_DEDUP_KEYFRAME_SECONDS,
+                 orderbook_deltas: bool = False,
+                 orderbook_keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL):
         """Initialize Binance cache
         
         Args:
             directory: Base directory for cache
             max_age_hours: Maximum age of cache files in hours
-            compress: Whether to compress cached files
+            compress: Whether to compress cached files (True, False or a codec name)
+            storage: Storage layout ('files', 'segments' or 'sqlite')
+            segment_max_bytes: Size at which a segment is sealed (segments only)
+            write_behind: Whether to write from a background thread
+            write_queue_size: Pending writes before saves block (write-behind only)
+            fsync_interval: Seconds between fsyncs (write-behind only)
+            read_cache_bytes: Memory budget for the in-process read cache (0 disables it)
+            dedup: Whether to store unchanged snapshots as references
+            dedup_keyframe_seconds: Seconds before an unchanged payload is written in full again
+            orderbook_deltas: Whether to store orderbooks as keyframes plus deltas
+            orderbook_keyframe_interval: Orderbook snapshots per keyframe
         """
-        super().__init__(directory)
+        super().__init__(directory, storage=storage, segment_max_bytes=segment_max_bytes,
+                         compress=compress, write_behind=write_behind,
+                         write_queue_size=write_queue_size, fsync_interval=fsync_interval,
+                         read_cache_bytes=read_cache_bytes, dedup=dedup,
+                         dedup_keyframe_seconds=dedup_keyframe_seconds,
+                         orderbook_deltas=orderbook_deltas,
+                         orderbook_keyframe_interval=orderbook_keyframe_interval)
         self.max_age_hours = max_age_hours
         self.compress = compress
\ No newline at end of file
@@ -0,0 +1,37 @@
+from typing import Dict, Optional
+
+# Seconds a response may be reused for, by how quickly the endpoint changes.
+# Endpoints read incrementally (depth, trades, aggTrades, klines) are never
+# memoized; their requests are only coalesced while in flight.
+EXCHANGE_INFO_TTL = 300
+FUNDING_HISTORY_TTL = 60
+TICKER_TTL = 1
+
+ENDPOINT_TTLS = {
+    # Spot
+    '/api/v3/exchangeInfo': EXCHANGE_INFO_TTL,
+    '/api/v3/ticker/24hr': TICKER_TTL,
+    '/api/v3/ticker/price': TICKER_TTL,
+    '/api/v3/ticker/bookTicker': TICKER_TTL,
+    # USD-M futures
+    '/fapi/v1/exchangeInfo': EXCHANGE_INFO_TTL,
+    '/fapi/v1/fundingRate': FUNDING_HISTORY_TTL,
+    '/fapi/v1/ticker/24hr': TICKER_TTL,
+    '/fapi/v1/ticker/price': TICKER_TTL,
+    '/fapi/v1/ticker/bookTicker': TICKER_TTL,
+    '/fapi/v1/premiumIndex': TICKER_TTL,
+    '/fapi/v1/openInterest': TICKER_TTL,
+}
+
+
+def endpoint_ttl(endpoint: str, params: Optional[Dict] = None) -> Optional[int]:
+    """Return how long a Binance endpoint's response may be memoized
+
+    Args:
+        endpoint: API path, with or without a leading slash
+        params: Query parameters of the request
+
+    Returns:
+        TTL in seconds, or None for endpoints that are not memoized
+    """
+    return ENDPOINT_TTLS.get('/' + endpoint.lstrip('/'))
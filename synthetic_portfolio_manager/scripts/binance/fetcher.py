@@ -1,14 +1,144 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional, List
 from ..base.base_fetcher import BaseFetcher
+from ..base.transport import HttpTransport
+from .endpoint_ttls import endpoint_ttl
+from .weights import endpoint_weight
+
+BOOK_TICKER_FIELDS = ('bidPrice', 'bidQty', 'askPrice', 'askQty')
+# Upper bound on per-symbol requests (open interest) issued in parallel
+MAX_PARALLEL_REQUESTS = 10
+
+def batch_params(symbols: List[str], market_type: str = 'spot') -> Dict:
+    """Query parameters selecting several symbols in one ticker request
+    
+    Spot tickers accept a `symbols` JSON list; futures tickers only support
+    one symbol or all of them, so larger futures batches request everything.
+    """
+    if len(symbols) == 1:
+        return {'symbol': symbols[0]}
+    if market_type == 'futures':
+        return {}
+    return {'symbols': json.dumps(list(symbols), separators=(',', ':'))}
+
+def agg_trades_params(symbol: str, limit: int = 1000, from_id: Optional[int] = None,
+                      start_time: Optional[int] = None, end_time: Optional[int] = None) -> Dict:
+    """Query parameters for an aggTrades request
+    
+    Without from_id, start_time or end_time Binance returns the most recent
+    aggregate trades.
+    """
+    params = {'symbol': symbol, 'limit': limit}
+    if from_id is not None:
+        params['fromId'] = from_id
+    if start_time is not None:
+        params['startTime'] = start_time
+    if end_time is not None:
+        params['endTime'] = end_time
+    return params
+
+def klines_params(symbol: str, interval: str, start_time: Optional[int] = None,
+                  end_time: Optional[int] = None, limit: int = 500) -> Dict:
+    """Query parameters for a klines request"""
+    params = {'symbol': symbol, 'interval': interval, 'limit': limit}
+    if start_time is not None:
+        params['startTime'] = start_time
+    if end_time is not None:
+        params['endTime'] = end_time
+    return params
+
+def merge_tickers(symbols: List[str], tickers, book_tickers=None) -> Dict[str, Dict]:
+    """Key batch ticker responses by symbol, adding best bid/ask fields
+    
+    Args:
+        symbols: Symbols to keep (responses may cover more)
+        tickers: 24hr ticker response (a list, or a dict for one symbol)
+        book_tickers: Optional book ticker response in the same shape
+        
+    Returns:
+        Dict of symbol -> ticker for every requested symbol that was returned
+    """
+    def by_symbol(response):
+        if isinstance(response, dict):
+            response = [response]
+        return {item['symbol']: item for item in response or [] if 'symbol' in item}
+    
+    wanted = set(symbols)
+    books = by_symbol(book_tickers)
+    merged = {}
+    for symbol, ticker in by_symbol(tickers).items():
+        if symbol not in wanted:
+            continue
+        ticker = dict(ticker)
+        book = books.get(symbol)
+        if book:
+            ticker.update({field: book[field] for field in BOOK_TICKER_FIELDS if field in book})
+        merged[symbol] = ticker
+    return merged
+
+def futures_snapshot(symbols: List[str], premium_index,
+                     open_interest: Optional[Dict[str, Optional[Dict]]] = None) -> Dict[str, Dict]:
+    """Build per-symbol futures fields from premiumIndex and open interest responses
+    
+    Args:
+        symbols: Symbols to keep (premiumIndex may cover every symbol)
+        premium_index: premiumIndex response (a list, or a dict for one symbol)
+        open_interest: Optional openInterest responses by symbol (None for failures)
+        
+    Returns:
+        Dict of symbol -> markPrice, indexPrice, fundingRate, nextFundingTime
+        and openInterest (when available)
+    """
+    if isinstance(premium_index, dict):
+        premium_index = [premium_index]
+    wanted = set(symbols)
+    open_interest = open_interest or {}
+    
+    snapshot = {}
+    for item in premium_index or []:
+        symbol = item.get('symbol')
+        if symbol not in wanted:
+            continue
+        fields = {
+            'markPrice': item.get('markPrice'),
+            'indexPrice': item.get('indexPrice'),
+            'fundingRate': item.get('lastFundingRate'),
+            'nextFundingTime': item.get('nextFundingTime'),
+        }
+        oi_data = open_interest.get(symbol)
+        if oi_data and 'openInterest' in oi_data:
+            fields['openInterest'] = float(oi_data['openInterest'])
+        snapshot[symbol] = fields
+    return snapshot
 
 class BinanceFetcher:
-    def __init__(self, spot_config: Dict, futures_config: Optional[Dict] = None):
+    def __init__(self, spot_config: Dict, futures_config: Optional[Dict] = None,
+                 memoize: bool = False, transport: Optional[HttpTransport] = None):
+        """Binance spot and USD-M futures REST client
+        
+        Spot and futures requests share one pooled transport (the
+        process-wide one unless `transport` is given).
+        
+        Args:
+            spot_config: Spot API settings (base_url, api_key, api_secret, rate_limit)
+            futures_config: Optional futures API settings (base_url, rate_limit)
+            memoize: Reuse responses of slow-changing endpoints for their TTL
+                (see endpoint_ttls); identical concurrent requests are always
+                coalesced
+            transport: Optional transport to use instead of the shared one
+        """
+        request_ttl = endpoint_ttl if memoize else None
+        
         # Initialize spot API fetcher
         self.spot_fetcher = BaseFetcher(
             base_url=spot_config['base_url'],
             api_key=spot_config.get('api_key'),
             api_secret=spot_config.get('api_secret'),
-            rate_limit=spot_config.get('rate_limit', 1200)
+            rate_limit=spot_config.get('rate_limit', 1200),
+            request_weight=endpoint_weight,
+            request_ttl=request_ttl,
+            transport=transport
         )
         
         # Initialize futures API fetcher if configured
@@ -18,7 +148,10 @@ class BinanceFetcher:
                 base_url=futures_config['base_url'],
                 api_key=spot_config.get('api_key'),  # Use same keys as spot
                 api_secret=spot_config.get('api_secret'),
-                rate_limit=futures_config.get('rate_limit', 1200)
+                rate_limit=futures_config.get('rate_limit', 1200),
+                request_weight=endpoint_weight,
+                request_ttl=request_ttl,
+                transport=transport
             )
         
     def _get_fetcher(self, market_type: str) -> BaseFetcher:
@@ -49,24 +182,11 @@ class BinanceFetcher:
                 params={'symbol': symbol}
             )
             
-            # For futures, get additional data
+            # For futures, add mark price, funding and open interest
             if market_type == 'futures' and ticker_data:
-                # Get funding rate
-                funding_data = fetcher.fetch_data(
-                    endpoint='/fapi/v1/fundingRate',
-                    params={'symbol': symbol}
-                )
-                
-                # Get open interest
-                oi_data = fetcher.fetch_data(
-                    endpoint='/fapi/v1/openInterest',
-                    params={'symbol': symbol}
-                )
-                
-                # Combine the data
-                if funding_data and oi_data:
-                    ticker_data['fundingRate'] = funding_data[0]['fundingRate']
-                    ticker_data['openInterest'] = float(oi_data['openInterest'])
+                snapshot = self.fetch_futures_snapshot([symbol])
+                if snapshot and symbol in snapshot:
+                    ticker_data.update(snapshot[symbol])
                     
             return ticker_data
             
@@ -76,17 +196,110 @@ class BinanceFetcher:
             )
             return None
             
+    def fetch_market_data_batch(self, symbols: List[str],
+                                market_type: str = 'spot') -> Optional[Dict[str, Dict]]:
+        """Fetch tickers and best bid/ask for several symbols in two requests
+        
+        Args:
+            symbols: Trading pair symbols
+            market_type: 'spot' or 'futures'
+            
+        Returns:
+            Dict of symbol -> market data (as from `fetch_market_data`, plus
+            bidPrice/bidQty/askPrice/askQty) or None on error
+        """
+        try:
+            fetcher = self._get_fetcher(market_type)
+            prefix = '/api/v3' if market_type == 'spot' else '/fapi/v1'
+            params = batch_params(symbols, market_type)
+            
+            tickers = fetcher.fetch_data(endpoint=f"{prefix}/ticker/24hr", params=dict(params))
+            if not tickers:
+                return None
+            book_tickers = fetcher.fetch_data(endpoint=f"{prefix}/ticker/bookTicker",
+                                              params=dict(params))
+            market_data = merge_tickers(symbols, tickers, book_tickers)
+            
+            if market_type == 'futures' and market_data:
+                snapshot = self.fetch_futures_snapshot(list(market_data)) or {}
+                for symbol, ticker_data in market_data.items():
+                    ticker_data.update(snapshot.get(symbol, {}))
+            
+            return market_data
+            
+        except Exception as e:
+            self._get_fetcher(market_type).logger.error(
+                f"Error fetching batch market data for {len(symbols)} symbols: {str(e)}"
+            )
+            return None
+            
+    def _fetch_open_interest(self, symbol: str) -> Optional[Dict]:
+        """Fetch open interest for one futures symbol, None on error"""
+        try:
+            return self.futures_fetcher.fetch_data(
+                endpoint='/fapi/v1/openInterest',
+                params={'symbol': symbol}
+            )
+        except Exception as e:
+            self.futures_fetcher.logger.warning(
+                f"Error fetching open interest for {symbol}: {str(e)}"
+            )
+            return None
+            
+    def fetch_futures_snapshot(self, symbols: List[str]) -> Optional[Dict[str, Dict]]:
+        """Fetch mark price, funding and open interest for futures symbols
+        
+        Mark/index price, current funding rate and next funding time for all
+        symbols come from one premiumIndex request; open interest has no
+        multi-symbol endpoint and is fetched per symbol in parallel.
+        
+        Args:
+            symbols: Trading pair symbols
+            
+        Returns:
+            Dict of symbol -> futures fields (see `futures_snapshot`) or None on error
+        """
+        try:
+            if not self.futures_fetcher:
+                raise ValueError("Futures market not configured")
+            
+            workers = min(len(symbols), MAX_PARALLEL_REQUESTS) + 1
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                premium_request = pool.submit(
+                    self.futures_fetcher.fetch_data,
+                    endpoint='/fapi/v1/premiumIndex',
+                    params=batch_params(symbols, 'futures')
+                )
+                oi_requests = {
+                    symbol: pool.submit(self._fetch_open_interest, symbol)
+                    for symbol in symbols
+                }
+                premium_index = premium_request.result()
+                open_interest = {symbol: request.result() for symbol, request in oi_requests.items()}
+            
+            if not premium_index:
+                return None
+            return futures_snapshot(symbols, premium_index, open_interest)
+            
+        except Exception as e:
+            if self.futures_fetcher:
+                self.futures_fetcher.logger.error(
+                    f"Error fetching futures snapshot for {len(symbols)} symbols: {str(e)}"
+                )
+            return None
+            
     def fetch_orderbook(self, symbol: str, limit: int = 100, 
-                       market_type: str = 'spot') -> Optional[Dict]:
+                       market_type: str = 'spot', raw: bool = False) -> Optional[Dict]:
         """Fetch orderbook data
         
         Args:
             symbol: Trading pair symbol
             limit: Number of price levels to fetch
             market_type: 'spot' or 'futures'
+            raw: Return the undecoded response body (bytes) for the cache
             
         Returns:
-            Dict containing orderbook data or None on error
+            Dict containing orderbook data (bytes when raw) or None on error
         """
         try:
             fetcher = self._get_fetcher(market_type)
@@ -97,7 +310,8 @@ class BinanceFetcher:
                 params={
                     'symbol': symbol,
                     'limit': limit
-                }
+                },
+                raw=raw
             )
             return data
         except Exception as e:
@@ -107,16 +321,17 @@ class BinanceFetcher:
             return None
             
     def fetch_recent_trades(self, symbol: str, limit: int = 100, 
-                          market_type: str = 'spot') -> Optional[List[Dict]]:
+                          market_type: str = 'spot', raw: bool = False) -> Optional[List[Dict]]:
         """Fetch recent trades
         
         Args:
             symbol: Trading pair symbol
             limit: Number of trades to fetch
             market_type: 'spot' or 'futures'
+            raw: Return the undecoded response body (bytes) for the cache
             
         Returns:
-            List of trade dictionaries or None on error
+            List of trade dictionaries (bytes when raw) or None on error
         """
         try:
             fetcher = self._get_fetcher(market_type)
@@ -127,7 +342,8 @@ class BinanceFetcher:
                 params={
                     'symbol': symbol,
                     'limit': limit
-                }
+                },
+                raw=raw
             )
             return data
         except Exception as e:
@@ -136,6 +352,68 @@ class BinanceFetcher:
             )
             return None
     
+    def fetch_agg_trades(self, symbol: str, limit: int = 1000, from_id: Optional[int] = None,
+                         start_time: Optional[int] = None, end_time: Optional[int] = None,
+                         market_type: str = 'spot') -> Optional[List[Dict]]:
+        """Fetch aggregate trades, optionally from an id or within a time window
+        
+        Args:
+            symbol: Trading pair symbol
+            limit: Number of aggregate trades to fetch (max 1000)
+            from_id: Optional aggregate trade id to start from (inclusive)
+            start_time: Optional start time in milliseconds (inclusive)
+            end_time: Optional end time in milliseconds (inclusive)
+            market_type: 'spot' or 'futures'
+            
+        Returns:
+            List of aggregate trade dictionaries (oldest first) or None on error
+        """
+        try:
+            fetcher = self._get_fetcher(market_type)
+            endpoint = '/api/v3/aggTrades' if market_type == 'spot' else '/fapi/v1/aggTrades'
+            
+            data = fetcher.fetch_data(
+                endpoint=endpoint,
+                params=agg_trades_params(symbol, limit, from_id, start_time, end_time)
+            )
+            return data
+        except Exception as e:
+            self._get_fetcher(market_type).logger.error(
+                f"Error fetching aggregate trades for {symbol}: {str(e)}"
+            )
+            return None
+    
+    def fetch_klines(self, symbol: str, interval: str, start_time: Optional[int] = None,
+                     end_time: Optional[int] = None, limit: int = 500,
+                     market_type: str = 'spot') -> Optional[List[List]]:
+        """Fetch klines (candlesticks)
+        
+        Args:
+            symbol: Trading pair symbol
+            interval: Kline interval (e.g. '1m', '1h', '1d')
+            start_time: Optional open time in milliseconds of the first kline
+            end_time: Optional open time in milliseconds of the last kline
+            limit: Number of klines to fetch (max 1000)
+            market_type: 'spot' or 'futures'
+            
+        Returns:
+            List of kline arrays (oldest first) or None on error
+        """
+        try:
+            fetcher = self._get_fetcher(market_type)
+            endpoint = '/api/v3/klines' if market_type == 'spot' else '/fapi/v1/klines'
+            
+            data = fetcher.fetch_data(
+                endpoint=endpoint,
+                params=klines_params(symbol, interval, start_time, end_time, limit)
+            )
+            return data
+        except Exception as e:
+            self._get_fetcher(market_type).logger.error(
+                f"Error fetching {interval} klines for {symbol}: {str(e)}"
+            )
+            return None
+    
     def fetch_liquidations(self, symbol: str, limit: int = 100) -> Optional[List[Dict]]:
         """Fetch recent liquidations (futures only)
         
@@ -195,19 +473,20 @@ class BinanceFetcher:
                 )
             return None
     
-    def fetch_market_info(self, market_type: str = 'spot') -> Optional[Dict]:
+    def fetch_market_info(self, market_type: str = 'spot', raw: bool = False) -> Optional[Dict]:
         """Fetch exchange information including trading rules
         
         Args:
             market_type: 'spot' or 'futures'
+            raw: Return the undecoded response body (bytes) for the cache
             
         Returns:
-            Dict containing exchange information or None on error
+            Dict containing exchange information (bytes when raw) or None on error
         """
         try:
             fetcher = self._get_fetcher(market_type)
             endpoint = '/api/v3/exchangeInfo' if market_type == 'spot' else '/fapi/v1/exchangeInfo'
-            data = fetcher.fetch_data(endpoint=endpoint)
+            data = fetcher.fetch_data(endpoint=endpoint, raw=raw)
             return data
         except Exception as e:
             self._get_fetcher(market_type).logger.error(
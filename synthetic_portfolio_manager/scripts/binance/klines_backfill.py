@@ -0,0 +1,268 @@
+import json
+import os
+import threading
+from bisect import bisect_left
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utilities.logging_config import get_logger
+from .fetcher import MAX_PARALLEL_REQUESTS
+from .processor import BinanceProcessor
+
+KLINES_PAGE_SIZE = 1000
+DEFAULT_FLUSH_CHUNKS = 50
+CHECKPOINT_FILENAME = 'klines_checkpoint.json'
+
+# Fixed-length Binance kline intervals ('1M' varies in length and is not supported)
+INTERVAL_MS = {
+    '1s': 1000,
+    '1m': 60 * 1000,
+    '3m': 3 * 60 * 1000,
+    '5m': 5 * 60 * 1000,
+    '15m': 15 * 60 * 1000,
+    '30m': 30 * 60 * 1000,
+    '1h': 60 * 60 * 1000,
+    '2h': 2 * 60 * 60 * 1000,
+    '4h': 4 * 60 * 60 * 1000,
+    '6h': 6 * 60 * 60 * 1000,
+    '8h': 8 * 60 * 60 * 1000,
+    '12h': 12 * 60 * 60 * 1000,
+    '1d': 24 * 60 * 60 * 1000,
+    '3d': 3 * 24 * 60 * 60 * 1000,
+    '1w': 7 * 24 * 60 * 60 * 1000,
+}
+
+
+def kline_chunks(start_ms: int, end_ms: int, interval: str,
+                 page_size: int = KLINES_PAGE_SIZE) -> List[Tuple[int, int]]:
+    """Split [start_ms, end_ms) into [chunk_start, chunk_end) ranges of at most page_size klines
+
+    Args:
+        start_ms: Range start in milliseconds (inclusive)
+        end_ms: Range end in milliseconds (exclusive)
+        interval: Kline interval (key of INTERVAL_MS)
+        page_size: Maximum klines per chunk (Binance allows 1000)
+    """
+    if interval not in INTERVAL_MS:
+        raise ValueError(f"Invalid kline interval: {interval}. Must be one of {list(INTERVAL_MS)}")
+    step = INTERVAL_MS[interval] * page_size
+    return [(chunk_start, min(chunk_start + step, end_ms))
+            for chunk_start in range(start_ms, end_ms, step)]
+
+
+@dataclass
+class BackfillResult:
+    """Outcome of one backfill run"""
+    chunks: int = 0
+    skipped: int = 0
+    failed: int = 0
+    klines: int = 0
+
+
+class BackfillCheckpoint:
+    def __init__(self, path: Path):
+        """Completed chunks per backfill job, kept in a JSON file
+
+        Each job records a `done_through` watermark (every chunk starting
+        before it is complete) plus the starts of chunks completed out of
+        order beyond it, so the file stays small however long the range.
+        Chunks finish out of order, so the watermark only moves once the
+        chunks below it are all done. KlinesBackfill records chunks only
+        after flushing their klines to its sinks, so a crash repeats the
+        chunks stored since the last flush as well as those in flight. The
+        file is replaced atomically but not fsynced.
+
+        Args:
+            path: Checkpoint file location
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict] = {}
+        if self.path.exists():
+            with open(self.path, 'r') as f:
+                self._jobs = json.load(f)
+
+    @staticmethod
+    def job_key(symbol: str, interval: str, start_ms: int, market_type: str = 'spot') -> str:
+        # Chunk boundaries depend on the start, so jobs with another start are separate
+        return f"{market_type}:{symbol}:{interval}:{start_ms}"
+
+    def is_done(self, key: str, chunk_start: int) -> bool:
+        job = self._jobs.get(key)
+        if job is None:
+            return False
+        return chunk_start < job['done_through'] or chunk_start in job['done']
+
+    def mark_done(self, key: str, chunk_start: int, chunks: List[Tuple[int, int]]) -> None:
+        """Record a completed chunk and advance the job's watermark
+
+        Args:
+            key: Job key from `job_key`
+            chunk_start: Start of the completed chunk
+            chunks: All chunks of the job, in order
+        """
+        with self._lock:
+            job = self._jobs.setdefault(key, {'done_through': chunks[0][0], 'done': []})
+            done = set(job['done'])
+            done.add(chunk_start)
+            for start, end in chunks[bisect_left(chunks, (job['done_through'],)):]:
+                if start not in done:
+                    break
+                done.discard(start)
+                job['done_through'] = end
+            job['done'] = sorted(done)
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(self._jobs, f, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+class KlinesBackfill:
+    def __init__(self, fetcher: Any, processor: BinanceProcessor, cache: Optional[Any] = None,
+                 columnar: Optional[Any] = None, checkpoint_path: Optional[str] = None,
+                 max_workers: int = MAX_PARALLEL_REQUESTS, page_size: int = KLINES_PAGE_SIZE,
+                 flush_chunks: int = DEFAULT_FLUSH_CHUNKS):
+        """Resumable, parallel historical klines downloader
+
+        A requested [start, end) range is split into chunks of at most
+        `page_size` klines. Chunks of every symbol are downloaded on a thread
+        pool; the fetcher's shared rate limiter keeps them within the weight
+        budget, so more workers only help until the budget is saturated.
+        Each completed chunk is written to the cache (data type 'kline',
+        timestamped by its first open time) and/or the columnar 'klines'
+        dataset. Every `flush_chunks` stored chunks the sinks are flushed
+        and only then are those chunks recorded in the checkpoint. Reruns
+        skip recorded chunks and retry failed ones.
+
+        Args:
+            fetcher: Initialized BinanceFetcher instance
+            processor: Initialized BinanceProcessor instance
+            cache: Optional BinanceCache to write raw and processed klines to
+            columnar: Optional Parquet sink for processed klines
+            checkpoint_path: Checkpoint file (default: klines_checkpoint.json in
+                the cache or columnar directory)
+            max_workers: Concurrent kline requests
+            page_size: Klines per request (max 1000)
+            flush_chunks: Stored chunks between sink flushes and checkpoint updates
+        """
+        if cache is None and columnar is None:
+            raise ValueError("KlinesBackfill needs a cache or a columnar store to write to")
+        self.fetcher = fetcher
+        self.processor = processor
+        self.cache = cache
+        self.columnar = columnar
+        if checkpoint_path is None:
+            base_dir = cache.base_dir if cache is not None else columnar.base_dir
+            checkpoint_path = Path(base_dir) / CHECKPOINT_FILENAME
+        self.checkpoint = BackfillCheckpoint(checkpoint_path)
+        self.max_workers = max_workers
+        self.page_size = page_size
+        self.flush_chunks = flush_chunks
+        self.logger = get_logger('binance.klines_backfill')
+
+    def _download(self, symbol: str, interval: str, chunk: Tuple[int, int],
+                  market_type: str) -> Optional[List[List]]:
+        chunk_start, chunk_end = chunk
+        return self.fetcher.fetch_klines(symbol, interval, start_time=chunk_start,
+                                         end_time=chunk_end - 1, limit=self.page_size,
+                                         market_type=market_type)
+
+    def _store(self, symbol: str, interval: str, chunk_start: int,
+               klines: List[List], market_type: str) -> None:
+        if not klines:
+            return
+        processed_klines = [
+            self.processor.process_kline_data(kline, symbol, interval, market_type)
+            for kline in klines
+        ]
+        if self.cache is not None:
+            filename = f"{symbol.lower()}_klines_{interval}"
+            self.cache.save_to_cache(klines, filename, 'kline', is_processed=False,
+                                     timestamp=chunk_start)
+            self.cache.save_to_cache(processed_klines, filename, 'kline', is_processed=True,
+                                     timestamp=chunk_start)
+        if self.columnar is not None:
+            self.columnar.append_klines(processed_klines)
+
+    def _flush(self, stored: List[Tuple[str, int, List[Tuple[int, int]]]]) -> None:
+        """Flush the sinks, then record the chunks stored since the last flush"""
+        if self.cache is not None:
+            self.cache.flush()
+        if self.columnar is not None:
+            self.columnar.flush()
+        for key, chunk_start, chunks in stored:
+            self.checkpoint.mark_done(key, chunk_start, chunks)
+        stored.clear()
+
+    def run(self, symbols: List[str], interval: str, start_ms: int, end_ms: int,
+            market_type: str = 'spot') -> BackfillResult:
+        """Download klines for every symbol over [start_ms, end_ms)
+
+        Args:
+            symbols: Trading pair symbols
+            interval: Kline interval (key of INTERVAL_MS)
+            start_ms: Range start in milliseconds (inclusive)
+            end_ms: Range end in milliseconds (exclusive)
+            market_type: 'spot' or 'futures'
+
+        Returns:
+            BackfillResult with chunk, skipped, failed and kline counts
+        """
+        result = BackfillResult()
+        jobs = {}
+        for symbol in symbols:
+            chunks = kline_chunks(start_ms, end_ms, interval, self.page_size)
+            if chunks:
+                jobs[symbol] = (self.checkpoint.job_key(symbol, interval, start_ms, market_type),
+                                chunks)
+
+        def pending() -> Iterator[Tuple[str, Tuple[int, int]]]:
+            for symbol, (key, chunks) in jobs.items():
+                for chunk in chunks:
+                    result.chunks += 1
+                    if self.checkpoint.is_done(key, chunk[0]):
+                        result.skipped += 1
+                        continue
+                    yield symbol, chunk
+
+        # Keep a bounded window of requests in flight; results are stored on this thread
+        work = pending()
+        stored = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            in_flight = {}
+            while True:
+                while len(in_flight) < self.max_workers * 2:
+                    item = next(work, None)
+                    if item is None:
+                        break
+                    symbol, chunk = item
+                    future = pool.submit(self._download, symbol, interval, chunk, market_type)
+                    in_flight[future] = item
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    symbol, chunk = in_flight.pop(future)
+                    klines = future.result()
+                    if klines is None:
+                        result.failed += 1
+                        continue
+                    self._store(symbol, interval, chunk[0], klines, market_type)
+                    key, chunks = jobs[symbol]
+                    stored.append((key, chunk[0], chunks))
+                    result.klines += len(klines)
+                if len(stored) >= self.flush_chunks:
+                    self._flush(stored)
+
+        self._flush(stored)
+        self.logger.info(
+            f"Backfilled {result.klines} {interval} klines for {len(symbols)} symbols: "
+            f"{result.chunks - result.skipped - result.failed} chunks downloaded, "
+            f"{result.skipped} already done, {result.failed} failed"
+        )
+        return result
@@ -0,0 +1,327 @@
+from collections import deque
+from random import random
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utilities.logging_config import get_logger
+from ..base.array_orderbook import ArrayOrderBook
+
+DEFAULT_SNAPSHOT_LIMIT = 1000
+DEFAULT_MAX_BUFFERED_UPDATES = 10000
+
+
+class _Level:
+    __slots__ = ('price', 'quantity', 'priority', 'total', 'left', 'right')
+
+    def __init__(self, price: float, quantity: float):
+        self.price = price
+        self.quantity = quantity
+        self.priority = random()
+        self.total = quantity
+        self.left: Optional['_Level'] = None
+        self.right: Optional['_Level'] = None
+
+
+def _total(node: Optional[_Level]) -> float:
+    return node.total if node is not None else 0.0
+
+
+def _update(node: _Level) -> _Level:
+    node.total = _total(node.left) + node.quantity + _total(node.right)
+    return node
+
+
+def _split(node: Optional[_Level], price: float,
+           inclusive: bool) -> Tuple[Optional[_Level], Optional[_Level]]:
+    """Split a treap into levels below `price` (or at it, if inclusive) and the rest"""
+    if node is None:
+        return None, None
+    if node.price < price or (inclusive and node.price == price):
+        node.right, right = _split(node.right, price, inclusive)
+        return _update(node), right
+    left, node.left = _split(node.left, price, inclusive)
+    return left, _update(node)
+
+
+def _merge(left: Optional[_Level], right: Optional[_Level]) -> Optional[_Level]:
+    """Join two treaps where every price in `left` is below every price in `right`"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return _update(left)
+    right.left = _merge(left, right.left)
+    return _update(right)
+
+
+class _BookSide:
+    def __init__(self, descending: bool):
+        """One side of a book: a treap of levels ordered by price
+
+        Each node carries the total quantity of its subtree, so inserting,
+        updating or removing a level and querying cumulative size all cost
+        O(log n) expected, however the diff and query calls interleave.
+        """
+        self.descending = descending
+        self.sizes: Dict[float, float] = {}
+        self._root: Optional[_Level] = None
+
+    def clear(self) -> None:
+        self.sizes = {}
+        self._root = None
+
+    def set(self, price: float, quantity: float) -> None:
+        """Set a level's quantity; a quantity of 0 removes the level"""
+        if quantity == 0:
+            if self.sizes.pop(price, None) is not None:
+                left, right = _split(self._root, price, False)
+                _, right = _split(right, price, True)
+                self._root = _merge(left, right)
+        elif price in self.sizes:
+            path = []
+            node = self._root
+            while node.price != price:
+                path.append(node)
+                node = node.left if price < node.price else node.right
+            node.quantity = quantity
+            _update(node)
+            for parent in reversed(path):
+                _update(parent)
+            self.sizes[price] = quantity
+        else:
+            left, right = _split(self._root, price, False)
+            self._root = _merge(_merge(left, _Level(price, quantity)), right)
+            self.sizes[price] = quantity
+
+    def best(self) -> Optional[Tuple[float, float]]:
+        node = self._root
+        if node is None:
+            return None
+        while True:
+            child = node.right if self.descending else node.left
+            if child is None:
+                return node.price, node.quantity
+            node = child
+
+    def levels(self, n: Optional[int] = None) -> List[List[float]]:
+        """Best n levels as [price, quantity], best first"""
+        limit = len(self.sizes) if n is None else n
+        result: List[List[float]] = []
+        stack: List[_Level] = []
+        node = self._root
+        while (stack or node is not None) and len(result) < limit:
+            while node is not None:
+                stack.append(node)
+                node = node.right if self.descending else node.left
+            node = stack.pop()
+            result.append([node.price, node.quantity])
+            node = node.left if self.descending else node.right
+        return result
+
+    def cumulative_size(self, price: float) -> float:
+        """Total quantity from the best level up to and including `price`"""
+        total = 0.0
+        node = self._root
+        while node is not None:
+            if self.descending and node.price >= price:
+                total += _total(node.right) + node.quantity
+                node = node.left
+            elif not self.descending and node.price <= price:
+                total += _total(node.left) + node.quantity
+                node = node.right
+            else:
+                node = node.right if self.descending else node.left
+        return total
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+
+class LocalOrderBook:
+    def __init__(self, symbol: str, market_type: str = 'spot',
+                 snapshot_source: Optional[Callable[[], Optional[Dict]]] = None,
+                 max_buffered_updates: int = DEFAULT_MAX_BUFFERED_UPDATES):
+        """Full-depth order book kept current from Binance depth diff events
+
+        Follows Binance's local book procedure: diff events are buffered
+        until a REST depth snapshot is applied, events already contained in
+        the snapshot (`u` <= `lastUpdateId`) are dropped, and the first
+        applied event must straddle `lastUpdateId`. After that every event
+        must continue the sequence (`U` == previous `u` + 1 on spot, `pu` ==
+        previous `u` on futures); a break marks the book out of sync and it
+        waits for a new snapshot.
+
+        With a `snapshot_source` the book fetches that snapshot itself
+        whenever it is out of sync; otherwise callers check `needs_snapshot`
+        and pass one to `apply_snapshot`.
+
+        Args:
+            symbol: Trading pair symbol
+            market_type: 'spot' or 'futures' (selects the sequencing rule)
+            snapshot_source: Optional callable returning a REST depth snapshot
+            max_buffered_updates: Diff events kept while waiting for a snapshot
+        """
+        if market_type not in ('spot', 'futures'):
+            raise ValueError(f"Invalid market type: {market_type}. Must be 'spot' or 'futures'")
+        self.symbol = symbol
+        self.market_type = market_type
+        self.snapshot_source = snapshot_source
+        self.logger = get_logger('binance.orderbook')
+
+        self.bids = _BookSide(descending=True)
+        self.asks = _BookSide(descending=False)
+        self.last_update_id: Optional[int] = None
+        self.timestamp = 0
+        self.synced = False
+        self.resyncs = 0
+        self._straddle = False
+        self._buffer: deque = deque(maxlen=max_buffered_updates)
+
+    @property
+    def needs_snapshot(self) -> bool:
+        """Whether the book is waiting for a REST snapshot to (re)sync"""
+        return not self.synced
+
+    def apply_snapshot(self, snapshot: Dict) -> bool:
+        """Load a REST depth snapshot and replay buffered diff events on top
+
+        Args:
+            snapshot: Raw depth response with lastUpdateId, bids and asks
+
+        Returns:
+            Whether the book is now in sync. False if the snapshot is older
+            than the buffered events (fetch another one) or a buffered event
+            breaks the sequence.
+        """
+        last_update_id = int(snapshot['lastUpdateId'])
+        if self._buffer and self._buffer[0]['U'] > last_update_id + 1:
+            self.logger.debug(
+                f"Snapshot {last_update_id} for {self.symbol} predates buffered updates"
+            )
+            return False
+
+        self.bids.clear()
+        self.asks.clear()
+        for price, quantity in snapshot.get('bids', []):
+            self.bids.set(float(price), float(quantity))
+        for price, quantity in snapshot.get('asks', []):
+            self.asks.set(float(price), float(quantity))
+        self.last_update_id = last_update_id
+        self.timestamp = int(snapshot.get('E', snapshot.get('T', 0)))
+        self.synced = True
+
+        buffered, self._buffer = list(self._buffer), deque(maxlen=self._buffer.maxlen)
+        self._straddle = True
+        for i, event in enumerate(buffered):
+            if event['u'] <= last_update_id:
+                continue
+            self._apply(event)
+            if not self.synced:
+                self._buffer.extend(buffered[i + 1:])
+                return False
+        return True
+
+    def apply_update(self, event: Dict) -> bool:
+        """Apply one depth diff event, buffering it while out of sync
+
+        Args:
+            event: Raw depthUpdate event (U, u, optionally pu, b, a)
+
+        Returns:
+            Whether the book is in sync after the event
+        """
+        if not self.synced:
+            self._buffer.append(event)
+            if self.snapshot_source:
+                self.resync()
+            return self.synced
+
+        if event['u'] <= self.last_update_id:
+            return True  # Already contained in the book
+        self._apply(event)
+        if not self.synced and self.snapshot_source:
+            self.resync()
+        return self.synced
+
+    def _apply(self, event: Dict) -> None:
+        if self._straddle:
+            # The first event after a snapshot only has to cover lastUpdateId + 1
+            continuous = event['U'] <= self.last_update_id + 1
+        elif self.market_type == 'futures' and 'pu' in event:
+            continuous = event['pu'] == self.last_update_id
+        else:
+            continuous = event['U'] == self.last_update_id + 1
+        if not continuous:
+            self._desync(self.last_update_id + 1, event['U'])
+            self._buffer.append(event)
+            return
+        self._straddle = False
+
+        for price, quantity in event.get('b', []):
+            self.bids.set(float(price), float(quantity))
+        for price, quantity in event.get('a', []):
+            self.asks.set(float(price), float(quantity))
+        self.last_update_id = event['u']
+        self.timestamp = int(event.get('E', self.timestamp))
+
+    def _desync(self, expected: int, received: int) -> None:
+        self.logger.warning(
+            f"Order book gap for {self.symbol}: expected update {expected}, got {received}; resyncing"
+        )
+        self.synced = False
+        self.resyncs += 1
+
+    def resync(self) -> bool:
+        """Fetch a snapshot from `snapshot_source` and apply it
+
+        Returns:
+            Whether the book is now in sync
+        """
+        snapshot = self.snapshot_source()
+        if snapshot is None:
+            self.logger.error(f"Failed to fetch depth snapshot for {self.symbol}")
+            return False
+        return self.apply_snapshot(snapshot)
+
+    def best_bid(self) -> Optional[Tuple[float, float]]:
+        """Highest bid as (price, quantity), or None if the side is empty"""
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[Tuple[float, float]]:
+        """Lowest ask as (price, quantity), or None if the side is empty"""
+        return self.asks.best()
+
+    def spread(self) -> Optional[float]:
+        """Best ask minus best bid, or None if either side is empty"""
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return ask[0] - bid[0]
+
+    def depth(self, n: Optional[int] = None) -> Dict[str, List[List[float]]]:
+        """Best n levels per side (all levels when n is None), best first"""
+        return {'bids': self.bids.levels(n), 'asks': self.asks.levels(n)}
+
+    def cumulative_size(self, side: str, price: float) -> float:
+        """Quantity resting between the best level and `price`, inclusive
+
+        Args:
+            side: 'bids' (levels at or above price) or 'asks' (at or below)
+            price: Price bound
+        """
+        if side not in ('bids', 'asks'):
+            raise ValueError(f"Invalid side: {side}. Must be 'bids' or 'asks'")
+        return getattr(self, side).cumulative_size(price)
+
+    def to_dict(self, n: Optional[int] = None) -> Dict:
+        """Book in the format of BinanceProcessor.process_orderbook_data"""
+        depth = self.depth(n)
+        return {
+            'symbol': self.symbol,
+            'type': self.market_type,
+            **depth,
+            'timestamp': self.timestamp,
+            'lastUpdateId': self.last_update_id or 0,
+            'metrics': ArrayOrderBook.from_levels(depth['bids'], depth['asks']).metrics()
+        }
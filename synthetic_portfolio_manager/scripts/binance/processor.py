@@ -1,5 +1,15 @@
+from operator import itemgetter
 from typing import Dict, List, Union, Optional, Tuple
+
+import numpy as np
+
+from ..base.array_orderbook import ArrayOrderBook
 from ..base.base_processor import BaseProcessor
+from ..base.trade_batch import TRADE_DTYPE, TradeBatch
+
+# Raw fields holding price, quantity, time, buyer-maker flag and id, in TRADE_DTYPE order
+TRADE_FIELDS = ('price', 'qty', 'time', 'isBuyerMaker', 'id')
+AGG_TRADE_FIELDS = ('p', 'q', 'T', 'm', 'a')
 
 class BinanceProcessor(BaseProcessor):
     def __init__(self, exchange_name: str = 'binance'):
@@ -24,6 +34,11 @@ class BinanceProcessor(BaseProcessor):
             'priceChange1h': None,  # Not directly available
         }
         
+        # Best bid/ask are only present when merged in from a book ticker
+        spread = self._calculate_spread(raw_data)
+        if spread is not None:
+            result['bidAskSpread'] = spread
+        
         # Add futures-specific fields if available
         if market_type == 'futures':
             result.update({
@@ -31,24 +46,37 @@ class BinanceProcessor(BaseProcessor):
                 'fundingRate': self._parse_numeric(raw_data.get('fundingRate')),
                 'liquidations24h': self._parse_numeric(raw_data.get('totalLiquidations'))
             })
+            # Mark data is only present when merged in from premiumIndex
+            if raw_data.get('markPrice') is not None:
+                result.update({
+                    'markPrice': self._parse_numeric(raw_data.get('markPrice')),
+                    'indexPrice': self._parse_numeric(raw_data.get('indexPrice')),
+                    'nextFundingTime': self._convert_timestamp(raw_data.get('nextFundingTime', 0))
+                })
         
         return result
-    
+
+    def _calculate_spread(self, raw_data: Dict) -> Optional[float]:
+        """Best ask minus best bid from merged book ticker fields, if present"""
+        if raw_data.get('bidPrice') is None or raw_data.get('askPrice') is None:
+            return None
+        return self._parse_numeric(raw_data['askPrice']) - self._parse_numeric(raw_data['bidPrice'])
+
     def process_orderbook_data(self, raw_data: Dict, symbol: str, market_type: str = 'spot') -> Dict:
         """Process Binance orderbook data into standardized format"""
         market_type = self._validate_market_type(market_type)
         
-        # Convert price and quantity strings to floats
-        bids = [[float(price), float(qty)] for price, qty in raw_data.get('bids', [])]
-        asks = [[float(price), float(qty)] for price, qty in raw_data.get('asks', [])]
+        # Parse price and quantity strings straight into contiguous arrays
+        book = ArrayOrderBook.from_levels(raw_data.get('bids', []), raw_data.get('asks', []))
         
         return {
             'symbol': symbol,
             'type': market_type,
-            'bids': bids,
-            'asks': asks,
+            'bids': book.levels('bids'),
+            'asks': book.levels('asks'),
             'timestamp': self._convert_timestamp(raw_data.get('time', raw_data.get('E', 0))),
-            'lastUpdateId': int(raw_data.get('lastUpdateId', 0))
+            'lastUpdateId': int(raw_data.get('lastUpdateId', 0)),
+            'metrics': book.metrics()
         }
     
     def process_trade_data(self, raw_data: Dict, symbol: str, market_type: str = 'spot') -> Dict:
@@ -64,7 +92,120 @@ class BinanceProcessor(BaseProcessor):
             'isBuyerMaker': bool(raw_data.get('isBuyerMaker')),
             'tradeId': int(raw_data.get('id', 0))
         }
-    
+
+    def process_trades_batch(self, raw_trades: List[Dict], symbol: str,
+                             market_type: str = 'spot') -> TradeBatch:
+        """Process a list of Binance trades or aggTrade events in one pass
+        
+        Each field is converted for the whole list at once into a TradeBatch
+        column; symbol and type are stored once on the batch. Lists with
+        missing or malformed fields fall back to `process_trade_data` /
+        `process_agg_trade_data` per trade, with the same defaults.
+        """
+        market_type = self._validate_market_type(market_type)
+        if not raw_trades:
+            return TradeBatch.empty(symbol, market_type)
+        
+        agg = 'a' in raw_trades[0]
+        try:
+            trades = self._trade_array(raw_trades, AGG_TRADE_FIELDS if agg else TRADE_FIELDS)
+        except (KeyError, TypeError, ValueError):
+            process = self.process_agg_trade_data if agg else self.process_trade_data
+            records = [process(trade, symbol, market_type) for trade in raw_trades]
+            trades = np.array([tuple(record[name] for name in TRADE_DTYPE.names) for record in records],
+                              dtype=TRADE_DTYPE)
+        return TradeBatch(symbol, market_type, trades)
+
+    def _trade_array(self, raw_trades: List[Dict], fields: Tuple[str, ...]) -> np.ndarray:
+        """TRADE_DTYPE array from raw trades, one column at a time"""
+        count = len(raw_trades)
+        trades = np.empty(count, dtype=TRADE_DTYPE)
+        for name, field in zip(TRADE_DTYPE.names, fields):
+            values = map(itemgetter(field), raw_trades)
+            if name in ('price', 'quantity'):
+                # Binance sends decimals as strings
+                values = map(float, values)
+            trades[name] = np.fromiter(values, dtype=TRADE_DTYPE[name], count=count)
+        return trades
+
+    def process_agg_trade_data(self, raw_data: Dict, symbol: str, market_type: str = 'spot') -> Dict:
+        """Process a Binance aggTrade stream event into the standardized trade format"""
+        market_type = self._validate_market_type(market_type)
+
+        return {
+            'symbol': symbol,
+            'type': market_type,
+            'price': self._parse_numeric(raw_data['p']),
+            'quantity': self._parse_numeric(raw_data['q']),
+            'timestamp': self._convert_timestamp(raw_data.get('T', raw_data.get('E', 0))),
+            'isBuyerMaker': bool(raw_data.get('m')),
+            'tradeId': int(raw_data['a'])
+        }
+
+    def process_depth_update(self, raw_data: Dict, symbol: str, market_type: str = 'spot') -> Dict:
+        """Process a Binance depth diff stream event
+
+        Levels are changes to apply to a local book; a quantity of 0 removes
+        the price level.
+        """
+        market_type = self._validate_market_type(market_type)
+
+        return {
+            'symbol': symbol,
+            'type': market_type,
+            'bids': [[float(price), float(qty)] for price, qty in raw_data.get('b', [])],
+            'asks': [[float(price), float(qty)] for price, qty in raw_data.get('a', [])],
+            'timestamp': self._convert_timestamp(raw_data.get('E', 0)),
+            'firstUpdateId': int(raw_data['U']),
+            'lastUpdateId': int(raw_data['u'])
+        }
+
+    def process_mini_ticker_data(self, raw_data: Dict, symbol: str, market_type: str = 'spot') -> Dict:
+        """Process a Binance miniTicker stream event into the standardized market format
+
+        The mini ticker has no trade count, spread or futures fields, so those
+        are left out or None.
+        """
+        market_type = self._validate_market_type(market_type)
+        close = self._parse_numeric(raw_data.get('c'))
+
+        return {
+            'symbol': symbol,
+            'exchange': self.exchange_name,
+            'type': market_type,
+            'price': close,
+            'timestamp': self._convert_timestamp(raw_data.get('E', 0)),
+            'volume24h': self._parse_numeric(raw_data.get('v')),
+            'priceChange24h': close - self._parse_numeric(raw_data.get('o'), close),
+            'price24hHigh': self._parse_numeric(raw_data.get('h')),
+            'price24hLow': self._parse_numeric(raw_data.get('l')),
+            'tradeCount24h': None,
+            'volumeDelta24h': None,
+            'priceChange1h': None,
+        }
+
+    def process_kline_data(self, raw_data: List, symbol: str, interval: str,
+                           market_type: str = 'spot') -> Dict:
+        """Process one Binance kline array into a standardized candle"""
+        market_type = self._validate_market_type(market_type)
+
+        return {
+            'symbol': symbol,
+            'type': market_type,
+            'interval': interval,
+            'timestamp': self._convert_timestamp(raw_data[0]),
+            'open': self._parse_numeric(raw_data[1]),
+            'high': self._parse_numeric(raw_data[2]),
+            'low': self._parse_numeric(raw_data[3]),
+            'close': self._parse_numeric(raw_data[4]),
+            'volume': self._parse_numeric(raw_data[5]),
+            'closeTime': self._convert_timestamp(raw_data[6]),
+            'quoteVolume': self._parse_numeric(raw_data[7]),
+            'tradeCount': int(raw_data[8]),
+            'takerBuyVolume': self._parse_numeric(raw_data[9]),
+            'takerBuyQuoteVolume': self._parse_numeric(raw_data[10])
+        }
+
     def process_liquidation_data(self, raw_data: List[Dict], timeframe_ms: int = 86400000) -> float:
         """Process liquidation data to get total liquidations in specified timeframe
         
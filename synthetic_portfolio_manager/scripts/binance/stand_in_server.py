@@ -0,0 +1,801 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+try:
+    import aiohttp
+    from aiohttp import web
+except ImportError:  # optional WebSocket server
+    aiohttp = None
+    web = None
+
+from utilities.logging_config import get_logger
+from .klines_backfill import INTERVAL_MS
+from .weights import endpoint_weight
+
+DEFAULT_SYMBOLS = {'BTCUSDT': 60000.0, 'ETHUSDT': 3000.0, 'SOLUSDT': 150.0}
+DEFAULT_WEIGHT_LIMIT = 1200
+DEFAULT_BAN_SECONDS = 120
+# One aggregate trade per symbol and one depth update every 100 ms
+TRADE_INTERVAL_MS = 100
+DEPTH_INTERVAL_MS = 100
+FUNDING_INTERVAL_MS = 8 * 60 * 60 * 1000
+TICK_SIZE = 0.01
+DEPTH_EVENT_LEVELS = 5
+STREAM_INTERVAL = 0.1
+# Most events sent per stream and interval when a client falls behind
+MAX_EVENTS_PER_INTERVAL = 50
+QUOTE_ASSETS = ('USDT', 'USDC', 'BUSD', 'BTC', 'ETH', 'BNB')
+# Parameters that change on every signed request and never select a fixture
+VOLATILE_PARAMS = ('timestamp', 'signature', 'recvWindow')
+
+
+def _fmt(value: float) -> str:
+    return f"{value:.8f}"
+
+
+def _error(code: int, msg: str) -> Dict:
+    return {'code': code, 'msg': msg}
+
+
+def _params_key(params: Optional[Dict]) -> Optional[Tuple]:
+    if params is None:
+        return None
+    return tuple(sorted((str(key), str(value)) for key, value in params.items()
+                        if key not in VOLATILE_PARAMS))
+
+
+@dataclass
+class StandInResponse:
+    """One answer of the stand-in exchange"""
+    status: int
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    delay: float = 0.0
+
+
+class SyntheticMarket:
+    def __init__(self, symbols: Dict[str, float]):
+        """Deterministic Binance-shaped market data for a set of symbols
+
+        Prices follow smooth functions of time, aggregate trade `a` happens
+        at `a * TRADE_INTERVAL_MS` and depth update `u` at
+        `u * DEPTH_INTERVAL_MS`, so trade ids, kline ranges, depth snapshots
+        and stream events agree with each other whenever they are asked for.
+
+        Args:
+            symbols: Symbol -> reference price
+        """
+        self.symbols = dict(symbols)
+        self._phase = {symbol: zlib.crc32(symbol.encode()) % 1000 / 1000 * 2 * math.pi
+                       for symbol in self.symbols}
+
+    def price(self, symbol: str, ms: int) -> float:
+        base = self.symbols[symbol]
+        phase = self._phase[symbol]
+        drift = 0.01 * math.sin(2 * math.pi * ms / 3_600_000 + phase)
+        noise = 0.001 * math.sin(2 * math.pi * ms / 60_000 + 3 * phase)
+        return round(base * (1 + drift + noise) / TICK_SIZE) * TICK_SIZE
+
+    def _quantity(self, *seed: int) -> float:
+        return 0.5 + (zlib.crc32(repr(seed).encode()) % 200) / 100
+
+    # Trades
+
+    def agg_trade(self, symbol: str, trade_id: int) -> Dict:
+        ms = trade_id * TRADE_INTERVAL_MS
+        return {
+            'a': trade_id, 'p': _fmt(self.price(symbol, ms)),
+            'q': _fmt(self._quantity(trade_id) / 100), 'f': trade_id, 'l': trade_id,
+            'T': ms, 'm': trade_id % 2 == 1, 'M': True
+        }
+
+    def trade(self, symbol: str, trade_id: int) -> Dict:
+        agg = self.agg_trade(symbol, trade_id)
+        return {
+            'id': trade_id, 'price': agg['p'], 'qty': agg['q'],
+            'quoteQty': _fmt(float(agg['p']) * float(agg['q'])), 'time': agg['T'],
+            'isBuyerMaker': agg['m'], 'isBestMatch': True
+        }
+
+    def agg_trades(self, symbol: str, now_ms: int, params: Dict) -> List[Dict]:
+        limit = min(int(params.get('limit', 500)), 1000)
+        last_id = now_ms // TRADE_INTERVAL_MS
+        if 'fromId' in params:
+            first = int(params['fromId'])
+        elif 'startTime' in params:
+            first = -(-int(params['startTime']) // TRADE_INTERVAL_MS)
+        else:
+            first = last_id - limit + 1
+        if 'endTime' in params:
+            last_id = min(last_id, int(params['endTime']) // TRADE_INTERVAL_MS)
+        last_id = min(last_id, first + limit - 1)
+        return [self.agg_trade(symbol, trade_id) for trade_id in range(max(first, 0), last_id + 1)]
+
+    def recent_trades(self, symbol: str, now_ms: int, params: Dict) -> List[Dict]:
+        limit = min(int(params.get('limit', 500)), 1000)
+        last_id = now_ms // TRADE_INTERVAL_MS
+        return [self.trade(symbol, trade_id) for trade_id in range(last_id - limit + 1, last_id + 1)]
+
+    # Order book
+
+    def depth_levels(self, symbol: str, update_id: int, levels: int) -> Tuple[List, List]:
+        mid = self.price(symbol, update_id * DEPTH_INTERVAL_MS)
+        bids = [[_fmt(mid - (i + 1) * TICK_SIZE), _fmt(self._quantity(update_id, i, 0))]
+                for i in range(levels)]
+        asks = [[_fmt(mid + (i + 1) * TICK_SIZE), _fmt(self._quantity(update_id, i, 1))]
+                for i in range(levels)]
+        return bids, asks
+
+    def depth(self, symbol: str, now_ms: int, params: Dict, market_type: str) -> Dict:
+        update_id = now_ms // DEPTH_INTERVAL_MS
+        limit = min(int(params.get('limit', 100 if market_type == 'spot' else 500)), 5000)
+        bids, asks = self.depth_levels(symbol, update_id, limit)
+        snapshot = {'lastUpdateId': update_id, 'bids': bids, 'asks': asks}
+        if market_type == 'futures':
+            snapshot.update({'E': now_ms, 'T': now_ms})
+        return snapshot
+
+    def depth_event(self, symbol: str, update_id: int, market_type: str) -> Dict:
+        """Depth diff `update_id`: the best levels of that update's book
+
+        The previous book's best levels that moved are removed with a zero
+        quantity, so replaying the diffs over a snapshot keeps a valid book.
+        """
+        bids, asks = self.depth_levels(symbol, update_id, DEPTH_EVENT_LEVELS)
+        old_bids, old_asks = self.depth_levels(symbol, update_id - 1, DEPTH_EVENT_LEVELS)
+        bid_prices = {price for price, _ in bids}
+        ask_prices = {price for price, _ in asks}
+        bids += [[price, _fmt(0)] for price, _ in old_bids if price not in bid_prices]
+        asks += [[price, _fmt(0)] for price, _ in old_asks if price not in ask_prices]
+        ms = update_id * DEPTH_INTERVAL_MS
+        event = {'e': 'depthUpdate', 'E': ms, 's': symbol, 'U': update_id, 'u': update_id,
+                 'b': bids, 'a': asks}
+        if market_type == 'futures':
+            event.update({'T': ms, 'pu': update_id - 1})
+        return event
+
+    # Tickers
+
+    def ticker_24hr(self, symbol: str, now_ms: int, market_type: str) -> Dict:
+        open_ms = now_ms - 24 * 60 * 60 * 1000
+        last, first = self.price(symbol, now_ms), self.price(symbol, open_ms)
+        samples = [self.price(symbol, open_ms + step * 600_000) for step in range(145)]
+        count = (now_ms - open_ms) // TRADE_INTERVAL_MS
+        volume = count * 0.0125
+        ticker = {
+            'symbol': symbol, 'priceChange': _fmt(last - first),
+            'priceChangePercent': f"{(last - first) / first * 100:.3f}",
+            'weightedAvgPrice': _fmt(sum(samples) / len(samples)),
+            'lastPrice': _fmt(last), 'lastQty': self.agg_trade(symbol, now_ms // TRADE_INTERVAL_MS)['q'],
+            'openPrice': _fmt(first), 'highPrice': _fmt(max(samples + [last])),
+            'lowPrice': _fmt(min(samples + [last])), 'volume': _fmt(volume),
+            'quoteVolume': _fmt(volume * last), 'openTime': open_ms, 'closeTime': now_ms,
+            'firstId': open_ms // TRADE_INTERVAL_MS, 'lastId': now_ms // TRADE_INTERVAL_MS,
+            'count': count
+        }
+        if market_type == 'spot':
+            ticker.update(self.book_ticker(symbol, now_ms, market_type))
+            ticker['prevClosePrice'] = _fmt(first)
+        return ticker
+
+    def book_ticker(self, symbol: str, now_ms: int, market_type: str) -> Dict:
+        bids, asks = self.depth_levels(symbol, now_ms // DEPTH_INTERVAL_MS, 1)
+        ticker = {'symbol': symbol, 'bidPrice': bids[0][0], 'bidQty': bids[0][1],
+                  'askPrice': asks[0][0], 'askQty': asks[0][1]}
+        if market_type == 'futures':
+            ticker['time'] = now_ms
+        return ticker
+
+    def mini_ticker(self, symbol: str, now_ms: int) -> Dict:
+        ticker = self.ticker_24hr(symbol, now_ms, 'futures')
+        return {'e': '24hrMiniTicker', 'E': now_ms, 's': symbol, 'c': ticker['lastPrice'],
+                'o': ticker['openPrice'], 'h': ticker['highPrice'], 'l': ticker['lowPrice'],
+                'v': ticker['volume'], 'q': ticker['quoteVolume']}
+
+    # Futures
+
+    def funding_rate(self, symbol: str, funding_ms: int) -> str:
+        return f"{0.0001 * (1 + math.sin(funding_ms / FUNDING_INTERVAL_MS + self._phase[symbol])):.8f}"
+
+    def premium_index(self, symbol: str, now_ms: int) -> Dict:
+        mark = self.price(symbol, now_ms)
+        next_funding = (now_ms // FUNDING_INTERVAL_MS + 1) * FUNDING_INTERVAL_MS
+        return {
+            'symbol': symbol, 'markPrice': _fmt(mark), 'indexPrice': _fmt(mark * 0.9999),
+            'estimatedSettlePrice': _fmt(mark), 'interestRate': '0.00010000',
+            'lastFundingRate': self.funding_rate(symbol, next_funding - FUNDING_INTERVAL_MS),
+            'nextFundingTime': next_funding, 'time': now_ms
+        }
+
+    def open_interest(self, symbol: str, now_ms: int) -> Dict:
+        contracts = 1e6 / self.symbols[symbol] * self._quantity(now_ms // 60_000)
+        return {'symbol': symbol, 'openInterest': _fmt(contracts), 'time': now_ms}
+
+    def funding_history(self, symbol: str, now_ms: int, params: Dict) -> List[Dict]:
+        limit = min(int(params.get('limit', 100)), 1000)
+        end = min(int(params.get('endTime', now_ms)), now_ms)
+        last = end // FUNDING_INTERVAL_MS
+        if 'startTime' in params:
+            first = -(-int(params['startTime']) // FUNDING_INTERVAL_MS)
+            last = min(last, first + limit - 1)
+        else:
+            first = last - limit + 1
+        return [{'symbol': symbol, 'fundingTime': n * FUNDING_INTERVAL_MS,
+                 'fundingRate': self.funding_rate(symbol, n * FUNDING_INTERVAL_MS),
+                 'markPrice': _fmt(self.price(symbol, n * FUNDING_INTERVAL_MS))}
+                for n in range(max(first, 0), last + 1)]
+
+    # Klines and metadata
+
+    def klines(self, symbol: str, now_ms: int, params: Dict) -> Optional[List[List]]:
+        interval_ms = INTERVAL_MS.get(params.get('interval'))
+        if interval_ms is None:
+            return None
+        limit = min(int(params.get('limit', 500)), 1000)
+        end = min(int(params.get('endTime', now_ms)), now_ms)
+        if 'startTime' in params:
+            first = -(-int(params['startTime']) // interval_ms)
+        else:
+            first = end // interval_ms - limit + 1
+        rows = []
+        for n in range(max(first, 0), end // interval_ms + 1)[:limit]:
+            open_ms = n * interval_ms
+            close_ms = open_ms + interval_ms - 1
+            open_price, close_price = self.price(symbol, open_ms), self.price(symbol, close_ms)
+            trades = interval_ms // TRADE_INTERVAL_MS
+            volume = trades * 0.0125
+            rows.append([
+                open_ms, _fmt(open_price), _fmt(max(open_price, close_price) * 1.0005),
+                _fmt(min(open_price, close_price) * 0.9995), _fmt(close_price), _fmt(volume),
+                close_ms, _fmt(volume * close_price), trades, _fmt(volume / 2),
+                _fmt(volume * close_price / 2), '0'
+            ])
+        return rows
+
+    def exchange_info(self, now_ms: int, weight_limit: int) -> Dict:
+        def assets(symbol):
+            quote = next((q for q in QUOTE_ASSETS if symbol.endswith(q) and symbol != q), '')
+            return symbol[:len(symbol) - len(quote)], quote
+
+        return {
+            'timezone': 'UTC', 'serverTime': now_ms,
+            'rateLimits': [{'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE',
+                            'intervalNum': 1, 'limit': weight_limit}],
+            'symbols': [{'symbol': symbol, 'status': 'TRADING', 'baseAsset': assets(symbol)[0],
+                         'quoteAsset': assets(symbol)[1]} for symbol in self.symbols]
+        }
+
+
+class StandInExchange:
+    def __init__(self, symbols: Optional[Dict[str, float]] = None,
+                 fixtures: Optional[str] = None, latency: float = 0.0, jitter: float = 0.0,
+                 weight_limit: int = DEFAULT_WEIGHT_LIMIT, enforce_limits: bool = True,
+                 ban_after: Optional[int] = None, error_rate: float = 0.0, seed: int = 0,
+                 clock: Callable[[], float] = time.time):
+        """Binance spot and USD-M futures REST behaviour without the network
+
+        Serves every endpoint the fetchers use from a SyntheticMarket, or
+        from recorded fixtures where one matches. Each request is charged
+        its Binance weight against a per-minute budget reported in
+        X-MBX-USED-WEIGHT-1M; going over it answers 429 with Retry-After
+        until the minute ends, and with `ban_after` that many further
+        requests in the same minute earn a 418 ban, as on Binance.
+
+        Args:
+            symbols: Symbol -> reference price (default: DEFAULT_SYMBOLS)
+            fixtures: Optional fixture file to replay (see load_fixtures)
+            latency: Seconds added to every response
+            jitter: Up to this many random seconds added on top of `latency`
+            weight_limit: Request weight allowed per minute
+            enforce_limits: Whether exceeding `weight_limit` answers 429
+            ban_after: Requests over the limit in one minute before a 418 ban
+                (None: never ban)
+            error_rate: Probability of answering 503 instead
+            seed: Seed for jitter and random errors
+            clock: Wall-clock time source in seconds
+        """
+        self.market = SyntheticMarket(symbols or DEFAULT_SYMBOLS)
+        self.latency = latency
+        self.jitter = jitter
+        self.weight_limit = weight_limit
+        self.enforce_limits = enforce_limits
+        self.ban_after = ban_after
+        self.error_rate = error_rate
+        self.clock = clock
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window = None
+        self.used_weight = 0
+        self._over_limit = 0
+        self.banned_until = 0.0
+        self._faults: deque = deque()
+        self._fixtures: Dict[Tuple, List[Tuple[int, Any]]] = defaultdict(list)
+        self._replayed: Counter = Counter()
+        self.stream_fixtures: Dict[str, List[Dict]] = defaultdict(list)
+        self.requests: Counter = Counter()
+        self.statuses: Counter = Counter()
+        self.logger = get_logger('stand_in_exchange')
+        if fixtures:
+            self.load_fixtures(fixtures)
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self.market.symbols)
+
+    def now_ms(self) -> int:
+        return int(self.clock() * 1000)
+
+    # Fault injection
+
+    def inject(self, status: int = 429, count: int = 1, path: Optional[str] = None,
+               retry_after: Optional[float] = 1) -> None:
+        """Answer the next `count` requests (to `path`, if given) with `status`"""
+        with self._lock:
+            for _ in range(count):
+                self._faults.append((status, path, retry_after))
+
+    def _take_fault(self, path: str) -> Optional[Tuple]:
+        for fault in self._faults:
+            if fault[1] is None or fault[1] == path:
+                self._faults.remove(fault)
+                return fault
+        return None
+
+    # Fixtures
+
+    def add_fixture(self, path: str, body: Any, params: Optional[Dict] = None,
+                    status: int = 200) -> None:
+        """Serve `body` for `path` (and exactly these `params`, if given)
+
+        Several fixtures for the same request are replayed in the order they
+        were added; the last one keeps being served after that.
+        """
+        with self._lock:
+            self._fixtures[('/' + path.lstrip('/'), _params_key(params))].append((status, body))
+
+    def add_stream_fixture(self, message: Dict) -> None:
+        """Replay a combined stream message {'stream': name, 'data': event} to subscribers"""
+        self.stream_fixtures[message['stream']].append(message)
+
+    def load_fixtures(self, path: str) -> None:
+        """Load recorded responses from a JSON file
+
+        The file holds {"rest": [{"path", "params", "status", "body"}, ...],
+        "stream": [{"stream", "data"}, ...]}; `params` and `status` are
+        optional, and entries without `params` match any parameters.
+        """
+        with open(path, 'r') as f:
+            recorded = json.load(f)
+        for entry in recorded.get('rest', []):
+            self.add_fixture(entry['path'], entry['body'], entry.get('params'),
+                             entry.get('status', 200))
+        for message in recorded.get('stream', []):
+            self.add_stream_fixture(message)
+        self.logger.info(f"Loaded {len(recorded.get('rest', []))} REST and "
+                         f"{len(recorded.get('stream', []))} stream fixtures from {path}")
+
+    def save_fixtures(self, path: str) -> None:
+        """Write every fixture to a JSON file readable by load_fixtures"""
+        with self._lock:
+            rest = [
+                {'path': endpoint, **({'params': dict(params)} if params is not None else {}),
+                 'status': status, 'body': body}
+                for (endpoint, params), responses in self._fixtures.items()
+                for status, body in responses
+            ]
+        stream = [message for messages in self.stream_fixtures.values() for message in messages]
+        with open(path, 'w') as f:
+            json.dump({'rest': rest, 'stream': stream}, f)
+
+    def _fixture(self, path: str, params: Dict) -> Optional[Tuple[int, Any]]:
+        for key in ((path, _params_key(params)), (path, None)):
+            responses = self._fixtures.get(key)
+            if responses:
+                index = min(self._replayed[key], len(responses) - 1)
+                self._replayed[key] += 1
+                return responses[index]
+        return None
+
+    # Requests
+
+    def _charge(self, weight: int, now: float) -> Optional[Tuple[int, Dict, float]]:
+        """Charge a request's weight; returns (status, error, retry_after) if refused"""
+        window = int(now // 60)
+        if window != self._window:
+            self._window, self.used_weight, self._over_limit = window, 0, 0
+        if now < self.banned_until:
+            return 418, _error(-1003, "Way too many requests; IP banned."), self.banned_until - now
+        if self.enforce_limits and self.used_weight + weight > self.weight_limit:
+            self._over_limit += 1
+            retry_after = (window + 1) * 60 - now
+            if self.ban_after is not None and self._over_limit > self.ban_after:
+                self.banned_until = now + DEFAULT_BAN_SECONDS
+                return 418, _error(-1003, "Way too many requests; IP banned."), DEFAULT_BAN_SECONDS
+            return 429, _error(-1003, "Too much request weight used."), retry_after
+        self.used_weight += weight
+        return None
+
+    def handle(self, method: str, path: str, params: Optional[Dict] = None) -> StandInResponse:
+        """Answer one request as Binance would
+
+        Args:
+            method: HTTP method
+            path: URL path, e.g. '/api/v3/depth'
+            params: Query parameters (strings, as parsed from the URL)
+        """
+        params = dict(params or {})
+        path = '/' + path.lstrip('/')
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        answer = None
+        with self._lock:
+            now = self.clock()
+            self.requests[path] += 1
+            refused = self._charge(endpoint_weight(path, params), now)
+            fault = self._take_fault(path) if refused is None else None
+            if fault is None and refused is None and self.error_rate \
+                    and self._random.random() < self.error_rate:
+                fault = (503, path, None)
+            headers = {'X-MBX-USED-WEIGHT-1M': str(self.used_weight)}
+            if refused is not None:
+                status, body, retry_after = refused
+                headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                answer = (status, body)
+            elif fault is not None:
+                status, _, retry_after = fault
+                answer = (status, _error(-1003 if status in (418, 429) else -1001,
+                                         f"Injected error {status}."))
+                if retry_after is not None:
+                    headers['Retry-After'] = str(math.ceil(retry_after))
+            else:
+                answer = self._fixture(path, params)
+        # Synthetic data is built outside the lock so handler threads run in parallel
+        status, body = answer or self._route(method, path, params)
+        with self._lock:
+            self.statuses[status] += 1
+        headers['Content-Type'] = 'application/json;charset=UTF-8'
+        payload = body if isinstance(body, bytes) else json.dumps(body, separators=(',', ':')).encode()
+        return StandInResponse(status, payload, headers, delay)
+
+    def _route(self, method: str, path: str, params: Dict) -> Tuple[int, Any]:
+        if method != 'GET':
+            return 405, _error(-1102, f"Method {method} not supported by the stand-in.")
+        market_type = 'futures' if path.startswith('/fapi/') else 'spot'
+        endpoint = path.split('/', 3)[-1]
+        now = self.now_ms()
+        market = self.market
+
+        if endpoint in ('ping', 'time', 'exchangeInfo'):
+            if endpoint == 'ping':
+                return 200, {}
+            if endpoint == 'time':
+                return 200, {'serverTime': now}
+            return 200, market.exchange_info(now, self.weight_limit)
+
+        symbols = self._symbols(params)
+        if symbols is None:
+            return 400, _error(-1121, "Invalid symbol.")
+        multi = endpoint in ('ticker/24hr', 'ticker/bookTicker', 'ticker/price', 'premiumIndex')
+        if multi:
+            if endpoint == 'ticker/24hr':
+                rows = [market.ticker_24hr(s, now, market_type) for s in symbols]
+            elif endpoint == 'ticker/bookTicker':
+                rows = [market.book_ticker(s, now, market_type) for s in symbols]
+            elif endpoint == 'ticker/price':
+                rows = [{'symbol': s, 'price': _fmt(market.price(s, now))} for s in symbols]
+            else:
+                rows = [market.premium_index(s, now) for s in symbols]
+            return 200, rows[0] if 'symbol' in params else rows
+        if endpoint == 'allForceOrders':
+            return 200, []
+        if endpoint == 'fundingRate' and 'symbol' not in params:
+            return 200, [row for s in symbols for row in market.funding_history(s, now, params)]
+        if 'symbol' not in params:
+            return 400, _error(-1102, "Mandatory parameter 'symbol' was not sent.")
+        symbol = symbols[0]
+
+        if endpoint == 'depth':
+            return 200, market.depth(symbol, now, params, market_type)
+        if endpoint == 'trades':
+            return 200, market.recent_trades(symbol, now, params)
+        if endpoint == 'aggTrades':
+            return 200, market.agg_trades(symbol, now, params)
+        if endpoint == 'klines':
+            rows = market.klines(symbol, now, params)
+            if rows is None:
+                return 400, _error(-1120, "Invalid interval.")
+            return 200, rows
+        if endpoint == 'openInterest' and market_type == 'futures':
+            return 200, market.open_interest(symbol, now)
+        if endpoint == 'fundingRate' and market_type == 'futures':
+            return 200, market.funding_history(symbol, now, params)
+        return 404, _error(-1100, f"Unknown endpoint {path}.")
+
+    def _symbols(self, params: Dict) -> Optional[List[str]]:
+        """Symbols selected by `symbol` or `symbols`, all without either, None if unknown"""
+        if 'symbol' in params:
+            requested = [params['symbol']]
+        elif 'symbols' in params:
+            try:
+                requested = json.loads(params['symbols'])
+            except ValueError:
+                return None
+        else:
+            return self.symbols
+        return requested if all(s in self.market.symbols for s in requested) else None
+
+    # Streams
+
+    def stream_events(self, stream: str, cursor: Optional[int], now_ms: int,
+                      market_type: str) -> Tuple[List[Dict], Optional[int]]:
+        """Synthetic events of one stream after `cursor`, and the new cursor
+
+        Args:
+            stream: Stream name, e.g. 'btcusdt@aggTrade' or 'btcusdt@depth@100ms'
+            cursor: Last trade/update id (or ticker time) sent, None for a new subscription
+            now_ms: Current time in milliseconds
+            market_type: 'spot' or 'futures'
+        """
+        name, _, kind = stream.partition('@')
+        symbol = name.upper()
+        if symbol not in self.market.symbols:
+            return [], cursor
+        kind = kind.split('@')[0]
+        if kind == 'aggTrade':
+            last = now_ms // TRADE_INTERVAL_MS
+            make = lambda n: dict(self.market.agg_trade(symbol, n), e='aggTrade',
+                                  E=n * TRADE_INTERVAL_MS, s=symbol)
+        elif kind == 'depth':
+            last = now_ms // DEPTH_INTERVAL_MS
+            make = lambda n: self.market.depth_event(symbol, n, market_type)
+        elif kind == 'miniTicker':
+            if cursor is not None and now_ms - cursor < 1000:
+                return [], cursor
+            return [self.market.mini_ticker(symbol, now_ms)], now_ms
+        else:
+            return [], cursor
+        first = last if cursor is None else max(cursor + 1, last - MAX_EVENTS_PER_INTERVAL + 1)
+        return [make(n) for n in range(first, last + 1)], last
+
+
+class _RestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # Keep-alive, like the real API
+
+    def _serve(self):
+        url = urlparse(self.path)
+        response = self.server.exchange.handle(self.command, url.path, dict(parse_qsl(url.query)))
+        if response.delay:
+            time.sleep(response.delay)
+        self.send_response(response.status)
+        for name, value in response.headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(response.body)))
+        self.end_headers()
+        self.wfile.write(response.body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _serve
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServer:
+    def __init__(self, exchange: Optional[StandInExchange] = None, host: str = '127.0.0.1',
+                 port: int = 0, stream_port: Optional[int] = 0,
+                 stream_interval: float = STREAM_INTERVAL):
+        """Local HTTP and WebSocket server in front of a StandInExchange
+
+        Point fetchers at `base_url` (spot and futures paths are both
+        served) and stream collectors at `stream_url`, which speaks the
+        combined-stream protocol: send SUBSCRIBE, receive
+        {'stream', 'data'} messages. Subscribed streams with recorded
+        fixtures replay those; others get synthetic events in step with the
+        REST data. Futures streams are served under `stream_url` + '/futures'.
+        The WebSocket side requires aiohttp.
+
+        Args:
+            exchange: Exchange to serve (default: StandInExchange())
+            host: Interface to listen on
+            port: REST port (0: any free port)
+            stream_port: WebSocket port (0: any free port, None: no streams)
+            stream_interval: Seconds between stream pushes
+        """
+        self.exchange = exchange or StandInExchange()
+        self.host = host
+        self.port = port
+        self.stream_port = stream_port
+        self.stream_interval = stream_interval
+        self._http: Optional[ThreadingHTTPServer] = None
+        self._threads: List[threading.Thread] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner = None
+        self.logger = get_logger('stand_in_server')
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def stream_url(self) -> str:
+        return f"ws://{self.host}:{self.stream_port}"
+
+    def start(self) -> 'StandInServer':
+        """Start serving in background threads"""
+        self._http = ThreadingHTTPServer((self.host, self.port), _RestHandler)
+        self._http.daemon_threads = True
+        self._http.exchange = self.exchange
+        self.port = self._http.server_address[1]
+        self._spawn(self._http.serve_forever)
+
+        if self.stream_port is not None:
+            if aiohttp is None:
+                raise ImportError("aiohttp is required for stand-in streams")
+            started = threading.Event()
+            self._loop = asyncio.new_event_loop()
+            self._spawn(self._run_streams, started)
+            started.wait()
+        self.logger.info(f"Stand-in exchange serving {self.base_url}"
+                         + (f" and {self.stream_url}" if self.stream_port is not None else ""))
+        return self
+
+    def _spawn(self, target, *args) -> None:
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _run_streams(self, started: threading.Event) -> None:
+        asyncio.set_event_loop(self._loop)
+        app = web.Application()
+        app.router.add_get('/stream', self._stream)
+        app.router.add_get('/ws', self._stream)
+        # Futures collectors use f"{stream_url}/futures" as their stream URL
+        app.router.add_get('/futures/stream', self._stream)
+        app.router.add_get('/futures/ws', self._stream)
+        self._runner = web.AppRunner(app)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, self.host, self.stream_port)
+        self._loop.run_until_complete(site.start())
+        self.stream_port = site._server.sockets[0].getsockname()[1]
+        started.set()
+        self._loop.run_forever()
+
+    async def _stream(self, request: 'web.Request') -> 'web.WebSocketResponse':
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        market_type = 'futures' if request.path.startswith('/futures/') else 'spot'
+        subscribed: Dict[str, Optional[int]] = {}
+        pusher = asyncio.ensure_future(self._push(ws, subscribed, market_type))
+        try:
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                try:
+                    command = json.loads(msg.data)
+                    method, names = command['method'], command.get('params', [])
+                except (ValueError, KeyError, TypeError):
+                    await ws.send_json({'error': {'code': 2, 'msg': 'Invalid request'}})
+                    continue
+                if method == 'SUBSCRIBE':
+                    for name in names:
+                        subscribed.setdefault(name, None)
+                elif method == 'UNSUBSCRIBE':
+                    for name in names:
+                        subscribed.pop(name, None)
+                await ws.send_json({'result': None, 'id': command.get('id')})
+        finally:
+            pusher.cancel()
+        return ws
+
+    async def _push(self, ws, subscribed: Dict[str, Optional[int]], market_type: str) -> None:
+        fixtures = self.exchange.stream_fixtures
+        while not ws.closed:
+            now_ms = self.exchange.now_ms()
+            for name, cursor in list(subscribed.items()):
+                if name in fixtures:
+                    sent = cursor or 0
+                    messages = fixtures[name][sent:sent + MAX_EVENTS_PER_INTERVAL]
+                    subscribed[name] = sent + len(messages)
+                else:
+                    events, subscribed[name] = self.exchange.stream_events(
+                        name, cursor, now_ms, market_type)
+                    messages = [{'stream': name, 'data': event} for event in events]
+                for message in messages:
+                    await ws.send_str(json.dumps(message, separators=(',', ':')))
+            await asyncio.sleep(self.stream_interval)
+
+    def stop(self) -> None:
+        """Stop serving and close every connection"""
+        if self._http is not None:
+            self._http.shutdown()
+            self._http.server_close()
+            self._http = None
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        for thread in self._threads:
+            thread.join(5)
+        self._threads.clear()
+        if self._loop is not None:
+            self._loop.close()
+            self._loop = None
+
+    def __enter__(self) -> 'StandInServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def record_fixtures(fetcher: Any, calls: Iterable[Tuple[str, Optional[Dict]]], path: str) -> int:
+    """Record live responses into a fixture file for StandInExchange
+
+    Args:
+        fetcher: BaseFetcher pointed at the real API
+        calls: (endpoint, params) pairs to request
+        path: Fixture file to write
+
+    Returns:
+        Number of responses recorded (failed requests are skipped)
+    """
+    exchange = StandInExchange(symbols={})
+    recorded = 0
+    for endpoint, params in calls:
+        try:
+            body = fetcher.fetch_data(endpoint, dict(params) if params else None)
+        except Exception as e:
+            fetcher.logger.warning(f"Not recording {endpoint}: {str(e)}")
+            continue
+        if body is not None:
+            exchange.add_fixture(endpoint, body, params or {})
+            recorded += 1
+    exchange.save_fixtures(path)
+    return recorded
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Local Binance stand-in server')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=8080, help='REST port')
+    parser.add_argument('--stream-port', type=int, default=8081,
+                        help='WebSocket port (requires aiohttp), -1 to disable')
+    parser.add_argument('--fixtures', help='Recorded fixture file to replay')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to responses')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Random extra latency in seconds')
+    parser.add_argument('--weight-limit', type=int, default=DEFAULT_WEIGHT_LIMIT,
+                        help='Request weight allowed per minute')
+    parser.add_argument('--ban-after', type=int,
+                        help='Requests over the weight limit in a minute before a 418 ban')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Probability of answering 503')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    exchange = StandInExchange(fixtures=args.fixtures, latency=args.latency, jitter=args.jitter,
+                               weight_limit=args.weight_limit, ban_after=args.ban_after,
+                               error_rate=args.error_rate)
+    stream_port = None if args.stream_port < 0 or aiohttp is None else args.stream_port
+    with StandInServer(exchange, args.host, args.port, stream_port) as server:
+        print(f"Serving {server.base_url}"
+              + (f" and {server.stream_url}" if stream_port is not None else "")
+              + "; Ctrl-C to stop")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
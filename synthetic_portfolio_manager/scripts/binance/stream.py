@@ -0,0 +1,363 @@
+import asyncio
+import functools
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import aiohttp
+except ImportError:  # optional async HTTP/WebSocket client
+    aiohttp = None
+
+from utilities.logging_config import get_logger
+from .cache import BinanceCache
+from .local_orderbook import LocalOrderBook, DEFAULT_SNAPSHOT_LIMIT
+from .processor import BinanceProcessor
+
+DEFAULT_SPOT_STREAM_URL = 'wss://stream.binance.com:9443'
+DEFAULT_FUTURES_STREAM_URL = 'wss://fstream.binance.com'
+STREAM_TYPES = ('aggTrade', 'depth', 'miniTicker')
+DEFAULT_DEPTH_SPEED = '100ms'
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 60.0
+HEARTBEAT_SECONDS = 30.0
+DEFAULT_BOOK_LEVELS = 100
+
+
+class BinanceStreamCollector:
+    def __init__(self, symbols: List[str], processor: BinanceProcessor, cache: BinanceCache,
+                 market_type: str = 'spot', stream_url: Optional[str] = None,
+                 streams: tuple = STREAM_TYPES, depth_speed: str = DEFAULT_DEPTH_SPEED,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 reconnect_delay: float = DEFAULT_RECONNECT_DELAY,
+                 max_reconnect_delay: float = MAX_RECONNECT_DELAY,
+                 on_gap: Optional[Callable[[Dict], None]] = None,
+                 columnar: Optional[Any] = None,
+                 snapshot_fetcher: Optional[Any] = None,
+                 snapshot_limit: int = DEFAULT_SNAPSHOT_LIMIT,
+                 book_levels: int = DEFAULT_BOOK_LEVELS):
+        """Collect trades, depth diffs and tickers from Binance combined streams
+
+        Subscribes to `<symbol>@aggTrade`, `<symbol>@depth@<speed>` and
+        `<symbol>@miniTicker` over one connection. Events are run through the
+        processor and buffered; every `flush_interval` seconds the buffered
+        raw and processed events are written to the cache as one entry per
+        symbol and stream. Dropped connections are reopened with exponential
+        backoff and the subscriptions sent again.
+
+        Aggregate trade ids and depth update ids are tracked per symbol,
+        including across reconnects. A jump in either is recorded in `gaps`
+        and passed to `on_gap`; duplicate or stale events are dropped.
+
+        With a `snapshot_fetcher` a LocalOrderBook is kept per symbol from
+        the depth stream, bootstrapped and resynced from REST snapshots, and
+        its best `book_levels` levels are cached as the processed orderbook
+        on every flush. No depth requests are made while a book stays in sync.
+
+        Args:
+            symbols: Trading symbols to subscribe to
+            processor: Initialized BinanceProcessor instance
+            cache: Initialized BinanceCache instance
+            market_type: 'spot' or 'futures'
+            stream_url: WebSocket base URL (default: Binance URL for the market)
+            streams: Stream types to subscribe to (subset of STREAM_TYPES)
+            depth_speed: Depth diff update speed ('100ms' or '1000ms' on spot)
+            flush_interval: Seconds between cache writes of buffered events
+            reconnect_delay: Initial delay before reconnecting in seconds
+            max_reconnect_delay: Upper bound of the reconnect backoff
+            on_gap: Optional callback receiving each detected sequence gap
+            columnar: Optional Parquet sink for processed trades and order books
+            snapshot_fetcher: Optional BinanceFetcher or AsyncBinanceFetcher
+                used for depth snapshots; enables local order books
+            snapshot_limit: Levels per depth snapshot request
+            book_levels: Levels per side cached from each local order book
+        """
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for BinanceStreamCollector")
+        unknown = set(streams) - set(STREAM_TYPES)
+        if unknown:
+            raise ValueError(f"Invalid stream types: {sorted(unknown)}. Must be in {STREAM_TYPES}")
+
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.processor = processor
+        self.cache = cache
+        self.market_type = processor._validate_market_type(market_type)
+        if stream_url is None:
+            stream_url = DEFAULT_FUTURES_STREAM_URL if self.market_type == 'futures' else DEFAULT_SPOT_STREAM_URL
+        self.stream_url = stream_url.rstrip('/')
+        self.streams = tuple(streams)
+        self.depth_speed = depth_speed
+        self.flush_interval = flush_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.on_gap = on_gap
+        self.columnar = columnar
+        self.snapshot_fetcher = snapshot_fetcher
+        self.snapshot_limit = snapshot_limit
+        self.book_levels = book_levels
+        self.logger = get_logger(self.__class__.__name__)
+
+        self.connects = 0
+        self.gaps: List[Dict] = []
+        self.events = 0
+        self.bad_messages = 0
+        # (symbol, stream type) -> last sequence id seen
+        self._last_ids: Dict[tuple, int] = {}
+        # (symbol, stream type) -> ([raw events], [processed events])
+        self._buffers: Dict[tuple, tuple] = defaultdict(lambda: ([], []))
+        self._stopped: Optional[asyncio.Event] = None
+        self._ws = None
+        self._request_id = 0
+
+        self.order_books: Dict[str, LocalOrderBook] = {}
+        if snapshot_fetcher is not None and 'depth' in self.streams:
+            self.order_books = {
+                symbol: LocalOrderBook(symbol, self.market_type) for symbol in self.symbols
+            }
+        self._syncing: set = set()
+        self._flushed_book_ids: Dict[str, int] = {}
+        # Flushes write from executor threads; one at a time keeps entries in order
+        self._write_lock = threading.Lock()
+
+    def stream_names(self) -> List[str]:
+        """Stream names subscribed to, e.g. 'btcusdt@aggTrade'"""
+        names = []
+        for symbol in self.symbols:
+            for stream in self.streams:
+                suffix = f"depth@{self.depth_speed}" if stream == 'depth' else stream
+                names.append(f"{symbol.lower()}@{suffix}")
+        return names
+
+    async def run(self, duration: Optional[float] = None) -> None:
+        """Stream until stop() is called or `duration` seconds have passed
+
+        Args:
+            duration: Optional run time in seconds (default: until stopped)
+        """
+        self._stopped = asyncio.Event()
+        if duration is not None:
+            asyncio.get_running_loop().call_later(duration, self.stop)
+
+        flusher = asyncio.ensure_future(self._flush_periodically())
+        delay = self.reconnect_delay
+        try:
+            async with aiohttp.ClientSession() as session:
+                while not self._stopped.is_set():
+                    try:
+                        if await self._consume(session):
+                            delay = self.reconnect_delay
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        self.logger.warning(f"Stream connection failed: {str(e)}")
+
+                    if self._stopped.is_set():
+                        break
+                    self.logger.info(f"Reconnecting to {self.stream_url} in {delay:.1f}s")
+                    try:
+                        await asyncio.wait_for(self._stopped.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    delay = min(delay * 2, self.max_reconnect_delay)
+        finally:
+            flusher.cancel()
+            await self._flush_async()
+
+    def stop(self) -> None:
+        """Stop streaming; buffered events are flushed when run() returns"""
+        if self._stopped is not None:
+            self._stopped.set()
+        if self._ws is not None and not self._ws.closed:
+            asyncio.ensure_future(self._ws.close())
+
+    async def _consume(self, session: 'aiohttp.ClientSession') -> bool:
+        """Connect, subscribe and handle messages until the connection closes
+
+        Returns:
+            Whether any stream event was received on this connection
+        """
+        received = False
+        async with session.ws_connect(f"{self.stream_url}/stream",
+                                      heartbeat=HEARTBEAT_SECONDS) as ws:
+            self._ws = ws
+            self.connects += 1
+            self._request_id += 1
+            await ws.send_json({
+                'method': 'SUBSCRIBE',
+                'params': self.stream_names(),
+                'id': self._request_id
+            })
+            self.logger.info(f"Subscribed to {len(self.stream_names())} streams on {self.stream_url}")
+
+            async for msg in ws:
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    try:
+                        message = msg.json()
+                        if 'stream' in message:
+                            received = True
+                            self.handle_message(message)
+                        elif message.get('error'):
+                            self.logger.error(f"Stream request failed: {message['error']}")
+                    except Exception as e:
+                        # One malformed event must not end the stream
+                        self.bad_messages += 1
+                        self.logger.error(f"Skipping bad stream message {msg.data[:200]!r}: "
+                                          f"{type(e).__name__}: {str(e)}")
+                elif msg.type == aiohttp.WSMsgType.ERROR:
+                    self.logger.warning(f"Stream error: {str(ws.exception())}")
+                    break
+        self._ws = None
+        if not self._stopped.is_set():
+            self.logger.warning(f"Stream connection to {self.stream_url} closed")
+        return received
+
+    def handle_message(self, message: Dict) -> None:
+        """Check sequencing of one combined stream message, process and buffer it
+
+        Args:
+            message: Combined stream message {'stream': name, 'data': event}
+        """
+        event = message['data']
+        symbol = event.get('s', message['stream'].split('@')[0].upper())
+        stream = message['stream'].split('@')[1]
+
+        if stream == 'aggTrade':
+            if not self._in_sequence(symbol, stream, event['a'], event['a']):
+                return
+            # Trades are processed as one batch per flush
+            processed = None
+        elif stream == 'depth':
+            # Futures diffs carry the previous event's final id, spot diffs the first id of this one
+            first_id = event['pu'] + 1 if 'pu' in event else event['U']
+            if not self._in_sequence(symbol, stream, first_id, event['u']):
+                return
+            processed = self.processor.process_depth_update(event, symbol, self.market_type)
+            book = self.order_books.get(symbol)
+            if book is not None:
+                book.apply_update(event)
+                if book.needs_snapshot and symbol not in self._syncing:
+                    self._syncing.add(symbol)
+                    asyncio.ensure_future(self._sync_book(book))
+        elif stream == 'miniTicker':
+            processed = self.processor.process_mini_ticker_data(event, symbol, self.market_type)
+        else:
+            self.logger.debug(f"Ignoring message from stream {message['stream']}")
+            return
+
+        raw_events, processed_events = self._buffers[(symbol, stream)]
+        raw_events.append(event)
+        if processed is not None:
+            processed_events.append(processed)
+        self.events += 1
+
+    def _in_sequence(self, symbol: str, stream: str, first_id: int, last_id: int) -> bool:
+        """Track the last id per symbol and stream, recording gaps
+
+        Returns:
+            False for a duplicate or stale event that should be dropped
+        """
+        key = (symbol, stream)
+        previous = self._last_ids.get(key)
+        if previous is not None:
+            if last_id <= previous:
+                return False
+            if first_id > previous + 1:
+                gap = {
+                    'symbol': symbol,
+                    'stream': stream,
+                    'expected': previous + 1,
+                    'received': first_id,
+                    'time': int(time.time() * 1000)
+                }
+                self.gaps.append(gap)
+                self.logger.warning(
+                    f"Sequence gap on {symbol} {stream}: expected {previous + 1}, got {first_id}"
+                )
+                if self.on_gap:
+                    self.on_gap(gap)
+        self._last_ids[key] = last_id
+        return True
+
+    async def _sync_book(self, book: LocalOrderBook) -> None:
+        """Fetch depth snapshots until the book is in sync or streaming stops"""
+        delay = self.reconnect_delay
+        try:
+            while book.needs_snapshot and not self._stopped.is_set():
+                snapshot = await self._fetch_snapshot(book.symbol)
+                if snapshot is not None and book.apply_snapshot(snapshot):
+                    self.logger.info(f"Order book for {book.symbol} synced at update {book.last_update_id}")
+                    break
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+        finally:
+            self._syncing.discard(book.symbol)
+
+    async def _fetch_snapshot(self, symbol: str) -> Optional[Dict]:
+        """Fetch a depth snapshot with either a sync or an async fetcher"""
+        fetch = functools.partial(self.snapshot_fetcher.fetch_orderbook, symbol,
+                                  limit=self.snapshot_limit, market_type=self.market_type)
+        if asyncio.iscoroutinefunction(self.snapshot_fetcher.fetch_orderbook):
+            return await fetch()
+        return await asyncio.get_running_loop().run_in_executor(None, fetch)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self._flush_async()
+            except Exception as e:
+                self.logger.error(f"Failed to flush stream events: {str(e)}")
+
+    async def _flush_async(self) -> None:
+        """Flush with the cache and Parquet I/O on an executor thread"""
+        pending = self._take_pending()
+        await asyncio.get_running_loop().run_in_executor(None, self._write, *pending)
+
+    def flush(self) -> None:
+        """Write buffered events to the cache, one entry per symbol and stream"""
+        self._write(*self._take_pending())
+
+    def _take_pending(self) -> Tuple[Dict[tuple, tuple], List[Dict]]:
+        """Swap out the event buffers and snapshot the books that changed
+
+        Runs on the event loop, which is what mutates buffers and books.
+        """
+        buffers, self._buffers = self._buffers, defaultdict(lambda: ([], []))
+        books = []
+        for symbol, book in self.order_books.items():
+            if not book.synced or self._flushed_book_ids.get(symbol) == book.last_update_id:
+                continue
+            books.append(book.to_dict(self.book_levels))
+            self._flushed_book_ids[symbol] = book.last_update_id
+        return buffers, books
+
+    def _write(self, buffers: Dict[tuple, tuple], books: List[Dict]) -> None:
+        with self._write_lock:
+            for (symbol, stream), (raw_events, processed_events) in buffers.items():
+                if not raw_events:
+                    continue
+                trade_batch = None
+                if stream == 'aggTrade':
+                    filename, data_type = f"{symbol.lower()}_trades", 'trade'
+                    trade_batch = self.processor.process_trades_batch(raw_events, symbol,
+                                                                      self.market_type)
+                    processed_events = trade_batch.to_records()
+                elif stream == 'depth':
+                    filename, data_type = f"{symbol.lower()}_depth", 'orderbook'
+                else:
+                    filename, data_type = f"{symbol.lower()}_market", 'market'
+                    # Only the latest ticker matters between flushes
+                    raw_events, processed_events = raw_events[-1], processed_events[-1]
+
+                self.cache.save_to_cache(raw_events, filename, data_type, is_processed=False)
+                self.cache.save_to_cache(processed_events, filename, data_type, is_processed=True)
+                if self.columnar and trade_batch is not None:
+                    self.columnar.append_trade_batch(trade_batch)
+                self.logger.debug(f"Cached streamed {stream} data for {symbol}")
+
+            for processed_orderbook in books:
+                self.cache.save_to_cache(processed_orderbook,
+                                         f"{processed_orderbook['symbol'].lower()}_orderbook",
+                                         'orderbook', is_processed=True)
+                if self.columnar:
+                    self.columnar.append_orderbook(processed_orderbook)
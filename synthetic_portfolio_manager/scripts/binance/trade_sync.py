@@ -0,0 +1,298 @@
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from utilities.logging_config import get_logger
+from .cache import BinanceCache
+from .fetcher import MAX_PARALLEL_REQUESTS
+from .processor import BinanceProcessor
+
+AGG_TRADES_PAGE_SIZE = 1000
+DEFAULT_MAX_PAGES = 50
+CURSOR_FILENAME = 'trade_cursors.json'
+
+# (fromId the page was requested from, aggregate trades or None on error)
+Page = Tuple[int, Optional[List[Dict]]]
+
+
+def gap_page_ids(start_id: int, end_id: int, page_size: int = AGG_TRADES_PAGE_SIZE,
+                 max_pages: int = DEFAULT_MAX_PAGES) -> List[int]:
+    """fromIds of the pages covering aggregate trade ids [start_id, end_id)
+
+    At most `max_pages` pages are returned, starting from `start_id`; the
+    rest of a larger gap is left for the next sync.
+    """
+    return list(range(start_id, end_id, page_size))[:max_pages]
+
+
+def stitch_pages(cursor: int, pages: List[Page]) -> List[Dict]:
+    """Join pages into the trades following `cursor` without holes or repeats
+
+    Pages are taken in fromId order and stop at the first failed page or
+    the first page that starts beyond what the previous pages covered, so
+    the result never skips a trade. Overlapping trades appear once.
+
+    Args:
+        cursor: Last aggregate trade id already stored
+        pages: (fromId, trades) pairs in any order
+
+    Returns:
+        Aggregate trades with ids above the cursor, oldest first
+    """
+    trades = []
+    covered = cursor
+    for from_id, page in sorted(pages, key=lambda item: item[0]):
+        if page is None or from_id > covered + 1:
+            break
+        for trade in page:
+            if trade['a'] > covered:
+                trades.append(trade)
+                covered = trade['a']
+        if not page:
+            break
+    return trades
+
+
+class TradeCursorStore:
+    def __init__(self, path: Path):
+        """Last stored aggregate trade id per market and symbol, kept in a JSON file
+
+        The file is rewritten atomically on every update.
+
+        Args:
+            path: Cursor file location
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._cursors: Dict[str, int] = {}
+        if self.path.exists():
+            with open(self.path, 'r') as f:
+                self._cursors = json.load(f)
+
+    @staticmethod
+    def key(symbol: str, market_type: str) -> str:
+        return f"{market_type}:{symbol}"
+
+    def get(self, symbol: str, market_type: str = 'spot') -> Optional[int]:
+        return self._cursors.get(self.key(symbol, market_type))
+
+    def set(self, symbol: str, market_type: str, trade_id: int) -> None:
+        with self._lock:
+            self._cursors[self.key(symbol, market_type)] = trade_id
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(self._cursors, f, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+
+class TradeSync:
+    def __init__(self, fetcher: Any, processor: BinanceProcessor, cache: BinanceCache,
+                 columnar: Optional[Any] = None, cursor_path: Optional[str] = None,
+                 start_time: Optional[int] = None, page_size: int = AGG_TRADES_PAGE_SIZE,
+                 max_pages: int = DEFAULT_MAX_PAGES):
+        """Incremental aggregate trade sync with a persisted per-symbol cursor
+
+        Each sync requests aggTrades from the id after the cursor. A full
+        page means more trades are waiting: the most recent page is fetched
+        to find the tip and the ids in between are requested as parallel
+        pages. Trades are stored once, in id order and without holes, and
+        the cursor advances only after they are on disk.
+
+        Args:
+            fetcher: BinanceFetcher (for `sync`) or AsyncBinanceFetcher (for
+                `fetch_new_trades_async`)
+            processor: Initialized BinanceProcessor instance
+            cache: Initialized BinanceCache instance
+            columnar: Optional Parquet sink for processed trades
+            cursor_path: Cursor file (default: trade_cursors.json in the cache directory)
+            start_time: Optional time in milliseconds to backfill from for
+                symbols without a cursor (default: start from the latest trades)
+            page_size: Aggregate trades per request (max 1000)
+            max_pages: Gap pages fetched per sync
+        """
+        self.fetcher = fetcher
+        self.processor = processor
+        self.cache = cache
+        self.columnar = columnar
+        self.cursors = TradeCursorStore(cursor_path or Path(cache.base_dir) / CURSOR_FILENAME)
+        self.start_time = start_time
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.logger = get_logger('binance.trade_sync')
+
+    def _fetch_page(self, symbol: str, market_type: str, **params) -> Optional[List[Dict]]:
+        return self.fetcher.fetch_agg_trades(symbol, limit=self.page_size,
+                                             market_type=market_type, **params)
+
+    def _initial_cursor(self, first_page: Optional[List[Dict]]) -> Optional[int]:
+        """Cursor just before the first trade of a bootstrap page"""
+        if not first_page:
+            return None
+        return first_page[0]['a'] - 1
+
+    def fetch_new_trades(self, symbol: str, market_type: str = 'spot') -> Optional[List[Dict]]:
+        """Fetch the aggregate trades after the symbol's cursor
+
+        Args:
+            symbol: Trading pair symbol
+            market_type: 'spot' or 'futures'
+
+        Returns:
+            New aggregate trades, oldest first, or None if the first request failed
+        """
+        cursor = self.cursors.get(symbol, market_type)
+        # A bootstrap without start_time already starts at the tip
+        from_latest = cursor is None and self.start_time is None
+        if cursor is None:
+            if self.start_time is not None:
+                bootstrap = self._fetch_page(symbol, market_type, start_time=self.start_time)
+            else:
+                bootstrap = self._fetch_page(symbol, market_type)
+            if bootstrap is None:
+                return None
+            cursor = self._initial_cursor(bootstrap)
+            if cursor is None:
+                return []
+            pages = [(cursor + 1, bootstrap)]
+        else:
+            first = self._fetch_page(symbol, market_type, from_id=cursor + 1)
+            if first is None:
+                return None
+            pages = [(cursor + 1, first)]
+
+        first = pages[0][1]
+        if len(first) == self.page_size and not from_latest:
+            # More trades than one page: find the tip, then fill the gap in parallel
+            latest = self._fetch_page(symbol, market_type)
+            if latest:
+                from_ids = gap_page_ids(first[-1]['a'] + 1, latest[0]['a'],
+                                        self.page_size, self.max_pages)
+                if from_ids:
+                    workers = min(len(from_ids), MAX_PARALLEL_REQUESTS)
+                    with ThreadPoolExecutor(max_workers=workers) as pool:
+                        results = pool.map(
+                            lambda from_id: self._fetch_page(symbol, market_type, from_id=from_id),
+                            from_ids
+                        )
+                        pages.extend(zip(from_ids, results))
+                pages.append((latest[0]['a'], latest))
+
+        return self._stitch(symbol, market_type, cursor, pages)
+
+    async def fetch_new_trades_async(self, symbol: str,
+                                     market_type: str = 'spot') -> Optional[List[Dict]]:
+        """Asyncio counterpart of `fetch_new_trades` for an AsyncBinanceFetcher"""
+        async def fetch_page(**params):
+            return await self.fetcher.fetch_agg_trades(symbol, limit=self.page_size,
+                                                       market_type=market_type, **params)
+
+        cursor = self.cursors.get(symbol, market_type)
+        # A bootstrap without start_time already starts at the tip
+        from_latest = cursor is None and self.start_time is None
+        if cursor is None:
+            if self.start_time is not None:
+                bootstrap = await fetch_page(start_time=self.start_time)
+            else:
+                bootstrap = await fetch_page()
+            if bootstrap is None:
+                return None
+            cursor = self._initial_cursor(bootstrap)
+            if cursor is None:
+                return []
+            pages = [(cursor + 1, bootstrap)]
+        else:
+            first = await fetch_page(from_id=cursor + 1)
+            if first is None:
+                return None
+            pages = [(cursor + 1, first)]
+
+        first = pages[0][1]
+        if len(first) == self.page_size and not from_latest:
+            latest = await fetch_page()
+            if latest:
+                from_ids = gap_page_ids(first[-1]['a'] + 1, latest[0]['a'],
+                                        self.page_size, self.max_pages)
+                results = await asyncio.gather(*(fetch_page(from_id=from_id) for from_id in from_ids))
+                pages.extend(zip(from_ids, results))
+                pages.append((latest[0]['a'], latest))
+
+        return self._stitch(symbol, market_type, cursor, pages)
+
+    def _stitch(self, symbol: str, market_type: str, cursor: int, pages: List[Page]) -> List[Dict]:
+        trades = stitch_pages(cursor, pages)
+        if len(pages) > 1:
+            self.logger.info(
+                f"Paged {len(pages)} aggTrades requests for {symbol} {market_type}: "
+                f"{len(trades)} new trades after {cursor}"
+            )
+        return trades
+
+    def store(self, symbol: str, market_type: str, trades: Optional[List[Dict]]) -> int:
+        """Cache new trades and advance the cursor past them
+
+        The cursor is persisted only once the trades are durable, so this
+        must not be called inside an open `cache.batch()` block.
+
+        Args:
+            symbol: Trading pair symbol
+            market_type: 'spot' or 'futures'
+            trades: Output of `fetch_new_trades` (None or empty stores nothing)
+
+        Returns:
+            Number of trades stored
+        """
+        cursor = self.cursors.get(symbol, market_type)
+        # Never store a trade twice, even if trades were fetched before a concurrent store
+        trades = [trade for trade in trades or [] if cursor is None or trade['a'] > cursor]
+        if not trades:
+            return 0
+
+        failures = self.cache.write_failures
+        trade_batch = self.processor.process_trades_batch(trades, symbol, market_type)
+        with self.cache.batch():
+            self.cache.save_to_cache(
+                trades,
+                f"{symbol.lower()}_trades",
+                'trade',
+                is_processed=False
+            )
+            self.cache.save_to_cache(
+                trade_batch.to_records(),
+                f"{symbol.lower()}_trades",
+                'trade',
+                is_processed=True
+            )
+        if self.columnar:
+            self.columnar.append_trade_batch(trade_batch)
+
+        # The cursor is fsynced, so the trades must be on disk before it moves:
+        # drain the write-behind queue, write out the Parquet buffer, fsync both
+        self.cache.flush()
+        if self.cache.write_failures > failures:
+            self.logger.error(
+                f"Dropped trade writes for {symbol}; cursor stays at {cursor} to refetch them"
+            )
+            return 0
+        self.cache.sync_durable()
+        if self.columnar:
+            self.columnar.flush()
+            self.columnar.sync()
+
+        self.cursors.set(symbol, market_type, trades[-1]['a'])
+        self.logger.debug(f"Stored {len(trades)} trades for {symbol}, cursor {trades[-1]['a']}")
+        return len(trades)
+
+    def sync(self, symbol: str, market_type: str = 'spot') -> int:
+        """Fetch and store the trades after the cursor (BinanceFetcher only)
+
+        Returns:
+            Number of trades stored
+        """
+        return self.store(symbol, market_type, self.fetch_new_trades(symbol, market_type))
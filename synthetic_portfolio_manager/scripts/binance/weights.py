@@ -0,0 +1,105 @@
+from typing import Dict, Optional
+
+# Request weights from the Binance spot and USD-M futures API docs. Entries
+# are either a fixed weight or a function of the request parameters.
+DEFAULT_WEIGHT = 1
+
+
+def _spot_depth(params: Dict) -> int:
+    limit = int(params.get('limit', 100))
+    if limit <= 100:
+        return 5
+    if limit <= 500:
+        return 25
+    if limit <= 1000:
+        return 50
+    return 250
+
+
+def _futures_depth(params: Dict) -> int:
+    limit = int(params.get('limit', 500))
+    if limit <= 50:
+        return 2
+    if limit <= 100:
+        return 5
+    if limit <= 500:
+        return 10
+    return 20
+
+
+def _futures_klines(params: Dict) -> int:
+    limit = int(params.get('limit', 500))
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+def _symbols_count(params: Dict) -> Optional[int]:
+    """Number of symbols requested, or None for all symbols"""
+    if 'symbol' in params:
+        return 1
+    symbols = params.get('symbols')
+    if symbols is None:
+        return None
+    if isinstance(symbols, str):
+        return symbols.count(',') + 1
+    return len(symbols)
+
+
+def _spot_ticker_24hr(params: Dict) -> int:
+    count = _symbols_count(params)
+    if count is None or count > 100:
+        return 80
+    return 2 if count <= 20 else 40
+
+
+def _per_symbol(single: int, multiple: int):
+    return lambda params: single if 'symbol' in params else multiple
+
+
+ENDPOINT_WEIGHTS = {
+    # Spot
+    '/api/v3/ping': 1,
+    '/api/v3/time': 1,
+    '/api/v3/exchangeInfo': 20,
+    '/api/v3/depth': _spot_depth,
+    '/api/v3/trades': 25,
+    '/api/v3/aggTrades': 4,
+    '/api/v3/klines': 2,
+    '/api/v3/ticker/24hr': _spot_ticker_24hr,
+    '/api/v3/ticker/price': _per_symbol(2, 4),
+    '/api/v3/ticker/bookTicker': _per_symbol(2, 4),
+    # USD-M futures
+    '/fapi/v1/ping': 1,
+    '/fapi/v1/time': 1,
+    '/fapi/v1/exchangeInfo': 1,
+    '/fapi/v1/depth': _futures_depth,
+    '/fapi/v1/trades': 5,
+    '/fapi/v1/aggTrades': 20,
+    '/fapi/v1/klines': _futures_klines,
+    '/fapi/v1/ticker/24hr': _per_symbol(1, 40),
+    '/fapi/v1/ticker/price': _per_symbol(1, 2),
+    '/fapi/v1/ticker/bookTicker': _per_symbol(2, 5),
+    '/fapi/v1/premiumIndex': _per_symbol(1, 10),
+    '/fapi/v1/fundingRate': 1,
+    '/fapi/v1/openInterest': 1,
+    '/fapi/v1/allForceOrders': _per_symbol(20, 50),
+}
+
+
+def endpoint_weight(endpoint: str, params: Optional[Dict] = None) -> int:
+    """Return the request weight of a Binance endpoint for the given parameters
+
+    Args:
+        endpoint: API path, with or without a leading slash
+        params: Query parameters of the request
+
+    Returns:
+        Request weight (1 for unknown endpoints)
+    """
+    weight = ENDPOINT_WEIGHTS.get('/' + endpoint.lstrip('/'), DEFAULT_WEIGHT)
+    return weight(params or {}) if callable(weight) else weight
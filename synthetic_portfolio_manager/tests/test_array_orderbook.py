@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from scripts.base.array_orderbook import ArrayOrderBook
+
+@pytest.fixture
+def book():
+    return ArrayOrderBook.from_levels(
+        [['100.0', '1.0'], ['99.0', '2.0'], ['98.0', '3.0']],
+        [['101.0', '3.0'], ['102.0', '2.0'], ['103.0', '1.0']]
+    )
+
+def test_arrays_and_levels(book):
+    assert book.bid_prices.dtype == np.float64
+    assert book.bid_prices.flags['C_CONTIGUOUS']
+    assert book.levels('bids') == [[100.0, 1.0], [99.0, 2.0], [98.0, 3.0]]
+    assert book.levels('asks') == [[101.0, 3.0], [102.0, 2.0], [103.0, 1.0]]
+
+def test_top_of_book(book):
+    assert (book.best_bid, book.best_ask) == (100.0, 101.0)
+    assert book.mid == 100.5
+    assert book.spread == 1.0
+    assert book.spread_bps == pytest.approx(1.0 / 100.5 * 1e4)
+    # More size on the ask pulls the microprice towards the bid
+    assert book.microprice == pytest.approx((100.0 * 3.0 + 101.0 * 1.0) / 4.0)
+
+def test_imbalance(book):
+    assert book.imbalance(1) == pytest.approx((1 - 3) / 4)
+    assert book.imbalance(2) == pytest.approx((3 - 5) / 8)
+    assert book.imbalance(10) == 0.0   # Capped at the levels present
+
+def test_depth_within(book):
+    # 100 bps of 100.5 reaches 99.495 on the bid and 101.505 on the ask
+    assert book.depth_within(100) == (1.0, 3.0)
+    assert book.depth_within(300) == (6.0, 6.0)
+    assert book.depth_within(1) == (0.0, 0.0)
+
+def test_vwap_to_fill(book):
+    assert book.vwap_to_fill(101.0, 'buy') == 101.0
+    # All of the first ask level (303) plus 1 unit of the second (102)
+    assert book.vwap_to_fill(405.0, 'buy') == pytest.approx(405.0 / 4.0)
+    assert book.vwap_to_fill(298.0, 'sell') == pytest.approx(298.0 / 3.0)
+    assert book.vwap_to_fill(10_000, 'buy') is None
+    assert book.vwap_to_fill(0, 'buy') is None
+
+def test_empty_book():
+    book = ArrayOrderBook.from_levels([], [['101.0', '1.0']])
+    assert book.empty
+    metrics = book.metrics()
+    assert metrics['bestAsk'] == 101.0
+    assert metrics['spread'] is None and metrics['microprice'] is None
+    assert metrics['imbalance'] == {'1': None, '5': None, '10': None}
+    assert metrics['vwap']['10000'] == {'buy': None, 'sell': None}
+
+def test_metrics_keys(book):
+    metrics = book.metrics(imbalance_levels=(2,), depth_bps=(0.5, 100), fill_notionals=(101,))
+    assert list(metrics['depth']) == ['0.5', '100']
+    assert metrics['imbalance'] == {'2': pytest.approx(-0.25)}
+    assert metrics['vwap'] == {'101': {'buy': 101.0, 'sell': pytest.approx(101.0 / (1 + 1 / 99))}}
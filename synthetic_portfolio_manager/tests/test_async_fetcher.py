@@ -0,0 +1,131 @@
+import asyncio
+import pytest
+import time
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web
+
+from scripts.base.async_base_fetcher import AsyncBaseFetcher
+from scripts.base.rate_limiter import RateLimiter
+from scripts.binance.async_fetcher import AsyncBinanceFetcher
+
+LATENCY = 0.1
+
+def run_with_server(handler_setup, scenario):
+    """Start a local aiohttp server, run scenario(base_url), then stop the server"""
+    async def main():
+        app = web.Application()
+        state = handler_setup(app)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            return await scenario(f"http://127.0.0.1:{port}", state)
+        finally:
+            await runner.cleanup()
+    return asyncio.run(main())
+
+def binance_app(app):
+    state = {'in_flight': 0, 'max_in_flight': 0, 'requests': []}
+
+    async def respond(request, payload):
+        state['requests'].append((request.path, dict(request.query)))
+        state['in_flight'] += 1
+        state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+        await asyncio.sleep(LATENCY)
+        state['in_flight'] -= 1
+        return web.json_response(payload, headers={'X-MBX-USED-WEIGHT-1M': '10'})
+
+    async def ticker(request):
+        return await respond(request, {'symbol': request.query['symbol'], 'lastPrice': '1.0'})
+
+    async def depth(request):
+        return await respond(request, {'lastUpdateId': 1, 'bids': [['1.0', '2.0']], 'asks': []})
+
+    async def trades(request):
+        return await respond(request, [{'id': 1, 'price': '1.0', 'qty': '1.0', 'time': 1}])
+
+    async def fail(request):
+        state['requests'].append((request.path, dict(request.query)))
+        return web.json_response({'code': -1121, 'msg': 'Invalid symbol.'}, status=400)
+
+    app.router.add_get('/api/v3/ticker/24hr', ticker)
+    app.router.add_get('/api/v3/depth', depth)
+    app.router.add_get('/api/v3/trades', trades)
+    app.router.add_get('/api/v3/exchangeInfo', fail)
+    return state
+
+def test_symbol_sweep_runs_concurrently():
+    symbols = [f"SYM{i}USDT" for i in range(20)]
+
+    async def scenario(base_url, state):
+        async with AsyncBinanceFetcher({'base_url': base_url, 'rate_limit': 0},
+                                       max_concurrency=100) as fetcher:
+            start = time.monotonic()
+            results = await asyncio.gather(*(
+                coro for symbol in symbols for coro in (
+                    fetcher.fetch_market_data(symbol),
+                    fetcher.fetch_orderbook(symbol),
+                    fetcher.fetch_recent_trades(symbol)
+                )
+            ))
+            return time.monotonic() - start, results
+
+    elapsed, results = run_with_server(binance_app, scenario)
+    assert all(result is not None for result in results)
+    assert results[0]['symbol'] == 'SYM0USDT'
+    # 60 requests of LATENCY each finish in a few round trips, not 60
+    assert elapsed < LATENCY * 10
+
+def test_concurrency_limited_per_host():
+    async def scenario(base_url, state):
+        async with AsyncBinanceFetcher({'base_url': base_url, 'rate_limit': 0},
+                                       max_concurrency=3) as fetcher:
+            await asyncio.gather(*(fetcher.fetch_orderbook(f"S{i}") for i in range(12)))
+        return state['max_in_flight']
+
+    assert run_with_server(binance_app, scenario) == 3
+
+def test_concurrency_limit_shared_by_fetchers_of_a_host():
+    async def scenario(base_url, state):
+        fetchers = [AsyncBaseFetcher(base_url, rate_limit=0, coalesce=False, max_concurrency=2)
+                    for _ in range(3)]
+        await asyncio.gather(*(fetcher.fetch_data('/api/v3/depth', {'symbol': f"S{i}"})
+                               for i in range(4) for fetcher in fetchers))
+        for fetcher in fetchers:
+            await fetcher.close()
+        return state['max_in_flight']
+
+    assert run_with_server(binance_app, scenario) == 2
+
+def test_weights_charged_to_shared_limiter():
+    limiter = RateLimiter(1200)
+
+    async def scenario(base_url, state):
+        fetcher = AsyncBaseFetcher(base_url, rate_limiter=limiter,
+                                   request_weight=lambda endpoint, params: 7)
+        async with fetcher:
+            await fetcher.fetch_data('/api/v3/depth', {'symbol': 'BTCUSDT'})
+
+    run_with_server(binance_app, scenario)
+    # Weight reserved, then resynced to the 10 reported by the server
+    assert limiter.weight.tokens == pytest.approx(1190, abs=1)
+
+def test_client_errors_return_none_without_retries():
+    async def scenario(base_url, state):
+        async with AsyncBinanceFetcher({'base_url': base_url, 'rate_limit': 0}) as fetcher:
+            result = await fetcher.fetch_market_info()
+        return result, state['requests']
+
+    result, requests = run_with_server(binance_app, scenario)
+    assert result is None
+    # A 400 will not succeed on a retry
+    assert len(requests) == 1
+
+def test_futures_requires_config():
+    async def scenario():
+        async with AsyncBinanceFetcher({'base_url': 'http://127.0.0.1:1', 'rate_limit': 0}) as fetcher:
+            return await fetcher.fetch_liquidations('BTCUSDT')
+    assert asyncio.run(scenario()) is None
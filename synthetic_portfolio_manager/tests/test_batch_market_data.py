@@ -0,0 +1,142 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import MagicMock, Mock, patch
+from config.settings import DataType, MarketType
+from scripts.binance.fetcher import BinanceFetcher, batch_params, merge_tickers
+from scripts.binance.processor import BinanceProcessor
+from main import fetch_and_process_data, fetch_and_process_data_async
+
+SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT']
+
+def ticker(symbol):
+    return {'symbol': symbol, 'lastPrice': '100.0', 'volume': '10.0', 'closeTime': 1645084800000}
+
+def book_ticker(symbol):
+    return {'symbol': symbol, 'bidPrice': '99.5', 'bidQty': '1.0', 'askPrice': '100.5', 'askQty': '2.0'}
+
+def fake_fetch_data(calls):
+    def fetch_data(endpoint, params=None, **kwargs):
+        calls.append((endpoint, dict(params or {})))
+        if 'symbols' in params:
+            symbols = json.loads(params['symbols'])
+        elif 'symbol' in params:
+            return (book_ticker if 'bookTicker' in endpoint else ticker)(params['symbol'])
+        else:
+            symbols = SYMBOLS + ['XRPUSDT']
+        return [(book_ticker if 'bookTicker' in endpoint else ticker)(s) for s in symbols]
+    return fetch_data
+
+def test_batch_params():
+    assert batch_params(['BTCUSDT']) == {'symbol': 'BTCUSDT'}
+    assert batch_params(SYMBOLS) == {'symbols': '["BTCUSDT","ETHUSDT","SOLUSDT"]'}
+    assert batch_params(SYMBOLS, 'futures') == {}
+
+def test_merge_keeps_requested_symbols():
+    tickers = [ticker(s) for s in SYMBOLS + ['XRPUSDT']]
+    merged = merge_tickers(SYMBOLS[:2], tickers, [book_ticker('BTCUSDT')])
+    assert set(merged) == {'BTCUSDT', 'ETHUSDT'}
+    assert merged['BTCUSDT']['askPrice'] == '100.5'
+    assert 'bidPrice' not in merged['ETHUSDT']
+    assert 'bidPrice' not in tickers[0]   # responses are not modified
+
+def test_spot_batch_uses_two_requests():
+    fetcher = BinanceFetcher({'base_url': 'https://batch.example.com', 'rate_limit': 0})
+    calls = []
+    with patch.object(fetcher.spot_fetcher, 'fetch_data', side_effect=fake_fetch_data(calls)):
+        market_data = fetcher.fetch_market_data_batch(SYMBOLS)
+
+    assert [endpoint for endpoint, _ in calls] == ['/api/v3/ticker/24hr', '/api/v3/ticker/bookTicker']
+    assert list(market_data) == SYMBOLS
+    assert market_data['ETHUSDT']['bidPrice'] == '99.5'
+
+def test_futures_batch_filters_all_symbols():
+    fetcher = BinanceFetcher({'base_url': 'https://batch.example.com', 'rate_limit': 0},
+                             {'base_url': 'https://fbatch.example.com', 'rate_limit': 0})
+    responses = {
+        '/fapi/v1/premiumIndex': [{'symbol': s, 'markPrice': '100.1', 'lastFundingRate': '0.0001'}
+                                  for s in SYMBOLS],
+        '/fapi/v1/openInterest': {'openInterest': '5000'}
+    }
+    calls = []
+    tickers = fake_fetch_data(calls)
+
+    def fetch_data(endpoint, params=None, **kwargs):
+        if endpoint in responses:
+            return responses[endpoint]
+        return tickers(endpoint, params)
+
+    with patch.object(fetcher.futures_fetcher, 'fetch_data', side_effect=fetch_data):
+        market_data = fetcher.fetch_market_data_batch(SYMBOLS, 'futures')
+
+    assert calls[0] == ('/fapi/v1/ticker/24hr', {})
+    assert list(market_data) == SYMBOLS
+    assert market_data['SOLUSDT']['openInterest'] == 5000.0
+    assert market_data['SOLUSDT']['fundingRate'] == '0.0001'
+
+def test_batch_failure_returns_none():
+    fetcher = BinanceFetcher({'base_url': 'https://batch.example.com', 'rate_limit': 0})
+    with patch.object(fetcher.spot_fetcher, 'fetch_data', side_effect=RuntimeError('down')):
+        assert fetcher.fetch_market_data_batch(SYMBOLS) is None
+
+def test_spread_from_book_ticker():
+    processor = BinanceProcessor()
+    processed = processor.process_market_data({**ticker('BTCUSDT'), **book_ticker('BTCUSDT')}, 'BTCUSDT')
+    assert processed['bidAskSpread'] == pytest.approx(1.0)
+    assert 'bidAskSpread' not in processor.process_market_data(ticker('BTCUSDT'), 'BTCUSDT')
+
+def test_pipeline_uses_batched_ticker():
+    fetcher = Mock()
+    cache = MagicMock()
+    fetch_and_process_data(fetcher, BinanceProcessor(), cache, 'BTCUSDT', MarketType.SPOT,
+                           [DataType.MARKET], market_data={**ticker('BTCUSDT'), **book_ticker('BTCUSDT')})
+
+    fetcher.fetch_market_data.assert_not_called()
+    processed = cache.save_to_cache.call_args_list[-1].args[0]
+    assert processed['bidAskSpread'] == pytest.approx(1.0)
+
+def test_async_sweep_fans_out_batch():
+    class FakeAsyncFetcher:
+        def __init__(self):
+            self.batches = []
+
+        async def fetch_market_data_batch(self, symbols, market_type='spot'):
+            self.batches.append(list(symbols))
+            return merge_tickers(symbols, [ticker(s) for s in symbols],
+                                 [book_ticker(s) for s in symbols])
+
+        async def fetch_market_data(self, symbol, market_type='spot'):
+            raise AssertionError("per-symbol ticker requested")
+
+    fetcher = FakeAsyncFetcher()
+    cache = MagicMock()
+    asyncio.run(fetch_and_process_data_async(fetcher, BinanceProcessor(), cache, SYMBOLS,
+                                             MarketType.SPOT, [DataType.MARKET],
+                                             batch_market_data=True))
+
+    assert fetcher.batches == [SYMBOLS]
+    processed = [call.args[0] for call in cache.save_to_cache.call_args_list if call.kwargs['is_processed']]
+    assert [item['symbol'] for item in processed] == SYMBOLS
+    assert all(item['bidAskSpread'] == pytest.approx(1.0) for item in processed)
+
+def test_async_sweep_falls_back_when_batch_fails():
+    class FakeAsyncFetcher:
+        def __init__(self):
+            self.singles = []
+
+        async def fetch_market_data_batch(self, symbols, market_type='spot'):
+            raise RuntimeError("batch request failed")
+
+        async def fetch_market_data(self, symbol, market_type='spot'):
+            self.singles.append(symbol)
+            return {**ticker(symbol), **book_ticker(symbol)}
+
+    fetcher = FakeAsyncFetcher()
+    cache = MagicMock()
+    asyncio.run(fetch_and_process_data_async(fetcher, BinanceProcessor(), cache, SYMBOLS,
+                                             MarketType.SPOT, [DataType.MARKET],
+                                             batch_market_data=True))
+
+    assert sorted(fetcher.singles) == sorted(SYMBOLS)
+    processed = [call.args[0] for call in cache.save_to_cache.call_args_list if call.kwargs['is_processed']]
+    assert [item['symbol'] for item in processed] == SYMBOLS
@@ -79,6 +79,14 @@ def test_process_orderbook_data(processor):
     assert processed["lastUpdateId"] == 1027024
     assert processed["timestamp"] == 1645084800000
 
+    metrics = processed["metrics"]
+    assert metrics["spread"] == 1.0
+    assert metrics["midPrice"] == 50000.5
+    assert metrics["imbalance"]["1"] == pytest.approx(0.5 / 1.5)
+    assert metrics["depth"]["10"] == {"bid": 2.5, "ask": 2.5}
+    assert metrics["vwap"]["10000"]["buy"] == 50001.0
+    assert 50001.0 < metrics["vwap"]["100000"]["buy"] < 50002.0   # Walks both ask levels
+
 def test_process_trade_data(processor):
     raw_data = {
         "id": 28457,
@@ -123,6 +131,7 @@ def test_process_orderbook_empty_data(processor):
     
     assert len(processed["bids"]) == 0
     assert len(processed["asks"]) == 0
+    assert processed["metrics"]["spread"] is None
 
 def test_invalid_market_type_processing(processor):
     raw_data = {"price": "50000.00"}
@@ -186,4 +195,41 @@ def test_process_trade_data_array(processor):
     assert processed_trades[0]["tradeId"] == 28457
     assert processed_trades[1]["tradeId"] == 28458
     assert processed_trades[0]["quantity"] == 0.100
-    assert processed_trades[1]["quantity"] == 0.200
\ No newline at end of file
+    assert processed_trades[1]["quantity"] == 0.200
+
+def test_process_trades_batch_matches_per_trade(processor):
+    raw_trades = [
+        {"id": 28457 + i, "price": f"{50000 + i}.50", "qty": "0.100",
+         "time": 1645084800000 + i, "isBuyerMaker": bool(i % 2)}
+        for i in range(5)
+    ]
+    
+    batch = processor.process_trades_batch(raw_trades, "BTCUSDT", "SPOT")
+    
+    assert (batch.symbol, batch.type, len(batch)) == ("BTCUSDT", "spot", 5)
+    assert batch.trades["price"][1] == 50001.5
+    assert batch.trades["tradeId"].tolist() == list(range(28457, 28462))
+    assert batch.to_records() == [
+        processor.process_trade_data(trade, "BTCUSDT", "spot") for trade in raw_trades
+    ]
+    df = batch.to_frame()
+    assert list(df.columns) == ["symbol", "type", "price", "quantity", "timestamp",
+                                "isBuyerMaker", "tradeId"]
+
+def test_process_trades_batch_agg_trades_and_fallback(processor):
+    agg_trades = [
+        {"a": 10, "p": "100.0", "q": "2.0", "T": 1645084800000, "m": True},
+        {"a": 11, "p": "101.0", "q": "1.0", "E": 1645084800001, "m": False},  # No "T"
+    ]
+    batch = processor.process_trades_batch(agg_trades, "ETHUSDT", "futures")
+    assert batch.to_records() == [
+        processor.process_agg_trade_data(trade, "ETHUSDT", "futures") for trade in agg_trades
+    ]
+    
+    malformed = [{"id": 1, "price": "n/a", "quantity": "0.5", "time": "2022-02-17T08:00:00Z"}]
+    record = processor.process_trades_batch(malformed, "BTCUSDT").to_records()[0]
+    assert (record["price"], record["quantity"], record["timestamp"]) == (0.0, 0.5, 1645084800000)
+    
+    assert len(processor.process_trades_batch([], "BTCUSDT")) == 0
+    with pytest.raises(ValueError):
+        processor.process_trades_batch([], "BTCUSDT", "options")
@@ -0,0 +1,99 @@
+import pytest
+import json
+import time
+from pathlib import Path
+from scripts.base.base_cache import BaseCache
+from scripts.base.cache_index import CacheIndex, INDEX_FILENAME
+
+@pytest.fixture
+def cache(tmp_path):
+    return BaseCache(str(tmp_path / "index_cache"))
+
+def test_index_persisted_next_to_data(cache):
+    for i in range(5):
+        cache.save_to_cache({"version": i}, "btc_market", "market", timestamp=1000 + i)
+    
+    index_path = cache.base_dir / 'market' / 'raw' / INDEX_FILENAME
+    assert index_path.exists()
+    
+    # A new instance reads the journal instead of scanning the directory
+    reopened = BaseCache(str(cache.base_dir))
+    loaded = reopened.load_from_cache("btc_market", "market", n_latest=2)
+    assert [entry['data']['version'] for entry in loaded] == [4, 3]
+
+def test_index_rebuilt_when_journal_missing(cache):
+    cache.save_to_cache({"version": 0}, "eth_market", "market", timestamp=1000)
+    cache.save_to_cache({"version": 1}, "eth_market", "market", timestamp=2000)
+    (cache.base_dir / 'market' / 'raw' / INDEX_FILENAME).unlink()
+    
+    reopened = BaseCache(str(cache.base_dir))
+    assert reopened.load_from_cache("eth_market", "market")['data']['version'] == 1
+    assert reopened.get_cache_info()['market']['raw'] == 2
+
+def test_time_range_opens_only_matching_files(cache, monkeypatch):
+    for i in range(10):
+        cache.save_to_cache({"version": i}, "sol_trades", "trade", timestamp=1000 * i)
+    
+    loads = []
+    original_load = json.load
+    monkeypatch.setattr(json, 'load', lambda f: loads.append(f.name) or original_load(f))
+    
+    loaded = cache.load_from_cache("sol_trades", "trade", n_latest=10, time_range=(3000, 5000))
+    assert [entry['data']['version'] for entry in loaded] == [5, 4, 3]
+    assert len(loads) == 3
+
+def test_instances_see_each_others_writes(cache):
+    other = BaseCache(str(cache.base_dir))
+    cache.save_to_cache({"writer": "first"}, "shared", "market", timestamp=1)
+    assert other.load_from_cache("shared", "market")['data']['writer'] == "first"
+    
+    other.save_to_cache({"writer": "second"}, "shared", "market", timestamp=2)
+    assert cache.load_from_cache("shared", "market")['data']['writer'] == "second"
+
+def test_reader_reloads_journal_compacted_and_regrown(tmp_path):
+    writer, reader = CacheIndex(tmp_path), CacheIndex(tmp_path)
+    for i in range(5):
+        writer.add('btc_market', i, f'btc_market_{i}.json')
+    assert reader.timestamps() == {'btc_market': [0, 1, 2, 3, 4]}
+
+    writer.discard([('btc_market', f'btc_market_{i}.json') for i in range(4)])
+    for i in range(5, 40):
+        writer.add('eth_market', i, f'eth_market_{i}.json')
+    assert (tmp_path / INDEX_FILENAME).stat().st_size > reader._offset
+    assert reader.timestamps() == writer.timestamps()
+
+def test_reader_reloads_journal_rewritten_in_place(tmp_path):
+    writer, reader = CacheIndex(tmp_path), CacheIndex(tmp_path)
+    for i in range(5):
+        writer.add('btc_market', i, f'btc_market_{i}.json')
+    assert len(reader.timestamps()['btc_market']) == 5
+
+    # Same inode, new generation: the size check alone would resume mid-file
+    lines = [json.dumps(['#', 'rewritten'])] + [
+        json.dumps(['+', 'sol_market', i, f'sol_market_{i}.json', 0]) for i in range(20)
+    ]
+    with open(tmp_path / INDEX_FILENAME, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    assert reader.timestamps() == {'sol_market': list(range(20))}
+
+def test_missing_files_are_dropped_from_index(cache):
+    cache.save_to_cache({"version": 0}, "gone", "market", timestamp=1000)
+    cache.save_to_cache({"version": 1}, "gone", "market", timestamp=2000)
+    (cache.base_dir / 'market' / 'raw' / 'gone_2000.json').unlink()
+    
+    assert cache.load_from_cache("gone", "market")['data']['version'] == 0
+    assert cache.get_cache_info()['market']['raw'] == 1
+
+def test_cache_info_does_not_glob(cache, monkeypatch):
+    cache.save_to_cache({"test": "data"}, "info_test", "orderbook", is_processed=True)
+    cache.get_cache_info()
+    
+    def fail_glob(self, pattern):
+        raise AssertionError("get_cache_info should not glob")
+    monkeypatch.setattr(Path, 'glob', fail_glob)
+    
+    assert cache.get_cache_info()['orderbook']['processed'] == 1
+
+def test_parse_name():
+    assert CacheIndex.parse_name("btcusdt_market_1700000000000.json") == ("btcusdt_market", 1700000000000)
+    assert CacheIndex.parse_name("notes.txt") is None
@@ -0,0 +1,117 @@
+import pytest
+from scripts.base.columnar_store import ColumnarStore
+
+pytest.importorskip("pyarrow")
+
+DAY_MS = 86400000
+START = 1645084800000  # 2022-02-17T08:00:00Z
+
+def make_trade(symbol, trade_id, timestamp):
+    return {
+        "symbol": symbol,
+        "type": "spot",
+        "price": 50000.0 + trade_id,
+        "quantity": 0.1,
+        "timestamp": timestamp,
+        "isBuyerMaker": bool(trade_id % 2),
+        "tradeId": trade_id
+    }
+
+@pytest.fixture
+def store(tmp_path):
+    return ColumnarStore(str(tmp_path / "columnar"))
+
+def test_trades_partitioned_by_symbol_and_date(store):
+    store.append_trades([make_trade("BTCUSDT", i, START + i * 3600000) for i in range(48)])
+    store.append_trades([make_trade("ETHUSDT", 1, START)])
+    store.flush()
+    
+    partitions = sorted(p.relative_to(store.base_dir / "trades").as_posix()
+                        for p in (store.base_dir / "trades").glob("*/*"))
+    assert partitions == [
+        "symbol=BTCUSDT/date=2022-02-17",
+        "symbol=BTCUSDT/date=2022-02-18",
+        "symbol=BTCUSDT/date=2022-02-19",
+        "symbol=ETHUSDT/date=2022-02-17",
+    ]
+
+def test_read_pushes_down_symbol_and_time_range(store):
+    store.append_trades([make_trade("BTCUSDT", i, START + i * 3600000) for i in range(48)])
+    store.append_trades([make_trade("ETHUSDT", 100, START + 20 * 3600000)])
+    store.flush()
+    
+    df = store.read("trades", symbols=["BTCUSDT"],
+                    time_range=(START + 20 * 3600000, START + 30 * 3600000))
+    assert df["tradeId"].tolist() == list(range(20, 31))
+    assert set(df["symbol"]) == {"BTCUSDT"}
+    assert len(store.read("trades")) == 49
+
+def test_orderbook_levels_flattened(store):
+    store.append_orderbook({
+        "symbol": "BTCUSDT",
+        "type": "spot",
+        "bids": [[50000.0, 1.0], [49999.0, 1.5]],
+        "asks": [[50001.0, 0.5]],
+        "timestamp": START,
+        "lastUpdateId": 1027024
+    })
+    store.close()
+    
+    df = store.read("orderbook", columns=["side", "level", "price", "quantity"])
+    assert df[["side", "level"]].values.tolist() == [["bid", 0], ["bid", 1], ["ask", 0]]
+    assert df["price"].tolist() == [50000.0, 49999.0, 50001.0]
+
+def test_buffer_flushes_at_row_threshold(tmp_path):
+    store = ColumnarStore(str(tmp_path), flush_rows=10)
+    store.append_trades([make_trade("BTCUSDT", i, START) for i in range(9)])
+    assert not (tmp_path / "trades").exists()
+    store.append_trades([make_trade("BTCUSDT", 9, START)])
+    assert len(store.read("trades")) == 10
+
+def test_read_missing_dataset(store):
+    assert store.read("market").empty
+    with pytest.raises(ValueError, match="Invalid dataset"):
+        store.read("candles")
+
+def test_trade_batch_partitioned_like_rows(store):
+    from scripts.binance.processor import BinanceProcessor
+    raw = [{"id": i, "price": "50000.0", "qty": "0.1", "time": START + i * 3600000,
+            "isBuyerMaker": bool(i % 2)} for i in range(48)]
+    store.append_trade_batch(BinanceProcessor().process_trades_batch(raw, "BTCUSDT"))
+    store.append_trades([make_trade("BTCUSDT", 100, START)])
+    store.flush()
+    
+    assert len(list((store.base_dir / "trades" / "symbol=BTCUSDT").glob("*"))) == 3
+    df = store.read("trades", symbols=["BTCUSDT"], time_range=(START, START + 3600000))
+    assert sorted(df["tradeId"].tolist()) == [0, 1, 100]
+    assert df["isBuyerMaker"].dtype == bool
+
+def test_parts_share_schema_when_columns_are_null(store):
+    from scripts.binance.processor import BinanceProcessor
+    processor = BinanceProcessor()
+    ticker = {"lastPrice": "50000.0", "closeTime": START, "count": "10"}
+    store.append_market(processor.process_market_data(ticker, "BTCUSDT"))
+    store.flush()   # bidAskSpread is all-null in this part
+    store.append_market(processor.process_market_data(
+        dict(ticker, closeTime=START + 1, bidPrice="49999.0", askPrice="50001.0"), "BTCUSDT"))
+    store.append_market(processor.process_market_data(
+        dict(ticker, closeTime=START + 2, openInterest="10", fundingRate="0.0001"),
+        "BTCUSDT", "futures"))
+    store.flush()
+
+    df = store.read("market", symbols=["BTCUSDT"])
+    assert df["type"].tolist() == ["spot", "spot", "futures"]
+    assert df["bidAskSpread"].tolist()[1] == 2.0
+    assert df["bidAskSpread"].isna().tolist() == [True, False, True]
+    assert df["openInterest"].tolist()[2] == 10.0
+
+def test_read_casts_parts_written_without_schema(store):
+    import pandas as pd
+    store.append_market({"symbol": "BTCUSDT", "type": "spot", "price": 1.0, "timestamp": START + 1,
+                         "bidAskSpread": 0.5})
+    store.flush()
+    legacy = store.base_dir / "market" / "symbol=BTCUSDT" / "date=2022-02-17" / "part-0.parquet"
+    pd.DataFrame([{"type": "spot", "price": 1.0, "timestamp": START, "bidAskSpread": None}]) \
+        .to_parquet(legacy, index=False)
+
+    assert store.read("market")["bidAskSpread"].isna().tolist() == [True, False]
@@ -0,0 +1,66 @@
+import pytest
+import gzip
+from pathlib import Path
+from scripts.base.base_cache import BaseCache
+from scripts.base.compression import (available_codecs, compress_bytes, decompress_bytes,
+                                      detect_codec, resolve_codec)
+
+def make_orderbook(n_levels=500):
+    return {
+        "lastUpdateId": 1027024,
+        "bids": [[f"{50000 - i * 0.01:.2f}", "1.00000000"] for i in range(n_levels)],
+        "asks": [[f"{50001 + i * 0.01:.2f}", "1.00000000"] for i in range(n_levels)],
+    }
+
+@pytest.mark.parametrize("codec", available_codecs())
+def test_roundtrip_bytes(codec):
+    payload = b'{"bids": [["50000.00", "1.000"]]}'
+    encoded = compress_bytes(payload, codec)
+    assert detect_codec(encoded) == codec
+    assert decompress_bytes(encoded) == payload
+
+def test_plain_bytes_pass_through():
+    assert decompress_bytes(b'{"a": 1}') == b'{"a": 1}'
+
+def test_resolve_codec():
+    assert resolve_codec(False) is None
+    assert resolve_codec(True) == available_codecs()[0]
+    assert resolve_codec('gzip') == 'gzip'
+    with pytest.raises(ValueError, match="Invalid codec"):
+        resolve_codec('brotli')
+
+@pytest.mark.parametrize("codec", available_codecs())
+def test_compressed_files_shrink_orderbooks(tmp_path, codec):
+    plain = BaseCache(str(tmp_path / "plain"))
+    packed = BaseCache(str(tmp_path / "packed"), compress=codec)
+    orderbook = make_orderbook()
+    
+    plain.save_to_cache(orderbook, "btc_orderbook", "orderbook", timestamp=1)
+    packed.save_to_cache(orderbook, "btc_orderbook", "orderbook", timestamp=1)
+    
+    plain_file = next((tmp_path / "plain" / "orderbook" / "raw").glob("btc_orderbook_*"))
+    packed_file = next((tmp_path / "packed" / "orderbook" / "raw").glob("btc_orderbook_*"))
+    assert packed_file.name.startswith("btc_orderbook_1.json.")
+    assert packed_file.stat().st_size * 10 < plain_file.stat().st_size
+    assert packed.load_from_cache("btc_orderbook", "orderbook")['data'] == orderbook
+
+def test_mixed_directory_reads(tmp_path):
+    BaseCache(str(tmp_path)).save_to_cache({"v": 0}, "mixed", "market", timestamp=1)
+    BaseCache(str(tmp_path), compress='gzip').save_to_cache({"v": 1}, "mixed", "market", timestamp=2)
+    
+    loaded = BaseCache(str(tmp_path)).load_from_cache("mixed", "market", n_latest=2)
+    assert [entry['data']['v'] for entry in loaded] == [1, 0]
+
+def test_segments_compress_records(tmp_path):
+    cache = BaseCache(str(tmp_path), storage='segments', compress='gzip')
+    cache.save_to_cache(make_orderbook(), "eth_orderbook", "orderbook", timestamp=1)
+    assert cache.load_from_cache("eth_orderbook", "orderbook")['data'] == make_orderbook()
+    cache.close()
+
+def test_corrupt_compressed_file(tmp_path):
+    cache = BaseCache(str(tmp_path), compress='gzip')
+    cache.save_to_cache({"v": 0}, "bad", "market", timestamp=1)
+    cache_file = next((tmp_path / "market" / "raw").glob("bad_*"))
+    cache_file.write_bytes(gzip.compress(b"{not json")[:12])
+    
+    assert cache.load_from_cache("bad", "market") is None
@@ -0,0 +1,92 @@
+import pytest
+from scripts.base.base_cache import BaseCache
+
+EXCHANGE_INFO = {'symbols': [{'symbol': f'SYM{i}USDT', 'status': 'TRADING'} for i in range(200)]}
+
+@pytest.fixture(params=['files', 'segments', 'sqlite'])
+def cache(tmp_path, request):
+    cache = BaseCache(str(tmp_path / "cache"), storage=request.param, dedup=True)
+    yield cache
+    cache.close()
+
+def test_unchanged_payload_stored_as_reference(cache):
+    for ts in (1000, 2000, 3000):
+        cache.save_to_cache(EXCHANGE_INFO, 'exchange_info', 'market', timestamp=ts)
+
+    entries = cache.load_from_cache('exchange_info', 'market', n_latest=3)
+    assert [entry['metadata']['timestamp'] for entry in entries] == [3000, 2000, 1000]
+    assert all(entry['data'] == EXCHANGE_INFO for entry in entries)
+    assert entries[0]['metadata']['ref_timestamp'] == 1000
+    assert 'ref_timestamp' not in entries[2]['metadata']
+
+def test_references_are_small(tmp_path):
+    plain = BaseCache(str(tmp_path / "plain"))
+    dedup = BaseCache(str(tmp_path / "dedup"), dedup=True)
+    for cache in (plain, dedup):
+        for ts in range(1000, 11000, 1000):
+            cache.save_to_cache(EXCHANGE_INFO, 'exchange_info', 'market', timestamp=ts)
+
+    assert dedup.disk_usage() < plain.disk_usage() / 5
+
+def test_changed_payload_written_in_full(cache):
+    cache.save_to_cache({'rate': 1}, 'BTCUSDT_funding', 'market', timestamp=1000)
+    cache.save_to_cache({'rate': 2}, 'BTCUSDT_funding', 'market', timestamp=2000)
+    cache.save_to_cache({'rate': 2}, 'BTCUSDT_funding', 'market', timestamp=3000)
+
+    entries = cache.load_from_cache('BTCUSDT_funding', 'market', n_latest=3)
+    assert [entry['data']['rate'] for entry in entries] == [2, 2, 1]
+    assert entries[0]['metadata']['ref_timestamp'] == 2000
+
+def test_time_range_load_resolves_reference(cache):
+    cache.save_to_cache(EXCHANGE_INFO, 'exchange_info', 'market', timestamp=1000)
+    cache.save_to_cache(EXCHANGE_INFO, 'exchange_info', 'market', timestamp=2000)
+
+    entry = cache.load_from_cache('exchange_info', 'market', time_range=(1500, 2500))
+    assert entry['data'] == EXCHANGE_INFO
+    assert entry['metadata']['timestamp'] == 2000
+
+def test_keyframe_interval(tmp_path):
+    cache = BaseCache(str(tmp_path / "cache"), dedup=True, dedup_keyframe_seconds=1)
+    for ts in (1000, 1500, 2500):
+        cache.save_to_cache({'a': 1}, 'BTCUSDT_market', 'market', timestamp=ts)
+
+    entries = cache.load_from_cache('BTCUSDT_market', 'market', n_latest=3)
+    assert 'ref_timestamp' not in entries[0]['metadata']   # more than 1s after 1000
+    assert entries[1]['metadata']['ref_timestamp'] == 1000
+
+def test_expired_full_record_not_referenced(cache):
+    cache.save_to_cache({'a': 1}, 'BTCUSDT_market', 'market', timestamp=1000)
+    cache.expire_entries('market', False, 1500)
+    cache.save_to_cache({'a': 1}, 'BTCUSDT_market', 'market', timestamp=2000)
+
+    entry = cache.load_from_cache('BTCUSDT_market', 'market')
+    assert entry['data'] == {'a': 1}
+    assert 'ref_timestamp' not in entry['metadata']
+
+def test_hash_ignores_key_order():
+    assert BaseCache.content_hash({'a': 1, 'b': 2}) == BaseCache.content_hash({'b': 2, 'a': 1})
+    assert BaseCache.content_hash({'a': 1}) != BaseCache.content_hash({'a': 2})
+
+def test_expiry_keeps_referenced_full_record(cache):
+    for ts in range(1000, 61000, 10000):
+        cache.save_to_cache(EXCHANGE_INFO, 'exchange_info', 'market', timestamp=ts)
+
+    cache.expire_entries('market', False, 5000)
+    entries = cache.load_from_cache('exchange_info', 'market', n_latest=10)
+    assert [entry['metadata']['timestamp'] for entry in entries] == [51000, 41000, 31000, 21000,
+                                                                    11000, 1000]
+    assert all(entry['data'] == EXCHANGE_INFO for entry in entries)
+
+    # Once nothing references it any more, the full record goes too
+    cache.expire_entries('market', False, 60000)
+    assert cache.load_from_cache('exchange_info', 'market', n_latest=10) is None
+
+def test_downsampling_keeps_referenced_full_record(cache):
+    for ts in (1000, 2000, 3000):
+        cache.save_to_cache(EXCHANGE_INFO, 'exchange_info', 'market', timestamp=ts)
+    cache.save_to_cache({'changed': True}, 'exchange_info', 'market', timestamp=4000)
+
+    assert cache.delete_entries('market', False, 'exchange_info', {1000, 2000, 4000}) == 2
+    entries = cache.load_from_cache('exchange_info', 'market', n_latest=10)
+    assert [entry['metadata']['timestamp'] for entry in entries] == [3000, 1000]
+    assert entries[0]['data'] == EXCHANGE_INFO
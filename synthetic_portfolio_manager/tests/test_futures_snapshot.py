@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from scripts.binance.fetcher import BinanceFetcher, futures_snapshot
+from scripts.binance.processor import BinanceProcessor
+
+SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT']
+SPOT = {'base_url': 'https://spot.example.com', 'rate_limit': 0}
+FUTURES = {'base_url': 'https://futures.example.com', 'rate_limit': 0}
+
+def premium(symbol):
+    return {'symbol': symbol, 'markPrice': '100.5', 'indexPrice': '100.4',
+            'lastFundingRate': '0.00025', 'nextFundingTime': 1645113600000}
+
+PREMIUM_INDEX = [premium(s) for s in SYMBOLS + ['XRPUSDT']]
+
+class FakeFutures:
+    """Stand-in for the futures BaseFetcher.fetch_data recording concurrency"""
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, endpoint, params=None, **kwargs):
+        with self.lock:
+            self.calls.append((endpoint, dict(params or {})))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+        if endpoint == '/fapi/v1/premiumIndex':
+            return premium(params['symbol']) if 'symbol' in params else PREMIUM_INDEX
+        if endpoint == '/fapi/v1/openInterest':
+            if params['symbol'] == 'ETHUSDT':
+                raise RuntimeError('timeout')
+            return {'symbol': params['symbol'], 'openInterest': '5000'}
+        if endpoint == '/fapi/v1/ticker/24hr':
+            return {'symbol': params['symbol'], 'lastPrice': '100.0', 'closeTime': 1645084800000}
+        raise AssertionError(f"unexpected request {endpoint}")
+
+def test_snapshot_from_premium_index():
+    snapshot = futures_snapshot(SYMBOLS[:2], PREMIUM_INDEX, {'BTCUSDT': {'openInterest': '12.5'}})
+    assert set(snapshot) == {'BTCUSDT', 'ETHUSDT'}
+    assert snapshot['BTCUSDT'] == {'markPrice': '100.5', 'indexPrice': '100.4',
+                                   'fundingRate': '0.00025', 'nextFundingTime': 1645113600000,
+                                   'openInterest': 12.5}
+    assert 'openInterest' not in snapshot['ETHUSDT']
+
+def test_one_premium_index_call_with_parallel_open_interest():
+    fetcher = BinanceFetcher(SPOT, FUTURES)
+    fake = FakeFutures(latency=0.05)
+    with patch.object(fetcher.futures_fetcher, 'fetch_data', side_effect=fake):
+        start = time.monotonic()
+        snapshot = fetcher.fetch_futures_snapshot(SYMBOLS)
+        elapsed = time.monotonic() - start
+
+    endpoints = [endpoint for endpoint, _ in fake.calls]
+    assert endpoints.count('/fapi/v1/premiumIndex') == 1
+    assert endpoints.count('/fapi/v1/openInterest') == len(SYMBOLS)
+    assert ('/fapi/v1/premiumIndex', {}) in fake.calls
+    assert fake.max_in_flight == len(SYMBOLS) + 1
+    assert elapsed < 0.05 * 3
+    # A failed open interest request only drops that field
+    assert snapshot['BTCUSDT']['openInterest'] == 5000.0
+    assert 'openInterest' not in snapshot['ETHUSDT']
+    assert snapshot['ETHUSDT']['fundingRate'] == '0.00025'
+
+def test_market_data_uses_current_funding():
+    fetcher = BinanceFetcher(SPOT, FUTURES)
+    fake = FakeFutures()
+    with patch.object(fetcher.futures_fetcher, 'fetch_data', side_effect=fake):
+        ticker = fetcher.fetch_market_data('BTCUSDT', 'futures')
+
+    assert '/fapi/v1/fundingRate' not in [endpoint for endpoint, _ in fake.calls]
+    assert ('/fapi/v1/premiumIndex', {'symbol': 'BTCUSDT'}) in fake.calls
+    processed = BinanceProcessor().process_market_data(ticker, 'BTCUSDT', 'futures')
+    assert processed['fundingRate'] == pytest.approx(0.00025)
+    assert processed['openInterest'] == 5000.0
+    assert processed['markPrice'] == 100.5
+    assert processed['indexPrice'] == 100.4
+    assert processed['nextFundingTime'] == 1645113600000
+
+def test_snapshot_requires_futures():
+    assert BinanceFetcher(SPOT).fetch_futures_snapshot(SYMBOLS) is None
+
+def test_async_snapshot_gathers_requests():
+    pytest.importorskip("aiohttp")
+    from scripts.binance.async_fetcher import AsyncBinanceFetcher
+
+    fake = FakeFutures()
+
+    async def fetch_data(endpoint, params=None, **kwargs):
+        await asyncio.sleep(0.05)
+        return fake(endpoint, params)
+
+    async def run():
+        async with AsyncBinanceFetcher(SPOT, FUTURES) as fetcher:
+            with patch.object(fetcher.futures_fetcher, 'fetch_data', side_effect=fetch_data):
+                start = time.monotonic()
+                snapshot = await fetcher.fetch_futures_snapshot(SYMBOLS)
+                return time.monotonic() - start, snapshot
+
+    elapsed, snapshot = asyncio.run(run())
+    assert elapsed < 0.05 * 3
+    assert [endpoint for endpoint, _ in fake.calls].count('/fapi/v1/premiumIndex') == 1
+    assert snapshot['SOLUSDT']['openInterest'] == 5000.0
+    assert 'openInterest' not in snapshot['ETHUSDT']
@@ -0,0 +1,133 @@
+import json
+import threading
+import pytest
+from scripts.binance.cache import BinanceCache
+from scripts.binance.fetcher import BinanceFetcher
+from scripts.binance.processor import BinanceProcessor
+from scripts.binance.klines_backfill import (
+    BackfillCheckpoint, KlinesBackfill, kline_chunks
+)
+
+SPOT = {'base_url': 'https://spot.example.com', 'rate_limit': 0}
+MINUTE = 60 * 1000
+
+def kline(open_time):
+    return [open_time, '100.0', '101.0', '99.0', '100.5', '2.0', open_time + MINUTE - 1,
+            '201.0', 7, '1.0', '100.5', '0']
+
+class FakeKlines:
+    """Stand-in for BaseFetcher.fetch_data serving one 1m kline per minute"""
+    def __init__(self, fail_starts=()):
+        self.fail_starts = set(fail_starts)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, endpoint, params=None, **kwargs):
+        assert endpoint == '/api/v3/klines'
+        with self.lock:
+            self.calls.append(dict(params))
+        if params['startTime'] in self.fail_starts:
+            return None
+        return [kline(t) for t in range(params['startTime'], params['endTime'] + 1, MINUTE)
+                ][:params['limit']]
+
+@pytest.fixture
+def cache(tmp_path):
+    return BinanceCache(directory=str(tmp_path))
+
+def make_backfill(cache, tape, **kwargs):
+    fetcher = BinanceFetcher(SPOT)
+    fetcher.spot_fetcher.fetch_data = tape
+    return KlinesBackfill(fetcher, BinanceProcessor(), cache, page_size=10, **kwargs)
+
+def stored_open_times(cache, symbol='btcusdt'):
+    entries = cache.load_from_cache(f'{symbol}_klines_1m', 'kline', is_processed=True,
+                                    n_latest=100)
+    if isinstance(entries, dict):
+        entries = [entries]
+    return sorted(k['timestamp'] for entry in entries or [] for k in entry['data'])
+
+def test_kline_chunks():
+    assert kline_chunks(0, 25 * MINUTE, '1m', page_size=10) == [
+        (0, 10 * MINUTE), (10 * MINUTE, 20 * MINUTE), (20 * MINUTE, 25 * MINUTE)
+    ]
+    assert kline_chunks(0, 0, '1m') == []
+    with pytest.raises(ValueError):
+        kline_chunks(0, MINUTE, '1M')
+
+def test_backfill_downloads_every_chunk_once(cache):
+    tape = FakeKlines()
+    backfill = make_backfill(cache, tape, max_workers=4)
+    result = backfill.run(['BTCUSDT', 'ETHUSDT'], '1m', 0, 95 * MINUTE)
+
+    assert (result.chunks, result.skipped, result.failed, result.klines) == (20, 0, 0, 190)
+    assert len(tape.calls) == 20
+    assert all(call['limit'] == 10 for call in tape.calls)
+    assert stored_open_times(cache) == list(range(0, 95 * MINUTE, MINUTE))
+    assert stored_open_times(cache, 'ethusdt') == list(range(0, 95 * MINUTE, MINUTE))
+
+def test_failed_chunk_retried_on_resume(cache, tmp_path):
+    tape = FakeKlines(fail_starts={30 * MINUTE})
+    result = make_backfill(cache, tape).run(['BTCUSDT'], '1m', 0, 60 * MINUTE)
+    assert (result.failed, result.klines) == (1, 50)
+
+    with open(tmp_path / 'klines_checkpoint.json') as f:
+        job = json.load(f)['spot:BTCUSDT:1m:0']
+    assert job == {'done_through': 30 * MINUTE, 'done': [40 * MINUTE, 50 * MINUTE]}
+
+    tape.fail_starts = set()
+    tape.calls.clear()
+    result = make_backfill(cache, tape).run(['BTCUSDT'], '1m', 0, 60 * MINUTE)
+    assert (result.skipped, result.failed, result.klines) == (5, 0, 10)
+    assert [call['startTime'] for call in tape.calls] == [30 * MINUTE]
+    assert stored_open_times(cache) == list(range(0, 60 * MINUTE, MINUTE))
+
+def test_checkpoint_watermark(tmp_path):
+    chunks = kline_chunks(0, 40 * MINUTE, '1m', page_size=10)
+    checkpoint = BackfillCheckpoint(tmp_path / 'checkpoint.json')
+    key = checkpoint.job_key('BTCUSDT', '1m', 0)
+    checkpoint.mark_done(key, 20 * MINUTE, chunks)
+    checkpoint.mark_done(key, 0, chunks)
+    assert checkpoint.is_done(key, 0) and checkpoint.is_done(key, 20 * MINUTE)
+    assert not checkpoint.is_done(key, 10 * MINUTE)
+
+    checkpoint.mark_done(key, 10 * MINUTE, chunks)
+    reloaded = BackfillCheckpoint(tmp_path / 'checkpoint.json')
+    assert reloaded._jobs[key] == {'done_through': 30 * MINUTE, 'done': []}
+    assert not reloaded.is_done(key, 30 * MINUTE)
+
+def test_backfill_into_columnar_store(tmp_path):
+    pytest.importorskip("pyarrow")
+    from scripts.base.columnar_store import ColumnarStore
+
+    columnar = ColumnarStore(str(tmp_path / 'columnar'))
+    fetcher = BinanceFetcher(SPOT)
+    fetcher.spot_fetcher.fetch_data = FakeKlines()
+    backfill = KlinesBackfill(fetcher, BinanceProcessor(), columnar=columnar, page_size=10)
+    backfill.run(['BTCUSDT'], '1m', 0, 25 * MINUTE)
+    columnar.close()
+
+    df = columnar.read('klines', symbols=['BTCUSDT'])
+    assert df['timestamp'].tolist() == list(range(0, 25 * MINUTE, MINUTE))
+    assert (tmp_path / 'columnar' / 'klines_checkpoint.json').exists()
+
+def test_chunks_checkpointed_only_after_flush(tmp_path):
+    from scripts.base.columnar_store import ColumnarStore
+
+    columnar = ColumnarStore(str(tmp_path / 'columnar'))
+    fetcher = BinanceFetcher(SPOT)
+    fetcher.spot_fetcher.fetch_data = FakeKlines()
+    backfill = KlinesBackfill(fetcher, BinanceProcessor(), columnar=columnar, page_size=10,
+                              max_workers=1, flush_chunks=2)
+    on_disk = []
+    mark_done = backfill.checkpoint.mark_done
+
+    def checked_mark_done(key, chunk_start, chunks):
+        timestamps = set(columnar.read('klines', symbols=['BTCUSDT'])['timestamp'])
+        on_disk.append(set(range(chunk_start, chunk_start + 10 * MINUTE, MINUTE)) <= timestamps)
+        mark_done(key, chunk_start, chunks)
+
+    backfill.checkpoint.mark_done = checked_mark_done
+    backfill.run(['BTCUSDT'], '1m', 0, 40 * MINUTE)
+    assert on_disk == [True] * 4
+    assert len(list((tmp_path / 'columnar' / 'klines').rglob('*.parquet'))) == 2
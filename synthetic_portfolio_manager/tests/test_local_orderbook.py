@@ -0,0 +1,124 @@
+import random
+import pytest
+from scripts.binance.local_orderbook import LocalOrderBook
+from scripts.binance.processor import BinanceProcessor
+
+def snapshot(last_update_id, bids=None, asks=None):
+    return {
+        'lastUpdateId': last_update_id,
+        'bids': bids if bids is not None else [['100.0', '1.0'], ['99.0', '2.0'], ['98.0', '3.0']],
+        'asks': asks if asks is not None else [['101.0', '1.5'], ['102.0', '2.5'], ['103.0', '3.5']]
+    }
+
+def update(first_id, last_id, bids=(), asks=(), previous_id=None):
+    event = {'e': 'depthUpdate', 'E': 1000 + last_id, 's': 'BTCUSDT',
+             'U': first_id, 'u': last_id, 'b': list(bids), 'a': list(asks)}
+    if previous_id is not None:
+        event['pu'] = previous_id
+    return event
+
+def test_queries_on_snapshot():
+    book = LocalOrderBook('BTCUSDT')
+    assert book.needs_snapshot
+    assert book.apply_snapshot(snapshot(10))
+
+    assert book.best_bid() == (100.0, 1.0)
+    assert book.best_ask() == (101.0, 1.5)
+    assert book.spread() == 1.0
+    assert book.depth(2) == {'bids': [[100.0, 1.0], [99.0, 2.0]],
+                             'asks': [[101.0, 1.5], [102.0, 2.5]]}
+    assert book.cumulative_size('bids', 99.0) == 3.0
+    assert book.cumulative_size('bids', 98.5) == 3.0
+    assert book.cumulative_size('asks', 103.0) == 7.5
+    assert book.cumulative_size('asks', 100.0) == 0.0
+    with pytest.raises(ValueError):
+        book.cumulative_size('both', 100.0)
+
+def test_buffered_updates_replayed_after_snapshot():
+    book = LocalOrderBook('BTCUSDT')
+    book.apply_update(update(5, 8, bids=[['100.0', '9.0']]))  # Contained in snapshot
+    book.apply_update(update(9, 12, bids=[['100.5', '1.0']]))  # Straddles snapshot
+    book.apply_update(update(13, 14, asks=[['101.0', '0']]))
+    assert book.needs_snapshot
+
+    assert book.apply_snapshot(snapshot(10))
+    assert book.last_update_id == 14
+    assert book.best_bid() == (100.5, 1.0)
+    assert book.bids.sizes[100.0] == 1.0
+    assert book.best_ask() == (102.0, 2.5)
+    assert book.cumulative_size('asks', 102.0) == 2.5
+
+def test_stale_snapshot_rejected():
+    book = LocalOrderBook('BTCUSDT')
+    book.apply_update(update(20, 25))
+    assert not book.apply_snapshot(snapshot(10))
+    assert book.needs_snapshot
+    assert book.apply_snapshot(snapshot(22))
+    assert book.last_update_id == 25
+
+def test_gap_triggers_resync_from_source():
+    snapshots = [snapshot(10), snapshot(30, bids=[['95.0', '1.0']], asks=[['96.0', '1.0']])]
+    book = LocalOrderBook('BTCUSDT', snapshot_source=lambda: snapshots.pop(0))
+
+    assert book.apply_update(update(11, 12, bids=[['100.0', '0']]))
+    assert book.best_bid() == (99.0, 2.0)
+
+    # Updates 13-27 were missed; the book refetches and replays what it has
+    assert book.apply_update(update(28, 31, asks=[['96.0', '4.0']]))
+    assert book.resyncs == 1
+    assert book.last_update_id == 31
+    assert book.best_bid() == (95.0, 1.0)
+    assert book.best_ask() == (96.0, 4.0)
+
+def test_gap_without_source_waits_for_snapshot():
+    book = LocalOrderBook('BTCUSDT')
+    book.apply_snapshot(snapshot(10))
+    assert not book.apply_update(update(15, 16))
+    assert book.needs_snapshot
+    assert book.apply_snapshot(snapshot(15))
+    assert book.last_update_id == 16
+
+def test_futures_sequenced_by_previous_id():
+    book = LocalOrderBook('BTCUSDT', market_type='futures')
+    book.apply_snapshot(snapshot(10))
+    assert book.apply_update(update(8, 12, bids=[['100.0', '5.0']], previous_id=7))
+    assert book.apply_update(update(14, 15, previous_id=12))
+    assert not book.apply_update(update(18, 20, previous_id=17))
+
+def test_to_dict_matches_processed_orderbook():
+    book = LocalOrderBook('BTCUSDT')
+    book.apply_snapshot(snapshot(10))
+    processed = book.to_dict(1)
+    metrics = processed.pop('metrics')
+    assert processed == {'symbol': 'BTCUSDT', 'type': 'spot', 'bids': [[100.0, 1.0]],
+                         'asks': [[101.0, 1.5]], 'timestamp': 0, 'lastUpdateId': 10}
+    assert metrics == BinanceProcessor().process_orderbook_data(
+        snapshot(10, bids=[['100.0', '1.0']], asks=[['101.0', '1.5']]), 'BTCUSDT')['metrics']
+
+def test_interleaved_updates_and_queries_match_brute_force():
+    rng = random.Random(7)
+    book = LocalOrderBook('BTCUSDT')
+    book.apply_snapshot(snapshot(0, bids=[], asks=[]))
+    model = {'bids': {}, 'asks': {}}
+    for update_id in range(1, 2001):
+        side = rng.choice(['bids', 'asks'])
+        price = float(rng.randint(1, 200))
+        quantity = float(rng.choice([0, 0, rng.randint(1, 9)]))
+        assert book.apply_update(update(update_id, update_id, **{side: [[str(price), str(quantity)]]}))
+        if quantity:
+            model[side][price] = quantity
+        else:
+            model[side].pop(price, None)
+
+        bound = float(rng.randint(0, 201))
+        if side == 'bids':
+            expected = sum(q for p, q in model['bids'].items() if p >= bound)
+        else:
+            expected = sum(q for p, q in model['asks'].items() if p <= bound)
+        assert book.cumulative_size(side, bound) == expected
+
+    for side in ('bids', 'asks'):
+        levels = sorted(model[side].items(), reverse=side == 'bids')
+        assert book.depth()[side] == [[p, q] for p, q in levels]
+        assert book.depth(5)[side] == [[p, q] for p, q in levels[:5]]
+        assert len(getattr(book, side)) == len(levels)
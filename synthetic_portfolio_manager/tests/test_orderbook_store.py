@@ -0,0 +1,173 @@
+import pytest
+import random
+from scripts.base.base_cache import BaseCache
+from scripts.base.orderbook_store import OrderbookDeltaStore
+
+def make_books(n, depth=100, seed=1):
+    """Consecutive processed books where only a few levels change per poll"""
+    rng = random.Random(seed)
+    bids = {100.0 - i * 0.1: 1.0 for i in range(depth)}
+    asks = {100.1 + i * 0.1: 1.0 for i in range(depth)}
+    books = []
+    for i in range(n):
+        for levels in (bids, asks):
+            for price in rng.sample(sorted(levels), 3):
+                levels[price] = round(rng.uniform(0.1, 5.0), 3)
+        if i % 10 == 5:
+            del bids[max(bids)]   # best bid consumed
+        books.append({
+            'symbol': 'BTCUSDT',
+            'type': 'spot',
+            'bids': [[p, q] for p, q in sorted(bids.items(), reverse=True)],
+            'asks': [[p, q] for p, q in sorted(asks.items())],
+            'timestamp': 1000 * (i + 1),
+            'lastUpdateId': i
+        })
+    return books
+
+@pytest.fixture
+def store(tmp_path):
+    store = OrderbookDeltaStore(tmp_path, keyframe_interval=10)
+    yield store
+    store.close()
+
+def save(store, books, prefix='btcusdt_orderbook'):
+    for book in books:
+        store.append('orderbook', 'processed', prefix, book['timestamp'],
+                     {'data': book, 'metadata': {'timestamp': book['timestamp'], 'filename': prefix}})
+
+def test_read_round_trips_every_snapshot(store):
+    books = make_books(35)
+    save(store, books)
+
+    results = store.read('orderbook', 'processed', 'btcusdt_orderbook', n_latest=100)
+    assert [r['data'] for r in reversed(results)] == books
+
+def test_reconstruct_at_timestamp(store):
+    books = make_books(25)
+    save(store, books)
+
+    assert store.reconstruct('orderbook', 'processed', 'btcusdt_orderbook', 17500)['data'] == books[16]
+    assert store.reconstruct('orderbook', 'processed', 'btcusdt_orderbook', 1000)['data'] == books[0]
+    assert store.reconstruct('orderbook', 'processed', 'btcusdt_orderbook', 999) is None
+
+def test_time_range_read_inside_chain(store):
+    books = make_books(30)
+    save(store, books)
+
+    results = store.read('orderbook', 'processed', 'btcusdt_orderbook', n_latest=100,
+                         time_range=(14000, 18000))
+    assert [r['data'] for r in reversed(results)] == books[13:18]
+
+def test_deltas_are_much_smaller(tmp_path):
+    books = make_books(100, depth=500)
+    full = BaseCache(str(tmp_path / "full"), storage='segments')
+    deltas = BaseCache(str(tmp_path / "deltas"), orderbook_deltas=True)
+    for cache in (full, deltas):
+        for book in books:
+            cache.save_to_cache(book, 'btcusdt_orderbook', 'orderbook', is_processed=True,
+                                timestamp=book['timestamp'])
+
+    assert deltas.disk_usage('orderbook') * 5 < full.disk_usage('orderbook')
+    full.close()
+    deltas.close()
+
+def test_raw_string_levels(store):
+    raw = [
+        {'lastUpdateId': 1, 'bids': [['100.10', '1.0'], ['100.00', '2.0']], 'asks': [['100.20', '1.5']]},
+        {'lastUpdateId': 2, 'bids': [['100.10', '0.5']], 'asks': [['100.20', '1.5'], ['100.30', '3.0']]},
+    ]
+    for i, book in enumerate(raw):
+        store.append('orderbook', 'raw', 'btcusdt_orderbook', i,
+                     {'data': book, 'metadata': {'timestamp': i, 'filename': 'btcusdt_orderbook'}})
+
+    results = store.read('orderbook', 'raw', 'btcusdt_orderbook', n_latest=2)
+    assert [r['data'] for r in reversed(results)] == raw
+
+def test_out_of_order_snapshot_is_standalone(store):
+    books = make_books(6)
+    save(store, books[:3] + books[4:])
+    save(store, [books[3]])   # backfilled between existing deltas
+
+    results = store.read('orderbook', 'processed', 'btcusdt_orderbook', n_latest=10)
+    assert [r['data'] for r in reversed(results)] == books
+
+def test_expire_keeps_chain_of_retained_deltas(store):
+    books = make_books(25)
+    save(store, books)   # keyframes at 1000, 11000, 21000
+
+    removed = store.expire('orderbook', 'processed', 15000)
+    assert removed == 10
+    results = store.read('orderbook', 'processed', 'btcusdt_orderbook', n_latest=100,
+                         time_range=(15000, 25000))
+    assert [r['data'] for r in reversed(results)] == books[14:]
+
+def test_expire_everything_starts_new_chain(store):
+    books = make_books(12)
+    save(store, books[:5])
+    store.expire('orderbook', 'processed', 10 ** 9)
+    assert store.count('orderbook', 'processed') == 0
+
+    save(store, books[5:])
+    results = store.read('orderbook', 'processed', 'btcusdt_orderbook', n_latest=100)
+    assert [r['data'] for r in reversed(results)] == books[5:]
+
+def test_base_cache_routes_orderbooks(tmp_path):
+    cache = BaseCache(str(tmp_path / "cache"), orderbook_deltas=True, orderbook_keyframe_interval=5)
+    books = make_books(12)
+    for book in books:
+        cache.save_to_cache(book, 'btcusdt_orderbook', 'orderbook', is_processed=True,
+                            timestamp=book['timestamp'])
+    cache.save_to_cache({'price': 1}, 'btcusdt_market', 'market', timestamp=1000)
+
+    assert cache.load_from_cache('btcusdt_orderbook', 'orderbook', is_processed=True)['data'] == books[-1]
+    assert cache.reconstruct_orderbook('btcusdt_orderbook', 7200)['data'] == books[6]
+    assert cache.get_cache_info()['orderbook']['processed'] == 12
+    assert cache.get_cache_info()['market']['raw'] == 1
+    assert not list((tmp_path / "cache" / "orderbook" / "processed").glob("*.json"))
+    cache.close()
+
+def test_delete_rebuilds_chain(store):
+    books = make_books(25)
+    save(store, books)   # keyframes at 1000, 11000, 21000
+    drop = {1000, 3000, 4000, 5000, 12000, 20000, 25000}
+
+    assert store.delete('orderbook', 'processed', 'btcusdt_orderbook', drop) == len(drop)
+    results = store.read('orderbook', 'processed', 'btcusdt_orderbook', n_latest=100)
+    kept = [book for book in books if book['timestamp'] not in drop]
+    assert [r['data'] for r in reversed(results)] == kept
+    # Reads that start inside a rewritten chain replay it correctly
+    assert store.reconstruct('orderbook', 'processed', 'btcusdt_orderbook', 7500)['data'] == books[6]
+
+    # The last snapshot was removed, so the next one starts a new chain
+    more = make_books(27)[25:]
+    save(store, more)
+    results = store.read('orderbook', 'processed', 'btcusdt_orderbook', n_latest=2)
+    assert [r['data'] for r in reversed(results)] == more
+
+def test_downsampling_thins_delta_books(tmp_path):
+    from scripts.base.retention import RetentionEngine, RetentionPolicy, RetentionTier
+    cache = BaseCache(str(tmp_path / "cache"), orderbook_deltas=True, orderbook_keyframe_interval=5)
+    books = make_books(20)
+    for book in books:
+        cache.save_to_cache(book, 'btcusdt_orderbook', 'orderbook', is_processed=True,
+                            timestamp=book['timestamp'])
+
+    # Past the first hour, keep the newest snapshot per 5 seconds
+    policy = RetentionPolicy(tiers=[RetentionTier(1), RetentionTier(3, resolution_seconds=5)],
+                             data_type='orderbook', is_processed=True)
+    stats = RetentionEngine(cache, [policy]).run_once(now_ms=2 * 3600 * 1000)
+    assert stats['downsampled'] == 15
+    entries = cache.load_from_cache('btcusdt_orderbook', 'orderbook', is_processed=True, n_latest=20)
+    assert [e['data'] for e in reversed(entries)] == [books[i] for i in (3, 8, 13, 18, 19)]
+    cache.close()
+
+def test_delete_standalone_and_delta(store):
+    books = make_books(8)
+    save(store, books[:4])
+    save(store, [dict(books[1], timestamp=1500)])   # out of order, standalone
+    save(store, books[4:])
+
+    assert store.delete('orderbook', 'processed', 'btcusdt_orderbook', {1500, 3000}) == 2
+    results = store.read('orderbook', 'processed', 'btcusdt_orderbook', n_latest=100)
+    assert [r['data'] for r in reversed(results)] == books[:2] + books[3:]
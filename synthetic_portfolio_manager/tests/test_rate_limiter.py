@@ -0,0 +1,119 @@
+import asyncio
+import pytest
+import threading
+import time
+from unittest.mock import Mock, patch
+from scripts.base.base_fetcher import BaseFetcher
+from scripts.base.rate_limiter import RateLimiter, TokenBucket, get_rate_limiter
+from scripts.binance.weights import endpoint_weight
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_bucket_waits_for_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(60, 60, clock)   # 1 token per second
+
+    assert bucket.reserve(50) == 0
+    assert bucket.reserve(10) == 0
+    assert bucket.reserve(5) == pytest.approx(5.0)
+    assert bucket.reserve(5) == pytest.approx(10.0)   # queued behind the previous caller
+
+    clock.now = 20
+    assert bucket.reserve(1) == 0
+
+def test_headers_resync_weight():
+    clock = FakeClock()
+    limiter = RateLimiter(1200, clock=clock)
+
+    # Another process already used most of the budget
+    limiter.update_from_headers({'X-MBX-USED-WEIGHT-1M': '1190', 'Content-Type': 'application/json'})
+    assert limiter._reserve(10, 0) == 0
+    assert limiter._reserve(20, 0) == pytest.approx(1.0)   # 20 weight per second refill
+
+def test_headers_never_raise_budget():
+    limiter = RateLimiter(1200, clock=FakeClock())
+    limiter._reserve(1000, 0)
+    limiter.update_from_headers({'x-mbx-used-weight-1m': '5'})
+    assert limiter.weight.tokens == pytest.approx(200)
+
+def test_order_count_headers():
+    limiter = RateLimiter(1200, order_limits={'10s': 50}, clock=FakeClock())
+    limiter.update_from_headers({'X-MBX-ORDER-COUNT-10S': '50'})
+    assert limiter._reserve(1, 1) > 0
+    assert limiter._reserve(1, 0) == 0
+
+def test_limiter_shared_per_host():
+    first = get_rate_limiter('https://shared.example.com/api', 1200)
+    second = get_rate_limiter('https://shared.example.com', 6000)
+    other = get_rate_limiter('https://other.example.com', 1200)
+    assert first is second
+    assert first is not other
+
+    spot = BaseFetcher('https://fetchers.example.com')
+    futures = BaseFetcher('https://fetchers.example.com/')
+    assert spot.rate_limiter is futures.rate_limiter
+
+def test_thread_safe_accounting():
+    limiter = RateLimiter(100000, clock=FakeClock())
+    threads = [threading.Thread(target=lambda: [limiter._reserve(1, 0) for _ in range(1000)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert limiter.weight.tokens == pytest.approx(100000 - 8000)
+
+def test_async_acquire_waits_without_blocking():
+    limiter = RateLimiter(600)   # 10 weight per second
+    limiter._reserve(600, 0)
+
+    async def run():
+        ticks = []
+        async def ticker():
+            for _ in range(3):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+        waited, _ = await asyncio.gather(limiter.acquire_async(1), ticker())
+        return waited, ticks
+
+    waited, ticks = asyncio.run(run())
+    assert waited == pytest.approx(0.1, abs=0.02)
+    assert len(ticks) == 3
+
+def test_binance_weights():
+    assert endpoint_weight('/api/v3/depth', {'symbol': 'BTCUSDT', 'limit': 100}) == 5
+    assert endpoint_weight('/api/v3/depth', {'symbol': 'BTCUSDT', 'limit': 1000}) == 50
+    assert endpoint_weight('api/v3/exchangeInfo') == 20
+    assert endpoint_weight('/api/v3/ticker/24hr', {'symbol': 'BTCUSDT'}) == 2
+    assert endpoint_weight('/api/v3/ticker/24hr', {}) == 80
+    assert endpoint_weight('/api/v3/ticker/24hr', {'symbols': '["A","B"]'}) == 2
+    assert endpoint_weight('/fapi/v1/depth', {'limit': 1000}) == 20
+    assert endpoint_weight('/fapi/v1/premiumIndex', {}) == 10
+    assert endpoint_weight('/unknown') == 1
+
+def test_fetch_data_charges_weight_and_reads_headers():
+    limiter = RateLimiter(1200, clock=FakeClock())
+    fetcher = BaseFetcher('https://weights.example.com', request_weight=endpoint_weight,
+                          rate_limiter=limiter)
+    response = Mock()
+    response.json.return_value = {'lastUpdateId': 1, 'bids': [], 'asks': []}
+    response.headers = {'X-MBX-USED-WEIGHT-1M': '300'}
+
+    with patch('requests.Session.request', return_value=response):
+        fetcher.fetch_data('/api/v3/depth', {'symbol': 'BTCUSDT', 'limit': 1000})
+
+    assert limiter.weight.tokens == pytest.approx(900)
+
+    with patch.object(limiter, 'acquire') as acquire, \
+            patch('requests.Session.request', return_value=response):
+        fetcher.fetch_data('/api/v3/exchangeInfo')
+    acquire.assert_called_once_with(20)
+
+def test_rate_limit_disabled():
+    fetcher = BaseFetcher('https://unlimited.example.com', rate_limit=0)
+    assert fetcher.rate_limiter is None
@@ -0,0 +1,72 @@
+import json
+import pytest
+from unittest.mock import Mock, patch
+from scripts.base.base_cache import BaseCache
+from scripts.base.base_fetcher import BaseFetcher
+from scripts.base.json_bytes import encode_envelope, loads
+
+DEPTH = {'lastUpdateId': 7, 'bids': [['100.0', '1.5']], 'asks': [['100.5', '2.0']]}
+DEPTH_BODY = b'{"lastUpdateId":7,"bids":[["100.0","1.5"]],"asks":[["100.5","2.0"]]}'
+
+@pytest.fixture(params=['files', 'segments', 'sqlite'])
+def cache(tmp_path, request):
+    cache = BaseCache(str(tmp_path / "cache"), storage=request.param)
+    yield cache
+    cache.close()
+
+def test_encode_envelope_splices_raw_body():
+    envelope = {'data': DEPTH_BODY, 'metadata': {'timestamp': 1}}
+    assert json.loads(encode_envelope(envelope)) == {'data': DEPTH, 'metadata': {'timestamp': 1}}
+    assert json.loads(encode_envelope({'data': DEPTH_BODY})) == {'data': DEPTH}
+    assert json.loads(encode_envelope({'data': DEPTH, 'metadata': {}})) == {'data': DEPTH,
+                                                                            'metadata': {}}
+    assert loads(DEPTH_BODY) == DEPTH
+
+def test_raw_bytes_load_as_objects(cache):
+    cache.save_to_cache(DEPTH_BODY, 'btcusdt_orderbook', 'orderbook', timestamp=1000)
+    entry = cache.load_from_cache('btcusdt_orderbook', 'orderbook')
+    assert entry['data'] == DEPTH
+    assert entry['metadata']['timestamp'] == 1000
+
+@pytest.mark.parametrize('codec', ['gzip'])
+def test_raw_bytes_compressed(tmp_path, codec):
+    cache = BaseCache(str(tmp_path / "cache"), compress=codec)
+    cache.save_to_cache(DEPTH_BODY, 'btcusdt_orderbook', 'orderbook', timestamp=1000)
+    assert cache.load_from_cache('btcusdt_orderbook', 'orderbook')['data'] == DEPTH
+
+def test_raw_bytes_with_orderbook_deltas(tmp_path):
+    cache = BaseCache(str(tmp_path / "cache"), orderbook_deltas=True)
+    cache.save_to_cache(DEPTH_BODY, 'btcusdt_orderbook', 'orderbook', timestamp=1000)
+    cache.save_to_cache(DEPTH_BODY.replace(b'"1.5"', b'"3.0"'), 'btcusdt_orderbook',
+                        'orderbook', timestamp=2000)
+    latest = cache.load_from_cache('btcusdt_orderbook', 'orderbook')
+    assert latest['data']['bids'] == [['100.0', '3.0']]
+    cache.close()
+
+def test_raw_bytes_dedup_and_read_cache(tmp_path):
+    cache = BaseCache(str(tmp_path / "cache"), dedup=True, read_cache_bytes=1 << 20)
+    cache.save_to_cache(DEPTH, 'btcusdt_orderbook', 'orderbook')
+    assert cache.load_from_cache('btcusdt_orderbook', 'orderbook')['data'] == DEPTH
+
+    # A newer raw entry replaces the cached parsed one instead of being parsed
+    cache.save_to_cache(DEPTH_BODY.replace(b'"1.5"', b'"3.0"'), 'btcusdt_orderbook',
+                        'orderbook')
+    assert cache.load_from_cache('btcusdt_orderbook', 'orderbook')['data']['bids'] == [
+        ['100.0', '3.0']
+    ]
+
+    for ts in (1000, 2000):
+        cache.save_to_cache(DEPTH_BODY, 'btcusdt_depth_raw', 'orderbook', timestamp=ts)
+    entries = cache.load_from_cache('btcusdt_depth_raw', 'orderbook', n_latest=2)
+    assert entries[0]['metadata']['ref_timestamp'] == 1000
+    assert all(entry['data'] == DEPTH for entry in entries)
+
+def test_fetch_data_raw_skips_parse():
+    fetcher = BaseFetcher('https://raw.example.com', rate_limit=0, coalesce=False)
+    response = Mock()
+    response.content = DEPTH_BODY
+    response.headers = {}
+
+    with patch('requests.Session.request', return_value=response):
+        assert fetcher.fetch_data('/api/v3/depth', {'symbol': 'BTCUSDT'}, raw=True) == DEPTH_BODY
+    response.json.assert_not_called()
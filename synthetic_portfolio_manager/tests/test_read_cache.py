@@ -0,0 +1,99 @@
+import pytest
+from scripts.base.base_cache import BaseCache
+from scripts.base.read_cache import ReadCache, estimate_size
+
+def test_lru_eviction_by_bytes():
+    cache = ReadCache(max_bytes=100)
+    cache.put('a', 'A', size=40)
+    cache.put('b', 'B', size=40)
+    assert cache.get('a') == 'A'   # 'b' becomes least recently used
+
+    cache.put('c', 'C', size=40)
+    assert cache.get('b') is None
+    assert cache.get('a') == 'A'
+    assert cache.get('c') == 'C'
+
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['bytes'] == 80
+    assert stats['hits'] == 3
+    assert stats['misses'] == 1
+
+def test_oversized_value_not_cached():
+    cache = ReadCache(max_bytes=10)
+    cache.put('big', 'x', size=11)
+    assert cache.get('big') is None
+    assert cache.stats()['bytes'] == 0
+
+@pytest.fixture(params=['files', 'segments', 'sqlite'])
+def cache(tmp_path, request):
+    cache = BaseCache(str(tmp_path / "cache"), storage=request.param,
+                      read_cache_bytes=1024 * 1024)
+    yield cache
+    cache.close()
+
+def test_repeated_loads_hit_memory(cache):
+    cache.save_to_cache({'price': 1}, 'BTCUSDT_market', 'market', timestamp=1000)
+
+    first = cache.load_from_cache('BTCUSDT_market', 'market')
+    second = cache.load_from_cache('BTCUSDT_market', 'market')
+
+    assert first['data'] == {'price': 1}
+    assert second is first
+    assert cache.read_cache.stats()['misses'] == 1
+    assert cache.read_cache.stats()['hits'] == 1
+
+def test_save_writes_through(cache):
+    cache.save_to_cache({'price': 1}, 'BTCUSDT_market', 'market')
+    assert cache.load_from_cache('BTCUSDT_market', 'market')['data'] == {'price': 1}
+
+    cache.save_to_cache({'price': 2}, 'BTCUSDT_market', 'market')
+    assert cache.load_from_cache('BTCUSDT_market', 'market')['data'] == {'price': 2}
+    assert cache.read_cache.stats()['misses'] == 0
+
+def test_backfill_does_not_replace_newer_entry(cache):
+    cache.save_to_cache({'price': 2}, 'BTCUSDT_market', 'market', timestamp=2000)
+    cache.load_from_cache('BTCUSDT_market', 'market')
+
+    cache.save_to_cache({'price': 1}, 'BTCUSDT_market', 'market', timestamp=1000)
+    assert cache.load_from_cache('BTCUSDT_market', 'market')['data'] == {'price': 2}
+
+def test_keys_are_separate(cache):
+    cache.save_to_cache({'raw': True}, 'BTCUSDT_market', 'market')
+    cache.save_to_cache({'raw': False}, 'BTCUSDT_market', 'market', is_processed=True)
+
+    assert cache.load_from_cache('BTCUSDT_market', 'market')['data'] == {'raw': True}
+    assert cache.load_from_cache('BTCUSDT_market', 'market',
+                                 is_processed=True)['data'] == {'raw': False}
+
+def test_patterns_and_ranges_bypass_cache(cache):
+    cache.save_to_cache({'price': 1}, 'BTCUSDT_market', 'market', timestamp=1000)
+    cache.save_to_cache({'price': 2}, 'BTCUSDT_market', 'market', timestamp=2000)
+
+    assert len(cache.load_from_cache('BTCUSDT_market', 'market', n_latest=2)) == 2
+    assert cache.load_from_cache('BTC*', 'market')['data'] == {'price': 2}
+    assert cache.load_from_cache('BTCUSDT_market', 'market',
+                                 time_range=(0, 1500))['data'] == {'price': 1}
+    assert cache.read_cache.stats()['hits'] + cache.read_cache.stats()['misses'] == 0
+
+def test_expired_entries_are_invalidated(cache):
+    cache.save_to_cache({'price': 1}, 'BTCUSDT_market', 'market', timestamp=1000)
+    assert cache.load_from_cache('BTCUSDT_market', 'market') is not None
+
+    cache.clear_old_cache(max_age_hours=1)
+    assert cache.load_from_cache('BTCUSDT_market', 'market') is None
+
+def test_disabled_by_default(tmp_path):
+    cache = BaseCache(str(tmp_path / "cache"))
+    assert cache.read_cache is None
+    cache.save_to_cache({'price': 1}, 'BTCUSDT_market', 'market')
+    assert cache.load_from_cache('BTCUSDT_market', 'market')['data'] == {'price': 1}
+
+def test_estimate_size_tracks_json_size():
+    import json
+    book = {'data': {'symbol': 'BTCUSDT', 'bids': [[50000.12, 1.234]] * 1000,
+                     'asks': [[50001.5, 0.5]] * 1000, 'timestamp': 1645084800000},
+            'metadata': {'timestamp': 1645084800000, 'filename': 'btcusdt_orderbook'}}
+    actual = len(json.dumps(book, separators=(',', ':')))
+    assert 0.5 * actual < estimate_size(book) < 2 * actual
+    assert estimate_size({'data': b'{"a":1}'}) < 20
@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import pytest
+from unittest.mock import Mock, patch
+from scripts.base.base_fetcher import BaseFetcher
+from scripts.base.request_coalescer import RequestCoalescer, request_key
+from scripts.binance.endpoint_ttls import endpoint_ttl
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_request_key_ignores_param_order():
+    assert request_key('get', '/api/v3/depth', {'symbol': 'BTCUSDT', 'limit': 5}) == \
+        request_key('GET', 'api/v3/depth', {'limit': 5, 'symbol': 'BTCUSDT'})
+    assert request_key('GET', '/api/v3/depth', {'limit': 5}) != \
+        request_key('GET', '/api/v3/depth', {'limit': 10})
+
+def test_concurrent_calls_share_one_request():
+    coalescer = RequestCoalescer()
+    release = threading.Event()
+    calls = []
+
+    def call():
+        calls.append(1)
+        release.wait(2)
+        return {'symbols': ['BTCUSDT']}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(coalescer.fetch('info', call)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while coalescer.coalesced < 4:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{'symbols': ['BTCUSDT']}] * 5
+    # Every caller owns its result
+    assert len({id(result) for result in results}) == 5
+
+    # Nothing is memoized without a TTL
+    coalescer.fetch('info', call)
+    assert len(calls) == 2
+
+def test_errors_reach_every_waiter():
+    coalescer = RequestCoalescer()
+    release = threading.Event()
+    errors = []
+
+    def call():
+        release.wait(2)
+        raise ConnectionError("down")
+
+    def caller():
+        try:
+            coalescer.fetch('info', call)
+        except ConnectionError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while coalescer.coalesced < 2:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 3
+
+def test_ttl_memo_expires():
+    clock = FakeClock()
+    coalescer = RequestCoalescer(clock=clock)
+    call = Mock(side_effect=lambda: {'n': call.call_count})
+
+    assert coalescer.fetch('info', call, ttl=300) == {'n': 1}
+    cached = coalescer.fetch('info', call, ttl=300)
+    assert cached == {'n': 1}
+    cached['n'] = 99   # Callers get copies; the memo is unaffected
+    clock.now = 299
+    assert coalescer.fetch('info', call, ttl=300) == {'n': 1}
+    assert (call.call_count, coalescer.hits) == (1, 2)
+
+    clock.now = 300
+    assert coalescer.fetch('info', call, ttl=300) == {'n': 2}
+
+def test_memo_bounded():
+    coalescer = RequestCoalescer(max_entries=2)
+    for key in ('a', 'b', 'c'):
+        coalescer.fetch(key, lambda: key, ttl=60)
+    assert list(coalescer._memo) == ['b', 'c']
+
+def test_async_calls_share_one_request():
+    coalescer = RequestCoalescer()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {'fundingRate': '0.0001'}
+
+    async def run():
+        return await asyncio.gather(*(coalescer.fetch_async('funding', call) for _ in range(4)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert results == [{'fundingRate': '0.0001'}] * 4
+    assert len({id(result) for result in results}) == 4
+
+def test_cancelled_first_caller_does_not_cancel_waiters():
+    coalescer = RequestCoalescer()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {'fundingRate': '0.0001'}
+
+    async def run():
+        first = asyncio.ensure_future(coalescer.fetch_async('funding', call))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(coalescer.fetch_async('funding', call))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == {'fundingRate': '0.0001'}
+    assert len(calls) == 1
+    assert coalescer._async_calls == {}
+
+def test_fetch_data_memoizes_by_endpoint_ttl():
+    fetcher = BaseFetcher('https://memo.example.com', rate_limit=0, request_ttl=endpoint_ttl,
+                          coalescer=RequestCoalescer())
+    response = Mock()
+    response.json.return_value = {'symbols': []}
+
+    with patch('requests.Session.request', return_value=response) as request:
+        fetcher.fetch_data('/api/v3/exchangeInfo')
+        fetcher.fetch_data('/api/v3/exchangeInfo')
+        assert request.call_count == 1
+
+        # Order book snapshots are never memoized
+        fetcher.fetch_data('/api/v3/depth', {'symbol': 'BTCUSDT'})
+        fetcher.fetch_data('/api/v3/depth', {'symbol': 'BTCUSDT'})
+        assert request.call_count == 3
+
+        # Signed requests bypass the coalescer
+        fetcher.api_secret = 'secret'
+        fetcher.fetch_data('/api/v3/exchangeInfo', sign=True)
+        assert request.call_count == 4
+
+def test_coalescing_can_be_disabled():
+    fetcher = BaseFetcher('https://plain.example.com', rate_limit=0, coalesce=False)
+    assert fetcher.coalescer is None
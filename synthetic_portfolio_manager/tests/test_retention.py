@@ -0,0 +1,170 @@
+import pytest
+import threading
+import time
+from scripts.base.base_cache import BaseCache
+from scripts.base.retention import (RetentionEngine, RetentionPolicy, RetentionTier,
+                                    default_policies)
+
+HOUR_MS = 3600 * 1000
+NOW = 1_700_000_000_000 - (1_700_000_000_000 % HOUR_MS)
+
+@pytest.fixture(params=['files', 'segments', 'sqlite'])
+def cache(tmp_path, request):
+    cache = BaseCache(str(tmp_path / "cache"), storage=request.param)
+    yield cache
+    cache.close()
+
+def test_expires_past_last_tier(cache):
+    for age_hours in (1, 10, 30):
+        cache.save_to_cache({'age': age_hours}, 'BTCUSDT_market', 'market',
+                            timestamp=NOW - age_hours * HOUR_MS)
+
+    engine = RetentionEngine(cache, [RetentionPolicy(tiers=[RetentionTier(24)])])
+    stats = engine.run_once(now_ms=NOW)
+
+    assert stats['expired'] == 1
+    remaining = cache.load_from_cache('BTCUSDT_market', 'market', n_latest=10)
+    assert [entry['data']['age'] for entry in remaining] == [1, 10]
+
+def test_downsamples_older_tiers(cache):
+    # One entry per minute for the last three hours
+    for minute in range(180):
+        cache.save_to_cache({'minute': minute}, 'BTCUSDT_market', 'market', is_processed=True,
+                            timestamp=NOW - minute * 60 * 1000)
+
+    tiers = [RetentionTier(1), RetentionTier(24, resolution_seconds=3600)]
+    engine = RetentionEngine(cache, [RetentionPolicy(tiers=tiers, is_processed=True)])
+    stats = engine.run_once(now_ms=NOW)
+
+    # Full resolution inside the first hour, then one entry per hour bucket
+    timestamps = cache.entry_timestamps('market', True)['BTCUSDT_market']
+    recent = [ts for ts in timestamps if ts >= NOW - HOUR_MS]
+    older = [ts for ts in timestamps if ts < NOW - HOUR_MS]
+    assert len(recent) == 61
+    assert len({ts // HOUR_MS for ts in older}) == len(older) == 2
+    assert stats['downsampled'] == 180 - len(timestamps)
+
+    # The newest entry of each bucket survives, and a second pass is a no-op
+    assert NOW - 61 * 60 * 1000 in older
+    assert engine.run_once(now_ms=NOW)['downsampled'] == 0
+
+def test_policies_are_per_data_type(cache):
+    for data_type in ('market', 'trade'):
+        cache.save_to_cache({}, f'BTCUSDT_{data_type}', data_type,
+                            timestamp=NOW - 48 * HOUR_MS)
+
+    policies = [
+        RetentionPolicy(tiers=[RetentionTier(24)]),
+        RetentionPolicy(tiers=[RetentionTier(72)], data_type='trade')
+    ]
+    RetentionEngine(cache, policies).run_once(now_ms=NOW)
+
+    info = cache.get_cache_info()
+    assert info['market']['raw'] == 0
+    assert info['trade']['raw'] == 1
+
+def test_disk_budget_removes_oldest(cache):
+    for i in range(50):
+        cache.save_to_cache({'payload': 'x' * 2000, 'i': i}, 'BTCUSDT_orderbook', 'orderbook',
+                            timestamp=NOW - (50 - i) * 1000)
+    usage = cache.disk_usage()
+    assert usage > 0
+
+    engine = RetentionEngine(cache, [], max_bytes=usage // 2)
+    removed = engine.run_once(now_ms=NOW)['budget']
+
+    assert removed > 0
+    assert cache.disk_usage() <= usage // 2
+    newest = cache.load_from_cache('BTCUSDT_orderbook', 'orderbook')
+    assert newest['data']['i'] == 49
+
+def test_disk_budget_keeps_kline_history(cache):
+    for is_processed in (False, True):
+        cache.save_to_cache([[0] * 12] * 200, 'btcusdt_klines_1m', 'kline',
+                            is_processed=is_processed, timestamp=NOW - 365 * 24 * HOUR_MS)
+    for i in range(5):
+        cache.save_to_cache({'payload': 'x' * 2000, 'i': i}, 'BTCUSDT_market', 'market',
+                            timestamp=NOW - (5 - i) * 1000)
+    market_usage = cache.disk_usage('market')
+
+    engine = RetentionEngine(cache, default_policies(),
+                             max_bytes=cache.disk_usage() - market_usage // 2)
+    assert engine.run_once(now_ms=NOW)['budget'] > 0
+
+    info = cache.get_cache_info()
+    assert info['kline'] == {'raw': 1, 'processed': 1}
+    assert info['market']['raw'] < 5
+
+def test_step_round_robin(cache):
+    cache.save_to_cache({}, 'BTCUSDT_market', 'market', timestamp=NOW - 48 * HOUR_MS)
+    cache.save_to_cache({}, 'BTCUSDT_trade', 'trade', timestamp=NOW - 48 * HOUR_MS)
+    engine = RetentionEngine(cache, [RetentionPolicy(tiers=[RetentionTier(24)])])
+
+    assert engine.step(now_ms=NOW)['expired'] == 1   # market
+    assert engine.step(now_ms=NOW)['expired'] == 0   # orderbook
+    assert engine.step(now_ms=NOW)['expired'] == 1   # trade
+
+def test_background_thread(cache):
+    cache.save_to_cache({}, 'BTCUSDT_market', 'market', timestamp=1000)
+    engine = RetentionEngine(cache, [RetentionPolicy(tiers=[RetentionTier(24)])],
+                             interval_seconds=0.03)
+    engine.start()
+    try:
+        deadline = time.monotonic() + 2
+        while cache.get_cache_info()['market']['raw'] and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        engine.stop()
+    assert cache.get_cache_info()['market']['raw'] == 0
+
+def test_background_thread_with_sqlite_batches(tmp_path):
+    cache = BaseCache(str(tmp_path / "cache"), storage='sqlite')
+    engine = RetentionEngine(cache, [RetentionPolicy(tiers=[RetentionTier(24)])],
+                             interval_seconds=0.01)
+    
+    def collect():
+        for i in range(30):
+            with cache.batch():
+                cache.save_to_cache({'i': i}, 'BTCUSDT_market', 'market', timestamp=i)
+                time.sleep(0.005)   # Let retention run while the batch is open
+                cache.save_to_cache({'i': i}, 'BTCUSDT_market', 'market')
+    
+    engine.start()
+    try:
+        collector = threading.Thread(target=collect, daemon=True)
+        collector.start()
+        collector.join(timeout=10)
+        assert not collector.is_alive(), "collection deadlocked with retention"
+    finally:
+        engine.stop()
+    engine.run_once()
+    assert cache.get_cache_info()['market']['raw'] == 30   # Only the current snapshots
+    cache.close()
+
+def test_invalid_tier_order(cache):
+    with pytest.raises(ValueError):
+        RetentionEngine(cache, [RetentionPolicy(tiers=[RetentionTier(48), RetentionTier(24)])])
+
+def test_clear_old_cache_uses_index(cache):
+    cache.save_to_cache({}, 'BTCUSDT_market', 'market', timestamp=1000)
+    cache.save_to_cache({}, 'BTCUSDT_market', 'market', is_processed=True, timestamp=1000)
+    cache.save_to_cache({}, 'BTCUSDT_market', 'market')
+
+    cache.clear_old_cache(max_age_hours=1)
+
+    info = cache.get_cache_info()
+    assert info['market'] == {'raw': 1, 'processed': 0}
+
+def test_clear_old_cache_keeps_kline_history(cache):
+    for is_processed in (False, True):
+        cache.save_to_cache([[0] * 12], 'btcusdt_klines_1m', 'kline',
+                            is_processed=is_processed, timestamp=1000)
+    cache.save_to_cache({}, 'BTCUSDT_market', 'market', timestamp=1000)
+
+    cache.clear_old_cache(max_age_hours=24)
+    info = cache.get_cache_info()
+    assert info['kline'] == {'raw': 1, 'processed': 1}
+    assert info['market']['raw'] == 0
+
+    cache.clear_old_cache(max_age_hours=24, data_type='kline')
+    assert cache.get_cache_info()['kline'] == {'raw': 0, 'processed': 0}
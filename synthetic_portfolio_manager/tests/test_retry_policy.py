@@ -0,0 +1,192 @@
+import asyncio
+import pytest
+import requests
+from unittest.mock import Mock, patch
+from scripts.base.base_fetcher import BaseFetcher
+from scripts.base.rate_limiter import RateLimiter
+from scripts.base.retry_policy import (
+    CircuitBreaker, CircuitOpenError, RetryPolicy, parse_retry_after
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def http_response(status, headers=None, payload=None):
+    response = Mock()
+    response.status_code = status
+    response.headers = headers or {}
+    response.json.return_value = payload
+    if status >= 400:
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(
+            f"{status} error", response=response
+        )
+    return response
+
+def make_fetcher(breaker=None, **kwargs):
+    return BaseFetcher('https://retry.example.com', rate_limit=0, coalesce=False,
+                       retry_policy=RetryPolicy(rand=lambda: 0.5),
+                       circuit_breaker=breaker or CircuitBreaker('retry.example.com'),
+                       **kwargs)
+
+def test_parse_retry_after():
+    assert parse_retry_after({'Retry-After': '12'}) == 12.0
+    assert parse_retry_after({'retry-after': '0.5'}) == 0.5
+    assert parse_retry_after({'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}) is None
+    assert parse_retry_after(None) is None
+
+def test_policy_per_status():
+    policy = RetryPolicy(max_delay=10, rand=lambda: 1.0)
+    assert policy.delay(0, 3, 1.0) == 1.0
+    assert policy.delay(1, 3, 1.0, status=503) == 2.0
+    assert policy.delay(2, 3, 1.0) is None          # out of attempts
+    assert policy.delay(0, 3, 1.0, status=400) is None
+    assert policy.delay(0, 3, 1.0, status=418) is None
+    assert policy.delay(0, 3, 1.0, status=429, retry_after=7) == 7
+    assert policy.delay(0, 3, 1.0, status=429, retry_after=60) is None  # too long to wait
+    assert policy.delay(5, 10, 1.0) == 10           # capped
+
+def test_jitter_spreads_delays():
+    draws = iter([0.0, 0.25, 0.999])
+    policy = RetryPolicy(rand=lambda: next(draws))
+    assert [policy.backoff(2, 1.0) for _ in range(3)] == pytest.approx([0.0, 1.0, 3.996])
+
+def test_client_error_not_retried():
+    fetcher = make_fetcher()
+    with patch('requests.Session.request', return_value=http_response(400)) as request, \
+            patch('time.sleep') as sleep:
+        with pytest.raises(requests.exceptions.HTTPError):
+            fetcher.fetch_data('/api/v3/depth', {'symbol': 'NOPE'})
+    assert request.call_count == 1
+    sleep.assert_not_called()
+    assert fetcher.circuit_breaker.failures == 0
+
+def test_server_error_retried_with_backoff():
+    fetcher = make_fetcher()
+    responses = [http_response(503), http_response(502), http_response(200, payload={'ok': 1})]
+    with patch('requests.Session.request', side_effect=responses), \
+            patch('time.sleep') as sleep:
+        assert fetcher.fetch_data('/api/v3/time', retry_delay=1.0) == {'ok': 1}
+    assert [call.args[0] for call in sleep.call_args_list] == [0.5, 1.0]
+    assert fetcher.circuit_breaker.failures == 0
+
+def test_429_honors_retry_after_and_pauses_host():
+    limiter = RateLimiter(1200, clock=FakeClock())
+    fetcher = make_fetcher(rate_limiter=limiter)
+    responses = [http_response(429, {'Retry-After': '3'}), http_response(200, payload=[])]
+    with patch('requests.Session.request', side_effect=responses), \
+            patch('time.sleep') as sleep:
+        assert fetcher.fetch_data('/api/v3/time') == []
+    # The retry waits Retry-After, and so does everyone sharing the limiter
+    assert sleep.call_args_list[0].args[0] == 3.0
+    assert limiter._reserve(1, 0) >= 3.0 - 1e-6
+
+def test_418_opens_circuit_for_ban():
+    clock = FakeClock()
+    breaker = CircuitBreaker('retry.example.com', clock=clock)
+    fetcher = make_fetcher(breaker)
+    with patch('requests.Session.request',
+               return_value=http_response(418, {'Retry-After': '120'})) as request:
+        with pytest.raises(requests.exceptions.HTTPError):
+            fetcher.fetch_data('/api/v3/time')
+        with pytest.raises(CircuitOpenError) as error:
+            fetcher.fetch_data('/api/v3/depth', {'symbol': 'BTCUSDT'})
+    assert request.call_count == 1
+    assert error.value.retry_after == pytest.approx(120)
+
+    clock.now = 121
+    with patch('requests.Session.request', return_value=http_response(200, payload={})):
+        assert fetcher.fetch_data('/api/v3/time') == {}
+
+def test_circuit_opens_after_failures_then_half_opens():
+    clock = FakeClock()
+    breaker = CircuitBreaker('retry.example.com', failure_threshold=3, reset_timeout=30,
+                             clock=clock)
+    fetcher = make_fetcher(breaker)
+    down = requests.exceptions.ConnectionError("refused")
+    with patch('requests.Session.request', side_effect=down) as request, \
+            patch('time.sleep'):
+        with pytest.raises(CircuitOpenError):
+            fetcher.fetch_data('/api/v3/time', retry_count=5)
+        assert request.call_count == 3
+        # Other callers fail fast without touching the network
+        with pytest.raises(CircuitOpenError):
+            fetcher.fetch_data('/api/v3/exchangeInfo')
+        assert request.call_count == 3
+
+    clock.now = 31
+    breaker.before_request()          # The trial request
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()      # Everyone else waits for its outcome
+    breaker.record_success()
+    breaker.before_request()
+    assert not breaker.is_open
+
+def test_trial_released_after_unrecorded_error():
+    clock = FakeClock()
+    breaker = CircuitBreaker('retry.example.com', failure_threshold=1, reset_timeout=30,
+                             clock=clock)
+    fetcher = make_fetcher(breaker)
+    breaker.record_failure()
+    clock.now = 31
+    with patch('requests.Session.request', side_effect=RuntimeError("not a transport error")):
+        with pytest.raises(RuntimeError):
+            fetcher.fetch_data('/api/v3/time')
+    with patch('requests.Session.request', return_value=http_response(200, payload={})):
+        assert fetcher.fetch_data('/api/v3/time') == {}
+    assert breaker.failures == 0
+
+def test_bad_json_body_not_retried_or_counted():
+    breaker = CircuitBreaker('retry.example.com', failure_threshold=1)
+    fetcher = make_fetcher(breaker)
+    response = http_response(200)
+    response.json.side_effect = requests.exceptions.JSONDecodeError("Expecting value", "<html>", 0)
+    with patch('requests.Session.request', return_value=response) as request, \
+            patch('time.sleep') as sleep:
+        assert fetcher.fetch_data('/api/v3/time', retry_count=3) is None
+    assert request.call_count == 1
+    sleep.assert_not_called()
+    assert breaker.failures == 0 and not breaker.is_open
+
+def test_async_fetcher_retries_server_errors():
+    aiohttp = pytest.importorskip("aiohttp")
+    from aiohttp import web
+    from scripts.base.async_base_fetcher import AsyncBaseFetcher
+
+    async def scenario():
+        calls = []
+
+        async def flaky(request):
+            calls.append(1)
+            if len(calls) < 3:
+                return web.json_response({}, status=503)
+            return web.json_response({'serverTime': 1})
+
+        async def banned(request):
+            return web.json_response({}, status=418, headers={'Retry-After': '60'})
+
+        app = web.Application()
+        app.router.add_get('/api/v3/time', flaky)
+        app.router.add_get('/api/v3/exchangeInfo', banned)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        breaker = CircuitBreaker('local')
+        try:
+            async with AsyncBaseFetcher(f"http://127.0.0.1:{port}", rate_limit=0,
+                                        coalesce=False, circuit_breaker=breaker) as fetcher:
+                result = await fetcher.fetch_data('/api/v3/time', retry_delay=0.01)
+                with pytest.raises(aiohttp.ClientResponseError):
+                    await fetcher.fetch_data('/api/v3/exchangeInfo')
+                with pytest.raises(CircuitOpenError):
+                    await fetcher.fetch_data('/api/v3/time')
+        finally:
+            await runner.cleanup()
+        return result, len(calls)
+
+    assert asyncio.run(scenario()) == ({'serverTime': 1}, 3)
@@ -0,0 +1,99 @@
+import pytest
+import time
+from pathlib import Path
+from scripts.base.base_cache import BaseCache
+from scripts.base.segment_store import SegmentStore, FOOTER_MAGIC
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = BaseCache(str(tmp_path / "segment_cache"), storage='segments')
+    yield cache
+    cache.close()
+
+def test_invalid_storage_mode(tmp_path):
+    with pytest.raises(ValueError, match="Invalid storage mode"):
+        BaseCache(str(tmp_path), storage='invalid')
+
+def test_records_share_one_segment(cache):
+    for i in range(50):
+        cache.save_to_cache({"version": i}, "btcusdt_trades", "trade", timestamp=1000 + i)
+    
+    segment_dir = cache.base_dir / 'trade' / 'raw' / 'btcusdt_trades.segments'
+    assert len(list(segment_dir.iterdir())) == 1
+    assert not list((cache.base_dir / 'trade' / 'raw').glob('*.json'))
+    
+    loaded = cache.load_from_cache("btcusdt_trades", "trade", n_latest=3)
+    assert [entry['data']['version'] for entry in loaded] == [49, 48, 47]
+    assert loaded[0]['metadata']['timestamp'] == 1049
+
+def test_time_range_and_out_of_order_writes(cache):
+    current_time = int(time.time() * 1000)
+    for i in range(3):
+        cache.save_to_cache({"version": i}, "time_test", "market",
+                            timestamp=current_time - (i * 3600 * 1000))
+    
+    loaded = cache.load_from_cache("time_test", "market", n_latest=10,
+                                   time_range=(current_time - 5400000, current_time))
+    assert [entry['data']['version'] for entry in loaded] == [0, 1]
+
+def test_rollover_seals_segment_with_footer(tmp_path):
+    cache = BaseCache(str(tmp_path), storage='segments', segment_max_bytes=512)
+    for i in range(20):
+        cache.save_to_cache({"payload": "x" * 64, "i": i}, "eth_book", "orderbook", timestamp=i)
+    cache.close()
+    
+    segment_files = sorted((tmp_path / 'orderbook' / 'raw' / 'eth_book.segments').iterdir())
+    assert len(segment_files) > 1
+    assert segment_files[0].read_bytes()[-4:] == FOOTER_MAGIC
+    
+    # A fresh store rebuilds its indexes from footers and the active segment
+    reopened = BaseCache(str(tmp_path), storage='segments', segment_max_bytes=512)
+    loaded = reopened.load_from_cache("eth_book", "orderbook", n_latest=20)
+    assert [entry['data']['i'] for entry in loaded] == list(range(19, -1, -1))
+    assert reopened.get_cache_info()['orderbook']['raw'] == 20
+    
+    reopened.save_to_cache({"i": 20}, "eth_book", "orderbook", timestamp=20)
+    assert reopened.load_from_cache("eth_book", "orderbook")['data']['i'] == 20
+    reopened.close()
+
+def test_truncated_tail_is_recovered(tmp_path):
+    cache = BaseCache(str(tmp_path), storage='segments')
+    cache.save_to_cache({"i": 0}, "sol_market", "market", timestamp=1)
+    cache.save_to_cache({"i": 1}, "sol_market", "market", timestamp=2)
+    cache.close()
+    
+    segment_file = next((tmp_path / 'market' / 'raw' / 'sol_market.segments').iterdir())
+    data = segment_file.read_bytes()
+    segment_file.write_bytes(data[:-5])
+    
+    reopened = BaseCache(str(tmp_path), storage='segments')
+    assert reopened.load_from_cache("sol_market", "market")['data']['i'] == 0
+    reopened.save_to_cache({"i": 2}, "sol_market", "market", timestamp=3)
+    assert [e['data']['i'] for e in reopened.load_from_cache("sol_market", "market", n_latest=5)] == [2, 0]
+    reopened.close()
+
+def test_clear_old_cache_expires_and_compacts(cache):
+    current_time = int(time.time() * 1000)
+    old_time = current_time - (25 * 3600 * 1000)
+    
+    cache.save_to_cache({"data": "old"}, "old_data", "market", timestamp=old_time)
+    cache.save_to_cache({"data": "old"}, "mixed_data", "market", timestamp=old_time)
+    cache.save_to_cache({"data": "recent"}, "mixed_data", "market")
+    
+    cache.clear_old_cache(max_age_hours=24)
+    
+    assert cache.load_from_cache("old_data", "market") is None
+    remaining = cache.load_from_cache("mixed_data", "market", n_latest=5)
+    assert [entry['data']['data'] for entry in remaining] == ["recent"]
+    assert cache.get_cache_info()['market']['raw'] == 1
+    
+    # Writes continue after the active segment was compacted
+    cache.save_to_cache({"data": "newer"}, "mixed_data", "market")
+    assert cache.load_from_cache("mixed_data", "market")['data']['data'] == "newer"
+
+def test_glob_pattern_across_prefixes(cache):
+    cache.save_to_cache({"s": "btc"}, "btcusdt_market", "market", timestamp=1)
+    cache.save_to_cache({"s": "eth"}, "ethusdt_market", "market", timestamp=2)
+    
+    loaded = cache.load_from_cache("*_market", "market", n_latest=5)
+    assert [entry['data']['s'] for entry in loaded] == ["eth", "btc"]
@@ -0,0 +1,108 @@
+import pytest
+import sqlite3
+import time
+from scripts.base.base_cache import BaseCache
+from scripts.base.sqlite_store import DATABASE_FILENAME
+from scripts.binance.processor import BinanceProcessor
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = BaseCache(str(tmp_path / "sqlite_cache"), storage='sqlite')
+    yield cache
+    cache.close()
+
+@pytest.fixture
+def processor():
+    return BinanceProcessor()
+
+def test_wal_mode_single_file(cache):
+    cache.save_to_cache({"price": "1"}, "btc_market", "market")
+    assert (cache.base_dir / DATABASE_FILENAME).exists()
+    assert cache.store.conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+def test_raw_roundtrip(cache):
+    raw = {"symbol": "BTCUSDT", "lastPrice": "50000.00", "nested": {"a": [1, 2]}}
+    cache.save_to_cache(raw, "btcusdt_market", "market", timestamp=1000)
+    
+    loaded = cache.load_from_cache("btcusdt_market", "market")
+    assert loaded['data'] == raw
+    assert loaded['metadata']['timestamp'] == 1000
+    assert loaded['metadata']['filename'] == "btcusdt_market"
+    assert loaded['metadata']['is_processed'] is False
+
+def test_processed_records_use_typed_tables(cache, processor):
+    market = processor.process_market_data(
+        {"lastPrice": "50000.00", "volume": "10", "count": "5", "closeTime": 1645084800000},
+        "BTCUSDT", "spot")
+    orderbook = processor.process_orderbook_data(
+        {"lastUpdateId": 7, "bids": [["1.0", "2.0"]], "asks": [["1.1", "3.0"]], "time": 1645084800000},
+        "BTCUSDT", "spot")
+    trades = [
+        processor.process_trade_data(
+            {"id": i, "price": "50000.00", "qty": "0.1", "time": 1645084800000 + i, "isBuyerMaker": i % 2},
+            "BTCUSDT", "spot")
+        for i in range(3)
+    ]
+    
+    cache.save_to_cache(market, "btcusdt_market", "market", is_processed=True)
+    cache.save_to_cache(orderbook, "btcusdt_orderbook", "orderbook", is_processed=True)
+    cache.save_to_cache(trades, "btcusdt_trades", "trade", is_processed=True)
+    
+    assert cache.load_from_cache("btcusdt_market", "market", is_processed=True)['data'] == market
+    assert cache.load_from_cache("btcusdt_orderbook", "orderbook", is_processed=True)['data'] == orderbook
+    assert cache.load_from_cache("btcusdt_trades", "trade", is_processed=True)['data'] == trades
+    
+    conn = cache.store.conn
+    assert conn.execute("SELECT COUNT(*) FROM processed_trade WHERE symbol = 'BTCUSDT'").fetchone()[0] == 3
+    assert conn.execute("SELECT price FROM processed_market").fetchone()[0] == 50000.0
+    assert conn.execute("SELECT payload FROM records WHERE processed = 1").fetchall() == [(None,)] * 3
+
+def test_time_range_and_latest(cache):
+    current_time = int(time.time() * 1000)
+    for i in range(3):
+        cache.save_to_cache({"version": i}, "time_test", "market",
+                            timestamp=current_time - (i * 3600 * 1000))
+    
+    loaded = cache.load_from_cache("time_test", "market", n_latest=10,
+                                   time_range=(current_time - 5400000, current_time))
+    assert [entry['data']['version'] for entry in loaded] == [0, 1]
+    assert cache.load_from_cache("time_*", "market")['data']['version'] == 0
+
+def test_batch_is_one_transaction(cache):
+    with cache.batch():
+        for i in range(10):
+            cache.save_to_cache({"i": i}, "batched", "market", timestamp=i)
+        # Not yet visible to other connections
+        other = sqlite3.connect(str(cache.base_dir / DATABASE_FILENAME))
+        assert other.execute("SELECT COUNT(*) FROM records").fetchone()[0] == 0
+        # But visible to the writer
+        assert cache.load_from_cache("batched", "market")['data']['i'] == 9
+    assert other.execute("SELECT COUNT(*) FROM records").fetchone()[0] == 10
+    other.close()
+
+def test_symbol_data_committed_per_symbol(cache, processor):
+    from config.settings import DataType, MarketType
+    from main import cache_symbol_data
+    ticker = {"lastPrice": "50000.0", "closeTime": 1645084800000}
+    other = sqlite3.connect(str(cache.base_dir / DATABASE_FILENAME))
+    for count, symbol in enumerate(["BTCUSDT", "ETHUSDT"], start=1):
+        cache_symbol_data(processor, cache, symbol, MarketType.SPOT, {DataType.MARKET: ticker})
+        # Each symbol is committed on its own, with no transaction left open
+        assert other.execute("SELECT COUNT(*) FROM processed_market").fetchone()[0] == count
+        assert not cache.store.conn.in_transaction
+    other.close()
+
+def test_clear_old_cache_cascades(cache):
+    current_time = int(time.time() * 1000)
+    old_trades = [{"symbol": "BTCUSDT", "type": "spot", "price": 1.0, "quantity": 1.0,
+                   "timestamp": 1, "isBuyerMaker": False, "tradeId": 1}]
+    cache.save_to_cache(old_trades, "btc_trades", "trade", is_processed=True,
+                        timestamp=current_time - (25 * 3600 * 1000))
+    cache.save_to_cache({"data": "recent"}, "recent_data", "market")
+    
+    cache.clear_old_cache(max_age_hours=24)
+    
+    assert cache.load_from_cache("btc_trades", "trade", is_processed=True) is None
+    assert cache.store.conn.execute("SELECT COUNT(*) FROM processed_trade").fetchone()[0] == 0
+    assert cache.get_cache_info()['market']['raw'] == 1
+    assert cache.get_cache_info()['trade']['processed'] == 0
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import time
+import pytest
+from scripts.base.base_fetcher import BaseFetcher
+from scripts.base.rate_limiter import RateLimiter
+from scripts.base.retry_policy import CircuitBreaker, RetryPolicy
+from scripts.base.transport import HttpTransport
+from scripts.binance.fetcher import BinanceFetcher
+from scripts.binance.stand_in_server import StandInExchange, StandInServer, record_fixtures
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def server():
+    with StandInServer(stream_port=None) as server:
+        yield server
+
+def plain_fetcher(url, **kwargs):
+    kwargs.setdefault('rate_limit', 0)
+    return BaseFetcher(url, coalesce=False, transport=HttpTransport(),
+                       retry_policy=RetryPolicy(rand=lambda: 0),
+                       circuit_breaker=CircuitBreaker('stand-in'), **kwargs)
+
+def test_binance_fetcher_against_stand_in(server):
+    fetcher = BinanceFetcher({'base_url': server.base_url, 'rate_limit': 0},
+                             {'base_url': server.base_url, 'rate_limit': 0})
+
+    book = fetcher.fetch_orderbook('BTCUSDT', limit=20)
+    assert len(book['bids']) == len(book['asks']) == 20
+    assert float(book['bids'][0][0]) < float(book['asks'][0][0])
+
+    trades = fetcher.fetch_agg_trades('ETHUSDT', limit=10)
+    page = fetcher.fetch_agg_trades('ETHUSDT', limit=10, from_id=trades[0]['a'])
+    assert [t['a'] for t in page] == [t['a'] for t in trades]
+
+    klines = fetcher.fetch_klines('SOLUSDT', '1m', start_time=0, end_time=10 * 60_000 - 1)
+    assert [row[0] for row in klines] == [n * 60_000 for n in range(10)]
+
+    tickers = fetcher.fetch_market_data_batch(['BTCUSDT', 'ETHUSDT'])
+    assert set(tickers) == {'BTCUSDT', 'ETHUSDT'}
+    assert tickers['BTCUSDT']['bidPrice'] < tickers['BTCUSDT']['askPrice']
+
+    futures = fetcher.fetch_market_data('BTCUSDT', market_type='futures')
+    assert futures['markPrice'] and futures['openInterest']
+
+    assert fetcher.fetch_orderbook('NOPEUSDT') is None
+    assert server.exchange.statuses[400] == 1
+
+def test_weight_headers_resync_limiter():
+    clock = FakeClock()
+    exchange = StandInExchange(clock=clock)
+    for _ in range(3):
+        response = exchange.handle('GET', '/api/v3/depth', {'symbol': 'BTCUSDT', 'limit': '100'})
+    assert response.headers['X-MBX-USED-WEIGHT-1M'] == '15'
+
+    limiter = RateLimiter(1200, clock=clock)
+    limiter.update_from_headers(response.headers)
+    assert limiter.weight.tokens == 1200 - 15
+
+    clock.now += 60    # The next minute starts a fresh budget
+    response = exchange.handle('GET', '/api/v3/time')
+    assert response.headers['X-MBX-USED-WEIGHT-1M'] == '1'
+
+def test_weight_limit_answers_429_then_bans():
+    clock = FakeClock(1_700_000_010.0)
+    exchange = StandInExchange(clock=clock, weight_limit=10, ban_after=1)
+    params = {'symbol': 'BTCUSDT'}
+    assert [exchange.handle('GET', '/api/v3/depth', params).status for _ in range(2)] == [200, 200]
+
+    throttled = exchange.handle('GET', '/api/v3/depth', params)
+    assert throttled.status == 429
+    assert throttled.headers['Retry-After'] == '30'   # Until the minute ends
+
+    banned = exchange.handle('GET', '/api/v3/depth', params)
+    assert banned.status == 418
+    clock.now += 60
+    assert exchange.handle('GET', '/api/v3/depth', params).status == 418
+    clock.now += 120
+    assert exchange.handle('GET', '/api/v3/depth', params).status == 200
+
+def test_injected_429_is_retried(server):
+    server.exchange.inject(429, count=2, path='/api/v3/time', retry_after=0)
+    fetcher = plain_fetcher(server.base_url)
+    assert 'serverTime' in fetcher.fetch_data('/api/v3/time', retry_delay=0.01)
+    assert server.exchange.statuses[429] == 2
+    assert server.exchange.requests['/api/v3/time'] == 3
+
+def test_latency(server):
+    server.exchange.latency = 0.05
+    fetcher = plain_fetcher(server.base_url)
+    started = time.monotonic()
+    fetcher.fetch_data('/api/v3/ping')
+    assert time.monotonic() - started >= 0.05
+
+def test_fixture_replay(server, tmp_path):
+    recorded = tmp_path / 'fixtures.json'
+    count = record_fixtures(plain_fetcher(server.base_url), [
+        ('/api/v3/depth', {'symbol': 'BTCUSDT', 'limit': 5}),
+        ('/api/v3/exchangeInfo', None),
+        ('/api/v3/depth', {'symbol': 'MISSING'}),
+    ], str(recorded))
+    assert count == 2
+
+    exchange = StandInExchange(fixtures=str(recorded), clock=FakeClock(0))
+    exchange.add_fixture('/api/v3/time', {'serverTime': 1})
+    exchange.add_fixture('/api/v3/time', {'serverTime': 2})
+    saved = {entry['path']: entry['body'] for entry in json.loads(recorded.read_text())['rest']}
+    with StandInServer(exchange, stream_port=None) as replay:
+        fetcher = plain_fetcher(replay.base_url)
+        # Recorded responses win over synthetic ones, replayed in order
+        assert fetcher.fetch_data('/api/v3/depth', {'symbol': 'BTCUSDT', 'limit': 5}) == \
+            saved['/api/v3/depth']
+        assert fetcher.fetch_data('/api/v3/exchangeInfo') == saved['/api/v3/exchangeInfo']
+        assert [fetcher.fetch_data('/api/v3/time')['serverTime'] for _ in range(3)] == [1, 2, 2]
+        # Requests without a recording fall back to synthetic data
+        assert len(fetcher.fetch_data('/api/v3/depth', {'symbol': 'ETHUSDT', 'limit': 3})['bids']) == 3
+
+def test_stream_collector_against_stand_in(tmp_path):
+    pytest.importorskip("aiohttp")
+    from scripts.binance.cache import BinanceCache
+    from scripts.binance.processor import BinanceProcessor
+    from scripts.binance.stream import BinanceStreamCollector
+
+    with StandInServer(stream_interval=0.05) as server:
+        cache = BinanceCache(str(tmp_path / "cache"))
+        collector = BinanceStreamCollector(['BTCUSDT'], BinanceProcessor(), cache,
+                                           stream_url=server.stream_url, flush_interval=0.2)
+        asyncio.run(collector.run(duration=1.0))
+        cache.close()
+
+    assert collector.events > 0
+    assert collector.gaps == []
@@ -0,0 +1,202 @@
+import asyncio
+import threading
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web
+
+from scripts.binance.cache import BinanceCache
+from scripts.binance.processor import BinanceProcessor
+from scripts.binance.stream import BinanceStreamCollector
+
+def agg_trade(symbol, trade_id, price='100.0'):
+    return {'stream': f"{symbol.lower()}@aggTrade",
+            'data': {'e': 'aggTrade', 'E': 1000 + trade_id, 's': symbol, 'a': trade_id,
+                     'p': price, 'q': '0.5', 'f': trade_id, 'l': trade_id,
+                     'T': 1000 + trade_id, 'm': True}}
+
+def depth_update(symbol, first_id, last_id):
+    return {'stream': f"{symbol.lower()}@depth@100ms",
+            'data': {'e': 'depthUpdate', 'E': 2000 + last_id, 's': symbol,
+                     'U': first_id, 'u': last_id,
+                     'b': [['99.0', '1.0']], 'a': [['101.0', '0.0']]}}
+
+def mini_ticker(symbol, close):
+    return {'stream': f"{symbol.lower()}@miniTicker",
+            'data': {'e': '24hrMiniTicker', 'E': 3000, 's': symbol, 'c': close,
+                     'o': '90.0', 'h': '110.0', 'l': '80.0', 'v': '1000', 'q': '100000'}}
+
+def run_with_stream_server(connections, scenario):
+    """Serve a scripted list of messages per connection on /stream
+
+    Each connection waits for a SUBSCRIBE request, records it, sends its
+    messages and closes. Later connections stay open once the script runs out.
+    """
+    async def main():
+        state = {'subscriptions': []}
+
+        async def stream(request):
+            ws = web.WebSocketResponse()
+            await ws.prepare(request)
+            subscribe = await ws.receive_json()
+            state['subscriptions'].append(subscribe['params'])
+            await ws.send_json({'result': None, 'id': subscribe['id']})
+            index = len(state['subscriptions']) - 1
+            if index < len(connections):
+                for message in connections[index]:
+                    await ws.send_json(message)
+                await ws.close()
+            else:
+                async for _ in ws:
+                    pass
+            return ws
+
+        app = web.Application()
+        app.router.add_get('/stream', stream)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            return await scenario(f"ws://127.0.0.1:{port}", state)
+        finally:
+            await runner.cleanup()
+    return asyncio.run(main())
+
+@pytest.fixture
+def cache(tmp_path):
+    return BinanceCache(directory=str(tmp_path))
+
+def test_stream_names():
+    collector = BinanceStreamCollector(['BTCUSDT'], BinanceProcessor(), None,
+                                       streams=('aggTrade', 'depth'))
+    assert collector.stream_names() == ['btcusdt@aggTrade', 'btcusdt@depth@100ms']
+    with pytest.raises(ValueError):
+        BinanceStreamCollector(['BTCUSDT'], BinanceProcessor(), None, streams=('kline',))
+
+def test_events_processed_and_cached(cache):
+    connections = [[
+        agg_trade('BTCUSDT', 1),
+        agg_trade('BTCUSDT', 2, price='101.0'),
+        depth_update('BTCUSDT', 1, 3),
+        mini_ticker('BTCUSDT', '105.0')
+    ]]
+
+    async def scenario(url, state):
+        collector = BinanceStreamCollector(['BTCUSDT'], BinanceProcessor(), cache,
+                                           stream_url=url, reconnect_delay=0.01)
+        await collector.run(duration=0.3)
+        return collector
+
+    collector = run_with_stream_server(connections, scenario)
+    assert collector.events == 4
+    assert collector.gaps == []
+
+    trades = cache.load_from_cache('btcusdt_trades', 'trade', is_processed=True)['data']
+    assert [trade['price'] for trade in trades] == [100.0, 101.0]
+    assert trades[0]['tradeId'] == 1 and trades[0]['isBuyerMaker'] is True
+
+    depth = cache.load_from_cache('btcusdt_depth', 'orderbook', is_processed=True)['data']
+    assert depth[0]['lastUpdateId'] == 3 and depth[0]['asks'] == [[101.0, 0.0]]
+
+    ticker = cache.load_from_cache('btcusdt_market', 'market', is_processed=True)['data']
+    assert ticker['price'] == 105.0 and ticker['priceChange24h'] == 15.0
+    raw_ticker = cache.load_from_cache('btcusdt_market', 'market', is_processed=False)['data']
+    assert raw_ticker['c'] == '105.0'
+
+def test_bad_message_skipped_and_flush_off_event_loop(cache):
+    connections = [[
+        {'stream': 'btcusdt@aggTrade', 'data': {'e': 'aggTrade', 's': 'BTCUSDT'}},
+        agg_trade('BTCUSDT', 1),
+    ]]
+    writer_threads = set()
+    save_to_cache = cache.save_to_cache
+
+    def recording_save(*args, **kwargs):
+        writer_threads.add(threading.get_ident())
+        save_to_cache(*args, **kwargs)
+
+    cache.save_to_cache = recording_save
+
+    async def scenario(url, state):
+        collector = BinanceStreamCollector(['BTCUSDT'], BinanceProcessor(), cache,
+                                           stream_url=url, reconnect_delay=0.01)
+        await collector.run(duration=0.3)
+        return collector
+
+    collector = run_with_stream_server(connections, scenario)
+    assert collector.bad_messages == 1
+    assert collector.events == 1
+    trades = cache.load_from_cache('btcusdt_trades', 'trade', is_processed=True)['data']
+    assert [trade['tradeId'] for trade in trades] == [1]
+    assert writer_threads and threading.get_ident() not in writer_threads
+
+def test_reconnects_resubscribes_and_detects_gaps(cache):
+    gaps = []
+    connections = [
+        [agg_trade('BTCUSDT', 1), depth_update('BTCUSDT', 1, 5)],
+        # Trade 2-3 and depth 6-9 were missed while disconnected; trade 1 is a replay
+        [agg_trade('BTCUSDT', 1), agg_trade('BTCUSDT', 4), depth_update('BTCUSDT', 10, 12)]
+    ]
+
+    async def scenario(url, state):
+        collector = BinanceStreamCollector(['BTCUSDT'], BinanceProcessor(), cache,
+                                           stream_url=url, streams=('aggTrade', 'depth'),
+                                           reconnect_delay=0.01, on_gap=gaps.append)
+        await collector.run(duration=0.5)
+        return collector, state['subscriptions']
+
+    collector, subscriptions = run_with_stream_server(connections, scenario)
+    assert collector.connects >= 3
+    assert all(params == ['btcusdt@aggTrade', 'btcusdt@depth@100ms'] for params in subscriptions)
+    assert collector.events == 4
+    assert [(gap['stream'], gap['expected'], gap['received']) for gap in gaps] == [
+        ('aggTrade', 2, 4), ('depth', 6, 10)
+    ]
+    assert collector.gaps == gaps
+
+def test_futures_depth_sequenced_by_previous_id():
+    collector = BinanceStreamCollector(['BTCUSDT'], BinanceProcessor(), None,
+                                       market_type='futures')
+    first = depth_update('BTCUSDT', 1, 5)
+    second = depth_update('BTCUSDT', 3, 8)
+    second['data']['pu'] = 5
+    third = depth_update('BTCUSDT', 12, 15)
+    third['data']['pu'] = 9
+
+    for message in (first, second, third):
+        collector.handle_message(message)
+    assert [(gap['expected'], gap['received']) for gap in collector.gaps] == [(9, 10)]
+
+class SnapshotFetcher:
+    def __init__(self, snapshots):
+        self.snapshots = snapshots
+        self.requests = []
+
+    async def fetch_orderbook(self, symbol, limit=100, market_type='spot'):
+        self.requests.append((symbol, limit, market_type))
+        return self.snapshots.pop(0)
+
+def test_local_order_book_synced_from_stream(cache):
+    fetcher = SnapshotFetcher([{'lastUpdateId': 4, 'bids': [['98.0', '2.0'], ['99.0', '1.0']],
+                                'asks': [['101.0', '1.0'], ['102.0', '2.0']]}])
+    connections = [[depth_update('BTCUSDT', 1, 5), depth_update('BTCUSDT', 6, 7)]]
+
+    async def scenario(url, state):
+        collector = BinanceStreamCollector(['BTCUSDT'], BinanceProcessor(), cache,
+                                           stream_url=url, streams=('depth',),
+                                           reconnect_delay=0.01, snapshot_fetcher=fetcher,
+                                           book_levels=1)
+        await collector.run(duration=0.3)
+        return collector
+
+    collector = run_with_stream_server(connections, scenario)
+    book = collector.order_books['BTCUSDT']
+    assert fetcher.requests == [('BTCUSDT', 1000, 'spot')]
+    assert book.synced and book.last_update_id == 7
+    assert book.best_ask() == (102.0, 2.0)
+
+    orderbook = cache.load_from_cache('btcusdt_orderbook', 'orderbook', is_processed=True)['data']
+    assert orderbook['bids'] == [[99.0, 1.0]] and orderbook['asks'] == [[102.0, 2.0]]
+    assert orderbook['lastUpdateId'] == 7
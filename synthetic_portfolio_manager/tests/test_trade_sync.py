@@ -0,0 +1,218 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import pytest
+from scripts.base.columnar_store import ColumnarStore
+from scripts.binance.cache import BinanceCache
+from scripts.binance.fetcher import BinanceFetcher
+from scripts.binance.processor import BinanceProcessor
+from scripts.binance.trade_sync import TradeSync, gap_page_ids, stitch_pages
+
+SPOT = {'base_url': 'https://spot.example.com', 'rate_limit': 0}
+
+def agg_trade(trade_id):
+    return {'a': trade_id, 'p': '100.0', 'q': '0.1', 'f': trade_id, 'l': trade_id,
+            'T': trade_id * 1000, 'm': False}
+
+class FakeTape:
+    """Stand-in for BaseFetcher.fetch_data serving aggTrades 1..last_id"""
+    def __init__(self, last_id, fail_from_ids=()):
+        self.last_id = last_id
+        self.fail_from_ids = set(fail_from_ids)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, endpoint, params=None, **kwargs):
+        assert endpoint == '/api/v3/aggTrades'
+        with self.lock:
+            self.calls.append(dict(params))
+        limit = params['limit']
+        if 'fromId' in params:
+            if params['fromId'] in self.fail_from_ids:
+                return None
+            start = params['fromId']
+        elif 'startTime' in params:
+            start = max(1, -(-params['startTime'] // 1000))
+        else:
+            start = max(1, self.last_id - limit + 1)
+        return [agg_trade(i) for i in range(start, min(start + limit, self.last_id + 1))]
+
+@pytest.fixture
+def cache(tmp_path):
+    return BinanceCache(directory=str(tmp_path))
+
+def make_sync(cache, tape, **kwargs):
+    fetcher = BinanceFetcher(SPOT)
+    fetcher.spot_fetcher.fetch_data = tape
+    return TradeSync(fetcher, BinanceProcessor(), cache, page_size=10, **kwargs)
+
+def stored_ids(cache):
+    entries = cache.load_from_cache('btcusdt_trades', 'trade', is_processed=True, n_latest=100)
+    if isinstance(entries, dict):
+        entries = [entries]
+    return sorted(trade['tradeId'] for entry in entries or [] for trade in entry['data'])
+
+def test_gap_page_ids():
+    assert gap_page_ids(11, 45, page_size=10) == [11, 21, 31, 41]
+    assert gap_page_ids(11, 45, page_size=10, max_pages=2) == [11, 21]
+    assert gap_page_ids(11, 11, page_size=10) == []
+
+def test_stitch_stops_at_missing_page():
+    pages = [(1, [agg_trade(i) for i in range(1, 4)]),
+             (4, None),
+             (7, [agg_trade(i) for i in range(7, 9)])]
+    assert [t['a'] for t in stitch_pages(0, pages)] == [1, 2, 3]
+    # Overlap is stored once
+    pages = [(3, [agg_trade(i) for i in range(3, 6)]), (1, [agg_trade(i) for i in range(1, 5)])]
+    assert [t['a'] for t in stitch_pages(0, pages)] == [1, 2, 3, 4, 5]
+
+def test_incremental_sync_stores_each_trade_once(cache):
+    tape = FakeTape(25)
+    sync = make_sync(cache, tape)
+
+    # Bootstrap from the latest page
+    assert sync.sync('BTCUSDT') == 10
+    assert sync.cursors.get('BTCUSDT') == 25
+
+    # Nothing new: one request, nothing stored
+    tape.calls.clear()
+    assert sync.sync('BTCUSDT') == 0
+    assert tape.calls == [{'symbol': 'BTCUSDT', 'limit': 10, 'fromId': 26}]
+
+    tape.last_id = 29
+    assert sync.sync('BTCUSDT') == 4
+    assert stored_ids(cache) == list(range(16, 30))
+
+def test_backlog_paged_in_parallel(cache):
+    tape = FakeTape(20)
+    sync = make_sync(cache, tape)
+    sync.sync('BTCUSDT')
+
+    tape.last_id = 95
+    tape.calls.clear()
+    assert sync.sync('BTCUSDT') == 75
+    from_ids = sorted(call['fromId'] for call in tape.calls if 'fromId' in call)
+    # First page, then gap pages up to the latest page (86-95)
+    assert from_ids == [21, 31, 41, 51, 61, 71, 81]
+    assert stored_ids(cache) == list(range(11, 96))
+    assert sync.cursors.get('BTCUSDT') == 95
+
+def test_failed_page_leaves_no_hole(cache):
+    tape = FakeTape(20)
+    sync = make_sync(cache, tape)
+    sync.sync('BTCUSDT')
+
+    tape.last_id = 80
+    tape.fail_from_ids = {41}
+    assert sync.sync('BTCUSDT') == 20
+    assert sync.cursors.get('BTCUSDT') == 40
+
+    tape.fail_from_ids = set()
+    assert sync.sync('BTCUSDT') == 40
+    assert stored_ids(cache) == list(range(11, 81))
+
+def test_cursor_persisted_and_start_time_bootstrap(cache, tmp_path):
+    tape = FakeTape(50)
+    sync = make_sync(cache, tape, start_time=31000)
+    assert sync.sync('BTCUSDT') == 20
+    assert stored_ids(cache) == list(range(31, 51))
+
+    with open(tmp_path / 'trade_cursors.json') as f:
+        assert json.load(f) == {'spot:BTCUSDT': 50}
+    reloaded = make_sync(cache, tape)
+    assert reloaded.cursors.get('BTCUSDT') == 50
+    assert reloaded.sync('BTCUSDT') == 0
+
+def test_async_fetch_matches_sync(cache):
+    tape = FakeTape(95)
+
+    class AsyncTape:
+        async def fetch_agg_trades(self, symbol, limit=1000, from_id=None, start_time=None,
+                                   end_time=None, market_type='spot'):
+            params = {'symbol': symbol, 'limit': limit}
+            if from_id is not None:
+                params['fromId'] = from_id
+            return tape('/api/v3/aggTrades', params)
+
+    sync = TradeSync(AsyncTape(), BinanceProcessor(), cache, page_size=10)
+    sync.cursors.set('BTCUSDT', 'spot', 20)
+    trades = asyncio.run(sync.fetch_new_trades_async('BTCUSDT'))
+    assert [t['a'] for t in trades] == list(range(21, 96))
+    assert sync.store('BTCUSDT', 'spot', trades) == 75
+    assert sync.store('BTCUSDT', 'spot', trades) == 0
+
+def test_cursor_persisted_after_queued_writes_are_durable(tmp_path):
+    cache = BinanceCache(directory=str(tmp_path / 'cache'), write_behind=True)
+    columnar = ColumnarStore(str(tmp_path / 'parquet'), flush_rows=10**6)
+    write_batch = cache.writer.write_batch
+
+    def slow_write_batch(items):
+        time.sleep(0.05)
+        write_batch(items)
+
+    cache.writer.write_batch = slow_write_batch
+    sync = make_sync(cache, FakeTape(30), columnar=columnar, start_time=1000)
+    seen = []
+    set_cursor = sync.cursors.set
+
+    def checked_set(symbol, market_type, trade_id):
+        seen.append((cache.writer.queue.unfinished_tasks, columnar._buffered_rows,
+                     len(columnar.read('trades'))))
+        set_cursor(symbol, market_type, trade_id)
+
+    sync.cursors.set = checked_set
+    assert sync.sync('BTCUSDT') == 30
+    assert seen == [(0, 0, 30)]
+    assert stored_ids(cache) == list(range(1, 31))
+    cache.close()
+
+@pytest.mark.parametrize('storage', ['files', 'segments'])
+def test_trades_fsynced_before_cursor_without_write_behind(tmp_path, monkeypatch, storage):
+    cache = BinanceCache(directory=str(tmp_path / 'cache'), storage=storage)
+    columnar = ColumnarStore(str(tmp_path / 'parquet'), flush_rows=10**6)
+    sync = make_sync(cache, FakeTape(30), columnar=columnar, start_time=1000,
+                     cursor_path=str(tmp_path / 'trade_cursors.json'))
+    synced = []
+    fsync = os.fsync
+
+    def recording_fsync(fd):
+        synced.append(os.readlink(f'/proc/self/fd/{fd}'))
+        fsync(fd)
+
+    monkeypatch.setattr(os, 'fsync', recording_fsync)
+    assert sync.sync('BTCUSDT') == 30
+    cursor = next(i for i, path in enumerate(synced) if 'trade_cursors' in path)
+    before = synced[:cursor]
+    assert any(path.startswith(str(tmp_path / 'cache' / 'trade')) for path in before)
+    assert any(path.endswith('.parquet') for path in before)
+    assert str(tmp_path / 'parquet' / 'trades') in before
+
+def test_sqlite_checkpointed_before_cursor(tmp_path):
+    cache = BinanceCache(directory=str(tmp_path), storage='sqlite')
+    sync = make_sync(cache, FakeTape(30))
+    events = []
+    store_sync = cache.store.sync_durable
+    set_cursor = sync.cursors.set
+    cache.store.sync_durable = lambda: (events.append('checkpoint'), store_sync())
+    sync.cursors.set = lambda *args: (events.append('cursor'), set_cursor(*args))
+    assert sync.sync('BTCUSDT') == 10
+    assert events == ['checkpoint', 'cursor']
+
+    with cache.batch():
+        with pytest.raises(RuntimeError):
+            cache.sync_durable()
+
+def test_dropped_writes_leave_cursor_in_place(tmp_path):
+    cache = BinanceCache(directory=str(tmp_path), write_behind=True)
+
+    def failing_write_batch(items):
+        raise OSError("disk full")
+
+    cache.writer.write_batch = failing_write_batch
+    sync = make_sync(cache, FakeTape(30))
+    assert sync.sync('BTCUSDT') == 0
+    assert sync.cursors.get('BTCUSDT') is None
+    assert not (tmp_path / 'trade_cursors.json').exists()
+    cache.close()
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import threading
+import time
+import pytest
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock, patch
+from scripts.base.base_fetcher import BaseFetcher
+from scripts.base.transport import HttpTransport
+from scripts.binance.fetcher import BinanceFetcher
+
+class CountingHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # Keep connections open between requests
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        if self.path.startswith('/slow'):
+            time.sleep(1)
+        body = json.dumps({'path': self.path,
+                           'key': self.headers.get('X-MBX-APIKEY')}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), CountingHandler)
+    server.connections = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def plain_fetcher(url, transport, **kwargs):
+    return BaseFetcher(url, rate_limit=0, coalesce=False, fail_fast=False,
+                       transport=transport, **kwargs)
+
+def test_fetchers_reuse_pooled_connections(server):
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    transport = HttpTransport()
+    spot = plain_fetcher(url, transport)
+    futures = plain_fetcher(url, transport, api_key='key')
+
+    for i in range(10):
+        assert spot.fetch_data(f'/api/v3/time?n={i}')['key'] is None
+        assert futures.fetch_data('/fapi/v1/time')['key'] == 'key'
+
+    # Twenty requests from two fetchers, one TCP connection
+    assert server.connections == 1
+    transport.close()
+
+def test_read_timeout(server):
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    transport = HttpTransport(read_timeout=0.1)
+    fetcher = plain_fetcher(url, transport)
+    started = time.monotonic()
+    with pytest.raises(requests.exceptions.Timeout):
+        fetcher.fetch_data('/slow', retry_count=1)
+    assert time.monotonic() - started < 1
+    transport.close()
+
+def test_pool_sizes_per_host():
+    transport = HttpTransport(pool_size=4, pool_sizes={'fapi.example.com': 16},
+                              connect_timeout=1, read_timeout=5)
+    transport.mount('https://api.example.com/api')
+    transport.mount('https://fapi.example.com')
+    assert transport.session.get_adapter('https://api.example.com/x')._pool_maxsize == 4
+    assert transport.session.get_adapter('https://fapi.example.com/x')._pool_maxsize == 16
+
+    response = Mock()
+    response.json.return_value = {}
+    with patch('requests.Session.request', return_value=response) as request:
+        transport.request('GET', 'https://api.example.com/x')
+    assert request.call_args.kwargs['timeout'] == (1, 5)
+
+def test_binance_fetcher_shares_transport():
+    fetcher = BinanceFetcher({'base_url': 'https://api.example.com'},
+                             {'base_url': 'https://fapi.example.com'})
+    assert fetcher.spot_fetcher.transport is fetcher.futures_fetcher.transport
+
+def test_async_fetchers_share_session():
+    pytest.importorskip("aiohttp")
+    from scripts.binance.async_fetcher import AsyncBinanceFetcher
+
+    async def scenario():
+        async with AsyncBinanceFetcher({'base_url': 'https://api.example.com'},
+                                       {'base_url': 'https://fapi.example.com'}) as fetcher:
+            session = fetcher.spot_fetcher.transport.session
+            assert fetcher.futures_fetcher.transport.session is session
+        return session.closed
+
+    assert asyncio.run(scenario())
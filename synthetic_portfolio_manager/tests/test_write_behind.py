@@ -0,0 +1,141 @@
+import pytest
+import threading
+import time
+from scripts.base.base_cache import BaseCache
+from scripts.base.write_behind import WriteBehindWriter
+
+def test_submit_does_not_wait_for_slow_writes():
+    written = []
+    def slow_write(items):
+        time.sleep(0.05)
+        written.extend(items)
+    
+    writer = WriteBehindWriter(slow_write, lambda: None)
+    start = time.monotonic()
+    for i in range(10):
+        writer.submit(i)
+    assert time.monotonic() - start < 0.05
+    
+    writer.close()
+    assert written == list(range(10))
+
+def test_writes_are_grouped_and_synced():
+    batches = []
+    syncs = []
+    release = threading.Event()
+    def write(items):
+        release.wait()
+        batches.append(list(items))
+    
+    writer = WriteBehindWriter(write, lambda: syncs.append(True), fsync_interval=60)
+    for i in range(20):
+        writer.submit(i)
+    release.set()
+    writer.close()
+    
+    assert sum(len(batch) for batch in batches) == 20
+    assert len(batches) < 20
+    assert syncs  # final sync on shutdown
+
+def test_full_queue_applies_backpressure():
+    release = threading.Event()
+    writer = WriteBehindWriter(lambda items: release.wait(), lambda: None, max_queue=1, batch_size=1)
+    writer.submit(0)  # picked up by the writer thread, which then blocks
+    time.sleep(0.05)
+    writer.submit(1)  # fills the queue
+    
+    blocked = threading.Thread(target=writer.submit, args=(2,))
+    blocked.start()
+    blocked.join(timeout=0.1)
+    assert blocked.is_alive()
+    
+    release.set()
+    blocked.join(timeout=1)
+    assert not blocked.is_alive()
+    writer.close()
+
+def test_submit_after_close_fails():
+    writer = WriteBehindWriter(lambda items: None, lambda: None)
+    writer.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        writer.submit(1)
+
+@pytest.mark.parametrize("storage", ['files', 'segments', 'sqlite'])
+def test_cache_reads_see_queued_writes(tmp_path, storage):
+    cache = BaseCache(str(tmp_path), storage=storage, write_behind=True, fsync_interval=0.01)
+    with cache.batch():
+        for i in range(25):
+            cache.save_to_cache({"i": i}, "btcusdt_trades", "trade", timestamp=i)
+    
+    assert cache.load_from_cache("btcusdt_trades", "trade")['data']['i'] == 24
+    assert cache.get_cache_info()['trade']['raw'] == 25
+    cache.close()
+    
+    reopened = BaseCache(str(tmp_path), storage=storage)
+    assert reopened.get_cache_info()['trade']['raw'] == 25
+    reopened.close()
+
+def test_reads_do_not_force_a_sync(tmp_path):
+    cache = BaseCache(str(tmp_path), write_behind=True, fsync_interval=3600)
+    syncs = []
+    sync = cache.sync
+    cache.sync = cache.writer.sync = lambda: (syncs.append(1), sync())
+    for i in range(5):
+        cache.save_to_cache({"i": i}, "btcusdt_trades", "trade", timestamp=i)
+        assert cache.load_from_cache("btcusdt_trades", "trade")['data']['i'] == i
+    assert syncs == []
+    cache.close()
+    assert syncs == [1]
+
+def test_failed_batch_is_retried_one_at_a_time():
+    written = []
+    def write(items):
+        if 3 in items:
+            raise ValueError("bad entry")
+        written.extend(items)
+    
+    writer = WriteBehindWriter(write, lambda: None)
+    for i in range(10):
+        writer.submit(i)
+    writer.close()
+    
+    assert sorted(written) == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+    assert writer.failed == 1
+    assert str(writer.last_error) == "bad entry"
+
+def test_partial_batch_resumes_after_written_prefix():
+    from scripts.base.write_behind import BatchWriteError
+    calls = []
+    started, release = threading.Event(), threading.Event()
+    def write(items):
+        if items == ['block']:
+            started.set()
+            release.wait()
+            return
+        calls.append(list(items))
+        if len(items) > 1:
+            raise BatchWriteError(2, OSError("disk full"))
+    
+    writer = WriteBehindWriter(write, lambda: None)
+    writer.submit('block')
+    started.wait()
+    for i in range(5):
+        writer.submit(i)   # Queued behind the blocked write, so taken as one batch
+    release.set()
+    writer.close()
+    
+    # Items 0 and 1 were written by the failed batch and are not repeated
+    assert calls == [[0, 1, 2, 3, 4], [2], [3], [4]]
+    assert writer.failed == 0
+
+@pytest.mark.parametrize("storage", ['files', 'segments', 'sqlite'])
+def test_bad_entry_does_not_discard_batch(tmp_path, storage):
+    cache = BaseCache(str(tmp_path), storage=storage, write_behind=True)
+    for i in range(10):
+        data = object() if i == 3 else {"i": i}   # Not JSON serializable
+        cache.save_to_cache(data, "btcusdt_market", "market", timestamp=i)
+    cache.flush()
+    
+    assert cache.write_failures == 1
+    assert cache.get_cache_info()['market']['raw'] == 9
+    cache.close()